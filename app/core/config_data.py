@@ -1,6 +1,6 @@
 # app/config_data.py
 from app.utils.hist import (
-    historical_rpc, historical_cmgr, historical_lucratividade, historical_ebitda,
+    historical_cmgr, historical_lucratividade, historical_ebitda,
     historical_gmv, historical_ticket, historical_nps_artistas, historical_nps_equipe,
     historical_roll6m, historical_estabilidade, historical_nrr, historical_perdas_operacionais,
     historical_churn, historical_inadimplencia, historical_turnover, historical_perfis_completos,
@@ -14,115 +14,532 @@ from app.utils.hist import (
     historical_num_shows, historical_custos_totais, historical_lucro_liquido,
     historical_faturamento_eshows, historical_num_colaboradores, historical_tempo_medio_casa,
     historical_receita_por_colaborador, historical_custo_medio_colaborador,
-    historical_artistas_ativos
+    historical_artistas_ativos, mes_para_data
 )
 import gc
-import pandas as pd # Adicionado para pd.Timestamp em alguns históricos
 import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from app.data import registry, shared_cache
+from app.data.data_manager import CACHE_RAM
+from app.data.modulobase import (
+    carregar_base_eshows,
+    carregar_base2,
+    carregar_pessoas,
+    carregar_base_inad,
+    carregar_ocorrencias,
+    carregar_casas_earliest_latest,
+)
+from app.data.scheduler import on_refresh
+from app.utils.fact_cube import cubo_mensal
 
 logger = logging.getLogger(__name__)
 
-logger.debug("[config_data.py] Calculando todos os históricos para HIST_KPI_MAP...")
-
-rpc_historico = historical_rpc(months=12)
-cmgr_historico = historical_cmgr(months=12)
-lucratividade_historico = historical_lucratividade(months=12)
-ebitda_historico = historical_ebitda(months=12)
-gmv_historico = historical_gmv(months=12)
-ticket_historico = historical_ticket(months=12)
-nps_artistas_historico = historical_nps_artistas(months=12)
-nps_equipe_historico = historical_nps_equipe(months=12)
-roll6m_historico = historical_roll6m(months=12)
-estabilidade_historico = historical_estabilidade(months=12)
-nrr_historico = historical_nrr(months=12)
-perdas_historico = historical_perdas_operacionais(months=12)
-churn_historico = historical_churn(months=12, dias_sem_show=45)
-inadimplencia_historico = historical_inadimplencia(months=12)
-turnover_historico = historical_turnover(months=12)
-perfis_completos_historico = historical_perfis_completos(months=12)
-autonomia_usuario_historico = historical_autonomia_usuario(months=12)
-sucesso_implantacao_historico = historical_sucesso_implantacao(months=12)
-conformidade_juridica_historico = historical_conformidade_juridica(months=12)
-eficiencia_atendimento_historico = historical_eficiencia_atendimento(months=12)
-nivel_servico_historico = historical_nivel_servico(months=12)
-resultado_take_rate = historical_take_rate(months=12)
-resultado_crescimento = historical_crescimento_sustentavel(months=12)
-resultado_inadimplencia_real = historical_inadimplencia_real(months=12)
-resultado_palcos_vazios = historical_palcos_vazios(months=12)
-palcos_ativos_historico = historical_palcos_ativos(months=12)
-ocorrencias_historico = historical_ocorrencias(months=12)
-erros_operacionais_historico = historical_erros_operacionais(months=12)
-cidades_historico = historical_cidades(months=12)
-novos_palcos_historico = historical_novos_palcos(months=12)
-lifetime_novos_historico = historical_lifetime_novos_palcos(months=12)
-fat_novos_historico = historical_fat_novos_palcos(months=12)
-churn_novos_historico = historical_churn_novos_palcos(months=12, dias_sem_show=45)
-fat_ka_historico = historical_fat_ka(months=12)
-novos_palcos_ka_historico = historical_novos_palcos_ka(months=12)
-take_rate_ka_historico = historical_take_rate_ka(months=12)
-churn_ka_historico = historical_churn_ka(months=12)
-num_shows_hist = historical_num_shows(months=12)
-custos_totais_hist = historical_custos_totais(months=12)
-lucro_liquido_hist = historical_lucro_liquido(months=12)
-faturamento_eshows_hist = historical_faturamento_eshows(months=12)
-num_colab_historico = historical_num_colaboradores(months=12)
-tempo_medio_casa_historico = historical_tempo_medio_casa(months=12)
-rpc_historico_pessoas = historical_receita_por_colaborador(months=12)
-custo_medio_colab_historico = historical_custo_medio_colaborador(months=12)
-artistas_ativos_historico = historical_artistas_ativos(months=12)
-
-gc.collect()
-logger.debug("[config_data.py] Coleta de lixo executada após cálculos históricos.")
-
-HIST_KPI_MAP = {
-    "GMV": gmv_historico,
-    "Número de Shows": num_shows_hist,
-    "Ticket Médio": ticket_historico,
-    "Número de Cidades": cidades_historico,
-    "Faturamento Eshows": faturamento_eshows_hist,
-    "Take Rate GMV": resultado_take_rate,
-    "Custos Totais": custos_totais_hist,
-    "Lucro Líquido": lucro_liquido_hist,
-    "Novos Palcos": novos_palcos_historico,
-    "Fat. Novos Palcos": fat_novos_historico,
-    "Life Time Médio": lifetime_novos_historico,
-    "Churn de Novos Palcos": churn_novos_historico,
-    "Faturamento KA": fat_ka_historico,
-    "Novos Palcos KA": novos_palcos_ka_historico,
-    "Take Rate KA": take_rate_ka_historico,
-    "Churn KA": churn_ka_historico,
-    "Palcos Ativos": palcos_ativos_historico,
-    "Ocorrências": ocorrencias_historico,
-    "Palcos Vazios": resultado_palcos_vazios,
-    "Erros Operacionais": erros_operacionais_historico,
-    "Artistas Ativos": artistas_ativos_historico,
-    "Nº de Colaboradores": num_colab_historico,
-    "Tempo Médio de Casa": tempo_medio_casa_historico,
-    "Receita por Colaborador": rpc_historico_pessoas,
-    "Custo Médio do Colaborador": custo_medio_colab_historico,
-    "CMGR": cmgr_historico,
-    "Lucratividade": lucratividade_historico,
-    "EBITDA": ebitda_historico,
-    "Roll 6M Growth": roll6m_historico,
-    "Estabilidade": estabilidade_historico,
-    "Net Revenue Retention": nrr_historico,
-    "Perdas Operacionais": perdas_historico,
-    "Churn %": churn_historico,
-    "Inadimplência": inadimplencia_historico,
-    "Turn Over": turnover_historico,
-    "Perfis Completos": perfis_completos_historico,
-    "Autonomia do Usuário": autonomia_usuario_historico,
-    "Sucesso da Implantação": sucesso_implantacao_historico,
-    "Conformidade Jurídica": conformidade_juridica_historico,
-    "Eficiência de Atendimento": eficiencia_atendimento_historico,
-    "Nível de Serviço": nivel_servico_historico,
-    "Inadimplência Real": resultado_inadimplencia_real,
-    "Crescimento Sustentável": resultado_crescimento,
-    "NPS Artistas": nps_artistas_historico,
-    "NPS Equipe": nps_equipe_historico
+# threads do warm-up/refresh (1 = sequencial)
+HIST_WORKERS = max(1, int(os.getenv("HIST_WORKERS", "4")))
+# séries (kpi, months) mantidas em memória
+HIST_CACHE_SIZE = max(1, int(os.getenv("HIST_CACHE_SIZE", "64")))
+
+# ────────────────────  entradas dos históricos  ─────────────────────────
+# Nome da entrada → (loader, dataset no registry). Todos passam pelo registry, então carregar a
+# mesma entrada em duas threads só espera pela primeira carga.
+HIST_INPUTS = {
+    "eshows": (carregar_base_eshows, "eshows"),
+    "cubo": (cubo_mensal, "cubo_mensal"),
+    "casas": (carregar_casas_earliest_latest, "casas_first_last"),
+    "base2": (carregar_base2, "base2"),
+    "pessoas": (carregar_pessoas, "pessoas"),
+    "inad": (carregar_base_inad, "inadimplencia"),
+    "ocorrencias": (carregar_ocorrencias, "ocorrencias"),
+}
+_E, _C, _B2, _P, _OC = ("eshows",), ("cubo",), ("base2",), ("pessoas",), ("ocorrencias",)
+
+# ────────────────────  especificação dos históricos  ────────────────────
+# Nome exibido → (função, kwargs, entradas). Nada é calculado no import:
+# cada série é computada no primeiro acesso (ver LazyHistMap).
+HIST_MONTHS = 12
+# janelas oferecidas no gráfico de evolução (0 = histórico completo)
+HIST_JANELAS = (12, 24, 36, 0)
+
+HIST_SPECS = {
+    "GMV": (historical_gmv, {}, _C),
+    "Número de Shows": (historical_num_shows, {}, _C),
+    "Ticket Médio": (historical_ticket, {}, _C),
+    "Número de Cidades": (historical_cidades, {}, _C),
+    "Faturamento Eshows": (historical_faturamento_eshows, {}, _C),
+    "Take Rate GMV": (historical_take_rate, {}, _C),
+    "Custos Totais": (historical_custos_totais, {}, _B2),
+    "Lucro Líquido": (historical_lucro_liquido, {}, _C + _B2),
+    "Novos Palcos": (historical_novos_palcos, {}, _E),
+    "Fat. Novos Palcos": (historical_fat_novos_palcos, {}, _E),
+    "Life Time Médio": (historical_lifetime_novos_palcos, {}, _E),
+    "Churn de Novos Palcos": (historical_churn_novos_palcos, {"dias_sem_show": 45}, _E + ("casas",)),
+    "Faturamento KA": (historical_fat_ka, {}, _E),
+    "Novos Palcos KA": (historical_novos_palcos_ka, {}, _E),
+    "Take Rate KA": (historical_take_rate_ka, {}, _E),
+    "Churn KA": (historical_churn_ka, {}, _E),
+    "Palcos Ativos": (historical_palcos_ativos, {}, _C),
+    "Ocorrências": (historical_ocorrencias, {}, _OC),
+    "Palcos Vazios": (historical_palcos_vazios, {}, _OC),
+    "Erros Operacionais": (historical_erros_operacionais, {}, _B2),
+    "Artistas Ativos": (historical_artistas_ativos, {}, _C),
+    "Nº de Colaboradores": (historical_num_colaboradores, {}, _P),
+    "Tempo Médio de Casa": (historical_tempo_medio_casa, {}, _P),
+    "Receita por Colaborador": (historical_receita_por_colaborador, {}, _C + _P),
+    "Custo Médio do Colaborador": (historical_custo_medio_colaborador, {}, _B2 + _P),
+    "CMGR": (historical_cmgr, {}, _C),
+    "Lucratividade": (historical_lucratividade, {}, _C + _B2),
+    "EBITDA": (historical_ebitda, {}, _C + _B2),
+    "Roll 6M Growth": (historical_roll6m, {}, _C),
+    "Estabilidade": (historical_estabilidade, {}, _B2),
+    "Net Revenue Retention": (historical_nrr, {}, _C),
+    "Perdas Operacionais": (historical_perdas_operacionais, {}, _C + _B2),
+    "Churn %": (historical_churn, {"dias_sem_show": 45}, _E),
+    "Inadimplência": (historical_inadimplencia, {}, _E + ("inad",)),
+    "Turn Over": (historical_turnover, {}, _P),
+    "Perfis Completos": (historical_perfis_completos, {}, _B2),
+    "Autonomia do Usuário": (historical_autonomia_usuario, {}, _B2),
+    "Sucesso da Implantação": (historical_sucesso_implantacao, {}, ()),
+    "Conformidade Jurídica": (historical_conformidade_juridica, {}, _B2),
+    "Eficiência de Atendimento": (historical_eficiencia_atendimento, {}, _B2),
+    "Nível de Serviço": (historical_nivel_servico, {}, _E + _OC),
+    "Inadimplência Real": (historical_inadimplencia_real, {}, _E + ("inad",)),
+    "Crescimento Sustentável": (historical_crescimento_sustentavel, {}, _C + _B2),
+    "NPS Artistas": (historical_nps_artistas, {}, _B2),
+    "NPS Equipe": (historical_nps_equipe, {}, _B2),
 }
+
+
+# Janelas longas (> HIST_MONTHS) saem de um armazém mensal por KPI: cada
+# ponto fica guardado pelo ordinal do mês e, quando os dados mudam, só os
+# meses a partir do primeiro mês alterado nas entradas (assinatura mensal do
+# conteúdo, ver _assinatura) – menos o alcance do KPI – são recalculados,
+# além do mês aberto. Alcance = quantos meses para trás uma linha do mês m
+# pode alterar; None = qualquer mudança refaz a série inteira (KPIs cujo
+# valor depende da janela ou de dados muito posteriores ao mês).
+HIST_ALCANCE = {
+    "Churn %": None,                    # depende da janela pedida
+    "Sucesso da Implantação": None,     # mock aleatório
+    # "novo" = primeiro show no ano do mês: a linha de dezembro mexe no ano todo
+    "Fat. Novos Palcos": 11,
+    # churn e lifetime olham o último show da casa (qualquer mês posterior)
+    "Life Time Médio": None,
+    "Churn de Novos Palcos": None,
+    "Churn KA": None,
+    # top 5 do ano anterior ao fim da janela vale para todos os meses
+    "Faturamento KA": None,
+    "Novos Palcos KA": None,
+    "Take Rate KA": None,
+}
+
+# entrada → dataset cuja assinatura vale para ela (derivados da BaseEshows)
+_ASSINATURA_DE = {"cubo": "eshows", "casas": "eshows"}
+# colunas que situam cada linha no tempo (vale a mais antiga presente)
+_COLUNAS_MES = ("Data do Show", "Data", "Data de Pagamento", "DATA", "DataInicio")
+_PARES_ANO_MES = (("Ano", "Mês"), ("AnoVenc", "MesVenc"))
+_SEM_MES = -1                           # linha sem data: afeta todos os meses
+
+
+def _mes_atual():
+    hoje = date.today()
+    return hoje.year * 12 + hoje.month - 1
+
+
+def _ordinais(df):
+    """
+    Ordinal (ano*12 + mês-1) do mês mais antigo de cada linha entre as
+    colunas de data; _SEM_MES sem data reconhecível.
+    """
+    cols = [c for c in _COLUNAS_MES if c in df.columns]
+    if cols:
+        ords = np.full(len(df), np.inf)
+        for col in cols:
+            d = pd.to_datetime(df[col], errors="coerce")
+            ords = np.fmin(ords, (d.dt.year * 12 + d.dt.month - 1).to_numpy(dtype="float64"))
+        return np.where(np.isfinite(ords), ords, _SEM_MES).astype(np.int64)
+    for ano, mes in _PARES_ANO_MES:
+        if ano in df.columns and mes in df.columns:
+            ords = (pd.to_numeric(df[ano], errors="coerce") * 12
+                    + pd.to_numeric(df[mes], errors="coerce") - 1).to_numpy(dtype="float64")
+            return np.where(np.isnan(ords), _SEM_MES, ords).astype(np.int64)
+    return np.full(len(df), _SEM_MES, dtype=np.int64)
+
+
+def _assinatura(valor):
+    """
+    Assinatura mensal do conteúdo de um dataset: {(parte, mês): (linhas,
+    soma dos hashes das linhas)}. None se o frame não é hasheável.
+    """
+    partes = valor if isinstance(valor, (tuple, list)) else (valor,)
+    out = {}
+    for i, df in enumerate(partes):
+        if not isinstance(df, pd.DataFrame) or df.empty:
+            continue
+        try:
+            h = pd.util.hash_pandas_object(df, index=False).to_numpy(np.uint64)
+        except TypeError:
+            return None
+        ords = _ordinais(df)
+        ordem = np.argsort(ords, kind="stable")
+        ords, h = ords[ordem], h[ordem]
+        meses, inicios = np.unique(ords, return_index=True)
+        somas = np.add.reduceat(h, inicios)
+        linhas = np.diff(np.r_[inicios, len(ords)])
+        out.update(((i, int(m)), (int(n), int(x))) for m, n, x in zip(meses, linhas, somas))
+    return out
+
+
+def _primeiro_mes_alterado(antes, depois):
+    """Menor mês cuja assinatura mudou em alguma entrada (None = nada mudou)."""
+    alterados = []
+    for nome in set(antes) | set(depois):
+        a, b = antes.get(nome), depois.get(nome)
+        if a is None or b is None:
+            return _SEM_MES
+        alterados += [m for chave in set(a) | set(b) if a.get(chave) != b.get(chave)
+                      for m in chave[1:]]
+    return min(alterados) if alterados else None
+
+
+def _meses_completos():
+    """Meses do primeiro show até o mês atual (janela "histórico completo")."""
+    cubo = cubo_mensal()
+    if cubo.empty:
+        return HIST_MONTHS
+    primeiro = cubo.index.min().to_period("M")
+    return max(HIST_MONTHS, (pd.Timestamp.today().to_period("M") - primeiro).n + 1)
+
+
+def _recorte(hist, months):
+    """Últimos *months* pontos de um histórico (raw_data numérico)."""
+    raw = hist.get("raw_data") if isinstance(hist, dict) else None
+    if not raw or len(raw["mes"]) <= months:
+        return hist
+    out = dict(hist)
+    out["raw_data"] = {**raw, "mes": raw["mes"][-months:], "valor": raw["valor"][-months:]}
+    if "start_date" in hist:
+        out["start_date"] = mes_para_data(out["raw_data"]["mes"][0]).strftime("%Y-%m-%d")
+    return out
+
+
+class LazyHistMap(Mapping):
+    """
+    Mapa KPI → histórico calculado sob demanda. Cada série é memoizada por
+    (kpi, months) junto com a versão no registry das bases de que depende:
+    se uma base muda, a série é refeita no próximo acesso. As séries menos
+    usadas saem por LRU (HIST_CACHE_SIZE), então históricos que ninguém
+    abre não custam CPU nem RAM. Antes de calcular, consulta o shared_cache
+    (séries que outro worker já fez para os mesmos dados). Janelas longas
+    vêm do armazém mensal incremental (ver HIST_ALCANCE).
+    """
+
+    def __init__(self, specs, months=HIST_MONTHS, maxsize=HIST_CACHE_SIZE):
+        self._specs = specs
+        self._months = months
+        self._maxsize = maxsize
+        self._cache = OrderedDict()     # (kpi, months) → (versão, histórico)
+        self._cache_lock = threading.Lock()
+        self._locks = {}
+        self._mensal = {}               # KPI → armazém mensal (janelas longas)
+        self._assinaturas = {}          # dataset → (versão, assinatura mensal)
+        self.timings = {}               # KPI → segundos do último cálculo
+
+    # ── memo ──────────────────────────────────────────────────────────
+    def _versao(self, kpi):
+        """Versões no registry das entradas do KPI (carrega as que faltam)."""
+        if not CACHE_RAM:
+            return ()
+        versoes = []
+        for nome in self._specs[kpi][2]:
+            loader, dataset = HIST_INPUTS[nome]
+            if registry.peek(dataset) is None:
+                try:
+                    loader()
+                except Exception as e:
+                    logger.error("[config_data] entrada '%s' falhou: %s", nome, e)
+            versoes.append(registry.version(dataset))
+        return tuple(versoes)
+
+    def _assinaturas_de(self, kpi):
+        """Assinatura mensal de cada entrada do KPI (uma vez por versão do dataset)."""
+        out = {}
+        for nome in self._specs[kpi][2]:
+            nome = _ASSINATURA_DE.get(nome, nome)
+            loader, dataset = HIST_INPUTS[nome]
+            versao = registry.version(dataset)
+            atual = self._assinaturas.get(dataset)
+            if atual is None or atual[0] != versao or not CACHE_RAM:
+                try:
+                    atual = (versao, _assinatura(loader()))
+                except Exception as e:
+                    logger.error("[config_data] assinatura de '%s' falhou: %s", nome, e)
+                    atual = (versao, None)
+                self._assinaturas[dataset] = atual
+            out[nome] = atual[1]
+        return out
+
+    def _lock_for(self, chave):
+        with self._cache_lock:
+            return self._locks.setdefault(chave, threading.Lock())
+
+    def _store(self, chave, versao, valor):
+        with self._cache_lock:
+            self._cache[chave] = (versao, valor)
+            self._cache.move_to_end(chave)
+            while len(self._cache) > self._maxsize:
+                antiga, _ = self._cache.popitem(last=False)
+                self._locks.pop(antiga, None)
+
+    def series(self, kpi, months=None):
+        """
+        Histórico de *kpi* para uma janela de *months* meses (None = padrão,
+        0 = histórico completo). Janelas maiores que a padrão são recortes
+        do armazém mensal do KPI (_serie_longa).
+        """
+        if kpi not in self._specs:
+            raise KeyError(kpi)
+        if months is None or 0 < months <= self._months:
+            return self._memo(kpi, months or self._months)
+        completo = self._serie_longa(kpi)
+        return completo if months == 0 else _recorte(completo, months)
+
+    def _serie_longa(self, kpi):
+        """
+        Histórico completo de *kpi* a partir do armazém mensal. Com dados
+        novos só recalcula do primeiro mês alterado (menos o alcance do KPI)
+        até hoje; os meses fechados anteriores ficam como estavam. O mês
+        aberto (último ponto) é sempre recalculado. As métricas-resumo do
+        dict são as da última janela calculada – o gráfico usa raw_data.
+        """
+        chave = (kpi, "mensal")
+        versao = (self._versao(kpi), _mes_atual())
+        atual = self._mensal.get(kpi)
+        if atual is not None and atual["versao"] == versao:
+            return atual["hist"]
+        with self._lock_for(chave):
+            atual = self._mensal.get(kpi)
+            if atual is not None and atual["versao"] == versao:
+                return atual["hist"]
+            assinaturas = self._assinaturas_de(kpi)
+            inicio = None                   # None = série inteira
+            alcance = HIST_ALCANCE.get(kpi, 0)
+            if atual is not None and atual["pontos"] and alcance is not None:
+                alterado = _primeiro_mes_alterado(atual["assinaturas"], assinaturas)
+                inicio = max(atual["pontos"])
+                if alterado is not None:
+                    inicio = min(inicio, alterado - alcance)
+                if inicio <= min(atual["pontos"]):
+                    inicio = None
+
+            if inicio is None:
+                meses = _meses_completos()
+            else:
+                # a janela dos historical_* termina hoje ou no último mês com dados
+                meses = max(_mes_atual(), max(atual["pontos"])) - inicio + 2
+            hist = self._executar(kpi, meses)
+            raw = hist.get("raw_data") if isinstance(hist, dict) else None
+            if inicio is not None and raw and int(min(raw["mes"])) > inicio:
+                # a cauda não alcançou o primeiro mês alterado: série inteira
+                inicio, meses = None, _meses_completos()
+                hist = self._executar(kpi, meses)
+            if hist is None:                # falhou: fica a versão anterior
+                return {} if atual is None else atual["hist"]
+            pontos = {} if inicio is None else {
+                m: v for m, v in atual["pontos"].items() if m < inicio}
+            raw = hist.get("raw_data") if isinstance(hist, dict) else None
+            if raw:
+                pontos.update((int(m), v) for m, v in zip(raw["mes"], raw["valor"])
+                              if inicio is None or m >= inicio)
+                meses_ord = sorted(pontos)
+                hist = dict(hist)
+                hist["raw_data"] = {
+                    "mes": np.asarray(meses_ord, dtype=np.int64),
+                    "valor": np.asarray([pontos[m] for m in meses_ord], dtype=np.float64),
+                    "formato": raw["formato"],
+                }
+                if "start_date" in hist:
+                    hist["start_date"] = mes_para_data(meses_ord[0]).strftime("%Y-%m-%d")
+            logger.debug("[config_data] %s: armazém mensal %s (%s meses calculados)",
+                         kpi, "completo" if inicio is None else "incremental", meses)
+            self._mensal[kpi] = {"versao": versao, "assinaturas": assinaturas,
+                                 "pontos": pontos, "hist": hist}
+            return hist
+
+    def _memo(self, kpi, months):
+        chave = (kpi, months)
+        versao = self._versao(kpi)
+        hit = self._cache.get(chave)
+        if hit is not None and hit[0] == versao:
+            with self._cache_lock:
+                if chave in self._cache:
+                    self._cache.move_to_end(chave)
+            return hit[1]
+
+        lock = self._lock_for(chave)
+        if hit is not None and not lock.acquire(blocking=False):
+            # já está sendo refeito (ex.: scheduler): serve a versão anterior
+            return hit[1]
+        if hit is None:
+            lock.acquire()
+        try:
+            atual = self._cache.get(chave)
+            if atual is not None and atual[0] == versao:
+                return atual[1]
+            valor = self._compute(kpi, chave[1],
+                                  default=None if atual is None else atual[1])
+            self._store(chave, versao, valor)
+            return valor
+        finally:
+            lock.release()
+
+    def tabelas(self, kpi):
+        """Tabelas-fonte lidas pelo histórico de *kpi* (chave do shared_cache)."""
+        self._versao(kpi)                   # carrega as entradas que faltam
+        return tuple(sorted({t for nome in self._specs[kpi][2]
+                             for t in registry.tables_of(HIST_INPUTS[nome][1])}))
+
+    def _compute(self, kpi, months, default=None):
+        # outro worker pode já ter calculado a série para os mesmos dados
+        partes = (kpi, months, date.today())
+        tabelas = self.tabelas(kpi)
+        tag = registry.content_tag(tabelas)
+        valor = None if tag is None else shared_cache.get("hist", partes, tabelas=tabelas)
+        if valor is not None:
+            return valor
+        valor = self._executar(kpi, months)
+        if valor is None:
+            return {} if default is None else default
+        if tag is not None:
+            shared_cache.put("hist", partes, valor, tabelas=tabelas, tag=tag)
+        return valor
+
+    def _executar(self, kpi, months):
+        """Roda o historical_* do KPI (None se falhar)."""
+        fn, kwargs, _ = self._specs[kpi]
+        t0 = time.perf_counter()
+        try:
+            return fn(months=months, **kwargs)
+        except Exception as e:
+            logger.error("[config_data] histórico '%s' falhou: %s", kpi, e)
+            return None
+        finally:
+            self.timings[kpi] = time.perf_counter() - t0
+            logger.debug("[config_data] %s (%s meses): %.2fs",
+                         kpi, months, self.timings[kpi])
+
+    # ── Mapping ───────────────────────────────────────────────────────
+    def __getitem__(self, kpi):
+        return self.series(kpi)
+
+    def __iter__(self):
+        return iter(self._specs)
+
+    def __len__(self):
+        return len(self._specs)
+
+    def is_loaded(self, kpi):
+        return (kpi, self._months) in self._cache
+
+    def loaded_items(self):
+        """Só os históricos (janela padrão) já calculados – não dispara cálculo."""
+        with self._cache_lock:
+            cache = dict(self._cache)
+        return [(k, cache[(k, self._months)][1])
+                for k in self._specs if (k, self._months) in cache]
+
+    def clear(self):
+        with self._cache_lock:
+            self._cache.clear()
+            self._locks.clear()
+            self._mensal.clear()
+            self._assinaturas.clear()
+
+    # ── cálculo em lote ───────────────────────────────────────────────
+    def _run_pool(self, chaves, task):
+        """
+        Executa *task(chave)* para cada (kpi, months) num pool de threads.
+        Cada entrada (HIST_INPUTS) é carregada uma vez e o histórico entra
+        na fila assim que todas as suas entradas ficam prontas.
+        """
+        if not chaves:
+            return
+        if HIST_WORKERS == 1:
+            for chave in chaves:
+                task(chave)
+            return
+
+        pendentes = {c: set(self._specs[c[0]][2]) for c in chaves}
+        prontas = set()
+        tarefas = []
+        with ThreadPoolExecutor(HIST_WORKERS, thread_name_prefix="hist") as pool:
+            def _liberar():
+                for chave in [c for c, deps in pendentes.items() if deps <= prontas]:
+                    del pendentes[chave]
+                    tarefas.append(pool.submit(task, chave))
+
+            _liberar()
+            cargas = {
+                pool.submit(HIST_INPUTS[nome][0]): nome
+                for nome in sorted(set().union(*pendentes.values()))
+            }
+            for fut in as_completed(cargas):
+                if fut.exception() is not None:
+                    # o histórico trata base vazia/ausente; não bloqueia a fila
+                    logger.error("[config_data] entrada '%s' falhou: %s",
+                                 cargas[fut], fut.exception())
+                prontas.add(cargas[fut])
+                _liberar()
+            wait(tarefas)
+
+    def _log_timings(self, kpis, t0):
+        lentos = sorted(set(kpis), key=lambda k: self.timings.get(k, 0), reverse=True)[:5]
+        logger.info(
+            "[config_data] %s históricos em %.1fs (%s threads) | mais lentos: %s",
+            len(kpis), time.perf_counter() - t0, HIST_WORKERS,
+            ", ".join(f"{k} {self.timings.get(k, 0):.2f}s" for k in lentos),
+        )
+
+    def refresh(self, *_):
+        """
+        Refaz as séries em cache cujas bases mudaram (chamado pelo scheduler).
+        Enquanto isso, os callbacks continuam recebendo a versão anterior.
+        """
+        with self._cache_lock:
+            chaves = list(self._cache)
+            longas = list(self._mensal.items())
+        velhas = [c for c in chaves if self._cache.get(c, (None,))[0] != self._versao(c[0])]
+        # armazéns mensais: só a cauda alterada é recalculada
+        velhas += [(k, 0) for k, st in longas if st["versao"][0] != self._versao(k)]
+        t0 = time.perf_counter()
+        self._run_pool(velhas, lambda c: self.series(*c))
+        gc.collect()
+        if velhas:
+            self._log_timings([c[0] for c in velhas], t0)
+
+    def warm_up(self, kpis=None):
+        """Calcula (janela padrão) os históricos informados, ou todos."""
+        pendentes = [(k, self._months) for k in (kpis or self._specs)
+                     if not self.is_loaded(k)]
+        t0 = time.perf_counter()
+        self._run_pool(pendentes, lambda c: self.series(*c))
+        gc.collect()
+        if pendentes:
+            self._log_timings([c[0] for c in pendentes], t0)
+
+
+HIST_KPI_MAP = LazyHistMap(HIST_SPECS)
+on_refresh(HIST_KPI_MAP.refresh)          # bases novas → históricos novos
 logger.debug("[config_data.py] HIST_KPI_MAP definido.")
 
 # Adicionar uma função para obter o mapa, para garantir que ele seja acessado após a definição
 def get_hist_kpi_map():
-    return HIST_KPI_MAP 
\ No newline at end of file
+    return HIST_KPI_MAP
@@ -0,0 +1,122 @@
+"""
+kpi_graph.py — grafo de cálculo dos cards
+-----------------------------------------
+Cada nó declara de quais resultados depende (frames filtrados do período
+principal e do comparativo, top-5 KA, novos palcos…). Numa execução cada
+nó roda uma única vez, e os nós independentes rodam em paralelo num pool
+de threads (KPI_GRAPH_WORKERS; 1 = sequencial, na ordem de declaração).
+
+    grafo = KPIGraph("dashboard")
+
+    @grafo.node("gmv", deps=("principal", "comparacao"))
+    def _gmv(principal, comparacao): ...
+
+    @grafo.node("custos", deps=("base2", "ano"), after=("principal",))
+    def _custos(base2, ano): ...       # só roda depois de "principal"
+
+    res = grafo.run({"ano": 2025, ...}, targets=("gmv", ...))
+    grafo.timings   # {nó: segundos} da última execução
+
+As entradas de run() são nós já resolvidos. Os nós recebem as dependências
+como kwargs e não devem alterar o que recebem: os resultados são
+compartilhados entre threads. Exceções (inclusive PreventUpdate) são
+relançadas no chamador e cancelam o que ainda não começou.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Tuple
+
+logger = logging.getLogger(__name__)
+
+KPI_GRAPH_WORKERS = max(1, int(os.getenv("KPI_GRAPH_WORKERS", "4")))
+
+# pool único do processo: callbacks simultâneos dividem as mesmas threads
+_pool: ThreadPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(KPI_GRAPH_WORKERS, thread_name_prefix="kpi-graph")
+        return _pool
+
+
+class KPIGraph:
+    def __init__(self, nome: str):
+        self.nome = nome
+        # nome → (fn, deps passadas como kwargs, deps só de ordem)
+        self._nodes: Dict[str, Tuple[Callable[..., Any], Tuple[str, ...], Tuple[str, ...]]] = {}
+        self.timings: Dict[str, float] = {}
+
+    def node(self, nome: str, deps: Iterable[str] = (), after: Iterable[str] = ()) -> Callable:
+        """
+        Decorator: registra *fn(**deps)* como o nó *nome*. *after* só ordena
+        (ex.: esperar o nó que valida o período e pode lançar PreventUpdate).
+        """
+        def registrar(fn: Callable[..., Any]) -> Callable[..., Any]:
+            self._nodes[nome] = (fn, tuple(deps), tuple(after))
+            return fn
+        return registrar
+
+    def _plano(self, entradas: Iterable[str], targets: Iterable[str]) -> list[str]:
+        # nós necessários para os targets, na ordem de declaração
+        prontos, pilha, needed = set(entradas), list(targets), set()
+        while pilha:
+            n = pilha.pop()
+            if n in prontos or n in needed:
+                continue
+            if n not in self._nodes:
+                raise KeyError(f"[{self.nome}] nó ou entrada desconhecido: {n}")
+            needed.add(n)
+            pilha.extend(self._nodes[n][1] + self._nodes[n][2])
+        return [n for n in self._nodes if n in needed]
+
+    def _kwargs(self, nome: str, res: Dict[str, Any]) -> Dict[str, Any]:
+        return {d: res[d] for d in self._nodes[nome][1]}
+
+    def _executar(self, nome: str, kwargs: Dict[str, Any]) -> Tuple[Any, float]:
+        t0 = time.perf_counter()
+        valor = self._nodes[nome][0](**kwargs)
+        return valor, time.perf_counter() - t0
+
+    def run(self, entradas: Dict[str, Any],
+            targets: Iterable[str] | None = None) -> Dict[str, Any]:
+        """Resolve *targets* (padrão: todos os nós); devolve {nó: resultado}."""
+        t0 = time.perf_counter()
+        res = dict(entradas)
+        plano = self._plano(res, self._nodes if targets is None else targets)
+        tempos: Dict[str, float] = {}
+
+        if KPI_GRAPH_WORKERS <= 1:
+            for n in plano:
+                res[n], tempos[n] = self._executar(n, self._kwargs(n, res))
+        else:
+            pool = _get_pool()
+            pendentes, rodando = list(plano), {}
+            try:
+                while pendentes or rodando:
+                    for n in [n for n in pendentes
+                              if all(d in res for d in self._nodes[n][1] + self._nodes[n][2])]:
+                        pendentes.remove(n)
+                        rodando[pool.submit(self._executar, n, self._kwargs(n, res))] = n
+                    feitos, _ = wait(rodando, return_when=FIRST_COMPLETED)
+                    for fut in feitos:
+                        n = rodando.pop(fut)
+                        res[n], tempos[n] = fut.result()
+            finally:
+                for fut in rodando:
+                    fut.cancel()
+
+        self.timings = tempos
+        lentos = sorted(tempos.items(), key=lambda kv: -kv[1])[:3]
+        logger.info("[%s] %d nós em %.2fs; mais lentos: %s", self.nome, len(tempos),
+                    time.perf_counter() - t0,
+                    ", ".join(f"{n} {s:.2f}s" for n, s in lentos))
+        return res
@@ -53,19 +53,24 @@ from app.updates.update_modal_improved import (
     create_update_modal,
     init_update_modal_callbacks
 )
-from app.core.config_data import HIST_KPI_MAP, get_hist_kpi_map
+from app.core.config_data import HIST_KPI_MAP, HIST_JANELAS, get_hist_kpi_map
+from app.core.kpi_graph import KPIGraph
+from app.core.warmup import start_warmup
+from app.data.scheduler import start_scheduler
+from app.data import registry, shared_cache
 from app.data.modulobase import (
     carregar_base_eshows,
     carregar_eshows_excluidos,  # para exportar registros descartados
     carregar_base2,
     carregar_ocorrencias,
+    carregar_casas_earliest_latest,
 )
 from app.utils.utils import (
     formatar_range_legivel,
     formatar_valor_utils,
     floatify_hist_data,
     filtrar_periodo_principal,
-    filtrar_periodo_comparacao,
+    argumentos_periodo_comparacao,
     get_period_start,
     get_period_end,
     mes_nome,
@@ -75,18 +80,19 @@ from app.utils.utils import (
     filtrar_base2_comparacao,
     filtrar_base2_op_shows,
     filtrar_base2_op_shows_compare,
-    faturamento_dos_grupos,
     obter_top5_grupos_ano_anterior,
-    novos_palcos_dos_grupos,
-    get_churn_ka_for_period,
     get_period_range,
     calcular_churn,
     filtrar_novos_palcos_por_comparacao,
     filtrar_novos_palcos_por_periodo,
     calcular_churn_novos_palcos,
     calcular_variacao_percentual,
-    ensure_grupo_col
+    ensure_grupo_col,
+    agregados_simples,
+    COLUNAS_FAT,
 )
+from app.utils.ocorrencias_rollup import contar_ocorrencias
+from app.utils.ka_index import churn_ka, faturamento_ka, gmv_ka, novos_palcos_ka
 from app.ui.kpis_charts import generate_kpi_figure
 
 # ==============================================================================
@@ -351,28 +357,13 @@ external_stylesheets = [
 # ==============================================================================
 # 6) CARREGAMENTO DAS BASES PRINCIPAIS
 # ==============================================================================
-# Carregar dados normalmente (reloader já está desabilitado)
-logger.info("Carregando bases do Supabase…")
+# Os frames ficam no registry (app.data.registry): os callbacks leem via
+# carregar_*() a cada execução, então um reload_tables vale na hora.
+# Nada é carregado no import (o worker sobe rápido); cada base carrega no
+# primeiro acesso e o warm-up adianta o trabalho em background (WARMUP=1).
 log_memory_usage("antes_bases")
-df_eshows = carregar_base_eshows()
-log_memory_usage("apos_df_eshows")
-df_base2 = carregar_base2()
-log_memory_usage("apos_df_base2")
-df_ocorrencias = carregar_ocorrencias()
-log_memory_usage("apos_df_ocorrencias")
-logger.info("Bases carregadas com sucesso.")
-log_memory_usage("bases_carregadas")
-
-# ― Ajustes auxiliares para Novos Clientes -------------------------------------
-if df_eshows is not None and not df_eshows.empty:
-    df_casas_earliest = (
-        df_eshows.groupby("Id da Casa")["Data do Show"].min().reset_index(name="EarliestShow")
-    )
-    df_casas_latest = (
-        df_eshows.groupby("Id da Casa")["Data do Show"].max().reset_index(name="LastShow")
-    )
-else:
-    df_casas_earliest = df_casas_latest = None
+start_warmup()
+start_scheduler()    # refresh periódico + troca atômica (REFRESH_SCHEDULER=1)
 
 # ==============================================================================
 # 7) UTILITÁRIO DE ESTADOS (UF → Nome/Bandeira)
@@ -565,17 +556,14 @@ from dateutil.relativedelta import relativedelta
 import numpy as np
 import pandas as pd
 
-from app.data.modulobase import (
-    carregar_pessoas,
-    carregar_base2,
-    carregar_base_eshows,
-)
-from app.kpis.variacoes  import get_churn_variables, get_rpc_variables
+from app.data.modulobase import carregar_pessoas
+from app.kpis.variacoes  import get_rpc_variables
 from app.utils.utils      import (
     get_period_start,
     get_period_end,
     calcular_periodo_anterior,
 )
+from app.utils.rh_intervalos import headcount, tempo_medio
 
 # ----------------------------------------------------------------------
 def metricas_rh_quick(
@@ -597,10 +585,10 @@ def metricas_rh_quick(
     """
 
     # ---------------------------------------------------------------
-    # 1) Bases
+    # 1) Bases (só leitura: nada é copiado nem alterado)
     # ---------------------------------------------------------------
     df_p = (
-        df_pessoas_global.copy()
+        df_pessoas_global
         if df_pessoas_global is not None and not df_pessoas_global.empty
         else carregar_pessoas()
     )
@@ -616,48 +604,40 @@ def metricas_rh_quick(
         return vazio, (vazio if comparar_opcao else None)
 
     df_b2 = (
-        df_base2_global.copy()
+        df_base2_global
         if df_base2_global is not None and not df_base2_global.empty
         else carregar_base2()
     )
     df_e  = (
-        df_eshows_global.copy()
+        df_eshows_global
         if df_eshows_global is not None and not df_eshows_global.empty
         else carregar_base_eshows()
     )
 
     _to_dt = lambda s: pd.to_datetime(s, errors="coerce")
-    df_p["DataInicio"] = _to_dt(df_p["DataInicio"])
-    df_p["DataSaida"]  = _to_dt(df_p.get("DataSaida"))
-
     if "Data" not in df_b2.columns and {"Ano", "Mês"}.issubset(df_b2.columns):
-        df_b2["Data"] = pd.to_datetime(
+        datas_b2 = pd.to_datetime(
             dict(year=df_b2["Ano"], month=df_b2["Mês"], day=1), errors="coerce"
         )
-    df_b2["Data"]   = _to_dt(df_b2["Data"]).dt.normalize()
-    df_b2["Equipe"] = pd.to_numeric(df_b2["Equipe"], errors="coerce").fillna(0.0)
+    else:
+        datas_b2 = df_b2["Data"]
+    datas_b2 = _to_dt(datas_b2).dt.normalize()
+    equipe_b2 = pd.to_numeric(df_b2["Equipe"], errors="coerce").fillna(0.0)
 
     # ---------------------------------------------------------------
-    # 2) Helpers
+    # 2) Helpers – headcount e tempo de casa pelo índice de intervalos
+    #    (rh_intervalos), vetorizados sobre as datas pedidas
     # ---------------------------------------------------------------
-    def _headcount_mes(ref_month: pd.Timestamp) -> int:
-        last_day = (ref_month + relativedelta(months=1)) - pd.DateOffset(days=1)
-        ativos = (df_p["DataInicio"] <= last_day) & (
-            df_p["DataSaida"].isna() | (df_p["DataSaida"] > last_day)
-        )
-        return int(ativos.sum())
+    def _headcount_meses(ref_months) -> np.ndarray:
+        # ativos no último dia do mês de referência (ref + 1 mês - 1 dia)
+        last_days = (pd.DatetimeIndex(ref_months) + pd.DateOffset(months=1)) - pd.Timedelta(days=1)
+        return headcount(last_days, df_p, saida="DataSaida")
 
     def _tempo_medio(dt_fim: pd.Timestamp) -> tuple[float, str]:
-        dias = [
-            (min(row["DataSaida"], dt_fim) if pd.notna(row["DataSaida"]) else dt_fim)
-            - row["DataInicio"]
-            for _, row in df_p.iterrows()
-            if pd.notna(row["DataInicio"])
-        ]
-        dias = [d.days for d in dias if d.days >= 0]
-        if not dias:
+        media = tempo_medio([dt_fim], df_p, saida="DataSaida")[0]
+        if np.isnan(media):
             return 0.0, "0 dias"
-        media = float(np.mean(dias))
+        media = float(media)
         if media < 30:
             fmt = f"{int(round(media))} dias"
         elif media < 365:
@@ -705,41 +685,27 @@ def metricas_rh_quick(
                 rpc_fmt="R$0",
             )
 
-        # ---> INÍCIO DA ALTERAÇÃO: Calcular Média de Headcount <----
-        # Gerar range de meses (início de cada mês) dentro do período
+        # média do headcount mensal (início de cada mês dentro do período)
         months_in_period = pd.date_range(start=dt_ini.replace(day=1), end=dt_fim.replace(day=1), freq='MS')
-        headcounts_mensais = []
-        for month_start in months_in_period:
-            headcount_do_mes = _headcount_mes(month_start) # Usa a função helper existente
-            headcounts_mensais.append(headcount_do_mes)
-
-        # Calcula a média e arredonda para o inteiro mais próximo
         n_func_avg = 0
-        if headcounts_mensais: # Evita divisão por zero se a lista estiver vazia
-            n_func_avg = round(np.mean(headcounts_mensais))
-        # ---> FIM DA ALTERAÇÃO <----
-
-        # Remove a linha antiga que pegava só o headcount do último mês:
-        # n_func = _headcount_mes(dt_fim.replace(day=1))
+        if len(months_in_period):
+            n_func_avg = round(np.mean(_headcount_meses(months_in_period)))
 
-        mask = (df_b2["Data"] >= dt_ini.replace(day=1)) & (
-            df_b2["Data"] <= dt_fim.replace(day=1)
-        )
-        df_custo = df_b2.loc[mask].copy()
-        if df_custo.empty:
+        mask = ((datas_b2 >= dt_ini.replace(day=1)) & (datas_b2 <= dt_fim.replace(day=1))).to_numpy()
+        if not mask.any():
             salario_medio = 0.0
         else:
-            df_custo["Head"] = df_custo["Data"].apply(_headcount_mes)
-            df_custo = df_custo[df_custo["Head"] > 0]
-            total_custo = df_custo["Equipe"].sum()
-            total_head  = df_custo["Head"].sum()
+            head = _headcount_meses(datas_b2[mask])
+            com_head = head > 0
+            total_custo = equipe_b2[mask][com_head].sum()
+            total_head  = head[com_head].sum()
             salario_medio = (total_custo / total_head) if total_head else 0.0
 
         media_dias, media_fmt = _tempo_medio(dt_fim)
         rpc_val, rpc_fmt = _rpc(ano_ref, per_ref, mes_ref, dt_ini, dt_fim)
 
         return dict(
-            n_func=n_func_avg, # <<< USA A MÉDIA CALCULADA
+            n_func=n_func_avg,
             salario_medio=float(salario_medio),
             tempo_medio_casa=media_dias,
             tempo_medio_casa_fmt=media_fmt,
@@ -789,8 +755,12 @@ alert_atualiza = html.Div(
 )
 
 # =================================================================================
-# FUNÇÃO QUE CRIA O MODAL DO GRÁFICO KPI – "Evolução 12 meses"
+# FUNÇÃO QUE CRIA O MODAL DO GRÁFICO KPI – "Evolução 12/24/36 meses ou completa"
 # =================================================================================
+def _rotulo_janela(meses):
+    return "Tudo" if not meses else f"{meses} meses"
+
+
 def create_kpi_dashboard_modal():
     return dbc.Modal(
         [
@@ -856,6 +826,18 @@ def create_kpi_dashboard_modal():
                                         id="kpi-dash-card-title",
                                         className="card-title text-center",
                                     ),
+                                    dcc.RadioItems(
+                                        id="kpi-dash-window",
+                                        options=[
+                                            {"label": _rotulo_janela(m), "value": m}
+                                            for m in HIST_JANELAS
+                                        ],
+                                        value=HIST_JANELAS[0],
+                                        inline=True,
+                                        className="text-center",
+                                        inputStyle={"marginRight": "6px"},
+                                        labelStyle={"marginRight": "18px", "cursor": "pointer"},
+                                    ),
                                     dcc.Graph(
                                         id="kpi-dash-modal-graph",
                                         config={"displayModeBar": False},
@@ -2027,6 +2009,7 @@ def atualizar_tooltip_contas_chave(
         raise dash.exceptions.PreventUpdate
 
     # 2) Resto da lógica original
+    df_eshows = carregar_base_eshows()
     if df_eshows is None or df_eshows.empty or "Grupo" not in df_eshows.columns:
         return "Não há grupos / colunas."
 
@@ -2048,74 +2031,38 @@ def atualizar_tooltip_contas_chave(
     return tooltip_content
 
 # =================================================================================
-# AQUI VAI O CONJUNTO DE CALLBACKS DO DASHBOARD (KPIs)
+# GRAFO DOS KPIs DO DASHBOARD (ver app/core/kpi_graph.py)
 # =================================================================================
-@app.callback(
-    [
-        Output('kpi-gmv-col','children'),
-        Output('kpi-numshows-col','children'),
-        Output('kpi-ticket-col','children'),
-        Output('kpi-cidades-col','children'),
-
-        Output('kpi-fat-col','children'),
-        Output('kpi-takerate-gmv-col','children'),
-        Output('kpi-custos-col','children'),
-        Output('kpi-lucro-col','children'),
-
-        Output('kpi-novospalcos-col','children'),
-        Output('kpi-fatnovospalcos-col','children'),
-        Output('kpi-lifetimemedio-col','children'),
-        Output('kpi-churn-novospalcos-col','children'),
-
-        Output('kpi-ka-fat-col','children'),
-        Output('kpi-ka-novospalcos-col','children'),
-        Output('kpi-ka-takerate-col','children'),
-        Output('kpi-ka-churn-col','children'),
-
-        Output('kpi-palcos-ativos-col','children'),
-        Output('kpi-artistas-ativos-col','children'),
-        Output('kpi-palcosvazios-col','children'),
-        Output('kpi-errosop-col','children'),
-
-        Output('cards-pessoas','children'),
-
-        Output('periodo-analisado','children'),
-
-        # Armazena todos os indicadores (simples + históricos)
-        Output('all-indicators-store', 'data'),
-    ],
-    [
-        Input('dashboard-ano-dropdown','value'),
-        Input('dashboard-periodo-dropdown','value'),
-        Input('dashboard-mes-dropdown','value'),
-        Input('dashboard-date-range-picker','start_date'),
-        Input('dashboard-date-range-picker','end_date'),
-        Input('dashboard-comparar-dropdown','value'),
-        Input('dashboard-date-range-picker-compare','start_date'),
-        Input('dashboard-date-range-picker-compare','end_date'),
-        Input("dummy-store","data"),   # para atualizar quando a base recarrega
-        Input("url","pathname")        # para checar a rota atual
-    ],
-    [State('all-indicators-store','data')],  # Lê o store já existente
-    prevent_initial_call=True
-)
-def atualizar_kpis(
-    ano, periodo, mes,
-    start_date_main, end_date_main,
-    comparar_opcao, start_date_compare, end_date_compare,
-    dummy_data,
-    current_pathname,
-    existing_indicators,
-):
-    # ————————————————————————————————————————————————————————————————
-    # 0) Só roda no /dashboard
-    # ————————————————————————————————————————————————————————————————
-    if current_pathname != "/dashboard":
-        raise dash.exceptions.PreventUpdate
-
-    # ————————————————————————————————————————————————————————————————
-    # 1) Intervalo PRINCIPAL
-    # ————————————————————————————————————————————————————————————————
+# Entradas: ano, periodo, mes, start_date_main, end_date_main, comparar_opcao,
+# start_date_compare, end_date_compare. "principal" e "comparacao" preparam os
+# frames filtrados uma única vez (coluna Grupo, GMV numérico); os demais nós só
+# os leem, e os independentes rodam em paralelo. Como "comparacao" valida os
+# dois períodos (PreventUpdate), todo nó que usa as entradas cruas roda depois
+# dele (after=), como no callback sequencial.
+DASHBOARD_KPIS = KPIGraph("dashboard")
+
+
+def _soma_fat(df):
+    if df is None or df.empty:
+        return 0.0
+    valid_cols = [c for c in COLUNAS_FAT if c in df.columns]
+    if not valid_cols:
+        return 0.0
+    return df[valid_cols].apply(pd.to_numeric, errors='coerce').fillna(0).sum().sum()
+
+
+# ― bases -------------------------------------------------------------------------
+DASHBOARD_KPIS.node("eshows")(carregar_base_eshows)
+DASHBOARD_KPIS.node("base2")(carregar_base2)
+DASHBOARD_KPIS.node("ocorrencias_base")(carregar_ocorrencias)
+DASHBOARD_KPIS.node("casas")(carregar_casas_earliest_latest)
+DASHBOARD_KPIS.node("pessoas")(carregar_pessoas)
+
+
+# ― períodos ----------------------------------------------------------------------
+@DASHBOARD_KPIS.node("principal", deps=("eshows", "ano", "periodo", "mes",
+                                         "start_date_main", "end_date_main"))
+def _kpi_principal(eshows, ano, periodo, mes, start_date_main, end_date_main):
     custom_principal = None
     if periodo == "custom-range":
         if not (start_date_main and end_date_main):
@@ -2125,9 +2072,7 @@ def atualizar_kpis(
             pd.to_datetime(end_date_main).normalize(),
         )
 
-    df_principal = filtrar_periodo_principal(
-        df_eshows, ano, periodo, mes, custom_principal
-    )
+    df_principal = filtrar_periodo_principal(eshows, ano, periodo, mes, custom_principal)
     if df_principal.empty:
         raise dash.exceptions.PreventUpdate
 
@@ -2136,16 +2081,23 @@ def atualizar_kpis(
         if custom_principal
         else mes_nome_intervalo(df_principal, periodo)
     )
+    df_principal = ensure_grupo_col(df_principal)
+    df_principal["Valor Total do Show"] = pd.to_numeric(df_principal["Valor Total do Show"], errors='coerce').fillna(0)
+    return {"df": df_principal, "custom": custom_principal, "label": label_princ,
+            "limites": get_period_range(ano, periodo, mes, custom_principal)}
 
-    # ————————————————————————————————————————————————————————————————
-    # 2) Intervalo de COMPARAÇÃO
-    # ————————————————————————————————————————————————————————————————
+
+@DASHBOARD_KPIS.node("comparacao", deps=("eshows", "principal", "ano", "periodo", "mes",
+                                          "comparar_opcao", "start_date_compare",
+                                          "end_date_compare"))
+def _kpi_comparacao(eshows, principal, ano, periodo, mes,
+                    comparar_opcao, start_date_compare, end_date_compare):
     custom_comp = None
     ano_cmp, per_cmp, mes_cmp = ano - 1, periodo, mes        # default: ano-1
 
     if comparar_opcao == "periodo_anterior":
-        ini_p = get_period_start(ano, periodo, mes, custom_principal)
-        fim_p = get_period_end  (ano, periodo, mes, custom_principal)
+        ini_p = get_period_start(ano, periodo, mes, principal["custom"])
+        fim_p = get_period_end  (ano, periodo, mes, principal["custom"])
 
         delta  = fim_p - ini_p            # mesma duração
         fim_c  = ini_p - timedelta(days=1)
@@ -2166,17 +2118,7 @@ def atualizar_kpis(
         ano_cmp, mes_cmp = custom_comp[0].year, custom_comp[0].month
     # (caso 'ano_anterior' nada muda: ano_cmp = ano-1)
 
-    # ─── aliases p/ partes de código que ainda usam os nomes antigos ──
-    custom_range_principal_tuple  = custom_principal
-    custom_range_comparacao_tuple = custom_comp
-    # ------------------------------------------------------------------
-
-    # ————————————————————————————————————————————————————————————————
-    # 3) DataFrame comparativo
-    # ————————————————————————————————————————————————————————————————
-    df_comp = filtrar_periodo_principal(
-        df_eshows, ano_cmp, per_cmp, mes_cmp, custom_comp
-    )
+    df_comp = filtrar_periodo_principal(eshows, ano_cmp, per_cmp, mes_cmp, custom_comp)
 
     # rótulo do período comparado
     if custom_comp:
@@ -2186,170 +2128,136 @@ def atualizar_kpis(
     else:                                  # ano_anterior (fallback)
         label_comp = f"{periodo} {ano-1}"
 
-    # ————————————————————————————————————————————————————————————————
-    # 4) Ajustes de coluna 'Grupo' e demais pré-requisitos
-    # ————————————————————————————————————————————————————————————————
-    df_principal = ensure_grupo_col(df_principal)
-    df_comp      = ensure_grupo_col(df_comp)
+    df_comp = ensure_grupo_col(df_comp)
+    if not df_comp.empty:
+        df_comp["Valor Total do Show"] = pd.to_numeric(df_comp["Valor Total do Show"], errors='coerce').fillna(0)
+    return {"df": df_comp, "custom": custom_comp, "label": label_comp,
+            "limites": get_period_range(ano_cmp, per_cmp, mes_cmp, custom_comp)}
+
+
+# ― agregados simples (distintos e somas dos dois períodos num só groupby) ----------
+@DASHBOARD_KPIS.node("agregados", deps=("principal", "comparacao"))
+def _kpi_agregados(principal, comparacao):
+    return agregados_simples({"principal": principal["df"], "comparacao": comparacao["df"]})
+
+
+# ― shows ---------------------------------------------------------------------------
+@DASHBOARD_KPIS.node("volume", deps=("agregados",))
+def _kpi_volume(agregados):
+    p, c = agregados["principal"], agregados["comparacao"]
+    gmv, num_shows = p["gmv"], p["shows"]
+    gmv_comp, num_shows_comp = c["gmv"], c["shows"]
+    return {
+        "gmv": gmv, "gmv_comp": gmv_comp,
+        "num_shows": num_shows, "num_shows_comp": num_shows_comp,
+        "var_gmv": calcular_variacao_percentual(gmv, gmv_comp),
+        "var_num": calcular_variacao_percentual(num_shows, num_shows_comp),
+    }
 
-    # -----------------------
-    # Cálculos dos indicadores simples
-    # -----------------------
 
-    # Palcos Ativos
-    palcos_ativos = df_principal["Id da Casa"].nunique() if not df_principal.empty else 0
-    palcos_ativos_comp = df_comp["Id da Casa"].nunique() if not df_comp.empty else 0
-    var_palcos_ativos = calcular_variacao_percentual(palcos_ativos, palcos_ativos_comp) if palcos_ativos_comp is not None else None
-
-    # Artistas Ativos
-    artistas_ativos = df_principal["Nome do Artista"].nunique() if not df_principal.empty and "Nome do Artista" in df_principal.columns else 0
-    artistas_ativos_comp = df_comp["Nome do Artista"].nunique() if not df_comp.empty and "Nome do Artista" in df_comp.columns else 0
-    var_artistas_ativos = calcular_variacao_percentual(artistas_ativos, artistas_ativos_comp) if artistas_ativos_comp is not None and artistas_ativos_comp > 0 else None
-
-    # Ocorrências (excluindo "Leve")
-    ocorrencias_count = 0
-    var_ocorrencias = None
-    if df_ocorrencias is not None and not df_ocorrencias.empty:
-        df_occ_temp = df_ocorrencias.rename(columns={"DATA": "Data"}).copy()
-        df_occ_princ = filtrar_periodo_principal(df_occ_temp, ano, periodo, mes, (start_date_main, end_date_main))
-        if not df_occ_princ.empty and "TIPO" in df_occ_princ.columns:
-            df_occ_princ = df_occ_princ[df_occ_princ["TIPO"] != "Leve"]
-            ocorrencias_count = df_occ_princ["ID_OCORRENCIA"].nunique() if "ID_OCORRENCIA" in df_occ_princ.columns else 0
-
-        df_occ_comp = filtrar_periodo_comparacao(df_occ_temp, ano, periodo, mes, comparar_opcao, (start_date_compare, end_date_compare))
-        ocorrencias_comp = 0
-        if not df_occ_comp.empty and "TIPO" in df_occ_comp.columns:
-            df_occ_comp = df_occ_comp[df_occ_comp["TIPO"] != "Leve"]
-            ocorrencias_comp = df_occ_comp["ID_OCORRENCIA"].nunique() if "ID_OCORRENCIA" in df_occ_comp.columns else 0
-
-        if ocorrencias_comp is not None and ocorrencias_comp > 0:
-            var_ocorrencias = calcular_variacao_percentual(ocorrencias_count, ocorrencias_comp)
-
-    # Palcos Vazios
-    palcos_vazios = 0
-    var_palcosvazios = None
-    logger.debug("[DEBUG] => Iniciando cálculo de Palcos Vazios")
-    if df_ocorrencias is not None and not df_ocorrencias.empty:
-        df_occ_temp2 = df_ocorrencias.rename(columns={"DATA": "Data"}).copy()
-        df_occ_princ2 = filtrar_periodo_principal(df_occ_temp2, ano, periodo, mes, (start_date_main, end_date_main))
-        if not df_occ_princ2.empty:
-            if "TIPO" in df_occ_princ2.columns:
-                df_occ_princ2 = df_occ_princ2[df_occ_princ2["TIPO"] == "Palco vazio"]
-                if "ID_OCORRENCIA" in df_occ_princ2.columns:
-                    palcos_vazios = df_occ_princ2["ID_OCORRENCIA"].nunique()
-                else:
-                    palcos_vazios = len(df_occ_princ2)
-        df_occ_comp2 = filtrar_periodo_comparacao(df_occ_temp2, ano, periodo, mes, comparar_opcao, (start_date_compare, end_date_compare))
-        palcos_vazios_comp = 0
-        if not df_occ_comp2.empty:
-            if "TIPO" in df_occ_comp2.columns:
-                df_occ_comp2 = df_occ_comp2[df_occ_comp2["TIPO"] == "Palco vazio"]
-                if "ID_OCORRENCIA" in df_occ_comp2.columns:
-                    palcos_vazios_comp = df_occ_comp2["ID_OCORRENCIA"].nunique()
-                else:
-                    palcos_vazios_comp = len(df_occ_comp2)
-        if palcos_vazios_comp is not None and palcos_vazios_comp > 0:
-            var_palcosvazios = calcular_variacao_percentual(palcos_vazios, palcos_vazios_comp)
-        logger.debug("[DEBUG] => Final palcos_vazios = %s, var_palcosvazios = %s", palcos_vazios, var_palcosvazios)
-    else:
-        logger.debug("[DEBUG] => df_ocorrencias está None ou vazio.")
+@DASHBOARD_KPIS.node("ticket", deps=("volume",))
+def _kpi_ticket(volume):
+    ticket = (volume["gmv"] / volume["num_shows"]) if volume["num_shows"] > 0 else None
+    ticket_comp = (volume["gmv_comp"] / volume["num_shows_comp"]) if volume["num_shows_comp"] > 0 else None
+    var_ticket = calcular_variacao_percentual(ticket, ticket_comp) if (ticket_comp is not None and ticket_comp != 0 and ticket is not None) else None
+    return ticket, var_ticket
 
-    # Erros Operacionais (Op. Shows)
-    erros_op = filtrar_base2_op_shows(df_base2, ano, periodo, mes)
-    erros_op_comp = filtrar_base2_op_shows_compare(df_base2, ano, periodo, mes, comparar_opcao)
-    var_errosop = calcular_variacao_percentual(erros_op, erros_op_comp) if erros_op_comp is not None else None
 
-    # Pessoas / RH
-    df_pessoas = carregar_pessoas()
-    met_princ, met_comp_rh = metricas_rh_quick( # Renomeado met_comp para met_comp_rh para evitar conflito
-        ano, periodo, mes,
-        comparar_opcao=comparar_opcao,
-        custom_range=custom_range_principal_tuple if periodo == 'custom-range' else None,
-        df_pessoas_global=df_pessoas
-    )
+@DASHBOARD_KPIS.node("cidades", deps=("agregados",))
+def _kpi_cidades(agregados):
+    cidades = agregados["principal"]["cidades"]
+    cidades_comp = agregados["comparacao"]["cidades"]
+    var_cidades = calcular_variacao_percentual(cidades, cidades_comp) if cidades_comp > 0 else None
+    return cidades, var_cidades
 
-    def pct(a, b):
-        return calcular_variacao_percentual(a, b) if (b not in (None, 0)) else None
 
-    # GMV e Número de Shows
-    df_principal["Valor Total do Show"] = pd.to_numeric(df_principal["Valor Total do Show"], errors='coerce').fillna(0)
-    gmv = df_principal["Valor Total do Show"].sum() if not df_principal.empty else 0
-    num_shows = df_principal["Id do Show"].nunique() if not df_principal.empty else 0
-    if not df_comp.empty:
-        df_comp["Valor Total do Show"] = pd.to_numeric(df_comp["Valor Total do Show"], errors='coerce').fillna(0)
-    gmv_comp = df_comp["Valor Total do Show"].sum() if not df_comp.empty else 0
-    num_shows_comp = df_comp["Id do Show"].nunique() if not df_comp.empty else 0
-    var_gmv = calcular_variacao_percentual(gmv, gmv_comp) if gmv_comp is not None else None
-    var_num = calcular_variacao_percentual(num_shows, num_shows_comp) if num_shows_comp is not None else None
-
-    # Ticket Médio
-    ticket = (gmv / num_shows) if num_shows > 0 else None
-    ticket_comp = (gmv_comp / num_shows_comp) if num_shows_comp > 0 else None
-    var_ticket = calcular_variacao_percentual(ticket, ticket_comp) if (ticket_comp is not None and ticket_comp != 0 and ticket is not None) else None
+@DASHBOARD_KPIS.node("palcos_ativos", deps=("agregados",))
+def _kpi_palcos_ativos(agregados):
+    palcos_ativos = agregados["principal"]["casas"]
+    palcos_ativos_comp = agregados["comparacao"]["casas"]
+    return palcos_ativos, calcular_variacao_percentual(palcos_ativos, palcos_ativos_comp)
 
-    # Cidades
-    cidades = df_principal["Cidade"].nunique() if not df_principal.empty else 0
-    cidades_comp = df_comp["Cidade"].nunique() if not df_comp.empty else 0
-    var_cidades = calcular_variacao_percentual(cidades, cidades_comp) if cidades_comp is not None and cidades_comp > 0 else None
 
-    # Faturamento
-    colunas_fat = [
-        "Comissão B2B", "Comissão B2C", "Antecipação de Cachês",
-        "Curadoria", "SaaS Percentual", "SaaS Mensalidade", "Notas Fiscais"
-    ]
-    fat = 0.0
-    if not df_principal.empty:
-        valid_cols = [c for c in colunas_fat if c in df_principal.columns]
-        if valid_cols:
-            df_fat_f = df_principal[valid_cols].apply(pd.to_numeric, errors='coerce').fillna(0)
-            fat = df_fat_f.sum().sum()
-    fat_comp = 0.0
-    if not df_comp.empty:
-        valid_cols_c = [c for c in colunas_fat if c in df_comp.columns]
-        if valid_cols_c:
-            df_fat_c = df_comp[valid_cols_c].apply(pd.to_numeric, errors='coerce').fillna(0)
-            fat_comp = df_fat_c.sum().sum()
-    var_fat = calcular_variacao_percentual(fat, fat_comp) if fat_comp is not None and fat_comp != 0 else None
+@DASHBOARD_KPIS.node("artistas_ativos", deps=("agregados",))
+def _kpi_artistas_ativos(agregados):
+    artistas_ativos = agregados["principal"]["artistas"] or 0
+    artistas_ativos_comp = agregados["comparacao"]["artistas"] or 0
+    var_artistas_ativos = calcular_variacao_percentual(artistas_ativos, artistas_ativos_comp) if artistas_ativos_comp > 0 else None
+    return artistas_ativos, var_artistas_ativos
+
 
-    # Take Rate GMV
+# ― financeiro ----------------------------------------------------------------------
+@DASHBOARD_KPIS.node("faturamento", deps=("agregados",))
+def _kpi_faturamento(agregados):
+    fat = agregados["principal"]["fat"]
+    fat_comp = agregados["comparacao"]["fat"]
+    var_fat = calcular_variacao_percentual(fat, fat_comp) if fat_comp != 0 else None
+    return fat, fat_comp, var_fat
+
+
+@DASHBOARD_KPIS.node("take_rate", deps=("agregados", "volume"))
+def _kpi_take_rate(agregados, volume):
+    gmv, gmv_comp = volume["gmv"], volume["gmv_comp"]
+    soma_b2b, soma_b2b_c = agregados["principal"]["b2b"], agregados["comparacao"]["b2b"]
     take_rate_gmv = None
-    if gmv > 0 and "Comissão B2B" in df_principal.columns:
-        soma_b2b = pd.to_numeric(df_principal["Comissão B2B"], errors='coerce').fillna(0).sum()
-        take_rate_gmv = (soma_b2b / gmv)*100 if gmv > 0 else None
+    if gmv > 0 and soma_b2b is not None:
+        take_rate_gmv = (soma_b2b / gmv)*100
     take_rate_gmv_comp = None
-    if gmv_comp > 0 and "Comissão B2B" in df_comp.columns:
-        soma_b2b_c = pd.to_numeric(df_comp["Comissão B2B"], errors='coerce').fillna(0).sum()
-        take_rate_gmv_comp = (soma_b2b_c / gmv_comp)*100 if gmv_comp > 0 else None
+    if gmv_comp > 0 and soma_b2b_c is not None:
+        take_rate_gmv_comp = (soma_b2b_c / gmv_comp)*100
     var_takegmv = calcular_variacao_percentual(take_rate_gmv, take_rate_gmv_comp) if (take_rate_gmv_comp is not None and take_rate_gmv_comp != 0) else None
+    return take_rate_gmv, var_takegmv
+
 
-    # Custos Totais e Lucro
-    custos_tot = filtrar_base2(df_base2, ano, periodo, mes, custom_range=custom_range_principal_tuple) # Passa custom_range
-    custos_comp = filtrar_base2_comparacao(df_base2, ano, periodo, mes, comparar_opcao, custom_range_comparacao=custom_range_comparacao_tuple) # Passa custom_range_comparacao
+@DASHBOARD_KPIS.node("custos_lucro", deps=("base2", "principal", "comparacao", "faturamento",
+                                            "ano", "periodo", "mes", "comparar_opcao"))
+def _kpi_custos_lucro(base2, principal, comparacao, faturamento, ano, periodo, mes, comparar_opcao):
+    fat, fat_comp, _ = faturamento
+    custos_tot = filtrar_base2(base2, ano, periodo, mes, custom_range=principal["custom"])
+    custos_comp = filtrar_base2_comparacao(base2, ano, periodo, mes, comparar_opcao, custom_range_comparacao=comparacao["custom"])
     var_custos = calcular_variacao_percentual(custos_tot, custos_comp) if (custos_tot is not None and custos_comp is not None and custos_comp != 0) else None
     lucro_liquido = (fat - custos_tot) if (custos_tot is not None) else None
     lucro_liquido_comp = (fat_comp - custos_comp) if (custos_comp is not None) else None
     var_lucro = None
     if lucro_liquido is not None and lucro_liquido_comp is not None:
         var_lucro = calcular_variacao_percentual(lucro_liquido, lucro_liquido_comp)
+    return {"custos": custos_tot, "var_custos": var_custos,
+            "lucro": lucro_liquido, "var_lucro": var_lucro}
 
-    # KPIs de Novos Palcos
-    df_new_period = filtrar_novos_palcos_por_periodo(df_casas_earliest, ano, periodo, mes, custom_range_principal_tuple)
-    novos_palcos = df_new_period.shape[0] if not df_new_period.empty else 0
-    
-    df_new_period_comp = filtrar_novos_palcos_por_comparacao(df_casas_earliest, ano, periodo, mes, comparar_opcao, custom_range_comparacao_tuple)
-    comp_np = df_new_period_comp.shape[0] if not df_new_period_comp.empty else 0
-    var_novospalcos = calcular_variacao_percentual(novos_palcos, comp_np) if comp_np is not None and comp_np > 0 else None
 
-    # Lifetime Médio (Novos)
+# ― novos palcos --------------------------------------------------------------------
+@DASHBOARD_KPIS.node("novos", deps=("casas", "principal", "ano", "periodo", "mes"))
+def _kpi_novos(casas, principal, ano, periodo, mes):
+    return filtrar_novos_palcos_por_periodo(casas[0], ano, periodo, mes, principal["custom"])
+
+
+@DASHBOARD_KPIS.node("novos_comp", deps=("casas", "comparacao", "ano", "periodo", "mes",
+                                          "comparar_opcao"))
+def _kpi_novos_comp(casas, comparacao, ano, periodo, mes, comparar_opcao):
+    return filtrar_novos_palcos_por_comparacao(casas[0], ano, periodo, mes, comparar_opcao, comparacao["custom"])
+
+
+@DASHBOARD_KPIS.node("novos_palcos", deps=("novos", "novos_comp"))
+def _kpi_novos_palcos(novos, novos_comp):
+    novos_palcos = novos.shape[0] if not novos.empty else 0
+    comp_np = novos_comp.shape[0] if not novos_comp.empty else 0
+    var_novospalcos = calcular_variacao_percentual(novos_palcos, comp_np) if comp_np > 0 else None
+    return novos_palcos, var_novospalcos
+
+
+@DASHBOARD_KPIS.node("lifetime", deps=("casas", "novos", "novos_comp"))
+def _kpi_lifetime(casas, novos, novos_comp):
+    df_casas_earliest, df_casas_latest = casas
     lifetime_medio_str = "-"
     var_lifetime = None
+
     def calc_lifetime(novos_ids):
         if df_casas_earliest is None or df_casas_latest is None:
             return None
         df_m = pd.merge(
             df_casas_earliest[["Id da Casa", "EarliestShow"]],
             df_casas_latest[["Id da Casa", "LastShow"]],
-            on="Id da Casa", 
+            on="Id da Casa",
             how="inner"
         )
         df_m = df_m[df_m["Id da Casa"].isin(novos_ids)]
@@ -2360,9 +2268,10 @@ def atualizar_kpis(
         if df_m.empty:
             return None
         return df_m["DiffDays"].mean()
-    if not df_new_period.empty:
-        nids = df_new_period["Id da Casa"].unique()
-        avg_days = calc_lifetime(nids)
+
+    avg_days = None
+    if not novos.empty:
+        avg_days = calc_lifetime(novos["Id da Casa"].unique())
         if avg_days is not None:
             if avg_days < 30:
                 lifetime_medio_str = f"{int(avg_days)}d"
@@ -2373,71 +2282,40 @@ def atualizar_kpis(
                 else:
                     anos_ = meses_/12
                     lifetime_medio_str = f"{anos_:.1f}y"
-    if not df_new_period_comp.empty: # Usa df_new_period_comp
-        nids_comp = df_new_period_comp["Id da Casa"].unique()
-        avg_days_comp = calc_lifetime(nids_comp)
+    if not novos_comp.empty:
+        avg_days_comp = calc_lifetime(novos_comp["Id da Casa"].unique())
         if avg_days_comp and avg_days_comp > 0 and lifetime_medio_str != "-":
-            avg_days_principal = calc_lifetime(df_new_period["Id da Casa"].unique())
-            if avg_days_principal is not None:
-                var_lifetime = calcular_variacao_percentual(avg_days_principal, avg_days_comp)
+            var_lifetime = calcular_variacao_percentual(avg_days, avg_days_comp)
+    return lifetime_medio_str, var_lifetime
+
 
-    # Faturamento dos Novos Palcos
+@DASHBOARD_KPIS.node("fat_novos", deps=("principal", "comparacao", "novos", "novos_comp"))
+def _kpi_fat_novos(principal, comparacao, novos, novos_comp):
+    df_principal, df_comp = principal["df"], comparacao["df"]
     fat_novos = 0.0
-    if not df_principal.empty and not df_new_period.empty:
-        novos_ids_ = df_new_period["Id da Casa"].unique()
-        df_princ_novos = df_principal[df_principal["Id da Casa"].isin(novos_ids_)]
-        if not df_princ_novos.empty:
-            valid_cols_n = [c for c in colunas_fat if c in df_princ_novos.columns]
-            if valid_cols_n:
-                df_princ_novos = df_princ_novos[valid_cols_n].apply(pd.to_numeric, errors='coerce').fillna(0)
-                fat_novos_ = df_princ_novos.sum().sum()
-                fat_novos = float(fat_novos_)
+    if not df_principal.empty and not novos.empty:
+        fat_novos = float(_soma_fat(df_principal[df_principal["Id da Casa"].isin(novos["Id da Casa"].unique())]))
     fat_novos_comp = 0.0
-    if not df_comp.empty and not df_new_period_comp.empty: # Usa df_new_period_comp
-        novos_ids_comp_ = df_new_period_comp["Id da Casa"].unique() # Usa df_new_period_comp
-        df_comp_novos = df_comp[df_comp["Id da Casa"].isin(novos_ids_comp_)]
-        if not df_comp_novos.empty:
-            valid_cols_nc = [c for c in colunas_fat if c in df_comp_novos.columns]
-            if valid_cols_nc:
-                df_comp_novos = df_comp_novos[valid_cols_nc].apply(pd.to_numeric, errors='coerce').fillna(0)
-                fat_novos_comp_ = df_comp_novos.sum().sum()
-                fat_novos_comp = float(fat_novos_comp_)
-    var_fat_novos = calcular_variacao_percentual(fat_novos, fat_novos_comp) if fat_novos_comp is not None and fat_novos_comp > 0 else None
-
-    # Churn de Novos Palcos
-    churn_data_novos_palcos = get_churn_variables(
-        ano, periodo, mes,
-        custom_range=custom_range_principal_tuple,
-        df_eshows_global=df_eshows, # Passando df_eshows filtrado para o período principal
-        # start_date e end_date são redundantes se custom_range é bem tratado dentro de get_churn_variables
-        # A função get_churn_variables pode precisar de ajuste para priorizar custom_range
-        # ou podemos manter start_date/end_date aqui se forem usados diretamente por calcular_churn dentro dela
-        start_date=custom_range_principal_tuple[0] if custom_range_principal_tuple else None,
-        end_date=custom_range_principal_tuple[1] if custom_range_principal_tuple else None,
-        # Adicionar lógica para filtrar por apenas novos palcos se necessário, ou ajustar get_churn_variables
-        # Esta chamada é para CHURN GERAL, não especificamente de novos palcos.
-        # Para CHURN DE NOVOS PALCOS, o cálculo original era:
-        # churn_count_novos = calcular_churn_novos_palcos(...)
-        # Vamos manter o cálculo específico para churn de novos palcos por enquanto, 
-        # a menos que get_churn_variables seja adaptada para isso.
-    )
-    # O KPI no dashboard é "Churn de Novos Palcos", não churn geral.
-    # Portanto, o cálculo original de `calcular_churn_novos_palcos` deve ser mantido e não substituído por `get_churn_variables` diretamente aqui.
-    # A instrução era "troque cálculo manual de NRR/Churn por get_nrr_variables(...) e get_churn_variables(...)"
-    # Isso se aplica ao Churn geral, não ao Churn de Novos Palcos que tem uma lógica diferente.
-    # Se houver um card de "Churn" geral, ele seria substituído. No layout atual, parece que não há.
-    # O card existente é "Churn de Novos Palcos".
-
-    # Mantendo cálculo original para Churn de Novos Palcos:
+    if not df_comp.empty and not novos_comp.empty:
+        fat_novos_comp = float(_soma_fat(df_comp[df_comp["Id da Casa"].isin(novos_comp["Id da Casa"].unique())]))
+    var_fat_novos = calcular_variacao_percentual(fat_novos, fat_novos_comp) if fat_novos_comp > 0 else None
+    return fat_novos, var_fat_novos
+
+
+@DASHBOARD_KPIS.node("churn_novos", deps=("eshows", "casas", "principal", "comparacao", "novos",
+                                           "ano", "periodo", "mes", "comparar_opcao"))
+def _kpi_churn_novos(eshows, casas, principal, comparacao, novos, ano, periodo, mes, comparar_opcao):
+    df_casas_earliest = casas[0]
+    custom_principal, custom_comp = principal["custom"], comparacao["custom"]
     churn_count_novos = calcular_churn_novos_palcos(
         ano,
         periodo,
         mes,
-        custom_range_principal_tuple[0] if custom_range_principal_tuple else None, # start_date_main
-        custom_range_principal_tuple[1] if custom_range_principal_tuple else None, # end_date_main
+        custom_principal[0] if custom_principal else None,  # start_date_main
+        custom_principal[1] if custom_principal else None,  # end_date_main
         df_casas_earliest,
-        df_eshows,
-        df_new_period, # Novos palcos do período principal
+        eshows,
+        novos,  # Novos palcos do período principal
         dias_sem_show=45,
         uf=None
     )
@@ -2449,23 +2327,23 @@ def atualizar_kpis(
 
     if comparar_opcao == 'ano_anterior':
         ano_churn_comp_np = ano - 1
-        if custom_range_principal_tuple:
-            sdt_comp_churn_np = custom_range_principal_tuple[0] - pd.DateOffset(years=1)
-            edt_comp_churn_np = custom_range_principal_tuple[1] - pd.DateOffset(years=1)
+        if custom_principal:
+            sdt_comp_churn_np = custom_principal[0] - pd.DateOffset(years=1)
+            edt_comp_churn_np = custom_principal[1] - pd.DateOffset(years=1)
     elif comparar_opcao == 'periodo_anterior':
         periodo_churn_comp_np, ano_churn_comp_np, mes_churn_comp_np = calcular_periodo_anterior(ano, periodo, mes)
-        if custom_range_principal_tuple:
-            duration = custom_range_principal_tuple[1] - custom_range_principal_tuple[0]
-            edt_comp_churn_np = custom_range_principal_tuple[0] - pd.Timedelta(days=1)
+        if custom_principal:
+            duration = custom_principal[1] - custom_principal[0]
+            edt_comp_churn_np = custom_principal[0] - pd.Timedelta(days=1)
             sdt_comp_churn_np = edt_comp_churn_np - duration
-    elif comparar_opcao == 'custom-compare' and custom_range_comparacao_tuple:
-        sdt_comp_churn_np, edt_comp_churn_np = custom_range_comparacao_tuple
+    elif comparar_opcao == 'custom-compare' and custom_comp:
+        sdt_comp_churn_np, edt_comp_churn_np = custom_comp
         # O ano/periodo/mes para custom_compare podem ser derivados das datas de comparação se necessário
         if sdt_comp_churn_np:
             ano_churn_comp_np = sdt_comp_churn_np.year
             mes_churn_comp_np = sdt_comp_churn_np.month
-            periodo_churn_comp_np = "custom-range" # Indica que é custom
-    
+            periodo_churn_comp_np = "custom-range"  # Indica que é custom
+
     df_new_period_comp_churn = filtrar_novos_palcos_por_periodo(df_casas_earliest, ano_churn_comp_np, periodo_churn_comp_np, mes_churn_comp_np, (sdt_comp_churn_np, edt_comp_churn_np))
 
     if not df_new_period_comp_churn.empty:
@@ -2476,110 +2354,260 @@ def atualizar_kpis(
             sdt_comp_churn_np,
             edt_comp_churn_np,
             df_casas_earliest,
-            df_eshows, 
-            df_new_period_comp_churn, # Novos palcos do período de comparação
+            eshows,
+            df_new_period_comp_churn,  # Novos palcos do período de comparação
             dias_sem_show=45,
             uf=None
         )
     if churn_count_novos_comp is not None and churn_count_novos_comp > 0:
         var_churn_novos = calcular_variacao_percentual(churn_count_novos, churn_count_novos_comp)
+    return churn_count_novos, var_churn_novos
 
 
-    # Contas Chave (Top5 Grupos do ano anterior)
-    logger.info("[atualizar_kpis] INICIANDO CÁLCULO KPIs KA")
-    top5_list = obter_top5_grupos_ano_anterior(df_eshows, ano)
-    logger.debug("[atualizar_kpis] Debug: Top 5 List para %s: %s", ano-1, top5_list)
-
-    fat_ka = 0.0
-    fat_ka_comp = 0.0
-    var_fat_ka = None
-    np_ka = 0
-    np_ka_comp = 0
-    var_np_ka = None
-    take_rate_ka = 0.0
-    take_rate_ka_comp = 0.0
-    var_takerate_ka = None
-    churn_ka_count = 0
-    churn_ka_comp = 0
-    var_churn_ka = None
-
-    # NRR para Contas Chave (substituindo cálculo manual, se houver um card para isso)
-    if top5_list:
-        logger.debug("[atualizar_kpis] Debug: top5_list NÃO está vazia. Calculando KAs...")
-        grp_names = [g[0] for g in top5_list]
-        logger.debug("[atualizar_kpis] Debug: KA Group Names: %s", grp_names)
-
-        # Faturamento KA
-        logger.debug("[atualizar_kpis] Debug: Calculando Faturamento KA...")
-        fat_ka = faturamento_dos_grupos(df_principal, top5_list)
-        fat_ka_comp = faturamento_dos_grupos(df_comp, top5_list)
-        logger.debug("[atualizar_kpis] Debug: Fat KA Princ: %s, Comp: %s", fat_ka, fat_ka_comp)
-        var_fat_ka = calcular_variacao_percentual(fat_ka, fat_ka_comp) if fat_ka_comp is not None else None
-
-        # Novos Palcos KA
-        logger.debug("[atualizar_kpis] Debug: Calculando Novos Palcos KA...")
-        np_ka = novos_palcos_dos_grupos(df_new_period, df_principal, top5_list)
-        np_ka_comp = novos_palcos_dos_grupos(df_new_period_comp, df_comp, top5_list) # Usa df_new_period_comp
-        logger.debug("[atualizar_kpis] Debug: NP KA Princ: %s, Comp: %s", np_ka, np_ka_comp)
-        var_np_ka = calcular_variacao_percentual(np_ka, np_ka_comp) if np_ka_comp is not None else None
-
-        # Take Rate KA
-        logger.debug("[atualizar_kpis] Debug: Calculando Take Rate KA...")
-        gmv_ka = 0.0
-        gmv_ka_comp = 0.0
-        df_ka_princ = df_principal[df_principal['Grupo'].isin(grp_names)]
-        df_ka_comp = df_comp[df_comp['Grupo'].isin(grp_names)]
-        if not df_ka_princ.empty:
-            gmv_ka = df_ka_princ['Valor Total do Show'].sum()
-        if not df_ka_comp.empty:
-            gmv_ka_comp = df_ka_comp['Valor Total do Show'].sum()
-        logger.debug("[atualizar_kpis] Debug: GMV KA Princ: %s, Comp: %s", gmv_ka, gmv_ka_comp)
-
-        take_rate_ka = (fat_ka / gmv_ka) * 100 if gmv_ka > 0 else 0
-        take_rate_ka_comp = (fat_ka_comp / gmv_ka_comp) * 100 if gmv_ka_comp > 0 else 0
-        logger.debug("[atualizar_kpis] Debug: Take Rate KA Princ: %s, Comp: %s", take_rate_ka, take_rate_ka_comp)
-        var_takerate_ka = calcular_variacao_percentual(take_rate_ka, take_rate_ka_comp) if take_rate_ka_comp is not None else None
-
-        # Churn KA
-        logger.debug("[atualizar_kpis] Debug: Calculando Churn KA...")
-        churn_ka_count = get_churn_ka_for_period(ano, periodo, mes, top5_list, start_date_main, end_date_main)
-        logger.debug("[atualizar_kpis] Debug: Churn KA Princ: %s", churn_ka_count)
-
-        # Calcular Churn KA Comparativo
-        logger.debug("[atualizar_kpis] Debug: Calculando Churn KA Comparativo...")
-        if comparar_opcao == 'ano_anterior':
-            logger.debug("[atualizar_kpis] Debug: Churn Comp - Ano Anterior")
-            churn_ka_comp = get_churn_ka_for_period(ano-1, periodo, mes, top5_list) # Não passa datas custom
-        elif comparar_opcao == 'periodo_anterior':
-            logger.debug("[atualizar_kpis] Debug: Churn Comp - Período Anterior")
-            per_ant, ano_ant, mes_ant = calcular_periodo_anterior(ano, periodo, mes)
-            churn_ka_comp = get_churn_ka_for_period(ano_ant, per_ant, mes_ant, top5_list) # Não passa datas custom
-        elif comparar_opcao == 'custom-compare' and start_date_compare and end_date_compare:
-            logger.debug("[atualizar_kpis] Debug: Churn Comp - Custom Compare")
-            # Passa as datas customizadas para o período de comparação
-            # A função get_churn_ka_for_period usa (ano, periodo, mes) apenas como fallback se custom_range não for passado
-            # Podemos passar ano/periodo/mes atuais ou do custom, mas as datas é que mandam.
-            # Passando ano/periodo/mes do range custom para clareza:
-            dt_comp_start = pd.to_datetime(start_date_compare)
-            churn_ka_comp = get_churn_ka_for_period(
-                dt_comp_start.year, # Usa ano/periodo/mes do custom para clareza
-                'custom-range',     # Indica que é custom
-                dt_comp_start.month,
-                top5_list,
-                start_date_compare, # Passa as datas custom
-                end_date_compare
-            )
-        else: # Caso 'sem_comparacao' ou datas custom inválidas
-            logger.debug("[atualizar_kpis] Debug: Churn Comp - Sem Comparação ou Datas Inválidas")
-            churn_ka_comp = 0
+# ― contas-chave (Top5 grupos do ano anterior) --------------------------------------
+# Ranking, faturamento, GMV, novos palcos e churn KA vêm do índice KA do ano
+# (ka_index): períodos viram searchsorted, sem varrer os frames filtrados.
+@DASHBOARD_KPIS.node("top5_ka", deps=("eshows", "ano"), after=("comparacao",))
+def _kpi_top5_ka(eshows, ano):
+    top5_list = obter_top5_grupos_ano_anterior(eshows, ano)
+    logger.debug("[atualizar_kpis] Top 5 KA para %s: %s", ano-1, top5_list)
+    return top5_list
 
-        logger.debug("[atualizar_kpis] Debug: Churn KA Comp (%s): %s", comparar_opcao, churn_ka_comp)
-        var_churn_ka = calcular_variacao_percentual(churn_ka_count, churn_ka_comp) if churn_ka_comp is not None else None
-    else:
-        logger.debug("[atualizar_kpis] Debug: top5_list está vazia para %s. KPIs de KA serão zero.", ano-1)
 
-    # Palcos Ativos
-    palcos_ativos = df_principal["Id da Casa"].nunique() if not df_principal.empty else 0
+def _limites_ka(principal, comparacao):
+    return ([principal["limites"][0], comparacao["limites"][0]],
+            [principal["limites"][1], comparacao["limites"][1]])
+
+
+@DASHBOARD_KPIS.node("ka_fat", deps=("top5_ka", "eshows", "ano", "principal", "comparacao"))
+def _kpi_ka_fat(top5_ka, eshows, ano, principal, comparacao):
+    if not top5_ka:
+        return 0.0, 0.0, None
+    fat_ka, fat_ka_comp = map(float, faturamento_ka(ano, *_limites_ka(principal, comparacao), df_eshows=eshows))
+    return fat_ka, fat_ka_comp, calcular_variacao_percentual(fat_ka, fat_ka_comp)
+
+
+@DASHBOARD_KPIS.node("ka_novos", deps=("top5_ka", "eshows", "ano", "principal", "comparacao",
+                                        "novos", "novos_comp"))
+def _kpi_ka_novos(top5_ka, eshows, ano, principal, comparacao, novos, novos_comp):
+    if not top5_ka:
+        return 0, None
+
+    def _novos_ka(limites, df_novos):
+        if df_novos is None or df_novos.empty or "Id da Casa" not in df_novos.columns:
+            return 0
+        return novos_palcos_ka(ano, *limites, df_novos["Id da Casa"], df_eshows=eshows)
+
+    np_ka = _novos_ka(principal["limites"], novos)
+    np_ka_comp = _novos_ka(comparacao["limites"], novos_comp)
+    return np_ka, calcular_variacao_percentual(np_ka, np_ka_comp)
+
+
+@DASHBOARD_KPIS.node("ka_take_rate", deps=("top5_ka", "ka_fat", "eshows", "ano",
+                                            "principal", "comparacao"))
+def _kpi_ka_take_rate(top5_ka, ka_fat, eshows, ano, principal, comparacao):
+    if not top5_ka:
+        return 0.0, None
+    fat_ka, fat_ka_comp, _ = ka_fat
+    gmv_ka_princ, gmv_ka_comp = gmv_ka(ano, *_limites_ka(principal, comparacao), df_eshows=eshows)
+
+    take_rate_ka = (fat_ka / gmv_ka_princ) * 100 if gmv_ka_princ > 0 else 0
+    take_rate_ka_comp = (fat_ka_comp / gmv_ka_comp) * 100 if gmv_ka_comp > 0 else 0
+    return take_rate_ka, calcular_variacao_percentual(take_rate_ka, take_rate_ka_comp)
+
+
+@DASHBOARD_KPIS.node("ka_churn", deps=("top5_ka", "eshows", "ano", "periodo", "mes", "comparar_opcao",
+                                        "start_date_main", "end_date_main",
+                                        "start_date_compare", "end_date_compare"))
+def _kpi_ka_churn(top5_ka, eshows, ano, periodo, mes, comparar_opcao,
+                  start_date_main, end_date_main, start_date_compare, end_date_compare):
+    if not top5_ka:
+        return 0, None
+
+    def _churn(ano_x, per_x, mes_x, inicio=None, fim=None):
+        # intervalo de get_period_start/end; grupos = KA de *ano*
+        return int(churn_ka(ano, *get_period_range(ano_x, per_x, mes_x, (inicio, fim)),
+                            df_eshows=eshows)[0])
+
+    churn_ka_count = _churn(ano, periodo, mes, start_date_main, end_date_main)
+
+    if comparar_opcao == 'ano_anterior':
+        churn_ka_comp = _churn(ano-1, periodo, mes)  # Não passa datas custom
+    elif comparar_opcao == 'periodo_anterior':
+        per_ant, ano_ant, mes_ant = calcular_periodo_anterior(ano, periodo, mes)
+        churn_ka_comp = _churn(ano_ant, per_ant, mes_ant)  # Não passa datas custom
+    elif comparar_opcao == 'custom-compare' and start_date_compare and end_date_compare:
+        # as datas é que mandam; ano/mês do range custom só por clareza
+        dt_comp_start = pd.to_datetime(start_date_compare)
+        churn_ka_comp = _churn(
+            dt_comp_start.year,
+            'custom-range',
+            dt_comp_start.month,
+            start_date_compare,
+            end_date_compare
+        )
+    else:  # Caso 'sem_comparacao' ou datas custom inválidas
+        churn_ka_comp = 0
+
+    logger.debug("[atualizar_kpis] Churn KA: %s, comp (%s): %s", churn_ka_count, comparar_opcao, churn_ka_comp)
+    return churn_ka_count, calcular_variacao_percentual(churn_ka_count, churn_ka_comp)
+
+
+# ― operação ------------------------------------------------------------------------
+@DASHBOARD_KPIS.node("palcos_vazios", deps=("ocorrencias_base", "ano", "periodo", "mes",
+                                             "comparar_opcao", "start_date_main",
+                                             "end_date_main", "start_date_compare",
+                                             "end_date_compare"),
+                     after=("comparacao",))
+def _kpi_palcos_vazios(ocorrencias_base, ano, periodo, mes, comparar_opcao,
+                       start_date_main, end_date_main, start_date_compare, end_date_compare):
+    """Palcos vazios nos dois períodos, pelo rollup diário das ocorrências."""
+    if ocorrencias_base is None or ocorrencias_base.empty:
+        logger.debug("[DEBUG] => df_ocorrencias está None ou vazio.")
+        return 0, None
+
+    def contar(argumentos):
+        if argumentos is None:
+            return 0
+        return contar_ocorrencias(*get_period_range(*argumentos), tipo="Palco vazio",
+                                  df_ocorrencias=ocorrencias_base)
+
+    palcos_vazios = contar((ano, periodo, mes, (start_date_main, end_date_main)))
+    palcos_vazios_comp = contar(argumentos_periodo_comparacao(
+        ano, periodo, mes, comparar_opcao, (start_date_compare, end_date_compare)))
+    var_palcosvazios = calcular_variacao_percentual(palcos_vazios, palcos_vazios_comp) if palcos_vazios_comp > 0 else None
+    logger.debug("[DEBUG] => Final palcos_vazios = %s, var_palcosvazios = %s", palcos_vazios, var_palcosvazios)
+    return palcos_vazios, var_palcosvazios
+
+
+@DASHBOARD_KPIS.node("erros_op", deps=("base2", "ano", "periodo", "mes", "comparar_opcao"),
+                     after=("comparacao",))
+def _kpi_erros_op(base2, ano, periodo, mes, comparar_opcao):
+    erros_op = filtrar_base2_op_shows(base2, ano, periodo, mes)
+    erros_op_comp = filtrar_base2_op_shows_compare(base2, ano, periodo, mes, comparar_opcao)
+    var_errosop = calcular_variacao_percentual(erros_op, erros_op_comp) if erros_op_comp is not None else None
+    return erros_op, var_errosop
+
+
+# ― pessoas -------------------------------------------------------------------------
+@DASHBOARD_KPIS.node("rh", deps=("pessoas", "principal", "ano", "periodo", "mes", "comparar_opcao"),
+                     after=("comparacao",))
+def _kpi_rh(pessoas, principal, ano, periodo, mes, comparar_opcao):
+    return metricas_rh_quick(
+        ano, periodo, mes,
+        comparar_opcao=comparar_opcao,
+        custom_range=principal["custom"] if periodo == 'custom-range' else None,
+        df_pessoas_global=pessoas
+    )
+
+
+# =================================================================================
+# AQUI VAI O CONJUNTO DE CALLBACKS DO DASHBOARD (KPIs)
+# =================================================================================
+@app.callback(
+    [
+        Output('kpi-gmv-col','children'),
+        Output('kpi-numshows-col','children'),
+        Output('kpi-ticket-col','children'),
+        Output('kpi-cidades-col','children'),
+
+        Output('kpi-fat-col','children'),
+        Output('kpi-takerate-gmv-col','children'),
+        Output('kpi-custos-col','children'),
+        Output('kpi-lucro-col','children'),
+
+        Output('kpi-novospalcos-col','children'),
+        Output('kpi-fatnovospalcos-col','children'),
+        Output('kpi-lifetimemedio-col','children'),
+        Output('kpi-churn-novospalcos-col','children'),
+
+        Output('kpi-ka-fat-col','children'),
+        Output('kpi-ka-novospalcos-col','children'),
+        Output('kpi-ka-takerate-col','children'),
+        Output('kpi-ka-churn-col','children'),
+
+        Output('kpi-palcos-ativos-col','children'),
+        Output('kpi-artistas-ativos-col','children'),
+        Output('kpi-palcosvazios-col','children'),
+        Output('kpi-errosop-col','children'),
+
+        Output('cards-pessoas','children'),
+
+        Output('periodo-analisado','children'),
+
+        # Armazena todos os indicadores (simples + históricos)
+        Output('all-indicators-store', 'data'),
+    ],
+    [
+        Input('dashboard-ano-dropdown','value'),
+        Input('dashboard-periodo-dropdown','value'),
+        Input('dashboard-mes-dropdown','value'),
+        Input('dashboard-date-range-picker','start_date'),
+        Input('dashboard-date-range-picker','end_date'),
+        Input('dashboard-comparar-dropdown','value'),
+        Input('dashboard-date-range-picker-compare','start_date'),
+        Input('dashboard-date-range-picker-compare','end_date'),
+        Input("dummy-store","data"),   # para atualizar quando a base recarrega
+        Input("url","pathname")        # para checar a rota atual
+    ],
+    [State('all-indicators-store','data')],  # Lê o store já existente
+    prevent_initial_call=True
+)
+def atualizar_kpis(
+    ano, periodo, mes,
+    start_date_main, end_date_main,
+    comparar_opcao, start_date_compare, end_date_compare,
+    dummy_data,
+    current_pathname,
+    existing_indicators,
+):
+    # ————————————————————————————————————————————————————————————————
+    # 0) Só roda no /dashboard
+    # ————————————————————————————————————————————————————————————————
+    if current_pathname != "/dashboard":
+        raise dash.exceptions.PreventUpdate
+
+    # ————————————————————————————————————————————————————————————————
+    # 1) Todos os indicadores pelo grafo (PreventUpdate dos nós sobe daqui);
+    #    tempos por nó em DASHBOARD_KPIS.timings
+    # ————————————————————————————————————————————————————————————————
+    r = DASHBOARD_KPIS.run({
+        "ano": ano, "periodo": periodo, "mes": mes,
+        "start_date_main": start_date_main, "end_date_main": end_date_main,
+        "comparar_opcao": comparar_opcao,
+        "start_date_compare": start_date_compare, "end_date_compare": end_date_compare,
+    })
+    label_princ = r["principal"]["label"]
+    label_comp = r["comparacao"]["label"]
+
+    gmv, var_gmv = r["volume"]["gmv"], r["volume"]["var_gmv"]
+    num_shows, var_num = r["volume"]["num_shows"], r["volume"]["var_num"]
+    ticket, var_ticket = r["ticket"]
+    cidades, var_cidades = r["cidades"]
+
+    fat, _, var_fat = r["faturamento"]
+    take_rate_gmv, var_takegmv = r["take_rate"]
+    custos_tot, var_custos = r["custos_lucro"]["custos"], r["custos_lucro"]["var_custos"]
+    lucro_liquido, var_lucro = r["custos_lucro"]["lucro"], r["custos_lucro"]["var_lucro"]
+
+    novos_palcos, var_novospalcos = r["novos_palcos"]
+    fat_novos, var_fat_novos = r["fat_novos"]
+    lifetime_medio_str, var_lifetime = r["lifetime"]
+    churn_count_novos, var_churn_novos = r["churn_novos"]
+
+    fat_ka, _, var_fat_ka = r["ka_fat"]
+    np_ka, var_np_ka = r["ka_novos"]
+    take_rate_ka, var_takerate_ka = r["ka_take_rate"]
+    churn_ka_count, var_churn_ka = r["ka_churn"]
+
+    palcos_ativos, var_palcos_ativos = r["palcos_ativos"]
+    artistas_ativos, var_artistas_ativos = r["artistas_ativos"]
+    palcos_vazios, var_palcosvazios = r["palcos_vazios"]
+    erros_op, var_errosop = r["erros_op"]
+    met_princ, met_comp_rh = r["rh"]
+
+    def pct(a, b):
+        return calcular_variacao_percentual(a, b) if (b not in (None, 0)) else None
 
     # -----------------------
     # Criação dos cards
@@ -2609,11 +2637,6 @@ def atualizar_kpis(
     card_palcos_vazios  = criar_card_kpi_shows("Palcos Vazios", palcos_vazios, var_palcosvazios, label_comp, format_type='numero')
     card_erros_op       = criar_card_kpi_shows("Erros Operacionais", erros_op, var_errosop, label_comp, format_type='monetario', is_negative=True)
 
-    card_palcos_ativos  = criar_card_kpi_shows("Palcos Ativos", palcos_ativos, var_palcos_ativos, label_comp, format_type='numero')
-    # card_artistas_ativos já definido acima - não precisamos redefini-lo
-    card_palcos_vazios  = criar_card_kpi_shows("Palcos Vazios", palcos_vazios, var_palcosvazios, label_comp, format_type='numero')
-    card_erros_op       = criar_card_kpi_shows("Erros Operacionais", erros_op, var_errosop, label_comp, format_type='monetario', is_negative=True)
-
     # Cards da seção Pessoas
     cards_pessoas = [
         dbc.Col(
@@ -2698,8 +2721,10 @@ def atualizar_kpis(
     
     # Garantir que os nomes das chaves aqui correspondam exatamente aos usados no HIST_KPI_MAP
     # e que o callback de kpis_charts.py também use esses mesmos nomes.
+    # Só os históricos já calculados: o callback não espera pelos pendentes
+    # (o warm-up os completa em background e o próximo refresh já os inclui)
     historical_indicators_from_map = {}
-    for kpi_key_in_map, data_dict in current_hist_kpi_map.items():
+    for kpi_key_in_map, data_dict in current_hist_kpi_map.loaded_items():
         # A chave para o all_indicators_store pode ser diferente se necessário,
         # mas vamos usar a mesma por simplicidade por enquanto, prefixada.
         store_key = f"historical_{kpi_key_in_map.lower().replace(' ', '_').replace('.', '').replace('º', '')}" 
@@ -2800,7 +2825,7 @@ def atualizar_grafico_receita_custo(
     # --------------------------------------------------------
     # 3) receita  (df_eshows)
     # --------------------------------------------------------
-    df_principal = filtrar_periodo_principal(df_eshows, ano, periodo, mes, custom_range)
+    df_principal = filtrar_periodo_principal(carregar_base_eshows(), ano, periodo, mes, custom_range)
     if df_principal.empty:
         return dash.no_update
 
@@ -2830,7 +2855,7 @@ def atualizar_grafico_receita_custo(
     # --------------------------------------------------------
     # 4) custos  (df_base2)
     # --------------------------------------------------------
-    df_cus_raw = filtrar_periodo_principal(df_base2, ano, periodo, mes, custom_range)
+    df_cus_raw = filtrar_periodo_principal(carregar_base2(), ano, periodo, mes, custom_range)
     if df_cus_raw.empty:
         df_cus = pd.DataFrame(columns=["AnoMes","Custos","AnoMesDate"])
     else:
@@ -2994,9 +3019,10 @@ import pandas as pd
 import plotly.graph_objects as go
 from dash import Input, Output, State, callback_context
 
-# Supondo que as funções e variáveis abaixo (df_eshows, formatar_valor_utils, get_nome_estado,
+# Supondo que as funções abaixo (formatar_valor_utils, get_nome_estado,
 # estado_para_arquivo_bandeira, filtrar_periodo_principal, filtrar_novos_palcos_por_periodo,
-# calcular_churn, df_casas_earliest) já estejam importadas ou definidas em outro local.
+# calcular_churn) já estejam importadas ou definidas em outro local; as bases
+# vêm de carregar_*() (registry).
 
 with open("assets/br.json","r",encoding="utf-8") as f:
     geojson_br = json.load(f)
@@ -3148,7 +3174,7 @@ def gerar_mapa_uf(ano, periodo, mes, start_date, end_date):
     Auxiliar que filtra df_eshows pelo período
     e retorna o DataFrame agregado por UF (nº de shows).
     """
-    dfp = filtrar_periodo_principal(df_eshows, ano, periodo, mes, (start_date, end_date))
+    dfp = filtrar_periodo_principal(carregar_base_eshows(), ano, periodo, mes, (start_date, end_date))
     if dfp.empty:
         return pd.DataFrame(columns=["UF","NumShows"])
     dfp["Id do Show"] = dfp["Id do Show"].astype(str)
@@ -3268,7 +3294,8 @@ def atualizar_indicadores_mapa(pathname,
     if not uf_selecionada:
         uf_selecionada = "BR"
 
-    dfp = filtrar_periodo_principal(df_eshows, ano, periodo, mes, (start_date, end_date))
+    df_casas_earliest = carregar_casas_earliest_latest()[0]
+    dfp = filtrar_periodo_principal(carregar_base_eshows(), ano, periodo, mes, (start_date, end_date))
     if uf_selecionada != "BR":
         dfp = dfp[dfp["Estado"] == uf_selecionada]
 
@@ -3409,7 +3436,7 @@ def get_waterfall_data(ano, periodo, mes):
     """Calcula categorias e valores para o gráfico Waterfall."""
 
     # ── faturamento ────────────────────────────────────────────
-    df_princ = filtrar_periodo_principal(df_eshows, ano, periodo, mes, None)
+    df_princ = filtrar_periodo_principal(carregar_base_eshows(), ano, periodo, mes, None)
     faturamento = 0
     if not df_princ.empty:
         cols_fat = [
@@ -3423,7 +3450,7 @@ def get_waterfall_data(ano, periodo, mes):
         )
 
     # ── custos ────────────────────────────────────────────────
-    df_b2 = filtrar_periodo_principal(df_base2, ano, periodo, mes, None)
+    df_b2 = filtrar_periodo_principal(carregar_base2(), ano, periodo, mes, None)
     custos = {}
     if not (df_b2 is None or df_b2.empty):
         cols_custo = [
@@ -3447,7 +3474,7 @@ def get_donut_data(ano, periodo, mes):
     Retorna (categories_donut, values_donut) – Top-4 departamentos + “Outras”.
     Se o total de despesas for 0, devolve listas vazias.
     """
-    df_b2 = filtrar_periodo_principal(df_base2, ano, periodo, mes, None)
+    df_b2 = filtrar_periodo_principal(carregar_base2(), ano, periodo, mes, None)
     if df_b2 is None or df_b2.empty:
         return [], []
 
@@ -3503,13 +3530,16 @@ COLUNAS_FATURAMENTO = [
     Output("kpi-dash-card-title", "children"),   # NOVO
     Output("kpi-dash-modal-graph", "figure"),
     [Input({"type": "kpi-dash-icon", "index": ALL}, "n_clicks"),
-     Input("close-kpi-dash-modal", "n_clicks")],
+     Input("close-kpi-dash-modal", "n_clicks"),
+     Input("kpi-dash-window", "value")],
     State("kpi-dash-modal", "is_open"),
+    State("kpi-dash-modal-title", "children"),
     prevent_initial_call=True
 )
-def toggle_kpi_modal(n_clicks_list, close_clicks, is_open):
+def toggle_kpi_modal(n_clicks_list, close_clicks, janela, is_open, kpi_aberto):
     """
     Abre o modal com o gráfico do KPI clicado ou fecha quando o X é clicado.
+    Trocar a janela (12/24/36 meses ou tudo) redesenha o KPI aberto.
 
     • Mantém a lógica original (todos os outros KPIs já funcionam).
     • Corrige a captura do ID para casos com ponto no nome
@@ -3526,18 +3556,27 @@ def toggle_kpi_modal(n_clicks_list, close_clicks, is_open):
     if triggered == "close-kpi-dash-modal":
         return False, dash.no_update, dash.no_update, dash.no_update
 
-    # evita abrir se nenhum ícone foi realmente clicado ou já está aberto
-    if not any(n_clicks_list) or is_open:
-        return False, dash.no_update, dash.no_update, dash.no_update
+    if janela is None:
+        janela = HIST_JANELAS[0]
+
+    if triggered == "kpi-dash-window":
+        # só redesenha se há um KPI aberto
+        if not is_open or not kpi_aberto:
+            raise PreventUpdate
+        kpi_index = kpi_aberto
+    else:
+        # evita abrir se nenhum ícone foi realmente clicado ou já está aberto
+        if not any(n_clicks_list) or is_open:
+            return False, dash.no_update, dash.no_update, dash.no_update
 
-    # -------- nome do KPI (index) ---------------------------------------
-    kpi_index = json.loads(triggered)["index"]
+        # -------- nome do KPI (index) -----------------------------------
+        kpi_index = json.loads(triggered)["index"]
 
     # -------- classe utilitária p/ generate_kpi_figure ------------------
     class DashboardKPI:
         def __init__(self):
-            self.df = df_eshows
-            self.df_clientes = df_base2
+            self.df = carregar_base_eshows()
+            self.df_clientes = carregar_base2()
             self.kpi_to_column = {
                 "GMV": "Valor Total do Show",
                 "Faturamento Eshows": "Faturamento",
@@ -3591,18 +3630,30 @@ def toggle_kpi_modal(n_clicks_list, close_clicks, is_open):
     else:
         format_type = "numero"
 
-    # -------- gera o gráfico -------------------------------------------
+    # -------- gera o gráfico (ou reaproveita o JSON de outro worker) ----
     today = datetime.now()
+    partes_fig = (kpi_index, janela, format_type, today.date())
+    tabelas_fig = HIST_KPI_MAP.tabelas(kpi_index) if kpi_index in HIST_KPI_MAP else None
+    tag_fig = registry.content_tag(tabelas_fig)
+    fig_json = None if tag_fig is None else shared_cache.get("figura", partes_fig,
+                                                            tabelas=tabelas_fig)
     try:
-        fig = generate_kpi_figure(
-            kpi_name=kpi_index,
-            ano=today.year,
-            mes=today.month,
-            dashboard=dashboard_instance,
-            chart_type="auto",
-            format_type=format_type,
-            animated=True
-        )
+        if fig_json is not None:
+            fig = json.loads(fig_json)
+        else:
+            fig = generate_kpi_figure(
+                kpi_name=kpi_index,
+                ano=today.year,
+                mes=today.month,
+                dashboard=dashboard_instance,
+                chart_type="auto",
+                format_type=format_type,
+                animated=True,
+                months=janela
+            )
+            if tag_fig is not None:
+                shared_cache.put("figura", partes_fig, fig.to_json(),
+                                 tabelas=tabelas_fig, tag=tag_fig)
     except Exception as e:
         fig = go.Figure()
         fig.add_annotation(
@@ -3613,7 +3664,10 @@ def toggle_kpi_modal(n_clicks_list, close_clicks, is_open):
         )
 
     # -------- títulos ---------------------------------------------------
-    card_title = f"{kpi_index} – Evolução nos últimos 12 meses"
+    if janela:
+        card_title = f"{kpi_index} – Evolução nos últimos {janela} meses"
+    else:
+        card_title = f"{kpi_index} – Evolução desde o início"
     return True, kpi_index, card_title, fig
 
 # =========================================================
@@ -0,0 +1,88 @@
+"""
+warmup.py — aquecimento opcional dos dados em background
+--------------------------------------------------------
+Nada pesado roda no import: bases, históricos e o PDF de OKRs carregam no
+primeiro acesso de cada rota. Com WARMUP=1 (padrão) uma thread daemon
+adianta esse trabalho logo após o boot, enquanto o gunicorn já responde
+ao health check. Os históricos só entram no aquecimento com WARMUP_HIST=1;
+por padrão cada um é calculado quando alguém abre o gráfico.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+
+from app.data.data_manager import prefetch_tables
+from app.data.modulobase import (
+    carregar_base_eshows,
+    carregar_base2,
+    carregar_ocorrencias,
+    carregar_pessoas,
+    carregar_base_inad,
+    carregar_metas,
+    carregar_custosabertos,
+    carregar_npsartistas,
+    carregar_casas_earliest_latest,
+)
+from app.data import registry
+
+logger = logging.getLogger(__name__)
+
+WARMUP = os.getenv("WARMUP", "1") == "1"
+WARMUP_HIST = os.getenv("WARMUP_HIST", "0") == "1"
+
+_started = False
+_lock = threading.Lock()
+
+# ordem = rota mais acessada primeiro (dashboard → kpis → okrs)
+_LOADERS = (
+    carregar_base_eshows,
+    carregar_base2,
+    carregar_ocorrencias,
+    carregar_casas_earliest_latest,
+    carregar_pessoas,
+    carregar_base_inad,
+    carregar_npsartistas,
+    carregar_custosabertos,
+    carregar_metas,
+)
+
+
+def _run() -> None:
+    t0 = time.perf_counter()
+    try:
+        prefetch_tables()
+    except Exception as e:
+        logger.error("[warmup] prefetch falhou: %s", e)
+
+    for loader in _LOADERS:
+        try:
+            loader()
+        except Exception as e:
+            logger.error("[warmup] %s falhou: %s", loader.__name__, e)
+    logger.info("[warmup] bases prontas em %.1fs", time.perf_counter() - t0)
+    registry.log_memory()
+
+    # derivados: estratégia do PDF e (opcional) históricos
+    from app.kpis.kpis import get_strategy_info
+
+    get_strategy_info()
+    if WARMUP_HIST:
+        from app.core.config_data import HIST_KPI_MAP
+
+        HIST_KPI_MAP.warm_up()
+    logger.info("[warmup] concluído em %.1fs", time.perf_counter() - t0)
+
+
+def start_warmup() -> None:
+    """Dispara o aquecimento uma única vez por processo (se WARMUP=1)."""
+    global _started
+    if not WARMUP:
+        return
+    with _lock:
+        if _started:
+            return
+        _started = True
+    threading.Thread(target=_run, name="warmup", daemon=True).start()
@@ -4,11 +4,13 @@ e define quais colunas estão em centavos (para dividir por 100).
 
 • Se surgir coluna nova, adicione o alias em MAPPING
 • Se for valor em centavos, inclua no CENTS_MAPPING
+• Se a coluna nova for usada no dashboard, inclua-a em FETCH_SPECS
+  (quando a tabela tiver projeção declarada)
 """
 from __future__ import annotations
 
 import logging
-from typing import Dict, List
+from typing import Any, Dict, List, Tuple
 import pandas as pd
 
 logger = logging.getLogger(__name__)
@@ -414,6 +416,62 @@ PERCENT_COLS = [
     "NPS_Equipe", "NPS_Contratante", "NPS_Artistas",
 ]
 
+# ────────────────────────────────────────────────────────────
+# 9) PROJEÇÃO / FILTROS ENVIADOS AO SUPABASE
+# ────────────────────────────────────────────────────────────
+# Nomes *originais* do Supabase. "columns" vira o select() do PostgREST e
+# "filters" são (operador, coluna, valor) aplicados no servidor.
+# Tabela ausente → select("*") sem filtro.
+#
+# "order" é a chave primária usada no ORDER BY da paginação: só tabelas com
+# ordem estável são baixadas em páginas paralelas (OFFSET/LIMIT sem ORDER BY
+# pode repetir ou pular linhas); as demais seguem página a página.
+#
+# baseeshows: Valor_Total é descartada pelo dedup (mesmo alias de
+# Valor_Bruto); Primeiro_Dia_Mes / Data_Pagamento saem no sanitize e
+# Dia / Mes / Ano são recalculados a partir de Data.
+FETCH_SPECS: Dict[str, Dict[str, Any]] = {
+    "baseeshows": {
+        "columns": [
+            "p_ID", "c_ID", "Casa", "UF", "Cidade", "Data", "Artista",
+            "Valor_Bruto", "Valor_Liquido",
+            "Comissao_Eshows_B2B", "Comissao_Eshows_B2C", "Taxa_Adiantamento",
+            "Curadoria", "SAAS_Percentual", "SAAS_Mensalidade", "Taxa_Emissao_NF",
+            "GRUPO_CLIENTES", "NOTA",
+        ],
+        "filters": [("gte", "Data", "2022-01-01")],
+        "order": "p_ID",
+    },
+    "boletocasas": {"order": "ID_Boleto"},
+    # sanitize_inad_df mantém só estas (+ idx, chave do sync incremental)
+    "boletoartistas": {
+        "columns": ["idx", "ID_Boleto", "ID", "NOME", "Adiantamento", "Valor_Bruto"],
+        "order": "idx",
+    },
+    "custosabertos": {"order": "id_custo"},
+}
+
+
+def select_clause(table: str) -> str:
+    """
+    Monta o parâmetro select do PostgREST para a tabela ("*" se não houver
+    projeção). Nomes fora do padrão identificador vão entre aspas.
+    """
+    cols = FETCH_SPECS.get(table.lower(), {}).get("columns")
+    if not cols:
+        return "*"
+    return ",".join(c if c.isidentifier() else f'"{c}"' for c in cols)
+
+
+def fetch_filters(table: str) -> List[Tuple[str, str, Any]]:
+    """Filtros (operador, coluna, valor) a aplicar no servidor."""
+    return list(FETCH_SPECS.get(table.lower(), {}).get("filters", []))
+
+
+def fetch_order(table: str) -> str | None:
+    """Coluna do ORDER BY da paginação (None = sem ordem estável declarada)."""
+    return FETCH_SPECS.get(table.lower(), {}).get("order")
+
 
 # ────────────────────────────────────────────────────────────
 # Funções utilitárias
@@ -1,43 +1,94 @@
 from __future__ import annotations
 
 import datetime as _dt
+import hashlib
+import json
 import logging
+import math
 import os
 import gc
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Callable, Dict, Tuple
 
 import pandas as pd
 from dotenv import find_dotenv, load_dotenv
 from postgrest import APIError
 
-from app.data.column_mapping import rename_columns, divide_cents, CENTS_MAPPING
+try:
+    import fcntl            # trava entre workers do gunicorn (só POSIX)
+except ImportError:         # Windows: trava apenas entre threads
+    fcntl = None
+
+from app.data import registry
+from app.data.column_mapping import (
+    rename_columns, divide_cents, CENTS_MAPPING, select_clause, fetch_filters,
+    fetch_order,
+)
 
 # ────────────────────────────  logging  ────────────────────────────
 logger = logging.getLogger(__name__)
 
-# Permite desativar o cache em RAM via variável de ambiente.
+# Permite desativar o cache em RAM via variável de ambiente. O cache em RAM
+# fica no registry (só frames sanitizados); aqui o bruto vive apenas no Parquet.
 CACHE_RAM = os.getenv("CACHE_RAM", "1") == "1"
 
 # ───────────────────────  cache em Parquet  ────────────────────────
 CACHE_DIR = Path(__file__).resolve().parent / "_cache_parquet"
 CACHE_DIR.mkdir(exist_ok=True)
+# frames já sanitizados (ver modulobase._load_sanitized)
+SANITIZED_DIR = CACHE_DIR / "sanitized"
+
+CACHE_EXPIRY_HOURS: float = float(os.getenv("CACHE_EXPIRY_HOURS", "12"))
 
-CACHE_EXPIRY_HOURS: int = 12
+# Validação por fingerprint remoto (contagem exata + maior chave): passado o
+# intervalo de validação o Parquet não é descartado – só é baixado de novo se
+# o fingerprint do Supabase mudou. Tabelas com sync incremental rodam o delta
+# mesmo assim (edições recentes não mudam o fingerprint); nas demais o arquivo
+# é reaproveitado por no máximo CACHE_EXPIRY_HOURS desde o último download.
+FINGERPRINT_CHECK = os.getenv("FINGERPRINT_CHECK", "1") == "1"
+CACHE_VALIDATE_MINUTES: float = float(os.getenv("CACHE_VALIDATE_MINUTES", "15"))
 
 def _cache_path(table: str) -> Path:
     return CACHE_DIR / f"{table.lower()}.parquet"
 
-def _is_cache_fresh(p: Path) -> bool:
-    if CACHE_EXPIRY_HOURS is None or not p.exists():
-        return p.exists()
+def _expiry_seconds(table: str) -> float | None:
+    # Tabelas com sync incremental podem expirar em minutos: o refresh só
+    # baixa o delta desde o último watermark.
+    if DELTA_SYNC and table.lower() in SYNC_SPECS:
+        return DELTA_EXPIRY_MINUTES * 60
+    if FINGERPRINT_CHECK:
+        return CACHE_VALIDATE_MINUTES * 60
+    if CACHE_EXPIRY_HOURS is None:
+        return None
+    return CACHE_EXPIRY_HOURS * 3600
+
+def _is_cache_fresh(p: Path, table: str | None = None) -> bool:
+    if not p.exists():
+        return False
+    expiry = _expiry_seconds(table or p.stem)
+    if expiry is None:
+        return True
     age = (_dt.datetime.now() -
            _dt.datetime.fromtimestamp(p.stat().st_mtime)).total_seconds()
-    return age < CACHE_EXPIRY_HOURS * 3600
+    return age < expiry
+
+def _read_parquet(table: str) -> pd.DataFrame | None:
+    """Lê o Parquet do disco sem checar validade (usado pelo sync incremental)."""
+    p = _cache_path(table)
+    if not p.exists():
+        return None
+    try:
+        return pd.read_parquet(p)
+    except Exception as e:
+        logger.error("[%s] Erro ao ler Parquet cache: %s", table, e)
+        return None
 
 def _load_parquet(table: str) -> pd.DataFrame | None:
     p = _cache_path(table)
-    if _is_cache_fresh(p):
+    if _is_cache_fresh(p, table):
         try:
             df = pd.read_parquet(p)
             if df.empty:
@@ -55,13 +106,102 @@ def _load_parquet(table: str) -> pd.DataFrame | None:
     return None
 
 def _save_parquet(table: str, df: pd.DataFrame) -> None:
+    p = _cache_path(table)
+    tmp = p.with_suffix(".tmp")
     try:
-        df.to_parquet(_cache_path(table),
+        df.to_parquet(tmp,
                       index=False,
                       compression="zstd",
                       use_dictionary=True)
+        os.replace(tmp, p)          # troca atômica (vários workers)
     except Exception:
-        pass
+        tmp.unlink(missing_ok=True)
+        return
+    _write_meta(table, {"fingerprint": frame_fingerprint(df)})
+
+def frame_fingerprint(df: pd.DataFrame) -> str | None:
+    """Hash do conteúdo do DataFrame (colunas + valores, sem índice)."""
+    try:
+        h = hashlib.blake2b(digest_size=16)
+        h.update("|".join(map(str, df.columns)).encode())
+        h.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+        return h.hexdigest()
+    except Exception as e:
+        logger.debug("fingerprint indisponível: %s", e)
+        return None
+
+# ─────────────────────  metadados por tabela  ──────────────────────
+# <table>.meta.json ao lado do Parquet: watermark do sync incremental,
+# fingerprint do conteúdo bruto (chave do cache de frames sanitizados) e
+# fingerprint remoto da última sincronização ("remote").
+def _meta_path(table: str) -> Path:
+    return CACHE_DIR / f"{table.lower()}.meta.json"
+
+def _read_meta(table: str) -> dict:
+    p = _meta_path(table)
+    if not p.exists():
+        return {}
+    try:
+        return json.loads(p.read_text(encoding="utf-8"))
+    except Exception as e:
+        logger.warning("[%s] metadados ilegíveis, ignorando: %s", table, e)
+        return {}
+
+def _write_meta(table: str, fields: dict) -> None:
+    meta = _read_meta(table)
+    meta.update(fields)
+    p = _meta_path(table)
+    tmp = p.with_suffix(".tmp")
+    try:
+        tmp.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(tmp, p)
+    except Exception as e:
+        logger.warning("[%s] falha ao gravar metadados: %s", table, e)
+
+# ──────────────────────  sync incremental (delta)  ─────────────────
+# O schema não tem coluna updated_at, então o watermark é a PK monotônica
+# da tabela (linhas novas) + uma janela móvel sobre a coluna de data
+# (linhas recentes alteradas). Exclusões e edições antigas só entram no
+# full sync periódico (FULL_SYNC_HOURS).
+DELTA_SYNC = os.getenv("DELTA_SYNC", "1") == "1"
+DELTA_EXPIRY_MINUTES: float = float(os.getenv("DELTA_EXPIRY_MINUTES", "15"))
+DELTA_WINDOW_DAYS: int = int(os.getenv("DELTA_WINDOW_DAYS", "45"))
+FULL_SYNC_HOURS: float = float(os.getenv("FULL_SYNC_HOURS", "24"))
+
+# tabela → coluna-chave (nome no Supabase) e coluna de data opcional
+SYNC_SPECS: Dict[str, dict] = {
+    "baseeshows":     {"key": "p_ID",      "date": "Data"},
+    "boletocasas":    {"key": "ID_Boleto", "date": "Data Vencimento"},
+    "boletoartistas": {"key": "idx",       "date": None},
+    "custosabertos":  {"key": "id_custo",  "date": "data_competencia"},
+}
+
+def _write_sync_state(table: str, df: pd.DataFrame, *, full: bool) -> None:
+    now = _dt.datetime.now().isoformat(timespec="seconds")
+    state = {"last_sync": now}
+    if full or "last_full_sync" not in _read_meta(table):
+        state["last_full_sync"] = now
+
+    spec = SYNC_SPECS.get(table)
+    if spec is not None and not df.empty:
+        key_col = _local_col(table, spec["key"])
+        if key_col in df.columns:
+            max_key = pd.to_numeric(df[key_col], errors="coerce").max()
+            if not pd.isna(max_key):
+                state.update(key=spec["key"], max_key=int(max_key))
+    _write_meta(table, state)
+
+def _full_sync_due(state: dict, horas: float | None = None) -> bool:
+    try:
+        last_full = _dt.datetime.fromisoformat(state["last_full_sync"])
+    except (KeyError, ValueError):
+        return True
+    horas = FULL_SYNC_HOURS if horas is None else horas
+    return (_dt.datetime.now() - last_full).total_seconds() > horas * 3600
+
+def _local_col(table: str, col: str) -> str:
+    """Nome da coluna do Supabase depois do rename_columns."""
+    return rename_columns(pd.DataFrame(columns=[col]), table).columns[0]
 
 # ────────────────────────  Supabase client  ────────────────────────
 supa = None  # lazily-instantiated singleton
@@ -91,75 +231,341 @@ def _init_supabase():
 supa = _init_supabase()
 
 # ─────────────────────────  helpers comuns  ────────────────────────
-_cache: Dict[str, pd.DataFrame] = {}
-
 def dedup(df: pd.DataFrame) -> pd.DataFrame:
     if not df.empty and df.columns.duplicated().any():
         df = df.loc[:, ~df.columns.duplicated(keep="first")]
     return df
 
 # ────────────────────────  download + limpeza  ─────────────────────
-def _fetch(table: str) -> pd.DataFrame:
-    if supa is None:
-        return pd.DataFrame()
+# Páginas são baixadas em paralelo depois de um count exato (tabelas com
+# "order" em FETCH_SPECS; as demais, uma a uma). O semáforo
+# limita o total de requisições simultâneas, inclusive quando várias
+# tabelas são baixadas ao mesmo tempo (prefetch_tables).
+STEP = 1000
+FETCH_WORKERS: int = int(os.getenv("FETCH_WORKERS", "4"))
+MAX_CONCURRENT_REQUESTS: int = int(os.getenv("MAX_CONCURRENT_REQUESTS", "8"))
+_HTTP_SLOTS = threading.BoundedSemaphore(max(1, MAX_CONCURRENT_REQUESTS))
+
+def _query(table: str, filtro: Callable | None = None, **select_kw):
+    # projeção e filtros declarados em column_mapping.FETCH_SPECS
+    q = supa.table(table).select(select_clause(table), **select_kw)
+    for op, col, val in fetch_filters(table):
+        q = getattr(q, op)(col, val)
+    if filtro is not None:
+        q = filtro(q)
+    return q
+
+def _count_rows(table: str, filtro: Callable | None = None) -> int | None:
+    try:
+        with _HTTP_SLOTS:
+            resp = _query(table, filtro, count="exact", head=True).execute()
+        return resp.count
+    except Exception as err:
+        logger.warning("[%s] count exato falhou, usando paginação sequencial: %s",
+                       table, getattr(err, "message", err))
+        return None
 
-    STEP, page, pages = 1000, 0, []
+def _fetch_page(table: str, filtro: Callable | None, page: int) -> list:
+    start, end = page * STEP, (page + 1) * STEP - 1
+    q = _query(table, filtro)
+    # ordem estável evita páginas sobrepostas quando baixadas fora de ordem
+    if (col := fetch_order(table)) is not None:
+        q = q.order(col)
+    with _HTTP_SLOTS:
+        resp = q.range(start, end).execute()
+    return resp.data or []
+
+def _fetch_sequential(table: str, filtro: Callable | None, page: int = 0) -> list:
+    pages = []
     while True:
-        start, end = page * STEP, (page + 1) * STEP - 1
         try:
-            q = supa.table(table).select("*")
-            if table.lower() == "baseeshows":
-                q = q.gte("Data", "2022-01-01")
-            resp = q.range(start, end).execute()
+            data = _fetch_page(table, filtro, page)
         except APIError as err:
             logger.error("[%s] página %s: %s", table, page + 1, err.message)
-            break
+            raise
 
-        data = resp.data or []
         if not data:
             break
         pages.append(pd.DataFrame(data))
         if len(data) < STEP:
             break
         page += 1
+    return pages
+
+def _fetch_pages(table: str, filtro: Callable | None = None) -> pd.DataFrame:
+    """
+    Pagina a tabela no Supabase e devolve o DataFrame bruto (sem rename).
+    Uma página com erro propaga o APIError: resultado parcial nunca passa
+    por completo (nem por delta vazio).
+    """
+    if supa is None:
+        return pd.DataFrame()
+
+    # sem ORDER BY declarado as páginas só são confiáveis em sequência
+    paralelo = FETCH_WORKERS > 1 and fetch_order(table) is not None
+    total = _count_rows(table, filtro) if paralelo else None
+    if total is None:
+        pages = _fetch_sequential(table, filtro)
+    else:
+        n_pages = math.ceil(total / STEP)
+        pages = []
+        if n_pages:
+            with ThreadPoolExecutor(max_workers=min(FETCH_WORKERS, n_pages),
+                                    thread_name_prefix=f"fetch-{table}") as ex:
+                futures = [ex.submit(_fetch_page, table, filtro, i)
+                           for i in range(n_pages)]
+                # remonta na ordem das páginas; a primeira falha interrompe
+                # o download, como na paginação sequencial
+                for i, fut in enumerate(futures):
+                    try:
+                        data = fut.result()
+                    except APIError as err:
+                        logger.error("[%s] página %s: %s", table, i + 1, err.message)
+                        for f in futures[i + 1:]:
+                            f.cancel()
+                        raise
+                    if data:
+                        pages.append(pd.DataFrame(data))
+                # linhas inseridas depois do count
+                if len(pages) == n_pages and len(pages[-1]) == STEP:
+                    pages += _fetch_sequential(table, filtro, n_pages)
+        logger.debug("[%s] %s linhas em %s páginas (paralelo)", table, total, n_pages)
 
     if not pages:
         return pd.DataFrame()
+    return pd.concat(pages, ignore_index=True)
 
-    df = pd.concat(pages, ignore_index=True)
+def _clean(table: str, df: pd.DataFrame) -> pd.DataFrame:
+    if df.empty:
+        return df
     df = divide_cents(dedup(rename_columns(df, table)), table)
 
     for col in CENTS_MAPPING.get(table.lower(), []):
         if col in df.columns:
             df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0.0)
+    return df
 
-    logger.info("[%s] baixado: %s linhas × %s col", table, *df.shape)
+def _fetch(table: str) -> pd.DataFrame:
+    df = _clean(table, _fetch_pages(table))
+    if not df.empty:
+        logger.info("[%s] baixado: %s linhas × %s col", table, *df.shape)
     return df
 
-# ───────────────────────  cache RAM + Parquet  ─────────────────────
+def _fetch_delta(table: str, state: dict) -> pd.DataFrame | None:
+    """Baixa só as linhas novas (key > watermark) e as da janela recente."""
+    spec = SYNC_SPECS[table]
+    key, date_col = spec["key"], spec["date"]
+
+    novos = _fetch_pages(table, lambda q: q.gt(key, state["max_key"]))
+    partes = [novos]
+    if date_col:
+        desde = (_dt.date.today() - _dt.timedelta(days=DELTA_WINDOW_DAYS)).isoformat()
+        partes.append(_fetch_pages(table, lambda q: q.gte(date_col, desde)))
+
+    partes = [p for p in partes if not p.empty]
+    if not partes:
+        return pd.DataFrame()
+    delta = pd.concat(partes, ignore_index=True)
+    delta = delta.drop_duplicates(subset=[key], keep="last")
+    return _clean(table, delta)
+
+def _remote_fingerprint(table: str) -> dict | None:
+    """
+    Fingerprint barato do lado do Supabase: contagem exata (HEAD) + maior
+    chave da tabela, com os mesmos filtros do download. Sem coluna
+    updated_at no schema, edições em linhas existentes não mudam o
+    fingerprint: aparecem na janela do delta (que roda a cada validação)
+    ou, nas tabelas sem delta, no download forçado após CACHE_EXPIRY_HOURS.
+    """
+    if not FINGERPRINT_CHECK or supa is None:
+        return None
+    try:
+        with _HTTP_SLOTS:
+            n = _query(table, count="exact", head=True).execute().count
+        if n is None:
+            return None
+        fp = {"rows": int(n)}
+        if (spec := SYNC_SPECS.get(table)) is not None:
+            key = spec["key"]
+            with _HTTP_SLOTS:
+                resp = _query(table, lambda q: q.order(key, desc=True).limit(1)).execute()
+            fp["max_key"] = (resp.data or [{}])[0].get(key)
+        return fp
+    except Exception as e:
+        logger.warning("[%s] fingerprint remoto indisponível: %s", table, e)
+        return None
+
+def _touch_cache(table: str) -> None:
+    # renova a validade sem criar arquivo vazio quando ainda não há Parquet
+    try:
+        os.utime(_cache_path(table))
+    except Exception:
+        pass
+
+def _sync_delta(table: str) -> pd.DataFrame | None:
+    """
+    Atualiza o cache em disco aplicando o delta sobre o frame existente.
+    Devolve None quando o sync incremental não se aplica (sem watermark,
+    sem Parquet, full sync vencido ou erro – inclusive página com falha,
+    que nunca vira "delta vazio") – o chamador faz o full fetch.
+    """
+    if not DELTA_SYNC or supa is None or table not in SYNC_SPECS:
+        return None
+    state = _read_meta(table)
+    if "max_key" not in state or "last_full_sync" not in state:
+        return None
+    if _full_sync_due(state):
+        logger.info("[%s] full sync vencido, baixando tabela completa", table)
+        return None
+
+    base = _read_parquet(table)
+    if base is None or base.empty:
+        return None
+
+    try:
+        delta = _fetch_delta(table, state)
+    except Exception as e:
+        logger.error("[%s] falha no sync incremental: %s", table, e)
+        return None
+    if delta is None:
+        return None
+
+    key_col = _local_col(table, SYNC_SPECS[table]["key"])
+    if not delta.empty:
+        if key_col not in base.columns or key_col not in delta.columns:
+            return None
+        base = pd.concat(
+            [base[~base[key_col].isin(delta[key_col])], delta],
+            ignore_index=True,
+        )
+        _save_parquet(table, base)
+    else:
+        _touch_cache(table)             # nada mudou: só renova a validade
+
+    _write_sync_state(table, base, full=False)
+    logger.info("[%s] sync incremental: %s linhas no delta (total %s)",
+                table, len(delta), len(base))
+    return base
+
+# ─────────────────────────  cache Parquet  ─────────────────────────
+# O frame bruto não fica em RAM: quem guarda o resultado é o registry,
+# já sanitizado (ver modulobase).
+_thread_locks: Dict[str, threading.Lock] = {}
+_thread_locks_guard = threading.Lock()
+
+@contextmanager
+def _table_lock(table: str):
+    """Serializa download/sync de uma tabela entre threads e workers."""
+    with _thread_locks_guard:
+        lock = _thread_locks.setdefault(table, threading.Lock())
+    with lock:
+        if fcntl is None:
+            yield
+            return
+        with open(CACHE_DIR / f".{table}.lock", "w") as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+def _fetch_full(table: str, remote: dict | None = None) -> pd.DataFrame | None:
+    """
+    Baixa a tabela inteira e substitui o Parquet. Download com falha, vazio
+    ou menor que a contagem remota não substitui nada: devolve None e o
+    arquivo atual (com seu fingerprint) continua valendo.
+    """
+    try:
+        df_live = _fetch(table) if supa is not None else pd.DataFrame()
+    except APIError as err:
+        logger.error("[%s] download falhou, mantendo o Parquet atual: %s",
+                     table, err.message)
+        return None
+    if df_live.empty:
+        logger.error("[%s] Fetch retornou vazio! Mantendo o Parquet atual", table)
+        return None
+    if remote is not None and len(df_live) < remote["rows"]:
+        logger.error("[%s] download incompleto (%s de %s linhas), mantendo o Parquet atual",
+                     table, len(df_live), remote["rows"])
+        return None
+    _save_parquet(table, df_live)
+    _write_sync_state(table, df_live, full=True)
+    return df_live
+
 def _get(table: str, *, force_reload: bool = False) -> pd.DataFrame:
     table = table.lower()
     logger.info("carregando %s…", table)
 
-    if CACHE_RAM and not force_reload and table in _cache:
-        return _cache[table]
+    if not force_reload and (df_disk := _load_parquet(table)) is not None:
+        logger.info("[%s] carregado do Parquet (%s linhas)", table, len(df_disk))
+        return df_disk
 
-    if not force_reload:
+    with _table_lock(table):
+        if force_reload:
+            return _sync_locked(table, force=True)
+        # outro thread/worker pode ter baixado enquanto esperávamos
         if (df_disk := _load_parquet(table)) is not None:
-            if CACHE_RAM:
-                _cache[table] = df_disk
-            logger.info("[%s] carregado do Parquet (%s linhas)", table, len(df_disk))
             return df_disk
+        return _sync_locked(table)
+
+def _sync_locked(table: str, *, load: bool = True,
+                 force: bool = False) -> pd.DataFrame | None:
+    """
+    Revalida o Parquet (chamar com _table_lock): tabelas com sync
+    incremental sempre aplicam o delta; nas demais, fingerprint remoto igual
+    ao da última sincronização → reaproveita o arquivo (até
+    CACHE_EXPIRY_HOURS do último download), senão download completo. Com
+    load=False não lê o frame quando nada mudou; force=True baixa a tabela
+    inteira.
+    """
+    delta = DELTA_SYNC and table in SYNC_SPECS
+    # o delta roda de qualquer jeito: o fingerprint (2 requisições) não
+    # pouparia trabalho nessas tabelas
+    remote = None if delta else _remote_fingerprint(table)
+    state = _read_meta(table)
+    limite = min(FULL_SYNC_HOURS, CACHE_EXPIRY_HOURS)
+    if (not force and remote is not None and remote == state.get("remote")
+            and not _full_sync_due(state, limite) and _cache_path(table).exists()):
+        base = _read_parquet(table) if load else None
+        if base is not None or not load:
+            _touch_cache(table)
+            logger.info("[%s] fingerprint remoto inalterado, cache reaproveitado", table)
+            return base
+
+    df = None if force else _sync_delta(table)
+    if df is None:
+        df = _fetch_full(table, remote)
+    if df is None:
+        # Supabase fora do ar (ou resposta incompleta): segue com o arquivo
+        # atual – fingerprint inalterado, o scheduler não troca nada – e só
+        # tenta de novo no próximo intervalo de validação
+        _touch_cache(table)
+        if not load:
+            return None
+        base = _read_parquet(table)
+        return base if base is not None else pd.DataFrame()
+    # contagem diferente (linhas inseridas/excluídas durante o download)
+    # não valida o fingerprint: a próxima revalidação baixa de novo
+    if remote is not None:
+        _write_meta(table, {"remote": remote if len(df) == remote["rows"] else None})
+    return df
 
-    df_live = _fetch(table)
-    if df_live.empty:
-        logger.error("[%s] Fetch retornou vazio!", table)
-    if CACHE_RAM:
-        _cache[table] = df_live
-    else:
-        logger.debug("RAM cache desativado, dados não permanecem em memória.")
-    _save_parquet(table, df_live)
-    return df_live
+def refresh_table(table: str, *, max_age: float | None = None) -> str | None:
+    """
+    Revalida o Parquet da tabela (fingerprint remoto; delta ou download
+    completo se mudou) e devolve o fingerprint do conteúdo. Com *max_age* (segundos)
+    não consulta o Supabase se o arquivo foi sincronizado há menos tempo
+    que isso – p.ex. pelo scheduler do outro worker.
+    """
+    table = table.lower()
+    p = _cache_path(table)
+    with _table_lock(table):
+        if max_age is not None and p.exists():
+            age = _dt.datetime.now().timestamp() - p.stat().st_mtime
+            if age < max_age:
+                return _read_meta(table).get("fingerprint")
+        _sync_locked(table, load=False)
+    return _read_meta(table).get("fingerprint")
 
 # ────────────────────  interfaces públicas  ────────────────────────
 def get_df_eshows()        -> pd.DataFrame:                      return _get("baseeshows")
@@ -172,11 +578,64 @@ def get_df_custosabertos() -> pd.DataFrame:                      return _get("cu
 def get_df_npsartistas()   -> pd.DataFrame:                      return _get("npsartistas")   # ← NOVO
 
 
+def table_fingerprint(table: str) -> str | None:
+    """
+    Garante o cache bruto da tabela em dia (sync/download se vencido) e
+    devolve o fingerprint do conteúdo, sem carregar o frame quando possível.
+    """
+    table = table.lower()
+    p = _cache_path(table)
+    if not _is_cache_fresh(p, table):
+        _get(table)
+    fp = _read_meta(table).get("fingerprint")
+    if fp is None and p.exists():
+        if (df := _read_parquet(table)) is not None:
+            fp = frame_fingerprint(df)
+            if fp:
+                _write_meta(table, {"fingerprint": fp})
+    return fp
+
+
+def meta_fingerprints(tables: Tuple[str, ...]) -> Tuple[str, ...] | None:
+    """Fingerprints do último sync gravados no meta – sem tocar no Supabase."""
+    fps = tuple(_read_meta(t.lower()).get("fingerprint") for t in tables)
+    return fps if all(fps) else None
+
+
+registry.set_fingerprinter(meta_fingerprints)
+
+
+# Tabelas baixadas no boot
+ALL_TABLES: Tuple[str, ...] = (
+    "baseeshows", "base2", "pessoas", "ocorrencias", "boletocasas",
+    "boletoartistas", "metas", "custosabertos", "npsartistas",
+)
+TABLE_WORKERS: int = int(os.getenv("TABLE_WORKERS", "3"))
+
+def _warm(table: str) -> None:
+    if not _is_cache_fresh(_cache_path(table), table):
+        _get(table)
+
+def prefetch_tables(tables: Tuple[str, ...] | list[str] = ALL_TABLES) -> None:
+    """Baixa várias tabelas ao mesmo tempo para o Parquet (só as vencidas)."""
+    if not tables:
+        return
+    with ThreadPoolExecutor(max_workers=max(1, min(TABLE_WORKERS, len(tables))),
+                            thread_name_prefix="prefetch") as ex:
+        futures = {t: ex.submit(_warm, t) for t in tables}
+        for table, fut in futures.items():
+            try:
+                fut.result()
+            except Exception as e:
+                logger.error("[%s] prefetch falhou: %s", table, e)
+
+
 def reset_all_data(clear_disk: bool = False):
-    _cache.clear()
+    registry.invalidate()
     gc.collect()
     if clear_disk:
-        for p in CACHE_DIR.glob("*.parquet"):
+        for p in [*CACHE_DIR.glob("*.parquet"), *CACHE_DIR.glob("*.meta.json"),
+                  *SANITIZED_DIR.glob("*.parquet"), *SANITIZED_DIR.glob("*.arrow")]:
             try:
                 p.unlink()
             except Exception:
@@ -186,12 +645,11 @@ def reset_all_data(clear_disk: bool = False):
 def clear_table_cache(table_names: list[str]) -> None:
     """Limpa o cache de tabelas específicas"""
     for table in table_names:
-        # Remove do cache em RAM
-        if table in _cache:
-            del _cache[table]
+        # Remove do cache em RAM (datasets sanitizados que dependem da tabela)
+        if registry.invalidate_tables([table]):
             logger.info(f"[data_manager] Cache RAM limpo para tabela: {table}")
         
-        # Remove arquivo Parquet
+        # Remove arquivo Parquet (e o watermark, forçando full sync)
         cache_file = _cache_path(table)
         if cache_file.exists():
             try:
@@ -199,6 +657,7 @@ def clear_table_cache(table_names: list[str]) -> None:
                 logger.info(f"[data_manager] Cache Parquet removido para tabela: {table}")
             except Exception as e:
                 logger.error(f"[data_manager] Erro ao remover cache Parquet de {table}: {e}")
+        _meta_path(table).unlink(missing_ok=True)
     
     gc.collect()
     logger.info(f"[data_manager] Cache limpo para {len(table_names)} tabela(s)")
@@ -212,7 +671,8 @@ def reload_tables(table_names: list[str]) -> dict:
             # Limpa o cache primeiro
             clear_table_cache([table])
             
-            # Força recarregamento usando _get com force_reload=True
+            # Força recarregamento usando _get com force_reload=True;
+            # o registry reconstrói os datasets na próxima leitura
             df = _get(table, force_reload=True)
             
             results[table] = {"status": "success", "rows": len(df) if df is not None else 0}
@@ -8,22 +8,32 @@ modulobase.py — processamento, sanitização e cache dos DataFrames
       – Ocorrências
       – Inadimplência  (boleto­­casas + boleto­­artistas)
       – Metas
-• Cache em RAM para acelerar chamadas repetidas.
+• Cache em RAM (app.data.registry) para acelerar chamadas repetidas.
 • Otimização de memória: down-cast numéricos e object→category quando útil.
 """
 
 from __future__ import annotations
 
+import hashlib
 import logging
+import os
 import re
 import unicodedata
-from typing import Tuple
+from pathlib import Path
+from typing import Callable, Dict, Tuple
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
 from dateutil.relativedelta import relativedelta
 
+from app.data import registry
 from app.data.data_manager import (
+    CACHE_RAM,
+    SANITIZED_DIR,
+    table_fingerprint,
+    meta_fingerprints,
     get_df_eshows,
     get_df_base2,
     get_df_ocorrencias,
@@ -39,29 +49,18 @@ from .column_mapping import rename_columns, SUPPLIER_TO_SETOR, PERCENT_COLS
 # ─────────────────────────────  logging  ────────────────────────────
 logger = logging.getLogger(__name__)
 
-# ────────────────────────────  caches  ──────────────────────────────
-_df_eshows_cache:            pd.DataFrame | None = None
-_df_eshows_excluidos_cache:  pd.DataFrame | None = None
-_df_base2_cache:             pd.DataFrame | None = None
-_df_pessoas_cache:           pd.DataFrame | None = None
-_df_ocorrencias_cache:       pd.DataFrame | None = None
-_inad_casas_cache:           pd.DataFrame | None = None
-_inad_artistas_cache:        pd.DataFrame | None = None
-_df_metas_cache:             pd.DataFrame | None = None
-_df_custosabertos_cache:     pd.DataFrame | None = None          # NOVO
-_df_npsartistas_cache:       pd.DataFrame | None = None          # NOVO
-
 # ╭───────────────────────────  helpers  ─────────────────────────────╮
 def _slug(text: str) -> str:
     text = unicodedata.normalize("NFD", str(text))
     return re.sub(r"[^0-9a-zA-Z]+", "_", text).strip("_").lower()
 
 
-def otimizar_tipos(df: pd.DataFrame) -> pd.DataFrame:
+def otimizar_tipos(df: pd.DataFrame, copy: bool = True) -> pd.DataFrame:
     if df.empty:
         return df
 
-    df2 = df.copy()
+    # copy=False: o chamador é dono do frame e aceita a conversão no lugar
+    df2 = df.copy() if copy else df
 
     for col in df2.select_dtypes(include="int64").columns:
         df2[col] = pd.to_numeric(df2[col], downcast="integer")
@@ -119,100 +118,109 @@ def sanitize_custosabertos_df(df_raw: pd.DataFrame) -> pd.DataFrame:
     return otimizar_tipos(df.reset_index(drop=True))
 
 # ╭──────────────────────  SANITIZE BaseEshows  ──────────────────────╮
+_ESHOWS_RENAME = {
+    "p_ID": "Id do Show",
+    "c_ID": "Id da Casa",
+    "Data": "Data do Show",
+    "Data_Pagamento": "Data de Pagamento",
+    "Valor_Bruto": "Valor Total do Show",
+    "Valor_Liquido": "Valor Artista",
+    "Comissao_Eshows_B2B": "Comissão B2B",
+    "Comissao_Eshows_B2C": "Comissão B2C",
+    "Taxa_Adiantamento": "Antecipação de Cachês",
+    "Curadoria": "Curadoria",
+    "SAAS_Percentual": "SaaS Percentual",
+    "SAAS_Mensalidade": "SaaS Mensalidade",
+    "Taxa_Emissao_NF": "Notas Fiscais",
+    "GRUPO_CLIENTES": "Grupo",
+    "NOTA": "Avaliação",
+    "Ano": "Ano",
+    "Mês": "Mês",
+    "Dia": "Dia do Show",
+}
+
+
+def _col_rule(col: str, fn: Callable[[pd.Series], pd.Series]):
+    def rule(d: pd.DataFrame) -> np.ndarray | None:
+        return np.asarray(fn(d[col]), dtype=bool) if col in d.columns else None
+    return rule
+
+
+def _contem_teste(s: pd.Series) -> np.ndarray:
+    # regex só sobre os valores distintos (nomes/casas se repetem muito)
+    codes, uniques = pd.factorize(s)
+    hit = pd.Series(uniques).str.contains("Teste", case=False, na=False).to_numpy(dtype=bool)
+    return np.append(hit, False)[codes]          # código -1 (NaN) → False
+
+
+# Regras de exclusão, na ordem de prioridade: (motivo, máscara). Cada linha
+# recebe o motivo da primeira regra que casar; motivo None = descartada sem
+# ir para os excluídos (nome/casa ausentes).
+_ESHOWS_RULES: Tuple[Tuple[str | None, Callable[[pd.DataFrame], np.ndarray | None]], ...] = (
+    ("id repetido", _col_rule("Id do Show", lambda s: s.duplicated(keep="first"))),
+    ("nome teste", _col_rule("Nome do Artista", _contem_teste)),
+    (None, _col_rule("Nome do Artista", pd.Series.isna)),
+    ("casa teste", _col_rule("Casa", _contem_teste)),
+    (None, _col_rule("Casa", pd.Series.isna)),
+    ("valor nulo", _col_rule("Valor Total do Show", pd.Series.isna)),
+    ("data show nula/inválida", _col_rule("Data do Show", pd.Series.isna)),
+)
+
+
 def sanitize_eshows_df(df_raw: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
     """
     Limpa a BaseEshows.
 
+    – Avalia todas as regras de exclusão como máscaras numa única passada,
+      rotula o motivo (primeira regra que casar) e separa limpas/excluídas
+      de uma vez só
     – Remove colunas *Primeiro_Dia_Mes* e *Data de Pagamento*
     – Converte Casa / Cidade / Grupo / Estado para category
     – Retorna (df_clean, df_excluidos)
     """
-    df_clean = df_raw.copy()
-    df_excl = pd.DataFrame(columns=df_clean.columns.tolist() + ["Motivo"])
-
-    # 1) Renomeações ---------------------------------------------------
-    mapeamento = {
-        "p_ID": "Id do Show",
-        "c_ID": "Id da Casa",
-        "Data": "Data do Show",
-        "Data_Pagamento": "Data de Pagamento",
-        "Valor_Bruto": "Valor Total do Show",
-        "Valor_Liquido": "Valor Artista",
-        "Comissao_Eshows_B2B": "Comissão B2B",
-        "Comissao_Eshows_B2C": "Comissão B2C",
-        "Taxa_Adiantamento": "Antecipação de Cachês",
-        "Curadoria": "Curadoria",
-        "SAAS_Percentual": "SaaS Percentual",
-        "SAAS_Mensalidade": "SaaS Mensalidade",
-        "Taxa_Emissao_NF": "Notas Fiscais",
-        "GRUPO_CLIENTES": "Grupo",
-        "NOTA": "Avaliação",
-        "Ano": "Ano",
-        "Mês": "Mês",
-        "Dia": "Dia do Show",
-    }
-    df_clean.rename(columns={k: v for k, v in mapeamento.items() if k in df_clean.columns},
-                    inplace=True)
-
-    # 2) Duplicados ----------------------------------------------------
-    if "Id do Show" in df_clean.columns:
-        dup = df_clean.duplicated("Id do Show", keep="first")
-        df_excl = pd.concat([df_excl, df_clean[dup].assign(Motivo="id repetido")])
-        df_clean = df_clean[~dup]
-
-    # 3) Linhas de teste ----------------------------------------------
-    for col, motivo in [("Nome do Artista", "nome teste"),
-                        ("Casa", "casa teste")]:
-        if col in df_clean.columns:
-            mask = df_clean[col].str.contains("Teste", case=False, na=False)
-            df_excl = pd.concat([df_excl, df_clean[mask].assign(Motivo=motivo)])
-            df_clean = df_clean[~mask].dropna(subset=[col])
-
-    # 4) Valor Total nulo ---------------------------------------------
-    if "Valor Total do Show" in df_clean.columns:
-        mask = df_clean["Valor Total do Show"].isna()
-        df_excl = pd.concat([df_excl, df_clean[mask].assign(Motivo="valor nulo")])
-        df_clean = df_clean[~mask]
-
-    # 5) Datas ---------------------------------------------------------
-    if "Data do Show" in df_clean.columns:
-        df_clean["Data do Show"] = pd.to_datetime(df_clean["Data do Show"],
-                                                  errors="coerce")
-        mask = df_clean["Data do Show"].isna()
-        df_excl = pd.concat([df_excl,
-                             df_clean[mask].assign(Motivo="data show nula/inválida")])
-        df_clean = df_clean[~mask]
-
-    if "Data de Pagamento" in df_clean.columns:
-        df_clean["Data de Pagamento"] = pd.to_datetime(
-            df_clean["Data de Pagamento"], errors="coerce"
-        )
-
-    # 6) Remove colunas pesadas não usadas ----------------------------
-    for col in ("Primeiro_Dia_Mes", "Data de Pagamento"):
-        df_clean.drop(columns=col, errors="ignore", inplace=True)
-
-    # 7) Padroniza Data / Ano / Mês -----------------------------------
+    df = df_raw.rename(
+        columns={k: v for k, v in _ESHOWS_RENAME.items() if k in df_raw.columns}
+    )
+    if "Data do Show" in df.columns:
+        df["Data do Show"] = pd.to_datetime(df["Data do Show"], errors="coerce")
+
+    # 1) Motivo de exclusão (0 = linha válida) -------------------------
+    n = len(df)
+    motivo = np.zeros(n, dtype=np.int8)
+    for code, (_, rule) in enumerate(_ESHOWS_RULES, start=1):
+        mask = rule(df)
+        if mask is not None:
+            motivo[(motivo == 0) & mask] = code
+
+    keep = motivo == 0
+
+    # 2) Excluídas (agrupadas por motivo, na ordem das regras) -----------
+    labels = np.array([None] + [m for m, _ in _ESHOWS_RULES], dtype=object)
+    excl = pd.notna(labels)[motivo]
+    ordem = np.argsort(motivo[excl], kind="stable")
+    df_excl = df.iloc[np.flatnonzero(excl)[ordem]].reset_index(drop=True)
+    df_excl["Motivo"] = labels[motivo[excl][ordem]]
+
+    # 3) Limpas: uma única cópia ----------------------------------------
+    df_clean = df.loc[keep, [c for c in df.columns
+                             if c not in ("Primeiro_Dia_Mes", "Data de Pagamento")]]
+    df_clean = df_clean.reset_index(drop=True)
+    del df
+
+    # 4) Padroniza Data / Ano / Mês + alias de compatibilidade ----------
     if "Data do Show" in df_clean.columns:
-        df_clean.rename(columns={"Data do Show": "Data"}, inplace=True)
-
-    if "Data" in df_clean.columns:
-        df_clean["Data"] = pd.to_datetime(df_clean["Data"], errors="coerce")
+        df_clean.insert(df_clean.columns.get_loc("Data do Show"), "Data",
+                        df_clean.pop("Data do Show"))
         df_clean["Ano"] = df_clean["Data"].dt.year
         df_clean["Mês"] = df_clean["Data"].dt.month
-
-    # 8) Alias de compatibilidade -------------------------------------
-    if "Data" in df_clean.columns and "Data do Show" not in df_clean.columns:
         df_clean["Data do Show"] = df_clean["Data"]
 
-    # 9) Strings → category -------------------------------------------
+    # 5) Strings → category ---------------------------------------------
     for col in ("Casa", "Cidade", "Grupo", "Estado"):
         if col in df_clean.columns:
             df_clean[col] = df_clean[col].astype("category")
 
-    df_clean = otimizar_tipos(df_clean.reset_index(drop=True))
-    df_excl = df_excl.reset_index(drop=True)
-    return df_clean, df_excl
+    return otimizar_tipos(df_clean, copy=False), df_excl
 
 # ╭───────────────────────  SANITIZE Base 2  ─────────────────────────╮
 def _parse_mes_abrev(col: pd.Series) -> tuple[pd.Series, pd.Series]:
@@ -422,84 +430,272 @@ def sanitize_metas_df(df_raw: pd.DataFrame) -> pd.DataFrame:
 
     return otimizar_tipos(df.reset_index(drop=True))
 
-# ╭──────────────────────────  loaders  ──────────────────────────────╮
-def carregar_base_eshows(force_reload: bool = False) -> pd.DataFrame:
-    global _df_eshows_cache, _df_eshows_excluidos_cache
+# ╭────────────────────  cache de frames sanitizados  ────────────────╮
+# Parquet com o frame já limpo e tipado (categorias incluídas), chaveado por
+# (dataset, fingerprint do bruto, versão do sanitizador). Warm start = só
+# leitura de Parquet. Incremente a versão ao mudar o sanitizador.
+SANITIZER_VERSION: Dict[str, int] = {
+    "eshows":        1,
+    "base2":         1,
+    "pessoas":       1,
+    "ocorrencias":   1,
+    "inadimplencia": 1,
+    "metas":         1,
+    "custosabertos": 1,
+    "npsartistas":   1,
+}
+CACHE_SANITIZED = os.getenv("CACHE_SANITIZED", "1") == "1"
+
+# Formato do cache sanitizado:
+#   "parquet" – compacto; cada worker materializa sua própria cópia.
+#   "arrow"   – Arrow IPC sem compressão, aberto via memory-map read-only.
+#               Colunas numéricas/datas sem nulos viram views numpy sobre o
+#               mapa, então os workers do gunicorn compartilham as mesmas
+#               páginas físicas. Essas colunas são somente leitura: código
+#               que altere o frame in-place (df.loc[...] = x) falha.
+# ARROW_DTYPES=1 usa pd.ArrowDtype em todas as colunas (zero-copy total,
+# inclusive categorias/texto) – exige que o código aceite dtypes Arrow.
+DATASET_STORE = os.getenv("DATASET_STORE", "parquet").lower()
+ARROW_DTYPES = os.getenv("ARROW_DTYPES", "0") == "1"
+_EXT = ".arrow" if DATASET_STORE == "arrow" else ".parquet"
+
+
+def _sanitized_key(name: str, fps: Tuple[str | None, ...]) -> str | None:
+    if not all(fps):
+        return None
+    h = hashlib.blake2b("|".join(fps).encode(), digest_size=8).hexdigest()
+    return f"{name}__{h}__v{SANITIZER_VERSION.get(name, 1)}"
+
+
+def _sanitized_path(key: str, part: str) -> Path:
+    return SANITIZED_DIR / f"{key}__{part}{_EXT}"
+
+
+def _read_arrow_mmap(p: Path) -> pd.DataFrame:
+    """
+    Abre o Arrow IPC via memory-map. Numéricos/datas sem nulos entram como
+    views read-only sobre o arquivo; o resto (categorias, texto, colunas com
+    nulos) é materializado normalmente.
+    """
+    table = pa.ipc.open_file(pa.memory_map(str(p), "r")).read_all()
+    if ARROW_DTYPES:
+        return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+    cols = {}
+    for name, col in zip(table.column_names, table.columns):
+        arr = None
+        if col.num_chunks == 1 and col.null_count == 0:
+            try:
+                arr = col.chunk(0).to_numpy(zero_copy_only=True)
+            except (pa.ArrowInvalid, NotImplementedError):
+                arr = None
+        # select() mantém o metadata pandas (category, Int16 …)
+        cols[name] = arr if arr is not None else table.select([name]).to_pandas()[name]
+    return pd.DataFrame(cols, copy=False)
+
+
+def _read_sanitized(key: str, parts: Tuple[str, ...]) -> Dict[str, pd.DataFrame] | None:
+    paths = {part: _sanitized_path(key, part) for part in parts}
+    if not all(p.exists() for p in paths.values()):
+        return None
+    reader = _read_arrow_mmap if DATASET_STORE == "arrow" else pd.read_parquet
+    try:
+        return {part: reader(p) for part, p in paths.items()}
+    except Exception as e:
+        logger.warning("[modulobase] cache sanitizado ilegível (%s): %s", key, e)
+        return None
+
+
+def _write_sanitized(key: str, frames: Dict[str, pd.DataFrame]) -> None:
+    SANITIZED_DIR.mkdir(exist_ok=True)
+    name = key.split("__", 1)[0]
+    try:
+        for part, df in frames.items():
+            p = _sanitized_path(key, part)
+            tmp = p.with_suffix(".tmp")
+            if DATASET_STORE == "arrow":
+                feather.write_feather(df.reset_index(drop=True), tmp,
+                                      compression="uncompressed")
+            else:
+                df.to_parquet(tmp, index=False, compression="zstd")
+            os.replace(tmp, p)
+    except Exception as e:
+        # colunas object com tipos mistos não serializam – segue sem cache
+        logger.debug("[modulobase] %s não persistido: %s", key, e)
+        return
+    # remove versões anteriores do mesmo dataset (no Linux o arquivo some só
+    # quando o último worker que o mapeou soltar o mmap)
+    for old in SANITIZED_DIR.glob(f"{name}__*"):
+        if not old.name.startswith(f"{key}__"):
+            try:
+                old.unlink()
+            except OSError:
+                pass
+
+
+def _load_sanitized(
+    name: str,
+    tables: Tuple[str, ...],
+    build: Callable[[], Dict[str, pd.DataFrame]],
+    parts: Tuple[str, ...] = ("data",),
+) -> Dict[str, pd.DataFrame]:
+    """
+    Lê o frame sanitizado do disco ou roda *build* e persiste o resultado.
+    Os fingerprints das tabelas lidas vão para o registry junto com a carga.
+    """
+    fps = tuple(table_fingerprint(t) for t in tables)
+    key = _sanitized_key(name, fps) if CACHE_SANITIZED else None
+    if key is not None and (frames := _read_sanitized(key, parts)) is not None:
+        logger.info("[modulobase] %s carregado do cache sanitizado", name)
+        registry.record_fingerprints(tables, fps)
+        return frames
+
+    frames = build()
+    # o build lê o Parquet bruto depois do fingerprint: se outro worker
+    # ressincronizou no meio, não dá para afirmar qual conteúdo foi lido
+    if all(fps) and meta_fingerprints(tables) != fps:
+        logger.info("[modulobase] %s: tabela ressincronizada durante a carga", name)
+        fps, key = (None,) * len(tables), None
+    registry.record_fingerprints(tables, fps)
+    if key is not None and not frames[parts[0]].empty:
+        _write_sanitized(key, frames)
+    return frames
 
-    if _df_eshows_cache is not None and not force_reload:
-        return _df_eshows_cache
 
+# ╭──────────────────────────  loaders  ──────────────────────────────╮
+# Todos os frames sanitizados vivem no registry (um único nível de cache).
+# force_reload só descarta o dataset; o bruto vem do Parquet/Supabase via
+# data_manager.
+def _dataset(name: str, loader, tables: Tuple[str, ...], force_reload: bool = False):
+    if force_reload:
+        registry.invalidate(name)
+    if not CACHE_RAM:
+        return loader()
+    return registry.get(name, loader, tables=tables)
+
+
+def _build_eshows() -> Dict[str, pd.DataFrame]:
     df_raw = get_df_eshows()
     if df_raw.empty:
         raise ValueError("[BaseEshows] Supabase retornou vazio!")
 
     df_clean, df_excl = sanitize_eshows_df(df_raw)
+    del df_raw
+    # ordenada por data: filtrar_periodo_principal recorta períodos com
+    # searchsorted + slice, sem cópia
+    df_clean = df_clean.sort_values("Data do Show", kind="stable", ignore_index=True)
     logger.info("[BaseEshows] Linhas finais: %s | Excluídas: %s",
                 len(df_clean), len(df_excl))
+    # df_excl junta linhas antes/depois da conversão de datas: colunas object
+    # com tipos mistos viram texto para poder ir ao Parquet
+    for col in df_excl.select_dtypes(include="object").columns:
+        if df_excl[col].dropna().map(type).nunique() > 1:
+            df_excl[col] = df_excl[col].astype(str)
+    return {"data": df_clean, "excluidos": df_excl}
+
 
-    _df_eshows_cache = otimizar_tipos(df_clean)
-    _df_eshows_excluidos_cache = df_excl
-    return _df_eshows_cache
+def _load_eshows() -> pd.DataFrame:
+    frames = _load_sanitized("eshows", ("baseeshows",), _build_eshows,
+                             parts=("data", "excluidos"))
+    if CACHE_RAM:
+        registry.put("eshows_excluidos", frames["excluidos"], tables=("baseeshows",))
+    return frames["data"]
+
+
+def carregar_base_eshows(force_reload: bool = False) -> pd.DataFrame:
+    if force_reload:
+        registry.invalidate("eshows_excluidos")
+    return _dataset("eshows", _load_eshows, ("baseeshows",), force_reload)
 
 
 def carregar_eshows_excluidos() -> pd.DataFrame:
-    global _df_eshows_excluidos_cache
-    if _df_eshows_excluidos_cache is None:
-        carregar_base_eshows()
-    return _df_eshows_excluidos_cache.copy()
+    if not CACHE_RAM:
+        return _load_sanitized("eshows", ("baseeshows",), _build_eshows,
+                               parts=("data", "excluidos"))["excluidos"]
+
+    df_excl = registry.peek("eshows_excluidos")
+    if df_excl is None:
+        carregar_base_eshows(force_reload=registry.peek("eshows") is not None)
+        df_excl = registry.peek("eshows_excluidos")
+    return pd.DataFrame() if df_excl is None else df_excl.copy()
+
+
+def _load_casas_first_last() -> Tuple[pd.DataFrame, pd.DataFrame]:
+    # vem do índice de ciclo de vida (import tardio: ele depende deste módulo)
+    from app.utils.casa_lifecycle import primeiro_ultimo_show
+
+    return primeiro_ultimo_show()
+
+
+def carregar_casas_earliest_latest() -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """(EarliestShow, LastShow) por casa – derivado da BaseEshows."""
+    return _dataset("casas_first_last", _load_casas_first_last, ("baseeshows",))
+
+
+def _load_base2() -> pd.DataFrame:
+    def build():
+        df_raw = dedup(get_df_base2())          # 37 × 53 atualmente
+        return {"data": sanitize_base2_df(df_raw)}
+
+    df_clean = _load_sanitized("base2", ("base2",), build)["data"]
+    logger.info("[modulobase] Base2 carregada: %s", df_clean.shape)
+    return df_clean
 
 
 def carregar_base2(force_reload: bool = False) -> pd.DataFrame:
     """
     Baixa a Base-2 do Supabase, aplica o sanitizador e mantém cache em RAM.
     """
-    global _df_base2_cache
-    if _df_base2_cache is not None and not force_reload:
-        return _df_base2_cache
+    return _dataset("base2", _load_base2, ("base2",), force_reload)
 
-    df_raw = dedup(get_df_base2())          # 37 × 53 atualmente
-    df_clean = sanitize_base2_df(df_raw)
-    _df_base2_cache = df_clean
-    logger.info("[modulobase] Base2 carregada: %s", _df_base2_cache.shape)
-    return _df_base2_cache
+
+def _load_pessoas() -> pd.DataFrame:
+    df = _load_sanitized(
+        "pessoas", ("pessoas",),
+        lambda: {"data": sanitize_pessoas_df(dedup(get_df_pessoas()))},
+    )["data"]
+    logger.info("[modulobase] Pessoas carregada: %s", df.shape)
+    return df
 
 
 def carregar_pessoas() -> pd.DataFrame:
-    global _df_pessoas_cache
-    if _df_pessoas_cache is not None:
-        return _df_pessoas_cache
+    return _dataset("pessoas", _load_pessoas, ("pessoas",))
+
 
-    _df_pessoas_cache = sanitize_pessoas_df(dedup(get_df_pessoas()))
-    logger.info("[modulobase] Pessoas carregada: %s", _df_pessoas_cache.shape)
-    return _df_pessoas_cache
+def _load_ocorrencias() -> pd.DataFrame:
+    try:
+        return _load_sanitized(
+            "ocorrencias", ("ocorrencias",),
+            lambda: {"data": dedup(get_df_ocorrencias())},
+        )["data"]
+    except Exception:
+        return pd.DataFrame()
 
 
 def carregar_ocorrencias() -> pd.DataFrame:
-    global _df_ocorrencias_cache
-    if _df_ocorrencias_cache is None:
-        try:
-            _df_ocorrencias_cache = dedup(get_df_ocorrencias())
-        except Exception:
-            _df_ocorrencias_cache = pd.DataFrame()
-    return _df_ocorrencias_cache
+    return _dataset("ocorrencias", _load_ocorrencias, ("ocorrencias",))
 
 
-def carregar_base_inadimplencia(
-    force_reload: bool = False,
-) -> Tuple[pd.DataFrame, pd.DataFrame]:
-    global _inad_casas_cache, _inad_artistas_cache
-    if (not force_reload
-            and _inad_casas_cache is not None
-            and _inad_artistas_cache is not None):
-        return _inad_casas_cache, _inad_artistas_cache
+def _load_inadimplencia() -> Tuple[pd.DataFrame, pd.DataFrame]:
+    def build():
+        df_casas_raw, df_art_raw = get_df_inadimplencia()
+        return {"casas": sanitize_inad_df(df_casas_raw, "boletocasas"),
+                "artistas": sanitize_inad_df(df_art_raw, "boletoartistas")}
 
-    df_casas_raw, df_art_raw = get_df_inadimplencia()
-    _inad_casas_cache = sanitize_inad_df(df_casas_raw, "boletocasas")
-    _inad_artistas_cache = sanitize_inad_df(df_art_raw, "boletoartistas")
+    frames = _load_sanitized("inadimplencia", ("boletocasas", "boletoartistas"),
+                             build, parts=("casas", "artistas"))
+    casas, artistas = frames["casas"], frames["artistas"]
 
     logger.info("[modulobase] Inad – casas %s | artistas %s",
-                _inad_casas_cache.shape, _inad_artistas_cache.shape)
-    return _inad_casas_cache, _inad_artistas_cache
+                casas.shape, artistas.shape)
+    return casas, artistas
+
+
+def carregar_base_inadimplencia(
+    force_reload: bool = False,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    return _dataset("inadimplencia", _load_inadimplencia,
+                    ("boletocasas", "boletoartistas"), force_reload)
 
 
 def carregar_base_inad() -> Tuple[pd.DataFrame, pd.DataFrame]:
@@ -508,45 +704,54 @@ def carregar_base_inad() -> Tuple[pd.DataFrame, pd.DataFrame]:
 
 
 def carregar_metas(force_reload: bool = False) -> pd.DataFrame:
-    global _df_metas_cache
-    if _df_metas_cache is not None and not force_reload:
-        return _df_metas_cache
+    def load():
+        return _load_sanitized(
+            "metas", ("metas",), lambda: {"data": sanitize_metas_df(get_df_metas())}
+        )["data"]
 
-    raw = get_df_metas()
-    _df_metas_cache = sanitize_metas_df(raw)
-    return _df_metas_cache
+    return _dataset("metas", load, ("metas",), force_reload)
 
 
 # ╭──────────────────────  loader Custos Abertos  ────────────────────╮
-def carregar_custosabertos(force_reload: bool = False) -> pd.DataFrame:
-    global _df_custosabertos_cache
-    if _df_custosabertos_cache is not None and not force_reload:
-        return _df_custosabertos_cache
-
+def _build_custosabertos() -> Dict[str, pd.DataFrame]:
     df_raw = get_df_custosabertos()
     if df_raw.empty:
         logger.warning("[custosabertos] Supabase retornou vazio.")
-        _df_custosabertos_cache = pd.DataFrame()
-        return _df_custosabertos_cache
+        return {"data": pd.DataFrame()}
+    return {"data": sanitize_custosabertos_df(df_raw)}
 
-    _df_custosabertos_cache = sanitize_custosabertos_df(df_raw)
-    logger.info("[modulobase] CustosAbertos carregado: %s",
-                _df_custosabertos_cache.shape)
-    return _df_custosabertos_cache
 
-# ───────────────────── loader NPS Artistas ────────────────────────
-def carregar_npsartistas(force_reload: bool = False) -> pd.DataFrame:
-    global _df_npsartistas_cache
-    if _df_npsartistas_cache is not None and not force_reload:
-        return _df_npsartistas_cache
+def _load_custosabertos() -> pd.DataFrame:
+    df = _load_sanitized("custosabertos", ("custosabertos",),
+                         _build_custosabertos)["data"]
+    if df.empty:
+        return df
+    logger.info("[modulobase] CustosAbertos carregado: %s", df.shape)
+    return df
+
+
+def carregar_custosabertos(force_reload: bool = False) -> pd.DataFrame:
+    return _dataset("custosabertos", _load_custosabertos,
+                    ("custosabertos",), force_reload)
 
+# ───────────────────── loader NPS Artistas ────────────────────────
+def _build_npsartistas() -> Dict[str, pd.DataFrame]:
     df_raw = get_df_npsartistas()
     if df_raw.empty:
         logger.warning("[npsartistas] Supabase retornou vazio.")
-        _df_npsartistas_cache = pd.DataFrame()
-        return _df_npsartistas_cache
+        return {"data": pd.DataFrame()}
+    return {"data": sanitize_npsartistas_df(df_raw)}
+
 
-    _df_npsartistas_cache = sanitize_npsartistas_df(df_raw)
-    logger.info("[modulobase] NPSArtistas carregado: %s",
-                _df_npsartistas_cache.shape)
-    return _df_npsartistas_cache
\ No newline at end of file
+def _load_npsartistas() -> pd.DataFrame:
+    df = _load_sanitized("npsartistas", ("npsartistas",),
+                         _build_npsartistas)["data"]
+    if df.empty:
+        return df
+    logger.info("[modulobase] NPSArtistas carregado: %s", df.shape)
+    return df
+
+
+def carregar_npsartistas(force_reload: bool = False) -> pd.DataFrame:
+    return _dataset("npsartistas", _load_npsartistas,
+                    ("npsartistas",), force_reload)
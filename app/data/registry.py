@@ -0,0 +1,421 @@
+"""
+registry.py — registro único dos DataFrames sanitizados
+-------------------------------------------------------
+• Um único nível de cache em RAM: guarda só o frame sanitizado e com tipos
+  otimizados de cada dataset (o bruto do Supabase fica apenas no Parquet).
+• Cada dataset declara de quais tabelas do Supabase depende; recarregar uma
+  tabela invalida todos os datasets derivados dela.
+• Versão por dataset + versão global (muda a cada carga/invalidação), para
+  que caches derivados saibam quando ficaram velhos. data_version() só muda
+  quando dados já publicados são trocados ou descartados – a primeira carga
+  de um dataset (p.ex. um índice derivado) não a altera.
+• Contabilidade de memória por dataset (memory_usage deep).
+• Liga o copy-on-write do pandas: quem recebe um frame (ou um recorte dele)
+  pode alterá-lo sem mexer no valor publicado.
+• refresh_tables reconstrói fora do caminho das requisições os datasets de
+  uma tabela atualizada e troca cada um atomicamente (ver scheduler).
+• content_tag: identidade do conteúdo das tabelas-fonte que um cálculo lê
+  (fingerprints), igual em todos os workers com os mesmos dados, seja qual
+  for o resto que cada um tem em RAM – é a chave de dados do shared_cache.
+  O loader informa os fingerprints que de fato leu (record_fingerprints);
+  reading() coleta as tabelas dos datasets consultados por um cálculo.
+
+Uso típico (modulobase):
+
+    registry.get("eshows", _load_eshows, tables=("baseeshows",))
+"""
+from __future__ import annotations
+
+import gc
+import hashlib
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Frames publicados são compartilhados por todas as requisições. Com
+# copy-on-write, recortes rasos (utils.recortar_periodo) copiam só o que for
+# escrito: alterar um recorte, inclusive por .loc, nunca altera o registry.
+pd.set_option("mode.copy_on_write", True)
+
+# ────────────────────────────  estado  ──────────────────────────────
+@dataclass
+class _Entry:
+    value: Any
+    tables: Tuple[str, ...] = ()
+    version: int = 0
+    nbytes: int = 0
+    loaded_at: float = field(default_factory=time.time)
+    loader: Callable[[], Any] | None = None
+    fingerprints: Tuple[Tuple[str, str], ...] | None = None
+
+
+_entries: Dict[str, _Entry] = {}
+_versions: Dict[str, int] = {}          # sobrevive à invalidação
+_global_version = 0
+_data_version = 0                       # trocas/descartes (ver data_version)
+
+_lock = threading.RLock()
+_load_locks: Dict[str, threading.Lock] = {}
+
+# tabelas → fingerprints do conteúdo (data_manager registra no import)
+_fingerprinter: Callable[[Tuple[str, ...]], Tuple[str, ...] | None] | None = None
+_tag: Tuple[int, str | None] = (-1, None)
+# tabela → fingerprint da última carga publicada (base dos derivados)
+_em_ram: Dict[str, str | None] = {}
+# pilha por thread dos fingerprints lidos pelos loaders em andamento
+_lidos = threading.local()
+# pilha por thread das tabelas consultadas pelos cálculos em andamento
+_consultas = threading.local()
+
+
+# ╭───────────────────────────  helpers  ─────────────────────────────╮
+def _nbytes(value: Any) -> int:
+    if isinstance(value, pd.DataFrame):
+        try:
+            return int(value.memory_usage(deep=True).sum())
+        except Exception:
+            return 0
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, (tuple, list)):
+        return sum(_nbytes(v) for v in value)
+    if isinstance(value, dict):
+        return sum(_nbytes(v) for v in value.values())
+    return 0
+
+
+def _bump(name: str) -> int:
+    global _global_version
+    _versions[name] = _versions.get(name, 0) + 1
+    _global_version += 1
+    return _versions[name]
+
+
+def _bump_data() -> None:
+    global _data_version
+    _data_version += 1
+
+
+@contextmanager
+def _coletando() -> Iterator[Dict[str, str | None]]:
+    pilha = _lidos.__dict__.setdefault("pilha", [])
+    pilha.append({})
+    try:
+        yield pilha[-1]
+    finally:
+        pilha.pop()
+
+
+def _fingerprints(tables: Tuple[str, ...],
+                  lidos: Dict[str, str | None] | None = None,
+                  ) -> Tuple[Tuple[str, str], ...] | None:
+    """
+    Fingerprints das tabelas do dataset, nesta ordem: os que o loader leu
+    (*lidos*, ou os registrados na carga em andamento nesta thread), os da
+    última carga publicada (derivados montados sobre as bases em RAM) e, por
+    fim, o meta do data_manager.
+    """
+    if not tables:
+        return None
+    if lidos is None:
+        pilha = getattr(_lidos, "pilha", None)
+        lidos = pilha[-1] if pilha else {}
+    fps = {t: lidos[t] for t in tables if t in lidos}
+    with _lock:
+        fps.update((t, _em_ram[t]) for t in tables if t not in fps and t in _em_ram)
+    faltam = tuple(t for t in tables if t not in fps)
+    if faltam:
+        if _fingerprinter is None:
+            return None
+        try:
+            meta = _fingerprinter(faltam)
+        except Exception as e:
+            logger.debug("[registry] fingerprint indisponível: %s", e)
+            return None
+        if meta is None:
+            return None
+        fps.update(zip(faltam, meta))
+    if not all(fps[t] for t in tables):
+        return None
+    return tuple((t, fps[t]) for t in tables)
+
+
+def _hash_fps(fps: Dict[str, str | None]) -> str | None:
+    if not fps or not all(fps.values()):
+        return None
+    return hashlib.blake2b(repr(sorted(fps.items())).encode(), digest_size=12).hexdigest()
+
+
+def _consultou(tables: Iterable[str]) -> None:
+    for aberta in getattr(_consultas, "pilha", ()):
+        aberta.update(tables)
+
+
+def _load_lock(name: str) -> threading.Lock:
+    with _lock:
+        return _load_locks.setdefault(name, threading.Lock())
+
+
+# ╭─────────────────────────  API pública  ───────────────────────────╮
+def get(name: str, loader: Callable[[], Any], *, tables: Iterable[str] = ()) -> Any:
+    """
+    Devolve o dataset *name*, carregando-o com *loader* na primeira vez.
+    Cargas concorrentes do mesmo dataset esperam a primeira terminar.
+    """
+    entry = _entries.get(name)
+    if entry is not None:
+        _consultou(entry.tables)
+        return entry.value
+
+    with _load_lock(name):
+        entry = _entries.get(name)
+        if entry is not None:
+            _consultou(entry.tables)
+            return entry.value
+        with _coletando() as lidos:
+            value = loader()
+        put(name, value, tables=tables, loader=loader, fingerprints=lidos)
+        _consultou(t.lower() for t in tables)
+        return value
+
+
+def put(name: str, value: Any, *, tables: Iterable[str] = (),
+        loader: Callable[[], Any] | None = None,
+        fingerprints: Dict[str, str | None] | None = None) -> int:
+    """
+    Publica (ou troca atomicamente) o valor do dataset. Retorna a nova versão.
+    *fingerprints* ({tabela: fingerprint}) são os do conteúdo efetivamente
+    lido; sem eles vale a ordem de _fingerprints.
+    """
+    entry = _Entry(value=value, tables=tuple(t.lower() for t in tables),
+                   nbytes=_nbytes(value), loader=loader)
+    entry.fingerprints = _fingerprints(entry.tables, fingerprints)
+    with _lock:
+        entry.version = _bump(name)
+        if _entries.get(name) is not None:
+            _bump_data()
+        _entries[name] = entry
+        if fingerprints:
+            _em_ram.update((t, fp) for t, fp in fingerprints.items() if t in entry.tables)
+        # loader que não informou o que leu: vale o de _fingerprints (ou nenhum)
+        conhecidos = dict(entry.fingerprints or ())
+        for t in entry.tables:
+            _em_ram.setdefault(t, conhecidos.get(t))
+    logger.debug("[registry] %s v%s publicado (%.1f MB)",
+                 name, entry.version, entry.nbytes / 1024 ** 2)
+    return entry.version
+
+
+def record_fingerprints(tables: Iterable[str], fps: Iterable[str | None]) -> None:
+    """
+    Chamado pelo loader: fingerprints do conteúdo que ele de fato leu (None
+    se não dá para garantir). Vão para o put da carga em andamento nesta
+    thread, em vez de serem relidos do meta na hora de publicar.
+    """
+    pilha = getattr(_lidos, "pilha", None)
+    if pilha:
+        pilha[-1].update(zip((t.lower() for t in tables), fps))
+
+
+@contextmanager
+def reading() -> Iterator[set]:
+    """
+    Coleta as tabelas-fonte de todo dataset consultado (get) nesta thread
+    dentro do bloco – inclusive por cálculos aninhados.
+    """
+    pilha = _consultas.__dict__.setdefault("pilha", [])
+    pilha.append(set())
+    try:
+        yield pilha[-1]
+    finally:
+        pilha.pop()
+
+
+def record_reads(tables: Iterable[str]) -> None:
+    """Conta *tables* como lidas pelos reading() abertos (resultado memoizado)."""
+    _consultou(tuple(tables))
+
+
+def tables_of(name: str) -> Tuple[str, ...]:
+    """Tabelas-fonte do dataset *name* (vazio se não está em RAM)."""
+    entry = _entries.get(name)
+    return () if entry is None else entry.tables
+
+
+def peek(name: str) -> Any | None:
+    """Valor em cache sem disparar carga (None se ausente)."""
+    entry = _entries.get(name)
+    return None if entry is None else entry.value
+
+
+def _contem(value: Any, obj: Any, nivel: int = 2) -> bool:
+    if value is obj:
+        return True
+    if nivel == 0:
+        return False
+    if isinstance(value, dict):
+        value = value.values()
+    elif not isinstance(value, (tuple, list)):
+        return False
+    return any(_contem(v, obj, nivel - 1) for v in value)
+
+
+def owner(obj: Any) -> str | None:
+    """
+    Nome do dataset cujo valor publicado é *obj* (ou o contém em tupla/dict,
+    como as duas bases de inadimplência). None se *obj* não está no registry.
+    """
+    with _lock:
+        entries = list(_entries.items())
+    for name, entry in entries:
+        if _contem(entry.value, obj):
+            return name
+    return None
+
+
+def invalidate(name: str | None = None) -> None:
+    """Descarta um dataset (ou todos, se *name* for None)."""
+    with _lock:
+        nomes = list(_entries) if name is None else [name]
+        if name is None:
+            _em_ram.clear()
+        for n in nomes:
+            if _entries.pop(n, None) is not None:
+                _bump(n)
+                _bump_data()
+    gc.collect()
+
+
+def invalidate_tables(tables: Iterable[str]) -> list[str]:
+    """Descarta todos os datasets que dependem das tabelas informadas."""
+    alvo = {t.lower() for t in tables}
+    with _lock:
+        nomes = [n for n, e in _entries.items() if alvo & set(e.tables)]
+        for t in alvo:
+            _em_ram.pop(t, None)
+        for n in nomes:
+            _entries.pop(n, None)
+            _bump(n)
+        if nomes:
+            _bump_data()
+    if nomes:
+        logger.info("[registry] invalidados: %s", ", ".join(nomes))
+        gc.collect()
+    return nomes
+
+
+def refresh_tables(tables: Iterable[str]) -> list[str]:
+    """
+    Reconstrói os datasets em RAM que dependem das tabelas informadas e os
+    publica no lugar dos antigos (quem já leu a versão anterior continua com
+    ela). Segue a ordem da primeira carga, então derivados como
+    casas_first_last são refeitos depois da base de que dependem. Em caso de
+    erro o valor antigo permanece.
+    """
+    alvo = {t.lower() for t in tables}
+    with _lock:
+        ordem = [n for n in _versions if n in _entries]
+        nomes = [n for n in ordem
+                 if _entries[n].loader is not None and alvo & set(_entries[n].tables)]
+    feitos = []
+    for n in nomes:
+        entry = _entries.get(n)
+        if entry is None:                       # invalidado no meio do caminho
+            continue
+        with _load_lock(n):
+            t0 = time.perf_counter()
+            try:
+                with _coletando() as lidos:
+                    value = entry.loader()
+            except Exception as e:
+                logger.error("[registry] refresh de %s falhou: %s", n, e)
+                continue
+            put(n, value, tables=entry.tables, loader=entry.loader,
+                fingerprints=lidos)
+        feitos.append(n)
+        logger.info("[registry] %s reconstruído em %.1fs", n, time.perf_counter() - t0)
+    if feitos:
+        gc.collect()
+    return feitos
+
+
+def version(name: str | None = None) -> int:
+    """Versão do dataset (ou a global, se *name* for None)."""
+    if name is None:
+        return _global_version
+    return _versions.get(name, 0)
+
+
+def data_version() -> int:
+    """
+    Contador que só avança quando um dataset publicado é trocado (refresh,
+    put sobre valor existente) ou descartado (invalidate, reload_tables).
+    Caches de resultados calculados sobre os dados usam esta versão: a carga
+    de um dataset novo não deixa velho o que já foi calculado.
+    """
+    return _data_version
+
+
+def set_fingerprinter(fn: Callable[[Tuple[str, ...]], Tuple[str, ...] | None]) -> None:
+    """
+    Registra a função tabelas → fingerprints do conteúdo (None se algum
+    faltar). Cada put guarda os fingerprints das tabelas do dataset.
+    """
+    global _fingerprinter
+    _fingerprinter = fn
+
+
+def content_tag(tables: Iterable[str] | None = None) -> str | None:
+    """
+    Hash dos fingerprints das tabelas-fonte *tables* (None = todas as já
+    carregadas neste processo). Cada tabela entra uma vez, com o fingerprint
+    da carga em RAM ou, se ainda não foi carregada aqui, o do meta – o que a
+    carga leria. Derivados (cubo, índices…) não entram: dois workers com os
+    mesmos dados chegam ao mesmo tag, monte cada um o que montar. None se
+    algum fingerprint falta (aí não dá para comparar entre workers).
+    """
+    global _tag
+    versao = _global_version
+    if tables is None:
+        if _tag[0] == versao:
+            return _tag[1]
+        with _lock:
+            fps = dict(_em_ram)
+        tag = _hash_fps(fps)
+        _tag = (versao, tag)
+        return tag
+    pares = _fingerprints(tuple(sorted({t.lower() for t in tables})), {})
+    return _hash_fps(dict(pares or ()))
+
+
+def memory_usage() -> Dict[str, dict]:
+    """Resumo {dataset: {"mb", "version", "tables", "age_s"}} + total."""
+    agora = time.time()
+    with _lock:
+        itens = list(_entries.items())
+    rel = {
+        n: {
+            "mb": round(e.nbytes / 1024 ** 2, 2),
+            "version": e.version,
+            "tables": list(e.tables),
+            "age_s": int(agora - e.loaded_at),
+        }
+        for n, e in itens
+    }
+    rel["_total_mb"] = round(sum(e.nbytes for _, e in itens) / 1024 ** 2, 2)
+    return rel
+
+
+def log_memory() -> None:
+    rel = memory_usage()
+    total = rel.pop("_total_mb")
+    for n, info in sorted(rel.items(), key=lambda kv: -kv[1]["mb"]):
+        logger.info("[registry] %-22s %8.2f MB  v%s", n, info["mb"], info["version"])
+    logger.info("[registry] total: %.2f MB", total)
@@ -0,0 +1,134 @@
+"""
+scheduler.py — refresh das tabelas em background
+------------------------------------------------
+Uma thread daemon por processo atualiza cada tabela na sua cadência
+(delta sync quando disponível) e, se o conteúdo mudou, reconstrói os
+datasets derivados no registry e avisa os ouvintes (históricos etc.).
+Os callbacks nunca esperam por download nem por sanitização: leem sempre
+a última versão publicada.
+
+Com vários workers do gunicorn, o Parquet é compartilhado: o primeiro
+worker baixa, os demais só percebem o fingerprint novo e reconstroem a RAM.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List
+
+from app.data import registry
+from app.data import data_manager as dm
+
+logger = logging.getLogger(__name__)
+
+REFRESH_SCHEDULER = os.getenv("REFRESH_SCHEDULER", "1") == "1"
+REFRESH_TICK_SECONDS: float = float(os.getenv("REFRESH_TICK_SECONDS", "60"))
+
+
+def _parse_intervals(raw: str) -> Dict[str, float]:
+    # "baseeshows=10,metas=720" → {"baseeshows": 600.0, "metas": 43200.0}
+    out = {}
+    for item in filter(None, (x.strip() for x in raw.split(","))):
+        try:
+            table, minutes = item.split("=", 1)
+            out[table.strip().lower()] = float(minutes) * 60
+        except ValueError:
+            logger.warning("[scheduler] REFRESH_INTERVALS inválido: %r", item)
+    return out
+
+
+# cadência (segundos) por tabela; o padrão segue a validade do cache
+_OVERRIDES = _parse_intervals(os.getenv("REFRESH_INTERVALS", ""))
+
+
+def refresh_interval(table: str) -> float:
+    if table in _OVERRIDES:
+        return _OVERRIDES[table]
+    return dm._expiry_seconds(table) or dm.CACHE_EXPIRY_HOURS * 3600
+
+
+# ╭──────────────────────────  ouvintes  ─────────────────────────────╮
+_listeners: List[Callable[[List[str]], None]] = []
+_seen: Dict[str, str | None] = {}       # fingerprint que a RAM deste worker usa
+
+
+def on_refresh(callback: Callable[[List[str]], None]) -> None:
+    """Registra *callback(tabelas_alteradas)*, chamado após cada troca."""
+    if callback not in _listeners:
+        _listeners.append(callback)
+
+
+def refresh_now(tables: Iterable[str], *, max_age: float | None = None) -> List[str]:
+    """
+    Atualiza as tabelas, reconstrói o que depende das que mudaram e devolve
+    a lista das tabelas alteradas.
+    """
+    mudaram = []
+    for table in tables:
+        antes = _seen.get(table) or dm._read_meta(table).get("fingerprint")
+        try:
+            depois = dm.refresh_table(table, max_age=max_age)
+        except Exception as e:
+            logger.error("[scheduler] refresh de %s falhou: %s", table, e)
+            continue
+        _seen[table] = depois
+        if depois != antes:
+            mudaram.append(table)
+
+    if not mudaram:
+        return mudaram
+
+    logger.info("[scheduler] tabelas alteradas: %s", ", ".join(mudaram))
+    registry.refresh_tables(mudaram)
+    for cb in list(_listeners):
+        try:
+            cb(mudaram)
+        except Exception as e:
+            logger.error("[scheduler] ouvinte %s falhou: %s",
+                         getattr(cb, "__name__", cb), e)
+    return mudaram
+
+
+# ╭────────────────────────────  loop  ───────────────────────────────╮
+_stop = threading.Event()
+_thread: threading.Thread | None = None
+
+
+def _loop(tables: tuple) -> None:
+    agora = time.monotonic()
+    proximo = {t: agora + refresh_interval(t) for t in tables}
+    while not _stop.wait(REFRESH_TICK_SECONDS):
+        agora = time.monotonic()
+        vencidas = [t for t in tables if proximo[t] <= agora]
+        if not vencidas:
+            continue
+        t0 = time.perf_counter()
+        # metade da cadência: se outro worker acabou de sincronizar, só relê
+        intervalo_min = min(refresh_interval(t) for t in vencidas)
+        refresh_now(vencidas, max_age=intervalo_min / 2)
+        for t in vencidas:
+            proximo[t] = time.monotonic() + refresh_interval(t)
+        logger.debug("[scheduler] ciclo %s em %.1fs",
+                     ", ".join(vencidas), time.perf_counter() - t0)
+
+
+def start_scheduler(tables: Iterable[str] = dm.ALL_TABLES) -> None:
+    """Inicia a thread de refresh (uma por processo, se REFRESH_SCHEDULER=1)."""
+    global _thread
+    if not REFRESH_SCHEDULER or _thread is not None:
+        return
+    for t in tables:
+        _seen.setdefault(t, dm._read_meta(t).get("fingerprint"))
+    _stop.clear()
+    _thread = threading.Thread(target=_loop, args=(tuple(tables),),
+                               name="refresh-scheduler", daemon=True)
+    _thread.start()
+    logger.info("[scheduler] iniciado (tick %.0fs)", REFRESH_TICK_SECONDS)
+
+
+def stop_scheduler() -> None:
+    global _thread
+    _stop.set()
+    _thread = None
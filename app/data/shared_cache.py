@@ -0,0 +1,240 @@
+"""
+shared_cache.py — cache de resultados compartilhado entre workers
+-----------------------------------------------------------------
+Os caches em RAM (kpi_cache, históricos, interpretações) são por processo:
+com N workers do gunicorn o mesmo KPI é calculado N vezes e tudo se perde
+a cada restart/deploy. Este módulo é o segundo nível, comum a todos:
+
+    • "sqlite" (padrão) – arquivo em _cache_parquet/, ao lado do Parquet
+      que os workers já compartilham (WAL: leituras não bloqueiam escritas);
+    • "redis"           – servidor local em SHARED_CACHE_URL (pacote redis
+      opcional; sem ele volta para sqlite);
+    • "0"               – desligado.
+
+A chave de cada valor junta namespace + partes + versão do código (hash dos
+.py do app) + registry.content_tag() das tabelas-fonte que o cálculo lê
+(tabelas=…; sem elas, todas as carregadas). Dois workers com os mesmos
+dados chegam à mesma chave; dados ou código novos geram chaves novas e as
+antigas só vencem (SHARED_CACHE_TTL_HOURS). Quem calcula guarda o tag de
+antes do cálculo e só publica se ele não mudou no meio (ver put).
+
+Qualquer falha do backend vira miss: o cache nunca derruba um callback.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import pickle
+import random
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterable
+
+from app.data import registry
+
+logger = logging.getLogger(__name__)
+
+SHARED_CACHE = os.getenv("SHARED_CACHE", "sqlite").lower()
+SHARED_CACHE_URL = os.getenv("SHARED_CACHE_URL", "redis://localhost:6379/0")
+SHARED_CACHE_TTL_HOURS = float(os.getenv("SHARED_CACHE_TTL_HOURS", "24"))
+
+_DB_PATH = Path(__file__).resolve().parent / "_cache_parquet" / "shared_cache.sqlite"
+_APP_DIR = Path(__file__).resolve().parents[1]
+
+_stats = {"hits": 0, "misses": 0, "puts": 0, "erros": 0}
+
+
+# ╭───────────────────────────  backends  ────────────────────────────╮
+class _SQLite:
+    nome = "sqlite"
+
+    def __init__(self, path: Path):
+        self._path = path
+        self._local = threading.local()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._conn() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS cache ("
+                         "chave TEXT PRIMARY KEY, valor BLOB, expira REAL)")
+
+    def _conn(self) -> sqlite3.Connection:
+        # uma conexão por thread (sqlite3 não compartilha entre threads)
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self._path), timeout=2)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, chave: str) -> bytes | None:
+        row = self._conn().execute(
+            "SELECT valor FROM cache WHERE chave = ? AND expira > ?",
+            (chave, time.time())).fetchone()
+        return None if row is None else row[0]
+
+    def put(self, chave: str, valor: bytes, ttl: float) -> None:
+        agora = time.time()
+        with self._conn() as conn:
+            conn.execute("INSERT OR REPLACE INTO cache VALUES (?, ?, ?)",
+                         (chave, valor, agora + ttl))
+            if random.random() < 0.01:          # faxina ocasional dos vencidos
+                conn.execute("DELETE FROM cache WHERE expira <= ?", (agora,))
+
+    def clear(self) -> None:
+        with self._conn() as conn:
+            conn.execute("DELETE FROM cache")
+
+
+class _Redis:
+    nome = "redis"
+
+    def __init__(self, url: str):
+        import redis
+
+        self._r = redis.Redis.from_url(url, socket_timeout=0.5,
+                                       socket_connect_timeout=0.5)
+        self._r.ping()
+
+    def get(self, chave: str) -> bytes | None:
+        return self._r.get(chave)
+
+    def put(self, chave: str, valor: bytes, ttl: float) -> None:
+        self._r.set(chave, valor, ex=max(1, int(ttl)))
+
+    def clear(self) -> None:
+        for chave in self._r.scan_iter("eshows:*"):
+            self._r.delete(chave)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+_pausado_ate = 0.0          # após erro de backend, fica em miss por um tempo
+
+
+def _get_backend():
+    global _backend
+    if _backend is not None or SHARED_CACHE in ("0", "off", "none"):
+        return _backend
+    with _backend_lock:
+        if _backend is None:
+            if SHARED_CACHE == "redis":
+                try:
+                    _backend = _Redis(SHARED_CACHE_URL)
+                except Exception as e:
+                    logger.warning("[shared_cache] redis indisponível (%s), usando sqlite", e)
+            if _backend is None:
+                try:
+                    _backend = _SQLite(_DB_PATH)
+                except Exception as e:
+                    logger.warning("[shared_cache] sqlite indisponível: %s", e)
+                    return None
+            logger.info("[shared_cache] backend %s", _backend.nome)
+    return _backend
+
+
+def _falhou(op: str, e: Exception) -> None:
+    global _pausado_ate
+    _stats["erros"] += 1
+    _pausado_ate = time.time() + 30
+    logger.warning("[shared_cache] %s falhou (%s); em miss por 30s", op, e)
+
+
+# ╭────────────────────────────  chaves  ─────────────────────────────╮
+_codigo: str | None = None
+
+
+def _versao_codigo() -> str:
+    """Hash do conteúdo dos .py do app: deploy com código novo = chaves novas."""
+    global _codigo
+    if _codigo is None:
+        h = hashlib.blake2b(digest_size=8)
+        for p in sorted(_APP_DIR.rglob("*.py")):
+            h.update(str(p.relative_to(_APP_DIR)).encode())
+            h.update(p.read_bytes())
+        _codigo = h.hexdigest()
+    return _codigo
+
+
+def chave(namespace: str, partes: Iterable[Any], *, dados: bool = True,
+          tabelas: Iterable[str] | None = None, tag: str | None = None) -> str | None:
+    """
+    Chave estável entre processos. *partes* precisa ter repr determinístico
+    (nada de hash() ou id()). Com dados=True entra o content_tag das
+    *tabelas* (ou o *tag* já tirado delas); None se ele não estiver
+    disponível (valor fica só no cache local).
+    """
+    if not dados:
+        tag = ""
+    elif tag is None:
+        tag = registry.content_tag(tabelas)
+        if tag is None:
+            return None
+    bruto = repr((namespace, tuple(partes), _versao_codigo(), tag)).encode()
+    return f"eshows:{namespace}:{hashlib.blake2b(bruto, digest_size=16).hexdigest()}"
+
+
+# ╭─────────────────────────  API pública  ───────────────────────────╮
+def get(namespace: str, partes: Iterable[Any], *, dados: bool = True,
+        tabelas: Iterable[str] | None = None) -> Any | None:
+    """Valor guardado por qualquer worker (None = miss)."""
+    backend = _get_backend()
+    if backend is None or time.time() < _pausado_ate:
+        return None
+    k = chave(namespace, partes, dados=dados, tabelas=tabelas)
+    if k is None:
+        return None
+    try:
+        bruto = backend.get(k)
+        valor = None if bruto is None else pickle.loads(bruto)
+    except Exception as e:
+        _falhou("get", e)
+        return None
+    _stats["hits" if valor is not None else "misses"] += 1
+    return valor
+
+
+def put(namespace: str, partes: Iterable[Any], valor: Any, *,
+        dados: bool = True, ttl: float | None = None,
+        tabelas: Iterable[str] | None = None, tag: str | None = None) -> None:
+    """
+    Publica *valor* para todos os workers (ttl em segundos). *tag* é o
+    content_tag das *tabelas* tirado antes do cálculo: se os dados mudaram
+    no meio, o valor pode misturar as duas versões e não é publicado.
+    """
+    backend = _get_backend()
+    if valor is None or backend is None or time.time() < _pausado_ate:
+        return
+    if dados and tag is not None and registry.content_tag(tabelas) != tag:
+        logger.debug("[shared_cache] %s: dados mudaram durante o cálculo", namespace)
+        return
+    k = chave(namespace, partes, dados=dados, tabelas=tabelas, tag=tag)
+    if k is None:
+        return
+    try:
+        bruto = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception as e:
+        logger.debug("[shared_cache] %s não serializável: %s", namespace, e)
+        return
+    try:
+        backend.put(k, bruto, SHARED_CACHE_TTL_HOURS * 3600 if ttl is None else ttl)
+        _stats["puts"] += 1
+    except Exception as e:
+        _falhou("put", e)
+
+
+def clear() -> None:
+    """Apaga tudo (para todos os workers)."""
+    backend = _get_backend()
+    if backend is not None:
+        try:
+            backend.clear()
+        except Exception as e:
+            _falhou("clear", e)
+
+
+def stats() -> dict:
+    backend = _get_backend()
+    return {**_stats, "backend": None if backend is None else backend.nome}
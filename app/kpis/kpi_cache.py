@@ -0,0 +1,145 @@
+"""
+kpi_cache.py — memoização dos get_*_variables
+---------------------------------------------
+Os cards do painel (atual + comparativo), os OKRs e o dashboard chamam os
+mesmos KPIs com o mesmo (ano, período, mês, custom_range) várias vezes por
+callback. Com @memo_kpi o resultado fica num LRU por processo, chaveado por
+(função, argumentos, registry.data_version(), dia):
+
+    • qualquer troca de dataset – refresh do scheduler, reload_tables,
+      invalidate – muda a versão e as entradas antigas deixam de casar;
+      montar um índice derivado (KA, ciclo das casas, cubo…) não muda;
+    • o dia entra na chave porque YTD e "hoje" dependem da data corrente;
+    • DataFrames só entram na chave se forem bases publicadas no registry
+      (identidade); com qualquer outro frame a chamada passa direto.
+
+Quem recebe o resultado ganha uma cópia (deepcopy): pode alterar à vontade.
+Num miss local o resultado ainda é procurado no shared_cache (namespace
+"kpi"), onde qualquer worker que já o calculou para os mesmos dados o deixou.
+A chave de lá usa só as tabelas-fonte que a chamada lê (registry.reading,
+aprendidas no primeiro cálculo e publicadas em "kpi_tabelas"); o resultado
+só é publicado se os dados não mudaram durante o cálculo.
+"""
+from __future__ import annotations
+
+import copy
+import functools
+import inspect
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Callable
+
+import pandas as pd
+
+from app.data import registry, shared_cache
+
+logger = logging.getLogger(__name__)
+
+KPI_CACHE_SIZE = int(os.getenv("KPI_CACHE_SIZE", "256"))
+
+_cache: "OrderedDict[tuple, Any]" = OrderedDict()
+_tabelas: dict = {}                     # chave → tabelas-fonte lidas
+_lock = threading.Lock()
+_versao_atual = None
+_stats = {"hits": 0, "misses": 0}
+
+
+class _SemChave(Exception):
+    """Argumento que não dá para pôr na chave (frame fora do registry etc.)."""
+
+
+def _congelar(valor):
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        nome = registry.owner(valor)
+        if nome is None:
+            raise _SemChave
+        return ("dataset", nome)
+    if isinstance(valor, (list, tuple)):
+        return tuple(_congelar(v) for v in valor)
+    if isinstance(valor, dict):
+        return tuple(sorted(((k, _congelar(v)) for k, v in valor.items()), key=repr))
+    try:
+        hash(valor)
+    except TypeError:
+        raise _SemChave from None
+    return valor
+
+
+def _guardar(chave: tuple, versao, valor) -> None:
+    global _versao_atual
+    with _lock:
+        if versao != _versao_atual:
+            # dados novos: o que foi calculado antes nunca mais casa
+            for k in [k for k in _cache if k[1] != versao]:
+                del _cache[k]
+            _versao_atual = versao
+        _cache[(chave, versao)] = valor
+        _cache.move_to_end((chave, versao))
+        while len(_cache) > KPI_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def memo_kpi(func: Callable) -> Callable:
+    """Decorator: memoiza um get_*_variables (ver docstring do módulo)."""
+    assinatura = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if KPI_CACHE_SIZE <= 0:
+            return func(*args, **kwargs)
+        try:
+            ligados = assinatura.bind(*args, **kwargs)
+            ligados.apply_defaults()
+            chave = (func.__qualname__, _congelar(tuple(ligados.arguments.items())))
+        except (TypeError, _SemChave):
+            return func(*args, **kwargs)
+
+        versao = (registry.data_version(), date.today())
+        with _lock:
+            valor = _cache.get((chave, versao))
+            if valor is not None:
+                _cache.move_to_end((chave, versao))
+            _stats["hits" if valor is not None else "misses"] += 1
+        if valor is not None:
+            registry.record_reads(_tabelas.get(chave, ()))
+            return copy.deepcopy(valor)
+
+        partes = chave + (versao[1],)
+        tabelas = _tabelas.get(chave)
+        if tabelas is None:
+            tabelas = shared_cache.get("kpi_tabelas", chave, dados=False)
+        tag = None if tabelas is None else registry.content_tag(tabelas)
+        if tag is not None:
+            valor = shared_cache.get("kpi", partes, tabelas=tabelas)
+        if valor is None:
+            with registry.reading() as lidas:
+                valor = func(*args, **kwargs)
+            tabelas = tuple(sorted(lidas))
+            # cruzou um refresh: o valor pode misturar dados velhos e novos
+            if (registry.data_version(), date.today()) == versao and tabelas:
+                shared_cache.put("kpi_tabelas", chave, tabelas, dados=False)
+                shared_cache.put("kpi", partes, valor, tabelas=tabelas, tag=tag)
+        if len(_tabelas) > 8 * KPI_CACHE_SIZE:
+            _tabelas.clear()
+        _tabelas[chave] = tabelas
+        registry.record_reads(tabelas)
+        if (registry.data_version(), date.today()) == versao:
+            _guardar(chave, versao, valor)
+        return copy.deepcopy(valor)
+
+    return wrapper
+
+
+def clear() -> None:
+    """Esvazia o cache (testes / diagnóstico)."""
+    with _lock:
+        _cache.clear()
+        _tabelas.clear()
+
+
+def stats() -> dict:
+    with _lock:
+        return {**_stats, "entradas": len(_cache), "max": KPI_CACHE_SIZE}
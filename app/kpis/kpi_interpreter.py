@@ -1,3 +1,4 @@
+import hashlib
 import json
 import logging
 import os
@@ -6,6 +7,7 @@ from datetime import datetime, timedelta
 from typing import Dict, Any, Optional, Tuple
 import anthropic
 from dotenv import load_dotenv
+from app.data import shared_cache
 from app.utils.utils import formatar_valor_utils
 from app.kpis.kpi_glossary import (
     KPI_DETAILED_GLOSSARY, 
@@ -346,7 +348,8 @@ DIRETRIZES:
             status, 
             round(resultado_num, 4),
             # Adiciona hash dos indicadores principais para invalida cache se dados mudarem
-            hash(json.dumps(sorted(all_indicators.items()), default=str)[:1000])
+            # (md5 e não hash(): a chave também vale no shared_cache, entre workers)
+            hashlib.md5(json.dumps(sorted(all_indicators.items()), default=str)[:1000].encode()).hexdigest()
         )
 
         # Verifica cache com TTL
@@ -358,6 +361,14 @@ DIRETRIZES:
                 self.metrics["total_calls"] += 1
                 return cached_data
 
+        # Interpretação já gerada por outro worker
+        cached_data = shared_cache.get("interpretacao", cache_key, dados=False)
+        if cached_data is not None:
+            self.cache[cache_key] = (cached_data, datetime.now())
+            self.metrics["cache_hits"] += 1
+            self.metrics["total_calls"] += 1
+            return cached_data
+
         # Pré-processa indicadores para remover ruído
         cleaned_indicators = self._preprocess_indicators(all_indicators)
         
@@ -420,6 +431,8 @@ DIRETRIZES:
                 
                 # Salva no cache com timestamp
                 self.cache[cache_key] = (interpretation.strip(), datetime.now())
+                shared_cache.put("interpretacao", cache_key, interpretation.strip(),
+                                 dados=False, ttl=self.cache_ttl.total_seconds())
                 
                 # Limpa cache antigo periodicamente
                 if len(self.cache) > 100:
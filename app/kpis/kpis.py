@@ -12,7 +12,9 @@ import os
 import numbers
 import textwrap
 import re
+import inspect
 import logging
+from functools import lru_cache
 logger = logging.getLogger(__name__)
 
 # ── IMPORTS DO PROJETO (todos voltam um nível: "..") ──────────
@@ -37,6 +39,7 @@ from app.utils.utils            import (
     get_period_end,
     filtrar_periodo_principal  
 )
+from app.utils.casa_lifecycle   import primeiro_ultimo_show
 from app.kpis.variacoes        import (
     get_cmgr_variables,
     get_lucratividade_variables,
@@ -183,11 +186,21 @@ def parse_control_values(control_values):
         ]
     return control_values
 
-# Carregando PDF e extraindo sua estratégia/pilares
+# Carregando PDF e extraindo sua estratégia/pilares (no primeiro acesso)
 pdf_name = "OKRs25.pdf"
 pdf_folder = "assets"
-pdf_text = extract_pdf_content(pdf_name, pdf_folder)
-strategy_info = parse_strategy_and_pillars(pdf_text)
+
+
+@lru_cache(maxsize=1)
+def get_strategy_info():
+    return parse_strategy_and_pillars(extract_pdf_content(pdf_name, pdf_folder))
+
+
+def __getattr__(name):
+    # compatibilidade: kpis.strategy_info continua funcionando, mas lazy
+    if name == "strategy_info":
+        return get_strategy_info()
+    raise AttributeError(name)
 
 
 def get_kpi_status(kpi_name, kpi_value, kpi_descriptions):
@@ -1199,9 +1212,6 @@ def register_callbacks(app):
     # kpi_functions["Churn "] = kpi_functions["Churn"] 
     # kpi_functions["Net Revenue Retention "] = kpi_functions["Net Revenue Retention"]
 
-    df_eshows_global = carregar_base_eshows()
-    df_base2_global = carregar_base2()
-
     @app.callback(
         [Output('kpis-cards-container', 'children'),
         Output('painel-indicators-store', 'data')],
@@ -1275,7 +1285,9 @@ def register_callbacks(app):
         # "ano anterior" continua igual: troca só o ano.
         # ------------------------------------------------------------------
 
-        # bases em memória --------------------------------------------------
+        # bases em memória (versão atual do registry) ----------------------
+        df_eshows_global = carregar_base_eshows()
+        df_base2_global = carregar_base2()
         bases_available = {
             "eshows": df_eshows_global,
             "base2":  df_base2_global,
@@ -1306,7 +1318,7 @@ def register_callbacks(app):
                 elif b in bases_available: # Adiciona verificação se a base existe
                     kwargs_current[f"df_{b}_global"] = bases_available[b]
             
-            if 'custom_range' in func.__code__.co_varnames:
+            if 'custom_range' in inspect.signature(func).parameters:
                 kwargs_current['custom_range'] = custom_range_principal
 
             # cálculo principal ------------------------------------------- #
@@ -1339,7 +1351,7 @@ def register_callbacks(app):
                 elif b in bases_available: # Adiciona verificação se a base existe
                     kwargs_comp[f"df_{b}_global"] = bases_available[b]
 
-            if 'custom_range' in func.__code__.co_varnames:
+            if 'custom_range' in inspect.signature(func).parameters:
                 kwargs_comp['custom_range'] = custom_range_comparacao
 
             try:
@@ -1415,15 +1427,17 @@ def register_callbacks(app):
         if not ctx.triggered:
             raise dash.exceptions.PreventUpdate
 
-        # --- DataFrames needed ---
-        # Reference the globally loaded dataframe (ensure df_eshows_global is loaded globally)
-        # df_eshows_global = df_eshows_global # No need to reassign if it's truly global and loaded before
+        # --- DataFrames needed (versão atual do registry) ---
+        df_eshows_global = carregar_base_eshows()
+        df_base2_global = carregar_base2()
 
         # Calculate earliest/latest based on the global df_eshows_global
         # Ensure df_eshows_global is accessible here (should be if loaded globally)
         logger.debug("DEBUG: Calculando earliest/latest dentro de update_kpi_selected_data")
-        df_casas_earliest = df_eshows_global.groupby("Id da Casa")["Data do Show"].min().reset_index(name="EarliestShow") if df_eshows_global is not None and not df_eshows_global.empty else None
-        df_casas_latest = df_eshows_global.groupby("Id da Casa")["Data do Show"].max().reset_index(name="LastShow") if df_eshows_global is not None and not df_eshows_global.empty else None
+        df_casas_earliest, df_casas_latest = (
+            primeiro_ultimo_show(df_eshows_global)
+            if df_eshows_global is not None and not df_eshows_global.empty else (None, None)
+        )
         # Also ensure df_base2_global is accessible if needed later (e.g., for LTV/CAC call)
         # ------------------------------------------------------------------
 
@@ -27,13 +27,15 @@ from app.data.modulobase import (
 from app.kpis.controles import get_kpi_status
 from app.utils.utils import (
     filtrar_periodo_principal,
-    filtrar_periodo_comparacao,
+    argumentos_periodo_comparacao,
     get_period_start,
     get_period_end,
+    get_period_range,
     calcular_periodo_anterior,
     carregar_kpi_descriptions,
     formatar_valor_utils,
     mes_nome_intervalo,
+    rotulo_intervalo,
     faturamento_dos_grupos,
     obter_top5_grupos_ano_anterior,
     calcular_churn,
@@ -41,6 +43,10 @@ from app.utils.utils import (
     filtrar_novos_palcos_por_periodo,
     parse_valor_formatado
 )
+from app.utils.casa_lifecycle import casas_churn, primeiro_ultimo_show
+from app.utils.ocorrencias_rollup import contar_ocorrencias, extremos_ocorrencias
+from app.utils.rh_intervalos import ativos_no_intervalo
+from app.kpis.kpi_cache import memo_kpi
 
 # Carrega descrições de KPI
 kpi_descriptions = carregar_kpi_descriptions()
@@ -225,6 +231,7 @@ def _buscar_periodo_valido_nps(
 # ======================================================================
 # KPI • Roll 6M Growth
 # ======================================================================
+@memo_kpi
 def get_roll_6m_growth(ano, periodo, mes, custom_range=None, df_eshows_global=None):
     """
     Rolling 6-Month Growth (R6MG)
@@ -360,6 +367,7 @@ def get_roll_6m_growth(ano, periodo, mes, custom_range=None, df_eshows_global=No
 # ----------------------------------------------------------------------
 # HELPER • get_cmgr_variables  ➜  calcula CMGR e devolve variáveis
 # ----------------------------------------------------------------------
+@memo_kpi
 def get_cmgr_variables(
     ano: int,
     periodo: str,
@@ -535,6 +543,7 @@ def get_cmgr_variables(
 # ===========================================================================
 # KPI: Lucratividade (["eshows", "base2"])
 # ===========================================================================
+@memo_kpi
 def get_lucratividade_variables(
     ano: int,
     periodo: str,
@@ -712,6 +721,7 @@ def get_lucratividade_variables(
 # ===========================================================================
 # KPI: Net Revenue Retention (NRR) (["eshows"])
 # ===========================================================================
+@memo_kpi
 def get_nrr_variables(
     ano: int,
     periodo: str,
@@ -829,6 +839,7 @@ def get_nrr_variables(
 # ======================================================================
 # KPI: EBITDA  (["eshows","base2"])
 # ======================================================================
+@memo_kpi
 def get_ebitda_variables(
     ano: int,
     periodo: str,
@@ -1026,6 +1037,7 @@ def get_ebitda_variables(
 # ======================================================================
 # KPI: Receita por Colaborador (RPC) (["eshows","pessoas"])
 # ======================================================================
+@memo_kpi
 def get_rpc_variables(
     ano: int,
     periodo: str,
@@ -1093,29 +1105,20 @@ def get_rpc_variables(
             "status": "controle",
             "variables_values": {},
         }
-    # 5) Calcula funcionários ativos em cada mês dentro do intervalo
-    df_p = df_pessoas.copy()
-    if "DataInicio" in df_p.columns:
-        df_p["DataInicio"] = pd.to_datetime(df_p["DataInicio"], errors="coerce")
-    else:
-        df_p["DataInicio"] = pd.NaT
-    if "DataSaida" in df_p.columns:
-        df_p["DataSaida"] = pd.to_datetime(df_p["DataSaida"], errors="coerce")
-    else:
-        df_p["DataSaida"] = pd.to_datetime(df_p.get("DataFinal", pd.NaT), errors="coerce")
-    total_staff_sum = 0
-    count_of_months = 0
+    # 5) Funcionários ativos em cada mês do intervalo (índice rh_intervalos,
+    #    todos os meses numa chamada)
+    first_days, last_days = [], []
     cursor = dt_min.replace(day=1)
     while cursor <= dt_max:
-        first_day = cursor
-        next_month = first_day + relativedelta(months=1)
-        last_day = next_month - pd.DateOffset(days=1)
-        cond_active = (df_p["DataInicio"] <= last_day) & (
-            df_p["DataSaida"].isna() | (df_p["DataSaida"] >= first_day)
-        )
-        total_staff_sum += int(cond_active.sum())
-        count_of_months += 1
+        first_days.append(cursor)
+        last_days.append(cursor + relativedelta(months=1) - pd.DateOffset(days=1))
         cursor += relativedelta(months=1)
+    ativos = ativos_no_intervalo(
+        first_days, last_days, df_pessoas,
+        saida="DataSaida" if "DataSaida" in df_pessoas.columns else "DataFinal",
+    )
+    total_staff_sum = int(ativos.sum())
+    count_of_months = len(first_days)
     if count_of_months < 1:
         return {
             "periodo": label_periodo,
@@ -1144,6 +1147,7 @@ def get_rpc_variables(
 # ------------------------------------------------------------------
 # HELPER • get_inadimplencia_variables
 # ------------------------------------------------------------------
+@memo_kpi
 def get_inadimplencia_variables(
     ano: int,
     periodo: str,
@@ -1277,6 +1281,7 @@ def get_inadimplencia_variables(
 #======================================================================
 # KPI • Estabilidade  (usa sempre o último mês com dados completos)
 # ======================================================================
+@memo_kpi
 def get_estabilidade_variables(ano, periodo, mes,
                                custom_range=None,
                                df_base2_global=None):
@@ -1352,6 +1357,7 @@ def get_estabilidade_variables(ano, periodo, mes,
 # ======================================================================
 # KPI: Nível de Serviço  (map: ["eshows", "ocorrencias"])
 # ======================================================================
+@memo_kpi
 def get_nivel_servico_variables(
     ano: int,
     periodo: str,
@@ -1394,12 +1400,9 @@ def get_nivel_servico_variables(
     # ------------------------------------------------------------------ #
     # 3) Carrega ocorrências e trata duplicadas
     # ------------------------------------------------------------------ #
-    df_ocorrencias = (df_ocorrencias_global.copy()
+    df_ocorrencias = (df_ocorrencias_global
                       if df_ocorrencias_global is not None
-                      else carregar_ocorrencias().copy())
-
-    if df_ocorrencias is not None:
-        df_ocorrencias = df_ocorrencias.loc[:, ~df_ocorrencias.columns.duplicated()]
+                      else carregar_ocorrencias())
 
     # ------------------------------------------------------------------ #
     # 4) Se não houver ocorrências → nível de serviço máximo
@@ -1425,18 +1428,12 @@ def get_nivel_servico_variables(
         }
 
     # ------------------------------------------------------------------ #
-    # 5) Filtra ocorrências no mesmo período
+    # 5) Ocorrências do mesmo período, exceto TIPO = "Leve" (rollup diário)
     # ------------------------------------------------------------------ #
-    df_occ_temp = df_ocorrencias.rename(columns={"DATA": "Data"}).copy()
-    df_occ_princ = filtrar_periodo_principal(df_occ_temp, ano, periodo, mes, custom_range) # Passa custom_range
-
-    # descarta TIPO = "Leve"
-    if "TIPO" in df_occ_princ.columns:
-        df_occ_princ = df_occ_princ[df_occ_princ["TIPO"] != "Leve"]
-
     ocorr_count = (
-        df_occ_princ["ID_OCORRENCIA"].nunique()
-        if not df_occ_princ.empty and "ID_OCORRENCIA" in df_occ_princ.columns
+        contar_ocorrencias(*get_period_range(ano, periodo, mes, custom_range),
+                           exceto="Leve", df_ocorrencias=df_ocorrencias)
+        if "ID_OCORRENCIA" in df_ocorrencias.columns
         else 0
     )
 
@@ -1476,6 +1473,7 @@ def get_nivel_servico_variables(
 # ======================================================================
 # KPI: Turn Over  (map: ["pessoas"])
 # ======================================================================
+@memo_kpi
 def get_turnover_variables(
     ano: int,
     periodo: str,
@@ -1549,6 +1547,7 @@ def get_turnover_variables(
 # ======================================================================
 # KPI: Palcos Vazios
 # ======================================================================
+@memo_kpi
 def get_palcos_vazios_variables(
     ano,
     periodo,
@@ -1582,21 +1581,13 @@ def get_palcos_vazios_variables(
             "variables_values": {"Palcos Vazios": 0}
         }
 
-    df_occ_temp = df_ocorrencias.rename(columns={"DATA": "Data"}).copy()
+    # contagens pelo rollup diário por TIPO (ver ocorrencias_rollup)
     date_range_main = custom_range if custom_range else (start_date_main, end_date_main)
+    inicio, fim = get_period_range(ano, periodo, mes, date_range_main)
+    extremos = extremos_ocorrencias(inicio, fim, df_ocorrencias=df_ocorrencias)
+    label_periodo = rotulo_intervalo(*extremos, periodo) if extremos else "Sem dados"
 
-    df_occ_princ = filtrar_periodo_principal(df_occ_temp, ano, periodo, mes, date_range_main)
-    label_periodo = mes_nome_intervalo(df_occ_princ, periodo)
-
-    if df_occ_princ.empty:
-        return {
-            "periodo": label_periodo,
-            "resultado": "0",
-            "status": "controle",
-            "variables_values": {"Palcos Vazios": 0}
-        }
-
-    if "TIPO" not in df_occ_princ.columns:
+    if extremos is None or "TIPO" not in df_ocorrencias.columns:
         return {
             "periodo": label_periodo,
             "resultado": "0",
@@ -1604,29 +1595,17 @@ def get_palcos_vazios_variables(
             "variables_values": {"Palcos Vazios": 0}
         }
 
-    df_occ_princ_pv = df_occ_princ[df_occ_princ["TIPO"] == "Palco vazio"].copy()
-    if "ID_OCORRENCIA" in df_occ_princ_pv.columns:
-        palcos_vazios = df_occ_princ_pv["ID_OCORRENCIA"].nunique()
-    else:
-        palcos_vazios = len(df_occ_princ_pv)
+    palcos_vazios = contar_ocorrencias(inicio, fim, tipo="Palco vazio", df_ocorrencias=df_ocorrencias)
 
     palcos_vazios_comp = 0
     var_palcosvazios = None
 
     if comparar_opcao is not None:
         date_range_compare_ = custom_range if (custom_range and periodo == "custom-range") else (start_date_compare, end_date_compare)
-        df_occ_comp = filtrar_periodo_comparacao(
-            df_occ_temp,
-            ano, periodo, mes,
-            comparar_opcao,
-            date_range_compare_
-        )
-        if not df_occ_comp.empty and "TIPO" in df_occ_comp.columns:
-            df_occ_comp_pv = df_occ_comp[df_occ_comp["TIPO"] == "Palco vazio"]
-            if "ID_OCORRENCIA" in df_occ_comp_pv.columns:
-                palcos_vazios_comp = df_occ_comp_pv["ID_OCORRENCIA"].nunique()
-            else:
-                palcos_vazios_comp = len(df_occ_comp_pv)
+        argumentos = argumentos_periodo_comparacao(ano, periodo, mes, comparar_opcao, date_range_compare_)
+        if argumentos is not None:
+            palcos_vazios_comp = contar_ocorrencias(*get_period_range(*argumentos), tipo="Palco vazio",
+                                                    df_ocorrencias=df_ocorrencias)
 
             if palcos_vazios_comp > 0:
                 var_palcosvazios = ((palcos_vazios - palcos_vazios_comp) / palcos_vazios_comp) * 100
@@ -1655,6 +1634,7 @@ def get_palcos_vazios_variables(
 # ======================================================================
 # KPI: Perdas Operacionais
 # ======================================================================
+@memo_kpi
 def get_perdas_operacionais_variables(
     ano,
     periodo,
@@ -1743,6 +1723,7 @@ def get_perdas_operacionais_variables(
 # ------------------------------------------------------------------
 # HELPER • get_inadimplencia_real_variables
 # ------------------------------------------------------------------
+@memo_kpi
 def get_inadimplencia_real_variables(
     ano: int,
     periodo: str,
@@ -1883,6 +1864,7 @@ def get_inadimplencia_real_variables(
 # ======================================================================
 # KPI: Crescimento Sustentável
 # ======================================================================
+@memo_kpi
 def get_crescimento_sustentavel_variables(
     ano,
     periodo,
@@ -1980,6 +1962,7 @@ def get_crescimento_sustentavel_variables(
 # ======================================================================
 # KPI: Perfis Completos
 # ======================================================================
+@memo_kpi
 def get_perfis_completos_variables(
     ano,
     periodo,
@@ -2051,6 +2034,7 @@ def get_perfis_completos_variables(
 # ======================================================================
 # KPI: Take Rate
 # ======================================================================
+@memo_kpi
 def get_take_rate_variables(
     ano,
     periodo,
@@ -2129,6 +2113,7 @@ def get_take_rate_variables(
 # ======================================================================
 # KPI: Autonomia do Usuário
 # ======================================================================
+@memo_kpi
 def get_autonomia_usuario_variables(
     ano,
     periodo,
@@ -2201,6 +2186,7 @@ def get_autonomia_usuario_variables(
 # --------------------------------------------------------------------------- #
 # KPI: NPS Artistas                                                           #
 # --------------------------------------------------------------------------- #
+@memo_kpi
 def get_nps_artistas_variables(
     ano: int,
     periodo: str,
@@ -2277,6 +2263,7 @@ def get_nps_artistas_variables(
 # --------------------------------------------------------------------------- #
 # KPI: NPS Equipe                                                             #
 # --------------------------------------------------------------------------- #
+@memo_kpi
 def get_nps_equipe_variables(
     ano: int,
     periodo: str,
@@ -2333,6 +2320,7 @@ def get_nps_equipe_variables(
 # ======================================================================
 # KPI: Conformidade Jurídica
 # ======================================================================
+@memo_kpi
 def get_conformidade_juridica_variables(
     ano,
     periodo,
@@ -2405,6 +2393,7 @@ def get_conformidade_juridica_variables(
 # ======================================================================
 # KPI: Eficiência do Atendimento
 # ======================================================================
+@memo_kpi
 def get_eficiencia_atendimento_variables(
     ano,
     periodo,
@@ -2520,6 +2509,7 @@ def get_sucesso_implantacao_variables(ano, periodo, mes, dashboard=None):
 # ======================================================================
 # KPI: Churn %
 # ======================================================================
+@memo_kpi
 def get_churn_variables(
     ano,
     periodo,
@@ -2601,6 +2591,7 @@ def get_churn_variables(
 # ======================================================================
 # KPI: CAC (Customer Acquisition Cost)
 # ======================================================================
+@memo_kpi
 def get_cac_variables(
     ano: int,
     periodo: str,
@@ -2999,7 +2990,6 @@ def _compute_ltv_cac(
     Retorna (resultado_dict, ok_bool).
     • ok_bool = False  ➜  caller tenta o próximo período de fallback.
     """
-    from datetime import timedelta
     from dateutil.relativedelta import relativedelta
     import gc
 
@@ -3045,27 +3035,10 @@ def _compute_ltv_cac(
     # ------------------------------------------------------------------ #
     # 3) Churn técnico                                                   #
     # ------------------------------------------------------------------ #
-    def churn_ids(df_earliest, df_all_shows, df_new, dias=45, cutoff=None):
-        if df_earliest.empty or df_all_shows.empty or df_new.empty:
-            return []
-        rel = df_all_shows[df_all_shows["Id da Casa"].isin(df_new["Id da Casa"])]
-        last = rel.groupby("Id da Casa")["Data do Show"].max().reset_index(name="LastShow")
-        last["churn_date"] = last["LastShow"] + timedelta(days=dias)
-        cutoff = pd.Timestamp.today().normalize() if cutoff is None else pd.Timestamp(cutoff)
-        cand = last[last["churn_date"] <= cutoff]
-        if cand.empty:
-            return []
-        merged = pd.merge(
-            cand[["Id da Casa", "LastShow"]],
-            rel[["Id da Casa", "Data do Show"]],
-            on="Id da Casa", how="left"
-        )
-        merged["Retornou"] = merged["Data do Show"] > merged["LastShow"]
-        return merged.groupby("Id da Casa")["Retornou"].any().loc[lambda s: ~s].index.tolist()
-
-    churn_list = churn_ids(df_first, df_eshows, df_new,
-                           dias=45,
-                           cutoff=custom_range[1] if custom_range else None)
+    # churn_date = LastShow global + 45 dias até o corte (hoje ou fim do range)
+    cutoff = pd.Timestamp(custom_range[1]) if custom_range else pd.Timestamp.today().normalize()
+    churn_list = casas_churn(None, cutoff, 45, df_eshows=df_eshows,
+                             casas=df_new["Id da Casa"]).tolist()
 
     # ------------------------------------------------------------------ #
     # 4) Lifetime real, histórico e ajustado                             #
@@ -3205,6 +3178,7 @@ def _compute_ltv_cac(
 # --------------------------------------------------------------------------- #
 # 2) Função pública – com fallback                                            #
 # --------------------------------------------------------------------------- #
+@memo_kpi
 def get_ltv_cac_variables(
     ano: int,
     periodo: str,
@@ -3235,23 +3209,11 @@ def get_ltv_cac_variables(
     df_pessoas = df_pessoas_global if df_pessoas_global is not None else carregar_pessoas() # NOVO
 
 
-    df_casas_earliest = (
-        df_casas_earliest_global
-        if df_casas_earliest_global is not None
-        else df_eshows.groupby("Id da Casa")["Data do Show"]
-             .min()
-             .reset_index()
-             .rename(columns={"Data do Show": "EarliestShow"})
-    )
-
-    df_casas_latest = (
-        df_casas_latest_global
-        if df_casas_latest_global is not None
-        else df_eshows.groupby("Id da Casa")["Data do Show"]
-             .max()
-             .reset_index()
-             .rename(columns={"Data do Show": "LastShow"})
-    )
+    df_casas_earliest, df_casas_latest = df_casas_earliest_global, df_casas_latest_global
+    if df_casas_earliest is None or df_casas_latest is None:
+        primeiro, ultimo = primeiro_ultimo_show(df_eshows)
+        df_casas_earliest = primeiro if df_casas_earliest is None else df_casas_earliest
+        df_casas_latest = ultimo if df_casas_latest is None else df_casas_latest
 
     tentativas = 0
     ano_cur, periodo_cur, mes_cur = ano, periodo, mes
@@ -3391,6 +3353,7 @@ def get_ltv_cac_variables(
 # ======================================================================
 # KPI: Score Médio do Show  (["eshows"])
 # ======================================================================
+@memo_kpi
 def get_score_medio_show_variables(      # ← nome agora bate com o import
     ano: int,
     periodo: str,
@@ -3457,44 +3420,13 @@ def _churn_ids(df_eshows: pd.DataFrame,
                uf: str = None) -> list[str]:
     """
     Devolve lista de Id da Casa que churnaram dentro do intervalo analisado.
-    Reaproveita a mesma lógica que já usa no LTV/CAC.
+    Reaproveita o índice de ciclo de vida (casa_lifecycle), como o LTV/CAC.
     """
-    if uf and uf != "BR":
-        df_eshows = df_eshows[df_eshows["Estado"] == uf]
-
-    df_last = (
-        df_eshows
-        .groupby("Id da Casa")["Data do Show"]
-        .max()
-        .reset_index(name="LastShow")
-    )
-    df_last["churn_date"] = df_last["LastShow"] + timedelta(days=dias_sem_show)
-
-    # Candidatos cujo churn_date caiu até o fim do período
-    df_cand = df_last[df_last["churn_date"] <= end_periodo]
-    if df_cand.empty:
-        return []
-
-    # Verifica se o cliente voltou
-    df_shows_cand = df_eshows[df_eshows["Id da Casa"].isin(df_cand["Id da Casa"])]
-    merged = pd.merge(
-        df_cand[["Id da Casa", "LastShow"]],
-        df_shows_cand[["Id da Casa", "Data do Show"]],
-        on="Id da Casa", how="left"
-    )
-    merged["Retornou"] = merged["Data do Show"] > merged["LastShow"]
-    df_status = merged.groupby("Id da Casa")["Retornou"].any().reset_index()
-
-    churn_ids = df_status[~df_status["Retornou"]]["Id da Casa"].tolist()
-
-    # Mantém só os churns cujo churn_date caiu dentro do intervalo analisado
-    churn_final = df_last[df_last["Id da Casa"].isin(churn_ids)]
-    churn_final = churn_final[
-        (churn_final["churn_date"] >= start_periodo) &
-        (churn_final["churn_date"] <= end_periodo)
-    ]
-    return churn_final["Id da Casa"].tolist()
+    # LastShow global por casa: quem tem churn_date no intervalo não voltou
+    return casas_churn(start_periodo, end_periodo, dias_sem_show,
+                       df_eshows=df_eshows, uf=uf).tolist()
 
+@memo_kpi
 def get_churn_valor_variables(
     ano: int,
     periodo: str,
@@ -3629,6 +3561,7 @@ def get_churn_valor_variables(
 # --------------------------------------------------------------------------- #
 # KPI: Receita por Pessoal  •  Faturamento ÷ Custo Total de Pessoas           #
 # --------------------------------------------------------------------------- #
+@memo_kpi
 def get_receita_pessoal_variables(
     ano: int,
     periodo: str,
@@ -3725,6 +3658,7 @@ def get_receita_pessoal_variables(
 # ===========================================================================
 # KPI: CSAT Artistas (base: npsartistas)
 # ===========================================================================
+@memo_kpi
 def get_csat_artistas_variables(
     ano: int,
     periodo: str,
@@ -3780,6 +3714,7 @@ def get_csat_artistas_variables(
 # ===========================================================================
 # KPI: CSAT Operação (base: npsartistas)
 # ===========================================================================
+@memo_kpi
 def get_csat_operacao_variables(
     ano: int,
     periodo: str,
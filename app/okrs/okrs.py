@@ -44,7 +44,9 @@ from app.utils.utils import (
     parse_valor_formatado,
     
 )
+from app.utils.casa_lifecycle import primeiro_ultimo_show
 from app.kpis.controles import zonas_de_controle, get_kpi_status
+from app.data.scheduler import on_refresh
 from app.kpis.variacoes import (
     get_nrr_variables,
     get_churn_variables,
@@ -64,35 +66,21 @@ from app.kpis.variacoes import (
 )
 
 # =============================================================================
-# DataFrame loaders
+# DataFrame loaders (leem do registry via modulobase – sem cópia local)
 # =============================================================================
-_df_eshows_cache = None
-_df_base2_cache = None
-_df_ocorrencias_cache = None
-
-
 def get_df_eshows():
     """Return the main eShows dataframe, loading it on first access."""
-    global _df_eshows_cache
-    if _df_eshows_cache is None:
-        _df_eshows_cache = carregar_base_eshows()
-    return _df_eshows_cache
+    return carregar_base_eshows()
 
 
 def get_df_base2():
     """Return the base2 dataframe, loading it on first access."""
-    global _df_base2_cache
-    if _df_base2_cache is None:
-        _df_base2_cache = carregar_base2()
-    return _df_base2_cache
+    return carregar_base2()
 
 
 def get_df_ocorrencias():
     """Return the ocorrencias dataframe, loading it on first access."""
-    global _df_ocorrencias_cache
-    if _df_ocorrencias_cache is None:
-        _df_ocorrencias_cache = carregar_ocorrencias()
-    return _df_ocorrencias_cache
+    return carregar_ocorrencias()
 
 
 # =============================================================================
@@ -101,6 +89,12 @@ def get_df_ocorrencias():
 # Cache para evitar múltiplas chamadas ao Supabase
 _metas_cache = {}
 
+def _limpar_metas_cache(tabelas):
+    if "metas" in tabelas:
+        _metas_cache.clear()
+
+on_refresh(_limpar_metas_cache)
+
 def buscar_metas_direto_supabase(ano, periodo, mes=None, custom_range=None):
     """
     Busca as metas diretamente do Supabase usando SQL com cache.
@@ -392,8 +386,10 @@ def calcular_progresso_geral(periodo, mes_selecionado, mes_inicial=None, mes_fin
     df_inad_casas, df_inad_artistas = carregar_base_inad()  # Para o cálculo da Inadimplência Real
     
     # Gerar df_casas_earliest e df_casas_latest para LTV/CAC
-    df_casas_earliest = get_df_eshows().groupby("Id da Casa")["Data do Show"].min().reset_index(name="EarliestShow") if get_df_eshows() is not None and not get_df_eshows().empty else None
-    df_casas_latest = get_df_eshows().groupby("Id da Casa")["Data do Show"].max().reset_index(name="LastShow") if get_df_eshows() is not None and not get_df_eshows().empty else None
+    df_casas_earliest, df_casas_latest = (
+        primeiro_ultimo_show(get_df_eshows())
+        if get_df_eshows() is not None and not get_df_eshows().empty else (None, None)
+    )
     
     # Obtenção de todas as metas utilizando a função ler_todas_as_metas
     mes = None
@@ -1497,8 +1493,10 @@ def calcular_progresso_kpi_com_historico(
                 elif 'ltv_cac' in funcao_kpi.__name__.lower():
                     # Caso específico para LTV/CAC
                     # Calcular df_casas_earliest e df_casas_latest
-                    df_casas_earliest = get_df_eshows().groupby("Id da Casa")["Data do Show"].min().reset_index(name="EarliestShow") if get_df_eshows() is not None and not get_df_eshows().empty else None
-                    df_casas_latest = get_df_eshows().groupby("Id da Casa")["Data do Show"].max().reset_index(name="LastShow") if get_df_eshows() is not None and not get_df_eshows().empty else None
+                    df_casas_earliest, df_casas_latest = (
+                        primeiro_ultimo_show(get_df_eshows())
+                        if get_df_eshows() is not None and not get_df_eshows().empty else (None, None)
+                    )
                     
                     resultado_anterior = funcao_kpi(
                         ano=ano_ant,
@@ -3884,8 +3882,10 @@ def register_okrs_callbacks(app):
         df_inad_casas, df_inad_artistas = carregar_base_inad()
         
         # Calcular df_casas_earliest e df_casas_latest para LTV/CAC
-        df_casas_earliest = df_eshows_global.groupby("Id da Casa")["Data do Show"].min().reset_index(name="EarliestShow") if df_eshows_global is not None and not df_eshows_global.empty else None
-        df_casas_latest = df_eshows_global.groupby("Id da Casa")["Data do Show"].max().reset_index(name="LastShow") if df_eshows_global is not None and not df_eshows_global.empty else None
+        df_casas_earliest, df_casas_latest = (
+            primeiro_ultimo_show(df_eshows_global)
+            if df_eshows_global is not None and not df_eshows_global.empty else (None, None)
+        )
         
         # Obtenção de todas as metas utilizando a função ler_todas_as_metas
         mes = None
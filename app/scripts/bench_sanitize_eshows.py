@@ -0,0 +1,155 @@
+"""
+app.scripts.bench_sanitize_eshows — Benchmark do sanitize_eshows_df
+Como rodar:
+    (.venv) PS> python -m app.scripts.bench_sanitize_eshows [linhas] [repetições]
+
+Gera uma BaseEshows sintética (200k linhas por padrão, já com os nomes de
+coluna do data_manager e ~1% de linhas problemáticas por regra), confere
+que a versão em passada única produz o mesmo resultado da versão antiga
+(concat por regra + otimizar_tipos duas vezes) e mede as duas.
+"""
+
+# --------------------------------------------------------------------------- #
+# Imports                                                                     #
+# --------------------------------------------------------------------------- #
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from app.data.modulobase import sanitize_eshows_df, otimizar_tipos
+
+
+# --------------------------------------------------------------------------- #
+# Fixture sintética                                                           #
+# --------------------------------------------------------------------------- #
+def base_eshows_sintetica(n: int = 200_000, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    n_casas = max(1, n // 100)
+    casas = np.array([f"Casa {i}" for i in range(n_casas)], dtype=object)
+    cidades = np.array(["São Paulo", "Rio de Janeiro", "Belo Horizonte",
+                        "Curitiba", "Porto Alegre", "Recife"], dtype=object)
+    ufs = np.array(["SP", "RJ", "MG", "PR", "RS", "PE"], dtype=object)
+    c_id = rng.integers(0, n_casas, n)
+    cid = rng.integers(0, len(cidades), n)
+    datas = pd.Timestamp("2022-01-01") + pd.to_timedelta(rng.integers(0, 1200, n), "D")
+    bruto = rng.integers(500, 20_000, n).astype(float)
+
+    df = pd.DataFrame({
+        "Id do Show": np.arange(1, n + 1),
+        "Id da Casa": c_id,
+        "Casa": casas[c_id],
+        "Estado": ufs[cid],
+        "Cidade": cidades[cid],
+        "Data do Show": datas.strftime("%Y-%m-%d").to_numpy(dtype=object),
+        "Nome do Artista": np.char.add("Artista ", rng.integers(0, n // 20 + 1, n).astype(str)).astype(object),
+        "Valor Total do Show": bruto,
+        "Valor Artista": bruto * 0.8,
+        "Comissão B2B": bruto * 0.1,
+        "Comissão B2C": bruto * 0.05,
+        "Antecipação de Cachês": np.where(rng.random(n) < 0.1, bruto * 0.02, 0.0),
+        "Curadoria": 0.0,
+        "SaaS Percentual": 0.0,
+        "SaaS Mensalidade": 0.0,
+        "Notas Fiscais": np.where(rng.random(n) < 0.3, 12.5, 0.0),
+        "Grupo": np.where(rng.random(n) < 0.2, "Grupo A", None),
+        "Avaliação": rng.integers(1, 6, n).astype(float),
+    })
+
+    # ~1% de sujeira por regra (índices sorteados, podem se sobrepor)
+    def amostra():
+        return rng.choice(n, size=max(1, n // 100), replace=False)
+
+    df.loc[amostra(), "Id do Show"] = df["Id do Show"].iloc[:max(1, n // 100)].to_numpy()
+    df.loc[amostra(), "Nome do Artista"] = "Artista TESTE"
+    df.loc[amostra(), "Casa"] = "Casa de teste"
+    df.loc[amostra()[: n // 1000 + 1], "Nome do Artista"] = None
+    df.loc[amostra(), "Valor Total do Show"] = np.nan
+    df.loc[amostra(), "Data do Show"] = "data inválida"
+    return df
+
+
+# --------------------------------------------------------------------------- #
+# Versão anterior (referência)                                                #
+# --------------------------------------------------------------------------- #
+def sanitize_eshows_legacy(df_raw: pd.DataFrame):
+    df_clean = df_raw.copy()
+    df_excl = pd.DataFrame(columns=df_clean.columns.tolist() + ["Motivo"])
+
+    if "Id do Show" in df_clean.columns:
+        dup = df_clean.duplicated("Id do Show", keep="first")
+        df_excl = pd.concat([df_excl, df_clean[dup].assign(Motivo="id repetido")])
+        df_clean = df_clean[~dup]
+
+    for col, motivo in [("Nome do Artista", "nome teste"), ("Casa", "casa teste")]:
+        if col in df_clean.columns:
+            mask = df_clean[col].str.contains("Teste", case=False, na=False)
+            df_excl = pd.concat([df_excl, df_clean[mask].assign(Motivo=motivo)])
+            df_clean = df_clean[~mask].dropna(subset=[col])
+
+    if "Valor Total do Show" in df_clean.columns:
+        mask = df_clean["Valor Total do Show"].isna()
+        df_excl = pd.concat([df_excl, df_clean[mask].assign(Motivo="valor nulo")])
+        df_clean = df_clean[~mask]
+
+    if "Data do Show" in df_clean.columns:
+        df_clean["Data do Show"] = pd.to_datetime(df_clean["Data do Show"], errors="coerce")
+        mask = df_clean["Data do Show"].isna()
+        df_excl = pd.concat([df_excl, df_clean[mask].assign(Motivo="data show nula/inválida")])
+        df_clean = df_clean[~mask]
+
+    for col in ("Primeiro_Dia_Mes", "Data de Pagamento"):
+        df_clean.drop(columns=col, errors="ignore", inplace=True)
+    if "Data do Show" in df_clean.columns:
+        df_clean.rename(columns={"Data do Show": "Data"}, inplace=True)
+    if "Data" in df_clean.columns:
+        df_clean["Data"] = pd.to_datetime(df_clean["Data"], errors="coerce")
+        df_clean["Ano"] = df_clean["Data"].dt.year
+        df_clean["Mês"] = df_clean["Data"].dt.month
+    if "Data" in df_clean.columns and "Data do Show" not in df_clean.columns:
+        df_clean["Data do Show"] = df_clean["Data"]
+    for col in ("Casa", "Cidade", "Grupo", "Estado"):
+        if col in df_clean.columns:
+            df_clean[col] = df_clean[col].astype("category")
+
+    df_clean = otimizar_tipos(df_clean.reset_index(drop=True))
+    # carregar_base_eshows aplicava otimizar_tipos de novo
+    return otimizar_tipos(df_clean), df_excl.reset_index(drop=True)
+
+
+# --------------------------------------------------------------------------- #
+# Execução                                                                    #
+# --------------------------------------------------------------------------- #
+def _melhor_tempo(fn, df, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        fn(df)
+        tempos.append(time.perf_counter() - t0)
+    return min(tempos)
+
+
+def main(n: int = 200_000, repeticoes: int = 3) -> None:
+    warnings.simplefilter("ignore", FutureWarning)   # concat vazio do legado
+    df = base_eshows_sintetica(n)
+    print(f"BaseEshows sintética: {len(df):,} linhas × {df.shape[1]} colunas")
+
+    novo_clean, novo_excl = sanitize_eshows_df(df)
+    velho_clean, velho_excl = sanitize_eshows_legacy(df)
+    pd.testing.assert_frame_equal(novo_clean, velho_clean)
+    assert (novo_excl["Motivo"].value_counts().to_dict()
+            == velho_excl["Motivo"].value_counts().to_dict())
+    assert (novo_excl["Id do Show"].tolist() == velho_excl["Id do Show"].tolist())
+    print(f"Resultados idênticos: {len(novo_clean):,} limpas | {len(novo_excl):,} excluídas")
+
+    t_velho = _melhor_tempo(sanitize_eshows_legacy, df, repeticoes)
+    t_novo = _melhor_tempo(sanitize_eshows_df, df, repeticoes)
+    print(f"legado : {t_velho * 1000:8.1f} ms")
+    print(f"atual  : {t_novo * 1000:8.1f} ms  ({t_velho / t_novo:.1f}× mais rápido)")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    main(*args)
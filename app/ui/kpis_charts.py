@@ -3,12 +3,12 @@
 # Gráficos de evolução mensal dos KPIs                                        #
 # --------------------------------------------------------------------------- #
 import calendar
+from collections.abc import Mapping
 from datetime import datetime
 import plotly.graph_objects as go
 import pandas as pd
 import logging
-from app.utils.utils import parse_valor_formatado      # ← função única, já corrigida
-from app.utils.hist import _format_tempo_casa # << IMPORTADO DE HIST
+from app.utils.hist import _format_tempo_casa, mes_para_data # << IMPORTADO DE HIST
 from app.core.config_data import HIST_KPI_MAP
 from app.utils.mem_utils import log_mem
 import numpy as np
@@ -21,28 +21,34 @@ COLOR_NEG   = "#F57C7C"   # vermelho
 COLOR_NEUTR = "#FC4F22"   # laranja principal
 BG_COLOR    = "rgba(0,0,0,0)"
 
+MAX_ROTULOS = 18          # acima disso o gráfico não desenha rótulo por ponto
+
 
 # --------------------------------------------------------------------------- #
-# 1) Captura dos dados históricos (até 12 pontos)                              #
+# 1) Captura dos dados históricos (12 pontos por padrão)                       #
 # --------------------------------------------------------------------------- #
 @log_mem("kpi_hist_data")
-def kpi_hist_data(kpi_name: str):
+def kpi_hist_data(kpi_name: str, months: int = 12):
     """
-    Retorna (labels, values) dos 12 últimos pontos históricos do KPI.
+    Retorna (labels, values) dos *months* últimos pontos históricos do KPI
+    (0 = histórico completo).
     """
     logger.debug("\n--- [kpi_hist_data] INICIANDO para KPI: '%s' ---", kpi_name)
     
     if HIST_KPI_MAP is None:
         logger.debug("[kpi_hist_data] ERRO FATAL: HIST_KPI_MAP importado de config_data é None.")
         return None, None
-    if not isinstance(HIST_KPI_MAP, dict):
+    if not isinstance(HIST_KPI_MAP, Mapping):
         logger.debug("[kpi_hist_data] ERRO FATAL: HIST_KPI_MAP importado de config_data não é um dicionário, é %s.", type(HIST_KPI_MAP))
         return None, None
     if not HIST_KPI_MAP:
         logger.debug("[kpi_hist_data] ERRO FATAL: HIST_KPI_MAP importado de config_data está VAZIO.")
         return None, None
 
-    hist = HIST_KPI_MAP.get(kpi_name)
+    try:
+        hist = HIST_KPI_MAP.series(kpi_name, months)
+    except KeyError:
+        hist = None
     
     # Log para verificar se o KPI específico foi encontrado e algumas chaves do mapa
     logger.debug("[kpi_hist_data] Verificando '%s'. Encontrado em HIST_KPI_MAP (de config_data): %s. Algumas chaves do mapa: %s",
@@ -53,39 +59,21 @@ def kpi_hist_data(kpi_name: str):
         return None, None
 
     raw = hist.get("raw_data")
-    if not raw:
-        logger.debug("[kpi_hist_data] KPI: '%s', 'raw_data' não encontrado ou vazio em hist. Verificando 'series' como fallback.", kpi_name)
-        raw = hist.get("series")
-
-    if not raw or not isinstance(raw, dict):
-        logger.debug("[kpi_hist_data] KPI: '%s', nem 'raw_data' nem 'series' encontrados ou não são dict. Conteúdo de hist: %s. Retornando None, None.", kpi_name, hist)
+    if not raw or not isinstance(raw, dict) or "mes" not in raw:
+        logger.debug("[kpi_hist_data] KPI: '%s', 'raw_data' ausente ou vazio. Retornando None, None.", kpi_name)
         return None, None
-    
-    logger.debug("[kpi_hist_data] KPI: '%s', raw_data obtido: %s, %s items.", kpi_name, type(raw), len(raw) if isinstance(raw, dict) else 'N/A')
 
-    items  = list(raw.items())[-12:]
-    if not items:
-        logger.debug("[kpi_hist_data] KPI: '%s', raw_data foi encontrado mas está vazio após pegar os últimos 12 items. Retornando None, None.", kpi_name)
-        return None, None
-        
-    labels = [pd.to_datetime(d).strftime("%b/%y") for d, _ in items]
-    
-    values = []
-    for i, (date_str, v_orig) in enumerate(items):
-        current_value = None
-        if v_orig is None:
-            current_value = None
-        elif isinstance(v_orig, str) and v_orig.strip().upper() == 'N/A':
-            current_value = None
-        elif isinstance(v_orig, (int, float)) and pd.isna(v_orig):
-            current_value = None
-        elif isinstance(v_orig, (int, float)):
-            current_value = float(v_orig)
-        elif isinstance(v_orig, str):
-            parsed = parse_valor_formatado(v_orig)
-            if isinstance(parsed, (int, float)):
-                current_value = float(parsed)
-        values.append(current_value)
+    # raw_data numérico (hist._serie_numerica): ordinais de mês + valores
+    meses, valores = raw["mes"], np.asarray(raw["valor"], dtype=float)
+    if months:
+        meses, valores = meses[-months:], valores[-months:]
+    logger.debug("[kpi_hist_data] KPI: '%s', %s pontos (%s).", kpi_name, len(meses), raw.get("formato"))
+
+    labels = [mes_para_data(m).strftime("%b/%y") for m in meses]
+    # percentuais vêm em 0–100; o gráfico trabalha com a fração
+    if raw.get("formato") == "percentual":
+        valores = valores / 100.0
+    values = [None if np.isnan(v) else float(v) for v in valores]
 
     logger.debug("[kpi_hist_data] FINAL - KPI: '%s', Labels: %s, Values: %s\n---", kpi_name, labels, values)
     return labels, values
@@ -104,10 +92,11 @@ def generate_kpi_figure(
     format_type: str = "numero",
     height: int = 540,
     custom_color: str = None,
-    animated: bool = False
+    animated: bool = False,
+    months: int = 12
 ):
     """
-    Gráfico evolutivo (até 12 meses) do KPI.
+    Gráfico evolutivo do KPI (12 meses por padrão; 24, 36 ou 0 = completo).
     1º) Usa dados prontos em HIST_KPI_MAP; se não houver, calcula on-the-fly.
     2º) Se format_type ficar em "numero", tenta inferir:
         · palavras–chave de dinheiro → "monetario"
@@ -137,7 +126,7 @@ def generate_kpi_figure(
     # ------------------------------------------------------------------ #
     # 1) Histórico pronto?                                               #
     # ------------------------------------------------------------------ #
-    labels, values = kpi_hist_data(kpi_name)
+    labels, values = kpi_hist_data(kpi_name, months)
     if not labels or not values:
         # Retorna figura vazia com mensagem
         fig = go.Figure()
@@ -262,8 +251,9 @@ def generate_kpi_figure(
         )
     )
 
-    # Rótulos sobre cada ponto (com sombra)
-    for _, r in df_hist.iterrows():
+    # Rótulos sobre cada ponto (com sombra) – só em janelas curtas; nas
+    # longas os valores ficam no hover
+    for _, r in (df_hist.iterrows() if len(df_hist) <= MAX_ROTULOS else ()):
         if pd.isna(r["valor"]) or r["valor"] == 0:
             continue
 
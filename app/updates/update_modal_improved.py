@@ -1172,7 +1172,7 @@ def init_update_modal_callbacks(app):
                     
                     # Limpar cache se sucesso
                     if upload_result["success"]:
-                        data_manager.clear_cache()
+                        data_manager.clear_table_cache([upload_table])
                     
                     return False, message, "Confirmar Atualização", False, None
                     
@@ -1199,7 +1199,7 @@ def init_update_modal_callbacks(app):
                 ], className="text-center")
                 
                 # Importa e executa a atualização
-                from app.data_manager import reload_tables
+                from app.data.data_manager import reload_tables
                 
                 results = reload_tables(selected_tables)
                 
@@ -0,0 +1,100 @@
+"""
+casa_lifecycle.py — ciclo de vida das casas na BaseEshows
+---------------------------------------------------------
+Índice único, por versão da BaseEshows, com o que churn, lifetime,
+novos palcos e LTV recalculavam cada um com groupby + merge:
+
+    • "tabela": EarliestShow, LastShow e Shows por Id da Casa
+    • "primeiro_ultimo": (EarliestShow, LastShow) como frames com a coluna
+      Id da Casa, o formato de carregar_casas_earliest_latest
+
+Como LastShow é o último show da casa na base inteira, "não retornou após
+LastShow" é sempre verdade: o churn de um período vira um filtro de
+LastShow + dias_sem_show na tabela, O(casas), sem voltar aos shows.
+"""
+from __future__ import annotations
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+from app.data import registry
+from app.data.data_manager import CACHE_RAM
+from app.data.modulobase import carregar_base_eshows
+
+logger = logging.getLogger(__name__)
+
+
+def _build(df: pd.DataFrame | None, uf: str | None = None) -> dict:
+    if df is not None and uf and uf != "BR" and "Estado" in df.columns:
+        df = df[df["Estado"] == uf]
+    if df is None or df.empty or not {"Id da Casa", "Data do Show"} <= set(df.columns):
+        ids = pd.Index([], name="Id da Casa")
+        datas, codigos, inicio = np.array([], "datetime64[ns]"), np.array([], np.int64), np.zeros(1, np.int64)
+    else:
+        datas = pd.to_datetime(df["Data do Show"], errors="coerce")
+        validas = (df["Id da Casa"].notna() & datas.notna()).to_numpy()
+        codigos, ids = pd.factorize(df["Id da Casa"][validas], sort=True)
+        ids = pd.Index(ids, name="Id da Casa")
+        datas = datas[validas].to_numpy("datetime64[ns]")
+        ordem = np.lexsort((datas, codigos))
+        codigos, datas = codigos[ordem].astype(np.int64), datas[ordem]
+        inicio = np.searchsorted(codigos, np.arange(len(ids) + 1))
+
+    tabela = pd.DataFrame({
+        "EarliestShow": datas[inicio[:-1]] if len(ids) else datas,
+        "LastShow": datas[inicio[1:] - 1] if len(ids) else datas,
+        "Shows": np.diff(inicio),
+    }, index=ids)
+    logger.debug("[casa_lifecycle] %s casas, %s shows%s",
+                 len(tabela), len(datas), f" ({uf})" if uf else "")
+    return {"tabela": tabela,
+            "primeiro_ultimo": (tabela["EarliestShow"].reset_index(),
+                                tabela["LastShow"].reset_index())}
+
+
+def ciclo_casas(df_eshows: pd.DataFrame | None = None, uf: str | None = None) -> dict:
+    """
+    Índice de ciclo de vida (ver docstring do módulo). Sem *df_eshows* – ou
+    com a própria BaseEshows do registry – usa o índice compartilhado da
+    versão atual; outro frame (um recorte) gera um índice só para ele.
+    """
+    if not CACHE_RAM:
+        return _build(carregar_base_eshows() if df_eshows is None else df_eshows, uf)
+    if df_eshows is not None and df_eshows is not carregar_base_eshows():
+        return _build(df_eshows, uf)
+    nome = "ciclo_casas" if not uf or uf == "BR" else f"ciclo_casas_{uf}"
+    return registry.get(nome, lambda: _build(carregar_base_eshows(), uf),
+                        tables=("baseeshows",))
+
+
+def primeiro_ultimo_show(df_eshows=None, uf=None):
+    """
+    (EarliestShow, LastShow) por casa no formato de carregar_casas_earliest_latest.
+    Os frames são os do índice: compartilhados, não altere no lugar.
+    """
+    return ciclo_casas(df_eshows, uf)["primeiro_ultimo"]
+
+
+def datas_churn(dias_sem_show: int = 45, df_eshows=None, uf=None) -> pd.Series:
+    """Data de churn técnico de cada casa: LastShow + dias_sem_show."""
+    tabela = ciclo_casas(df_eshows, uf)["tabela"]
+    return tabela["LastShow"] + pd.Timedelta(days=dias_sem_show)
+
+
+def casas_churn(inicio, fim, dias_sem_show: int = 45, df_eshows=None, uf=None,
+                casas=None) -> pd.Index:
+    """
+    Casas cujo churn técnico (LastShow + dias_sem_show) cai em [inicio, fim].
+    *inicio* None = sem limite inferior; *casas* restringe o universo
+    (ex.: só os novos palcos do período).
+    """
+    dc = datas_churn(dias_sem_show, df_eshows, uf)
+    if casas is not None:
+        dc = dc[dc.index.isin(pd.Series(casas).dropna().unique())]
+    mask = dc <= pd.Timestamp(fim)
+    if inicio is not None:
+        mask &= dc >= pd.Timestamp(inicio)
+    return dc.index[mask.to_numpy()]
+
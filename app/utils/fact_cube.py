@@ -0,0 +1,102 @@
+"""
+fact_cube.py — cubo mensal de fatos da BaseEshows
+-------------------------------------------------
+Uma linha por mês com as medidas que os históricos de hist.py
+recalculavam cada um por conta própria:
+
+    • componentes do faturamento (COLUNAS_FATURAMENTO) + "Faturamento"
+    • "Valor Total do Show" (GMV)
+    • "Linhas" (registros), "Shows" (Id do Show não nulo)
+    • "Casas", "Cidades", "Artistas" (valores distintos no mês)
+
+O índice "Data do Show" usa os mesmos rótulos de
+groupby(pd.Grouper(freq="M")) – último dia do mês – e os meses sem show
+aparecem zerados como no Grouper. O cubo é
+montado uma vez por versão da BaseEshows (registry, tabela baseeshows) e
+cada histórico vira um recorte barato dele.
+"""
+from __future__ import annotations
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+from app.data import registry
+from app.data.data_manager import CACHE_RAM
+from app.data.modulobase import carregar_base_eshows
+
+logger = logging.getLogger(__name__)
+
+COLUNAS_FATURAMENTO = [
+    "Comissão B2B",
+    "Comissão B2C",
+    "Antecipação de Cachês",
+    "Curadoria",
+    "SaaS Percentual",
+    "SaaS Mensalidade",
+    "Notas Fiscais",
+]
+GMV = "Valor Total do Show"
+
+# medida de contagem → (coluna-fonte, agregação)
+_CONTAGENS = {
+    "Shows":    ("Id do Show", "count"),
+    "Casas":    ("Id da Casa", "nunique"),
+    "Cidades":  ("Cidade", "nunique"),
+    "Artistas": ("Nome do Artista", "nunique"),
+}
+
+MEDIDAS = COLUNAS_FATURAMENTO + ["Faturamento", GMV, "Linhas", *_CONTAGENS]
+
+
+def _vazio() -> pd.DataFrame:
+    idx = pd.DatetimeIndex([], name="Data do Show")
+    return pd.DataFrame(columns=MEDIDAS, index=idx, dtype="float64")
+
+
+def _build() -> pd.DataFrame:
+    df = carregar_base_eshows()
+    if df is None or df.empty or "Data do Show" not in df.columns:
+        return _vazio()
+
+    mes = pd.to_datetime(df["Data do Show"], errors="coerce").dt.to_period("M")
+    base = {"_mes": mes, "_um": np.ones(len(df), dtype=np.int8)}
+    for col in COLUNAS_FATURAMENTO + [GMV]:
+        if col in df.columns:
+            base[col] = pd.to_numeric(df[col], errors="coerce").astype("float64").fillna(0.0)
+        else:
+            base[col] = np.zeros(len(df))
+    aggs = {col: (col, "sum") for col in COLUNAS_FATURAMENTO + [GMV]}
+    aggs["Linhas"] = ("_um", "size")
+    for nome, (col, func) in _CONTAGENS.items():
+        if col in df.columns:
+            base[col] = df[col]
+            aggs[nome] = (col, func)
+
+    cubo = pd.DataFrame(base).groupby("_mes", observed=True, sort=True).agg(**aggs)
+    for nome in _CONTAGENS:
+        if nome not in cubo.columns:
+            cubo[nome] = 0
+    cubo["Faturamento"] = cubo[COLUNAS_FATURAMENTO].sum(axis=1)
+    if cubo.empty:
+        return _vazio()
+
+    meses = pd.period_range(cubo.index.min(), cubo.index.max(), freq="M")
+    cubo = cubo.reindex(meses, fill_value=0)
+    cubo.index = cubo.index.to_timestamp(how="end").normalize()
+    cubo.index.name = "Data do Show"
+
+    cubo = cubo[MEDIDAS]
+    logger.info("[fact_cube] cubo mensal: %s linhas", len(cubo))
+    return cubo
+
+
+def cubo_mensal() -> pd.DataFrame:
+    """
+    Cubo mensal da BaseEshows (ver docstring do módulo). O frame é
+    compartilhado: não altere no lugar.
+    """
+    if not CACHE_RAM:
+        return _build()
+    return registry.get("cubo_mensal", _build, tables=("baseeshows",))
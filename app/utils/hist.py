@@ -1,7 +1,6 @@
 # hist.py
 import logging
 import random
-import gc
 from datetime import timedelta
 from collections import OrderedDict
 
@@ -11,6 +10,7 @@ from dateutil.relativedelta import relativedelta
 
 from app.data.modulobase import (
     carregar_base_eshows,
+    carregar_casas_earliest_latest,
     carregar_base2,
     carregar_pessoas,
     carregar_ocorrencias,
@@ -18,18 +18,17 @@ from app.data.modulobase import (
 )
 from app.utils.utils import (
     formatar_valor_utils,
-    calcular_churn,
     obter_top5_grupos_ano_anterior,
-    get_churn_ka_for_period,
-    filtrar_periodo_principal,
+    get_period_start,
     get_period_end,
     filtrar_novos_palcos_por_periodo,
     filtrar_novos_palcos_por_comparacao,
-    calcular_churn_novos_palcos,
-    faturamento_dos_grupos,
-    novos_palcos_dos_grupos,
-    ensure_grupo_col,
 )  # Função para formatação
+from app.utils.fact_cube import cubo_mensal
+from app.utils.casa_lifecycle import ciclo_casas, datas_churn
+from app.utils.ocorrencias_rollup import serie_mensal_ocorrencias
+from app.utils.rh_intervalos import headcount, receita_por_colaborador, tempo_medio
+from app.utils.ka_index import churn_ka, faturamento_ka, gmv_ka, novos_palcos_ka
 
 logger = logging.getLogger(__name__)
 
@@ -59,6 +58,70 @@ def sanitize_faturamento_cols(df: pd.DataFrame, cols=COLUNAS_FATURAMENTO) -> pd.
 # Funções Auxiliares
 # --------------------------
 
+def _local(df):
+    """
+    Cópia rasa do frame compartilhado do registry. Conversões e colunas
+    novas ficam só nesta chamada, então os históricos podem rodar em
+    paralelo sem alterar a base que os callbacks leem.
+    """
+    return df if df is None else df.copy(deep=False)
+
+
+def _eshows_mensal() -> pd.DataFrame:
+    """
+    Agregados mensais da BaseEshows (cubo compartilhado, ver fact_cube) com
+    a coluna 'Data do Show' = fim do mês – o mesmo formato do antigo
+    groupby(pd.Grouper(key='Data do Show', freq='M')).reset_index().
+    """
+    return cubo_mensal().reset_index()
+
+def _serie_numerica(serie, formato, escala=1.0) -> dict:
+    """
+    raw_data numérico de um histórico: {"mes": int64 (ano*12 + mês-1),
+    "valor": float64, "formato": tag}. *valor* já está na escala que
+    formatar_valor_utils espera (percentual em 0–100); a formatação fica
+    para quem desenha.
+    """
+    serie = pd.Series(serie)
+    if serie.empty:
+        return {}
+    idx = pd.DatetimeIndex(serie.index)
+    return {
+        "mes": (idx.year * 12 + idx.month - 1).to_numpy(dtype=np.int64),
+        "valor": pd.to_numeric(serie, errors="coerce").to_numpy(dtype=np.float64) * escala,
+        "formato": formato,
+    }
+
+
+def mes_para_data(mes) -> pd.Timestamp:
+    """Ordinal de mês do raw_data → Timestamp do 1º dia do mês."""
+    ano, m = divmod(int(mes), 12)
+    return pd.Timestamp(year=ano, month=m + 1, day=1)
+
+
+def _datas_ns(datas) -> np.ndarray:
+    return pd.to_datetime(pd.Series(datas), errors="coerce").to_numpy("datetime64[ns]")
+
+
+def _contar_no_intervalo(datas, inicios, fins) -> np.ndarray:
+    """
+    Quantas *datas* caem em cada intervalo fechado [inicio, fim] – uma
+    ordenação e dois searchsorted para a grade de meses inteira. NaT não
+    conta.
+    """
+    d = _datas_ns(datas)
+    d = np.sort(d[~np.isnat(d)])
+    return (np.searchsorted(d, _datas_ns(fins), side="right")
+            - np.searchsorted(d, _datas_ns(inicios), side="left"))
+
+
+def _limites_mes_aberto(period_starts):
+    """(inícios, fins) de 'Mês Aberto' para cada mês, como em get_period_start/end."""
+    inicios = [get_period_start(p.year, "Mês Aberto", p.month, (None, None)) for p in period_starts]
+    fins = [get_period_end(p.year, "Mês Aberto", p.month, (None, None)) for p in period_starts]
+    return inicios, fins
+
+
 def get_date_range_for_period(end_date, months=12):
     """
     Retorna a data de início, considerando que end_date é o fim do período e queremos
@@ -139,37 +202,8 @@ def historical_rpc(months: int = 12) -> dict:
     RPC mensal = Faturamento / Funcionários.
     (Neste exemplo, usamos funcionários fixos = 30.)
     """
-    # ── 1. Carrega base ────────────────────────────────────────────────
-    df_eshows = carregar_base_eshows()
-    if df_eshows is None or df_eshows.empty:
-        return {}
-
-    # ── 2. Prepara coluna de data ─────────────────────────────────────
-    df_eshows["Data do Show"] = pd.to_datetime(
-        df_eshows["Data do Show"], errors="coerce"
-    )
-    df_eshows = (
-        df_eshows.dropna(subset=["Data do Show"])
-        .sort_values("Data do Show")
-    )
-
-    # ── 3. Calcula Faturamento por show ───────────────────────────────
-    COLS_FAT = [
-        "Comissão B2B", "Comissão B2C", "Antecipação de Cachês",
-        "Curadoria", "SaaS Percentual", "SaaS Mensalidade", "Notas Fiscais"
-    ]
-    for c in COLS_FAT:
-        df_eshows[c] = pd.to_numeric(df_eshows.get(c, 0), errors="coerce").fillna(0)
-
-    df_eshows["Faturamento"] = df_eshows[COLS_FAT].sum(axis=1)
-
-    # ── 4. Agrega mensalmente ─────────────────────────────────────────
-    df_monthly = (
-        df_eshows
-        .groupby(pd.Grouper(key="Data do Show", freq="M"))
-        .agg({"Faturamento": "sum"})
-        .reset_index()
-    )
+    # ── 1-4. Faturamento mensal (cubo compartilhado) ─────────────────
+    df_monthly = _eshows_mensal()[["Data do Show", "Faturamento"]]
     if df_monthly.empty:
         return {}
 
@@ -201,15 +235,11 @@ def historical_rpc(months: int = 12) -> dict:
         "std_deviation":  formatar_valor_utils(std, "monetario"),
         "last_quarter":   last_q,
         "last_semester":  last_s,
-        "raw_data": {
-            d.strftime("%Y-%m-%d"): formatar_valor_utils(v, "monetario")
-            for d, v in rpc_series.to_dict().items()
-        },
+        "raw_data": _serie_numerica(rpc_series, "monetario"),
     }
 
     # ── 8. Libera memória ────────────────────────────────────────────
-    del df_eshows, df_monthly, df_period, rpc_series, ma
-    gc.collect()
+    del df_monthly, df_period, rpc_series, ma
 
     return resultado
 
@@ -220,37 +250,8 @@ def historical_cmgr(months: int = 12) -> dict:
     CMGR = ((Faturamento_final / Faturamento_inicial) ** (1 / n)) - 1,
     onde *n* é o número de intervalos mensais.
     """
-    # ── 1. Carrega base ────────────────────────────────────────────────
-    df_eshows = carregar_base_eshows()
-    if df_eshows is None or df_eshows.empty:
-        return {}
-
-    # ── 2. Prepara data e ordena ──────────────────────────────────────
-    df_eshows["Data do Show"] = pd.to_datetime(
-        df_eshows["Data do Show"], errors="coerce"
-    )
-    df_eshows = (
-        df_eshows.dropna(subset=["Data do Show"])
-        .sort_values("Data do Show")
-    )
-
-    # ── 3. Faturamento por show ───────────────────────────────────────
-    COLS_FAT = [
-        "Comissão B2B", "Comissão B2C", "Antecipação de Cachês",
-        "Curadoria", "SaaS Percentual", "SaaS Mensalidade", "Notas Fiscais"
-    ]
-    for c in COLS_FAT:
-        df_eshows[c] = pd.to_numeric(df_eshows.get(c, 0), errors="coerce").fillna(0)
-
-    df_eshows["Faturamento"] = df_eshows[COLS_FAT].sum(axis=1)
-
-    # ── 4. Agrega por mês ─────────────────────────────────────────────
-    df_monthly = (
-        df_eshows
-        .groupby(pd.Grouper(key="Data do Show", freq="M"))
-        .agg({"Faturamento": "sum"})
-        .reset_index()
-    )
+    # ── 1-4. Faturamento mensal (cubo compartilhado) ─────────────────
+    df_monthly = _eshows_mensal()[["Data do Show", "Faturamento"]]
     if df_monthly.empty:
         return {}
 
@@ -296,15 +297,11 @@ def historical_cmgr(months: int = 12) -> dict:
         "std_deviation":  formatar_valor_utils(std, "monetario"),
         "last_quarter":   last_q,
         "last_semester":  last_s,
-        "raw_data": {
-            d.strftime("%Y-%m-%d"): formatar_valor_utils(v * 100, "percentual")
-            for d, v in growth_series.items()
-        },
+        "raw_data": _serie_numerica(growth_series, "percentual", escala=100),
     }
 
     # ── 9. Libera memória ────────────────────────────────────────────
-    del df_eshows, df_monthly, df_period, fatt_series, ma, growth_series
-    gc.collect()
+    del df_monthly, df_period, fatt_series, ma, growth_series
 
     return resultado
 
@@ -318,36 +315,11 @@ def historical_lucratividade(months: int = 12) -> dict:
     • Faturamento: colunas de receita na Base Eshows
     • Custos     : coluna "Custos" na Base2
     """
-    df_eshows = carregar_base_eshows()
-    df_base2  = carregar_base2()
-    if df_eshows is None or df_eshows.empty or df_base2 is None or df_base2.empty:
+    df_fat_monthly = _eshows_mensal()[["Data do Show", "Faturamento"]]
+    df_base2  = _local(carregar_base2())
+    if df_fat_monthly.empty or df_base2 is None or df_base2.empty:
         return {}
 
-    # ── 1. Datas e faturamento ───────────────────────────────────────
-    df_eshows["Data do Show"] = pd.to_datetime(
-        df_eshows["Data do Show"], errors="coerce"
-    )
-    df_eshows = (
-        df_eshows.dropna(subset=["Data do Show"])
-        .sort_values("Data do Show")
-    )
-
-    COLS_FAT = [
-        "Comissão B2B", "Comissão B2C", "Antecipação de Cachês",
-        "Curadoria", "SaaS Percentual", "SaaS Mensalidade", "Notas Fiscais"
-    ]
-    for c in COLS_FAT:
-        df_eshows[c] = pd.to_numeric(df_eshows.get(c, 0), errors="coerce").fillna(0)
-
-    df_eshows["Faturamento"] = df_eshows[COLS_FAT].sum(axis=1)
-
-    df_fat_monthly = (
-        df_eshows
-        .groupby(pd.Grouper(key="Data do Show", freq="M"))
-        .agg({"Faturamento": "sum"})
-        .reset_index()
-    )
-
     # ── 2. Custos mensais (Base2) ────────────────────────────────────
     df_base2 = prepare_base2_with_date(df_base2)
     df_base2["Custos"] = pd.to_numeric(df_base2.get("Custos", 0), errors="coerce").fillna(0)
@@ -403,18 +375,14 @@ def historical_lucratividade(months: int = 12) -> dict:
         "std_deviation":  formatar_valor_utils(std, "percentual"),
         "last_quarter":   last_q,
         "last_semester":  last_s,
-        "raw_data": {
-            d.strftime("%Y-%m-%d"): formatar_valor_utils(v, "percentual")
-            for d, v in serie.items()
-        },
+        "raw_data": _serie_numerica(serie, "percentual"),
     }
 
     # ── 5. Libera memória ────────────────────────────────────────────
     del (
-        df_eshows, df_base2, df_fat_monthly, df_cst_monthly,
+        df_base2, df_fat_monthly, df_cst_monthly,
         df_merged, df_period, serie, ma
     )
-    gc.collect()
 
     return resultado
 
@@ -428,38 +396,15 @@ def historical_ebitda(months: int = 12) -> dict:
       • ReceitaEBTIDA = Faturamento – Notas Fiscais
       • CustosEBTIDA  = Custos – Imposto  (ambos em Base2)
     """
-    df_eshows = carregar_base_eshows()
-    df_base2  = carregar_base2()
-    if df_eshows is None or df_eshows.empty or df_base2 is None or df_base2.empty:
+    # ── 1. Receita EBTIDA mensal (Faturamento – Notas Fiscais) ────────
+    df_fat_monthly = _eshows_mensal()
+    df_base2  = _local(carregar_base2())
+    if df_fat_monthly.empty or df_base2 is None or df_base2.empty:
         return {}
-
-    # ── 1. Datas e receita EBTIDA ─────────────────────────────────────
-    df_eshows["Data do Show"] = pd.to_datetime(
-        df_eshows["Data do Show"], errors="coerce"
-    )
-    df_eshows = (
-        df_eshows.dropna(subset=["Data do Show"])
-        .sort_values("Data do Show")
-    )
-
-    COLS_FAT = [
-        "Comissão B2B", "Comissão B2C", "Antecipação de Cachês",
-        "Curadoria", "SaaS Percentual", "SaaS Mensalidade", "Notas Fiscais"
-    ]
-    for c in COLS_FAT:
-        df_eshows[c] = pd.to_numeric(df_eshows.get(c, 0), errors="coerce").fillna(0)
-
-    df_eshows["Faturamento"]    = df_eshows[COLS_FAT].sum(axis=1)
-    df_eshows["ReceitaEBTIDA"]  = (
-        df_eshows["Faturamento"] - df_eshows.get("Notas Fiscais", 0)
-    )
-
-    df_fat_monthly = (
-        df_eshows
-        .groupby(pd.Grouper(key="Data do Show", freq="M"))
-        .agg({"ReceitaEBTIDA": "sum"})
-        .reset_index()
+    df_fat_monthly["ReceitaEBTIDA"] = (
+        df_fat_monthly["Faturamento"] - df_fat_monthly["Notas Fiscais"]
     )
+    df_fat_monthly = df_fat_monthly[["Data do Show", "ReceitaEBTIDA"]]
 
     # ── 2. CustosEBTIDA ──────────────────────────────────────────────
     df_base2 = prepare_base2_with_date(df_base2)
@@ -519,18 +464,14 @@ def historical_ebitda(months: int = 12) -> dict:
         "std_deviation":  formatar_valor_utils(std, "percentual"),
         "last_quarter":   last_q,
         "last_semester":  last_s,
-        "raw_data": {
-            d.strftime("%Y-%m-%d"): formatar_valor_utils(v, "percentual")
-            for d, v in serie.items()
-        },
+        "raw_data": _serie_numerica(serie, "percentual"),
     }
 
     # ── 5. Libera memória ────────────────────────────────────────────
     del (
-        df_eshows, df_base2, df_fat_monthly, df_cst_monthly,
+        df_base2, df_fat_monthly, df_cst_monthly,
         df_merged, df_period, serie, ma
     )
-    gc.collect()
 
     return resultado
 
@@ -544,15 +485,7 @@ def historical_roll6m(months=12):
     Para cada mês (a partir do 6º dado), o Roll 6M Growth é calculado como:
       roll6m = (Faturamento_atual / Faturamento_6meses_atrás)^(1/5) - 1
     """
-    df_eshows = carregar_base_eshows()
-    if df_eshows is None or df_eshows.empty:
-        return {}
-    df_eshows['Data do Show'] = pd.to_datetime(df_eshows['Data do Show'], errors='coerce')
-    df_eshows = df_eshows.dropna(subset=['Data do Show']).sort_values('Data do Show')
-    # Garante colunas de faturamento necessárias
-    sanitize_faturamento_cols(df_eshows)
-    df_eshows['Faturamento'] = df_eshows[COLUNAS_FATURAMENTO].sum(axis=1)
-    df_monthly = df_eshows.groupby(pd.Grouper(key='Data do Show', freq='M')).agg({'Faturamento': 'sum'}).reset_index()
+    df_monthly = _eshows_mensal()[['Data do Show', 'Faturamento']]
     if df_monthly.empty or len(df_monthly) < 6:
         return {}
     faturamento_series = df_monthly.set_index('Data do Show')['Faturamento']
@@ -582,8 +515,7 @@ def historical_roll6m(months=12):
         "std_deviation": formatar_valor_utils(std * 100, 'percentual'),
         "last_quarter": last_q,
         "last_semester": last_s,
-        "raw_data": {d.strftime("%Y-%m-%d"): formatar_valor_utils(v * 100, 'percentual')
-                     for d, v in roll6m_series.to_dict().items()}
+        "raw_data": _serie_numerica(roll6m_series, "percentual", escala=100)
     }
 
 def historical_estabilidade(months=12):
@@ -596,7 +528,7 @@ def historical_estabilidade(months=12):
       - Taxa de Erros (%)
     As métricas são normalizadas e combinadas com pesos fixos.
     """
-    df_base2 = carregar_base2()
+    df_base2 = _local(carregar_base2())
     if df_base2 is None or df_base2.empty:
         return {}
     df_base2 = prepare_base2_with_date(df_base2)
@@ -648,8 +580,7 @@ def historical_estabilidade(months=12):
         "std_deviation": formatar_valor_utils(std, 'percentual'),
         "last_quarter": last_q,
         "last_semester": last_s,
-        "raw_data": {d.strftime("%Y-%m-%d"): formatar_valor_utils(v, 'percentual')
-                     for d, v in estabilidade_series.to_dict().items()}
+        "raw_data": _serie_numerica(estabilidade_series, "percentual")
     }
 
 def historical_nrr(months=12):
@@ -658,15 +589,8 @@ def historical_nrr(months=12):
     Calcula, para cada mês que possui dado no mesmo mês do ano anterior:
       NRR = ((Faturamento_mês_atual - Faturamento_ano_anterior) / Faturamento_ano_anterior) * 100
     """
-    df_eshows = carregar_base_eshows()
-    if df_eshows is None or df_eshows.empty:
-        return {}
-    df_eshows['Data do Show'] = pd.to_datetime(df_eshows['Data do Show'], errors='coerce')
-    df_eshows = df_eshows.dropna(subset=['Data do Show']).sort_values('Data do Show')
-    # Calcula faturamento mensal total
-    sanitize_faturamento_cols(df_eshows)
-    df_eshows['Faturamento'] = df_eshows[COLUNAS_FATURAMENTO].sum(axis=1)
-    df_monthly = df_eshows.groupby(pd.Grouper(key='Data do Show', freq='M')).agg({'Faturamento': 'sum'}).reset_index()
+    # Faturamento mensal total
+    df_monthly = _eshows_mensal()[['Data do Show', 'Faturamento']]
     if df_monthly.empty:
         return {}
     # Calcula NRR para cada mês com dado no ano anterior
@@ -702,8 +626,7 @@ def historical_nrr(months=12):
         "std_deviation": formatar_valor_utils(std, 'percentual'),
         "last_quarter": last_q,
         "last_semester": last_s,
-        "raw_data": {d.strftime("%Y-%m-%d"): formatar_valor_utils(v, 'percentual')
-                     for d, v in nrr_series.to_dict().items()}
+        "raw_data": _serie_numerica(nrr_series, "percentual")
     }
 
 def historical_perdas_operacionais(months=12) -> dict:
@@ -711,27 +634,14 @@ def historical_perdas_operacionais(months=12) -> dict:
     Histórico das Perdas Operacionais (%).
     Calcula: Perdas (%) = (Custos "Op. Shows" / GMV) * 100.
     """
-    # Base Eshows (GMV)
-    df_eshows = carregar_base_eshows()
-    if df_eshows is None or df_eshows.empty:
+    # Base Eshows (GMV mensal, cubo compartilhado)
+    gmv_month = cubo_mensal()["Valor Total do Show"]
+    if gmv_month.empty:
         return {}
     # Base2 (Op. Shows)
-    df_b2 = carregar_base2()
+    df_b2 = _local(carregar_base2())
     if df_b2 is None or df_b2.empty:
         return {}
-    df_eshows['Data do Show'] = pd.to_datetime(df_eshows['Data do Show'], errors='coerce')
-    df_eshows = df_eshows.dropna(subset=['Data do Show']).sort_values('Data do Show')
-    # Garante coluna Valor Total do Show
-    if "Valor Total do Show" not in df_eshows.columns:
-        for alt in ["ValorTotaldoShow", "Valor_Total_do_Show"]:
-            if alt in df_eshows.columns:
-                df_eshows.rename(columns={alt: "Valor Total do Show"}, inplace=True)
-                break
-        if "Valor Total do Show" not in df_eshows.columns:
-            df_eshows["Valor Total do Show"] = 0
-    df_eshows["Valor Total do Show"] = pd.to_numeric(df_eshows["Valor Total do Show"], errors="coerce").fillna(0)
-    # GMV mensal
-    gmv_month = df_eshows.groupby(pd.Grouper(key="Data do Show", freq="M"))["Valor Total do Show"].sum()
     # Base2 Op. Shows
     df_b2 = prepare_base2_with_date(df_b2)
     if "Op. Shows" not in df_b2.columns:
@@ -765,8 +675,7 @@ def historical_perdas_operacionais(months=12) -> dict:
         "std_deviation": formatar_valor_utils(std, "percentual"),
         "last_quarter": last_q,
         "last_semester": last_s,
-        "raw_data": {d.strftime("%Y-%m-%d"): formatar_valor_utils(v, "percentual")
-                     for d, v in perdas_series.to_dict().items()}
+        "raw_data": _serie_numerica(perdas_series, "percentual")
     }
 
 def historical_churn(months=12, dias_sem_show=45):
@@ -775,27 +684,24 @@ def historical_churn(months=12, dias_sem_show=45):
     Para cada mês no intervalo dos últimos 'months' meses, calcula a taxa de churn:
       churn_rate = (casas que não retornaram / estabelecimentos ativos) * 100.
     """
-    df = carregar_base_eshows()
+    df = _local(carregar_base_eshows())
     if df is None or df.empty:
         return {}
     df['Data do Show'] = pd.to_datetime(df['Data do Show'], errors='coerce')
-    df = df.dropna(subset=['Data do Show']).sort_values('Data do Show')
+    df = df.dropna(subset=['Data do Show'])
     end_date = df['Data do Show'].max()
     start_date, _ = get_date_range_for_period(end_date, months)
     dates = pd.date_range(start=start_date, end=end_date, freq='M')
-    churn_series = {}
-    global df_eshows  # disponibiliza df para uso em calcular_churn
-    df_eshows = df.copy()
-    for d in dates:
-        period_start, period_end = get_date_range_for_period(d, months)
-        churn_count = calcular_churn(
-            ano=period_end.year, periodo="Custom", mes=period_end.month,
-            start_date=period_start, end_date=period_end, dias_sem_show=dias_sem_show
-        )
-        ativos = df[df['Data do Show'] <= d]['Id da Casa'].nunique()
-        churn_rate_val = (churn_count / ativos * 100) if ativos > 0 else 0
-        churn_series[d] = churn_rate_val
-    churn_series_pd = pd.Series(churn_series).sort_index()
+    # mesma regra de calcular_churn (LastShow global + dias_sem_show dentro
+    # da janela móvel), contada para todos os meses de uma vez
+    inicios = [get_date_range_for_period(d, months)[0] for d in dates]
+    churn = _contar_no_intervalo(datas_churn(dias_sem_show), inicios, dates)
+    # ativos em d = casas com 1º show até d
+    primeiro_show = np.sort(_datas_ns(ciclo_casas()["tabela"]["EarliestShow"]))
+    ativos = np.searchsorted(primeiro_show, _datas_ns(dates), side='right')
+    churn_series_pd = pd.Series(
+        np.where(ativos > 0, churn / np.maximum(ativos, 1) * 100, 0.0), index=dates
+    )
     if churn_series_pd.empty:
         return {}
     ma = moving_average(churn_series_pd, window=3)
@@ -810,8 +716,7 @@ def historical_churn(months=12, dias_sem_show=45):
         "std_deviation": formatar_valor_utils(std, 'percentual'),
         "last_quarter": last_q,
         "last_semester": last_s,
-        "raw_data": {d.strftime("%Y-%m-%d"): formatar_valor_utils(v, 'percentual')
-                     for d, v in churn_series_pd.to_dict().items()}
+        "raw_data": _serie_numerica(churn_series_pd, "percentual")
     }
 
 def historical_inadimplencia(months=12):
@@ -820,7 +725,7 @@ def historical_inadimplencia(months=12):
     Taxa = (Valor Inadimplente / GMV) * 100, considerando boletos vencidos ou em dunning até o cutoff do mês.
     """
     # 1. Base Eshows (GMV)
-    df_eshows = carregar_base_eshows()
+    df_eshows = _local(carregar_base_eshows())
     if df_eshows is None or df_eshows.empty:
         return {}
     df_eshows['Data do Show'] = pd.to_datetime(df_eshows['Data do Show'], errors='coerce')
@@ -875,8 +780,7 @@ def historical_inadimplencia(months=12):
         "std_deviation": formatar_valor_utils(std, 'percentual'),
         "last_quarter": last_q,
         "last_semester": last_s,
-        "raw_data": {d.strftime("%Y-%m-%d"): formatar_valor_utils(v, 'percentual')
-                     for d, v in inad_series_pd.to_dict().items()}
+        "raw_data": _serie_numerica(inad_series_pd, "percentual")
     }
 
 def historical_turnover(months: int = 12) -> dict:
@@ -884,7 +788,7 @@ def historical_turnover(months: int = 12) -> dict:
     Série mensal de Turn Over para os últimos *months* meses.
     (desligamentos / quadro-ativo na véspera) × 100
     """
-    df_p = carregar_pessoas()
+    df_p = _local(carregar_pessoas())
     if df_p is None or df_p.empty:
         return {}
 
@@ -931,10 +835,7 @@ def historical_turnover(months: int = 12) -> dict:
         "std_deviation":  formatar_valor_utils(std, "percentual"),
         "last_quarter":   lq,
         "last_semester":  ls,
-        "raw_data": {
-            d.strftime("%Y-%m-%d"): formatar_valor_utils(v, "percentual")
-            for d, v in serie.to_dict().items()
-        },
+        "raw_data": _serie_numerica(serie, "percentual"),
     }
 
 def historical_perfis_completos(months=12):
@@ -943,7 +844,7 @@ def historical_perfis_completos(months=12):
     Calcula mensalmente a porcentagem de perfis completos:
       Perfis Completos (%) = (Base Acumulada Completa / Base Acumulada Total) * 100.
     """
-    df_base2 = carregar_base2()
+    df_base2 = _local(carregar_base2())
     if df_base2 is None or df_base2.empty:
         return {}
     df_base2 = prepare_base2_with_date(df_base2)
@@ -981,8 +882,7 @@ def historical_perfis_completos(months=12):
         "std_deviation": formatar_valor_utils(std, 'percentual'),
         "last_quarter": last_q,
         "last_semester": last_s,
-        "raw_data": {d.strftime("%Y-%m-%d"): formatar_valor_utils(v, 'percentual')
-                     for d, v in perfis_series.to_dict().items()}
+        "raw_data": _serie_numerica(perfis_series, "percentual")
     }
 
 def historical_autonomia_usuario(months=12):
@@ -990,7 +890,7 @@ def historical_autonomia_usuario(months=12):
     Histórico para Autonomia do Usuário.
     Calcula mensalmente: Autonomia (%) = (Propostas Lançadas Usuários / (Usuários + Internas)) * 100.
     """
-    df_base2 = carregar_base2()
+    df_base2 = _local(carregar_base2())
     if df_base2 is None or df_base2.empty:
         return {}
     df_base2 = prepare_base2_with_date(df_base2)
@@ -1028,8 +928,7 @@ def historical_autonomia_usuario(months=12):
         "std_deviation": formatar_valor_utils(std, 'percentual'),
         "last_quarter": last_q,
         "last_semester": last_s,
-        "raw_data": {d.strftime("%Y-%m-%d"): formatar_valor_utils(v, 'percentual')
-                     for d, v in autonomia_series.to_dict().items()}
+        "raw_data": _serie_numerica(autonomia_series, "percentual")
     }
 
 def historical_sucesso_implantacao(months=12):
@@ -1057,8 +956,7 @@ def historical_sucesso_implantacao(months=12):
         "std_deviation": formatar_valor_utils(std * 100, 'percentual'),
         "last_quarter": last_q,
         "last_semester": last_s,
-        "raw_data": {d.strftime("%Y-%m-%d"): formatar_valor_utils(v * 100, 'percentual')
-                     for d, v in sucesso_series.to_dict().items()}
+        "raw_data": _serie_numerica(sucesso_series, "percentual", escala=100)
     }
 
 def historical_conformidade_juridica(months=12):
@@ -1066,7 +964,7 @@ def historical_conformidade_juridica(months=12):
     Histórico para Conformidade Jurídica.
     Calcula: Conformidade (%) = (Casas Contrato / Casas Ativas) * 100.
     """
-    df_base2 = carregar_base2()
+    df_base2 = _local(carregar_base2())
     if df_base2 is None or df_base2.empty:
         return {}
     df_base2 = prepare_base2_with_date(df_base2)
@@ -1103,8 +1001,7 @@ def historical_conformidade_juridica(months=12):
         "std_deviation": formatar_valor_utils(std, 'percentual'),
         "last_quarter": last_q,
         "last_semester": last_s,
-        "raw_data": {d.strftime("%Y-%m-%d"): formatar_valor_utils(v, 'percentual')
-                     for d, v in conformidade_series.to_dict().items()}
+        "raw_data": _serie_numerica(conformidade_series, "percentual")
     }
 
 def historical_eficiencia_atendimento(months=12):
@@ -1113,7 +1010,7 @@ def historical_eficiencia_atendimento(months=12):
     Calcula um score (%) de eficiência a partir dos tempos médios de resposta e resolução:
     score = média(100 - (Tempo Resposta / LIM_RESPOSTA * 100), 100 - (Tempo Resolução / LIM_RESOLUCAO * 100)).
     """
-    df_base2 = carregar_base2()
+    df_base2 = _local(carregar_base2())
     if df_base2 is None or df_base2.empty:
         return {}
     df_base2 = prepare_base2_with_date(df_base2)
@@ -1155,8 +1052,7 @@ def historical_eficiencia_atendimento(months=12):
         "std_deviation": formatar_valor_utils(std, 'percentual'),
         "last_quarter": last_q,
         "last_semester": last_s,
-        "raw_data": {d.strftime("%Y-%m-%d"): formatar_valor_utils(v, 'percentual')
-                     for d, v in eficiencia_series.to_dict().items()}
+        "raw_data": _serie_numerica(eficiencia_series, "percentual")
     }
 
 def historical_nivel_servico(months=12):
@@ -1165,8 +1061,8 @@ def historical_nivel_servico(months=12):
     Calcula: Nível de Serviço (%) = (1 - (Ocorrências / Shows)) * 100.
     Usa Base Eshows (Shows mensais) e Ocorrências (Ocorrências mensais, excluindo leves).
     """
-    df_eshows = carregar_base_eshows()
-    df_ocorr = carregar_ocorrencias()
+    df_eshows = _local(carregar_base_eshows())
+    df_ocorr = _local(carregar_ocorrencias())
     if df_eshows is None or df_eshows.empty or df_ocorr is None or df_ocorr.empty:
         return {}
     # Preparação dos dados de shows mensais
@@ -1215,8 +1111,7 @@ def historical_nivel_servico(months=12):
         "std_deviation": formatar_valor_utils(std, 'percentual'),
         "last_quarter": last_q,
         "last_semester": last_s,
-        "raw_data": {d.strftime("%Y-%m-%d"): formatar_valor_utils(v, 'percentual')
-                     for d, v in nivel_series.to_dict().items()}
+        "raw_data": _serie_numerica(nivel_series, "percentual")
     }
 
 def historical_take_rate(months: int = 12) -> dict:
@@ -1224,7 +1119,7 @@ def historical_take_rate(months: int = 12) -> dict:
     Série mensal de Turn Over para os últimos *months* meses.
     (desligamentos / quadro-ativo na véspera) × 100
     """
-    df_p = carregar_pessoas()
+    df_p = _local(carregar_pessoas())
     if df_p is None or df_p.empty:
         return {}
 
@@ -1271,10 +1166,7 @@ def historical_take_rate(months: int = 12) -> dict:
         "std_deviation":  formatar_valor_utils(std, "percentual"),
         "last_quarter":   lq,
         "last_semester":  ls,
-        "raw_data": {
-            d.strftime("%Y-%m-%d"): formatar_valor_utils(v, "percentual")
-            for d, v in serie.to_dict().items()
-        },
+        "raw_data": _serie_numerica(serie, "percentual"),
     }
 
 def historical_crescimento_sustentavel(months=12):
@@ -1295,26 +1187,19 @@ def historical_crescimento_sustentavel(months=12):
     logger.debug(">> Iniciando cálculo histórico de Crescimento Sustentável (agrupado por Ano e Mês).")
     
     # 1) Carrega as bases
-    df_eshows = carregar_base_eshows()
-    df_base2 = carregar_base2()
+    cubo = cubo_mensal()
+    df_base2 = _local(carregar_base2())
     
-    if df_eshows is None or df_eshows.empty or df_base2 is None or df_base2.empty:
+    if cubo.empty or df_base2 is None or df_base2.empty:
         logger.debug(">> Dados do eshows ou base2 estão vazios.")
         return {}
     
-    # 2) Cria coluna 'Period' na BaseEshows a partir de 'Ano' e 'Mês'
-    df_eshows['Period'] = pd.to_datetime(
-        df_eshows['Ano'].astype(str) + '-' + df_eshows['Mês'].astype(str) + '-01',
-        errors='coerce'
-    )
-    
-    # Define as colunas de faturamento conforme a função de variáveis
-    sanitize_faturamento_cols(df_eshows)
-    
-    # Agrega faturamento por mês
-    df_fat = df_eshows.groupby('Period')[COLUNAS_FATURAMENTO].sum()
-    df_fat['Faturamento'] = df_fat.sum(axis=1)
-    df_fat = df_fat[['Faturamento']].reset_index()
+    # 2) Faturamento por mês (só meses com show), 'Period' = 1º dia do mês
+    cubo = cubo[cubo['Linhas'] > 0]
+    df_fat = pd.DataFrame({
+        'Period': cubo.index.to_period('M').to_timestamp(),
+        'Faturamento': cubo['Faturamento'].to_numpy(),
+    })
     
     # 3) Cria coluna 'Period' na Base2 usando os campos 'Ano' e 'Mês'
     df_base2['Period'] = pd.to_datetime(
@@ -1383,8 +1268,7 @@ def historical_crescimento_sustentavel(months=12):
         "std_deviation": formatar_valor_utils(std, 'percentual'),
         "last_quarter": last_q,
         "last_semester": last_s,
-        "raw_data": {d.strftime("%Y-%m-%d"): formatar_valor_utils(v, 'percentual')
-                     for d, v in cs_series.to_dict().items()}
+        "raw_data": _serie_numerica(cs_series, "percentual")
     }
     
     logger.debug(">> Resultado final histórico de Crescimento Sustentável:")
@@ -1402,7 +1286,7 @@ def historical_inadimplencia_real(months=12):
     logger.debug(">> Iniciando cálculo histórico da Inadimplência Real (método variáveis).")
 
     # 1) Carrega a base eshows e converte datas
-    df_eshows = carregar_base_eshows()
+    df_eshows = _local(carregar_base_eshows())
     if df_eshows is None or df_eshows.empty:
         logger.debug(">> Base de eshows vazia ou não carregada.")
         return {}
@@ -1471,96 +1355,71 @@ def historical_inadimplencia_real(months=12):
         logger.debug(">> Coluna 'Adiantamento' não encontrada em df_artistas")
         df_artistas["Adiantamento"] = "não"
 
-    # 6) Itera para cada mês no período e calcula a inadimplência real
+    # 6) Faturamento por mês: soma acumulada sobre as datas ordenadas e
+    #    searchsorted nos limites [início do mês, fim do mês]
+    period_starts = dates.map(lambda d: d.replace(day=1))
+    fat_linha = np.zeros(len(df_eshows))
+    for c in COLUNAS_FATURAMENTO:
+        if c in df_eshows.columns:
+            fat_linha += pd.to_numeric(df_eshows[c], errors='coerce').fillna(0).to_numpy(dtype=float)
+    datas_show = _datas_ns(df_eshows["Data do Show"])
+    validas = ~np.isnat(datas_show)
+    ordem = np.argsort(datas_show[validas], kind="stable")
+    datas_show = datas_show[validas][ordem]
+    fat_acum = np.concatenate(([0.0], np.cumsum(fat_linha[validas][ordem])))
+    fat_mes = (fat_acum[np.searchsorted(datas_show, _datas_ns(dates), side="right")]
+               - fat_acum[np.searchsorted(datas_show, _datas_ns(period_starts), side="left")])
+
+    # 6.1) Aging dos boletos: cada boleto inadimplente pertence ao mês do
+    #      vencimento, desde que vença até 22 dias antes do fim desse mês
+    status_inad = ["Vencido", "DUNNING_REQUESTED"]
+    tem_casas = "DataVenc" in df_casas.columns and "Status" in df_casas.columns
+    tem_adiant = all(c in df_artistas.columns for c in ("ID_Boleto", "Adiantamento", "Valor Bruto"))
+    tem_valor_real = "Valor Real" in df_casas.columns
+    n_inad = np.zeros(len(dates), dtype=np.int64)
+    n_adiant = np.zeros(len(dates), dtype=np.int64)
+    valor_adiantado = np.zeros(len(dates))
+    if tem_casas:
+        df_inad = df_casas[df_casas["Status"].isin(status_inad)]
+        venc = _datas_ns(df_inad["DataVenc"])
+        mes_venc = np.searchsorted(_datas_ns(period_starts), venc, side="right") - 1
+        no_grid = (mes_venc >= 0) & ~np.isnat(venc)
+        mes_venc = np.where(no_grid, mes_venc, 0)
+        cutoff = _datas_ns(dates - timedelta(days=22))
+        no_grid &= venc <= cutoff[mes_venc]
+        df_inad = df_inad[no_grid]
+        mes_venc = mes_venc[no_grid]
+        n_inad = np.bincount(mes_venc, minlength=len(dates))
+
+        if tem_adiant and tem_valor_real:
+            # 6.2) Adiantado por boleto (Valor Bruto somado) limitado ao Valor Real
+            df_adiant = df_artistas[df_artistas["Adiantamento"] == "sim"]
+            bruto = (pd.to_numeric(df_adiant["Valor Bruto"], errors='coerce').fillna(0)
+                     .groupby(df_adiant["ID_Boleto"]).sum())
+            bruto_boleto = df_inad["ID_Boleto"].map(bruto)
+            casou = bruto_boleto.notna().to_numpy()
+            real = pd.to_numeric(df_inad["Valor Real"], errors='coerce').fillna(0).to_numpy(dtype=float)
+            ajustado = np.minimum(bruto_boleto.to_numpy(dtype=float), real)
+            n_adiant = np.bincount(mes_venc[casou], minlength=len(dates))
+            valor_adiantado = np.bincount(mes_venc[casou], weights=ajustado[casou], minlength=len(dates))
+
+    # 6.3) Monta a série com as mesmas regras de exclusão do cálculo mensal
     inad_series = {}
-    for period_end in dates:
-        period_start = period_end.replace(day=1)
-
-        # 6.1) Filtro do faturamento no período (usando COLUNAS_FATURAMENTO)
-        df_period = df_eshows[(df_eshows["Data do Show"] >= period_start) & 
-                              (df_eshows["Data do Show"] <= period_end)].copy()
-        for c in COLUNAS_FATURAMENTO:
-            if c not in df_period.columns:
-                df_period[c] = 0
-            else:
-                df_period[c] = pd.to_numeric(df_period[c], errors='coerce').fillna(0)
-        fat = df_period[COLUNAS_FATURAMENTO].sum().sum()
+    for k, period_end in enumerate(dates):
+        fat = fat_mes[k]
         if fat <= 0:
-            inad_rate = 0
-            inad_series[period_end] = inad_rate
-            continue
-
-        # 6.2) Define dt_min e dt_max para o período
-        dt_min = period_start
-        dt_max = period_end
-
-        # 6.3) Filtra df_casas para o período e status inadimplente
-        if "DataVenc" not in df_casas.columns:
-            logger.debug(">> Coluna 'DataVenc' não encontrada em df_casas")
-            continue
-            
-        mask_casas = (df_casas["DataVenc"] >= dt_min) & (df_casas["DataVenc"] <= dt_max)
-        df_casas_periodo = df_casas[mask_casas].copy()
-        
-        if "Status" not in df_casas_periodo.columns:
-            logger.debug(">> Coluna 'Status' não encontrada em df_casas_periodo")
-            continue
-            
-        status_inad = ["Vencido", "DUNNING_REQUESTED"]
-        df_inad = df_casas_periodo[df_casas_periodo["Status"].isin(status_inad)].copy()
-        cutoff_date = dt_max - timedelta(days=22)
-        df_inad = df_inad[df_inad["DataVenc"] <= cutoff_date]
-
-        if df_inad.empty:
-            inad_rate = 0
-            inad_series[period_end] = inad_rate
-            continue
-
-        # 6.4) Filtra adiantamentos em artistas para os boletos inadimplentes
-        # Garantir que ID_Boleto e Adiantamento existam em df_artistas
-        if "ID_Boleto" not in df_artistas.columns or "Adiantamento" not in df_artistas.columns:
-            logger.debug(">> Colunas necessárias não encontradas em df_artistas")
-            continue
-            
-        df_adiant = df_artistas[(df_artistas["Adiantamento"] == "sim") &
-                                (df_artistas["ID_Boleto"].isin(df_inad["ID_Boleto"]))].copy()
-                                
-        if "Valor Bruto" not in df_adiant.columns:
-            logger.debug(">> Coluna 'Valor Bruto' não encontrada em df_adiant")
+            inad_series[period_end] = 0
+        elif not tem_casas:
             continue
-            
-        df_adiant["Valor Bruto"] = pd.to_numeric(df_adiant["Valor Bruto"], errors='coerce').fillna(0)
-        
-        if "Valor Real" not in df_inad.columns:
-            logger.debug(">> Coluna 'Valor Real' não encontrada em df_inad")
-            continue
-            
-        df_inad["Valor Real"] = pd.to_numeric(df_inad["Valor Real"], errors='coerce').fillna(0)
-
-        if df_adiant.empty:
-            inad_rate = 0
-            inad_series[period_end] = inad_rate
+        elif n_inad[k] == 0:
+            inad_series[period_end] = 0
+        elif not (tem_adiant and tem_valor_real):
             continue
-
-        # 6.5) Agrupa por ID_Boleto e ajusta o valor adiantado (mínimo entre Valor Bruto e Valor Real)
-        df_adiant_grouped = df_adiant.groupby("ID_Boleto")["Valor Bruto"].sum().reset_index()
-        df_adiant_grouped = df_adiant_grouped.merge(
-            df_inad[["ID_Boleto", "Valor Real"]],
-            on="ID_Boleto",
-            how="left"
-        )
-        df_adiant_grouped["Valor Adiantado Ajustado"] = df_adiant_grouped.apply(
-            lambda row: min(row["Valor Bruto"], row["Valor Real"]) if pd.notnull(row["Valor Real"]) else 0,
-            axis=1
-        )
-        valor_adiantado_inad = df_adiant_grouped["Valor Adiantado Ajustado"].sum()
-
-        # 6.6) Calcula a inadimplência real para o período
-        inad_rate = (valor_adiantado_inad / fat) * 100
-        inad_series[period_end] = inad_rate
-
-        logger.debug(f">> Período {period_start.strftime('%Y-%m-%d')} a {period_end.strftime('%Y-%m-%d')}:")
-        logger.debug(f"   Faturamento = {fat}, Valor adiantado inadimplente = {valor_adiantado_inad}, Taxa = {inad_rate:.2f}%")
+        elif n_adiant[k] == 0:
+            inad_series[period_end] = 0
+        else:
+            inad_series[period_end] = (valor_adiantado[k] / fat) * 100
+    logger.debug(f">> Inadimplência real calculada para {len(inad_series)} meses")
 
     # 7) Converte a série para pandas e calcula métricas históricas
     if not inad_series:
@@ -1590,8 +1449,7 @@ def historical_inadimplencia_real(months=12):
         "std_deviation": formatar_valor_utils(std, 'percentual'),
         "last_quarter": last_q,
         "last_semester": last_s,
-        "raw_data": {d.strftime("%Y-%m-%d"): formatar_valor_utils(v, 'percentual')
-                     for d, v in inad_series_pd.to_dict().items()}
+        "raw_data": _serie_numerica(inad_series_pd, "percentual")
     }
 
     logger.debug(">> Resultado final histórico Inadimplência Real:")
@@ -1605,28 +1463,17 @@ def historical_palcos_vazios(months=12):
     Valores de médias e desvio são formatados como 'numero' e growth_rate em 'percentual'.
     """
     df_ocorr = carregar_ocorrencias()
-    if df_ocorr is None or df_ocorr.empty:
+    if df_ocorr is None or df_ocorr.empty or "TIPO" not in df_ocorr.columns:
         return {}
-    if "DATA" in df_ocorr.columns:
-        df_ocorr = df_ocorr.rename(columns={"DATA": "Data"})
-    df_ocorr['Data'] = pd.to_datetime(df_ocorr['Data'], errors='coerce')
-    df_ocorr = df_ocorr.sort_values('Data')
-    if "TIPO" not in df_ocorr.columns:
+    # rollup diário por TIPO (ver ocorrencias_rollup): meses = fim do mês
+    serie = serie_mensal_ocorrencias(tipo="Palco vazio", df_ocorrencias=df_ocorr)
+    if serie.empty:
         return {}
-    df_palco = df_ocorr[df_ocorr["TIPO"] == "Palco vazio"]
-    if "ID_OCORRENCIA" in df_palco.columns:
-        df_monthly = df_palco.groupby(pd.Grouper(key='Data', freq='M')).agg({'ID_OCORRENCIA': 'nunique'}).reset_index()
-        df_monthly.rename(columns={'ID_OCORRENCIA': 'Palcos Vazios'}, inplace=True)
-    else:
-        df_monthly = df_palco.groupby(pd.Grouper(key='Data', freq='M')).size().reset_index(name='Palcos Vazios')
-    
-    end_date = df_monthly['Data'].max()
+    end_date = serie.index.max()
     start_date, _ = get_date_range_for_period(end_date, months)
-    df_period = df_monthly[df_monthly['Data'] >= start_date]
-    if df_period.empty:
+    palcos_series = serie[serie.index >= start_date].rename('Palcos Vazios')
+    if palcos_series.empty:
         return {}
-    
-    palcos_series = df_period.set_index('Data')['Palcos Vazios']
     ma = moving_average(palcos_series, window=3)
     gr = growth_rate(palcos_series)
     std = std_deviation(palcos_series)
@@ -1640,8 +1487,7 @@ def historical_palcos_vazios(months=12):
         "std_deviation": formatar_valor_utils(std, 'numero'),
         "last_quarter": last_q,
         "last_semester": last_s,
-        "raw_data": {d.strftime("%Y-%m-%d"): formatar_valor_utils(v, 'numero')
-                     for d, v in palcos_series.to_dict().items()}
+        "raw_data": _serie_numerica(palcos_series, "numero")
     }
 
 def historical_palcos_ativos(months=12):
@@ -1650,13 +1496,10 @@ def historical_palcos_ativos(months=12):
     Calcula o número de palcos ativos (únicos "Id da Casa") por mês a partir da base eShows.
     Valores: médias e desvio como 'numero'; growth_rate como 'percentual'.
     """
-    df_eshows = carregar_base_eshows()
-    if df_eshows is None or df_eshows.empty:
+    df_monthly = _eshows_mensal()[['Data do Show', 'Casas']]
+    if df_monthly.empty:
         return {}
-    df_eshows['Data do Show'] = pd.to_datetime(df_eshows['Data do Show'], errors='coerce')
-    df_eshows = df_eshows.sort_values('Data do Show')
-    df_monthly = df_eshows.groupby(pd.Grouper(key='Data do Show', freq='M')).agg({'Id da Casa': 'nunique'}).reset_index()
-    df_monthly.rename(columns={'Id da Casa': 'Palcos Ativos'}, inplace=True)
+    df_monthly = df_monthly.rename(columns={'Casas': 'Palcos Ativos'})
     
     end_date = df_monthly['Data do Show'].max()
     start_date, _ = get_date_range_for_period(end_date, months)
@@ -1676,8 +1519,7 @@ def historical_palcos_ativos(months=12):
         "std_deviation": formatar_valor_utils(std, 'numero'),
         "last_quarter": last_q,
         "last_semester": last_s,
-        "raw_data": {d.strftime("%Y-%m-%d"): formatar_valor_utils(v, 'numero')
-                     for d, v in pa_series.to_dict().items()}
+        "raw_data": _serie_numerica(pa_series, "numero")
     }
 
 def historical_ocorrencias(months=12):
@@ -1689,26 +1531,15 @@ def historical_ocorrencias(months=12):
     df_ocorr = carregar_ocorrencias()
     if df_ocorr is None or df_ocorr.empty:
         return {}
-    if "DATA" in df_ocorr.columns:
-        df_ocorr.rename(columns={"DATA": "Data"}, inplace=True)
-    df_ocorr['Data'] = pd.to_datetime(df_ocorr['Data'], errors='coerce')
-    df_ocorr = df_ocorr.dropna(subset=['Data']).sort_values('Data')
-    if "TIPO" in df_ocorr.columns:
-        df_ocorr = df_ocorr[df_ocorr["TIPO"] != "Leve"]
-    # Agrupa ocorrências por mês
-    if "ID_OCORRENCIA" in df_ocorr.columns:
-        df_occ = df_ocorr.groupby(pd.Grouper(key='Data', freq='M')).agg({'ID_OCORRENCIA': 'nunique'}).reset_index()
-        df_occ.rename(columns={"ID_OCORRENCIA": "Ocorrencias"}, inplace=True)
-    else:
-        df_occ = df_ocorr.groupby(pd.Grouper(key='Data', freq='M')).size().reset_index(name="Ocorrencias")
-    if df_occ.empty:
+    # rollup diário por TIPO (ver ocorrencias_rollup): meses = fim do mês
+    serie = serie_mensal_ocorrencias(exceto="Leve", df_ocorrencias=df_ocorr)
+    if serie.empty:
         return {}
-    end_date = df_occ['Data'].max()
+    end_date = serie.index.max()
     start_date, _ = get_date_range_for_period(end_date, months)
-    df_period = df_occ[df_occ['Data'] >= start_date]
-    if df_period.empty:
+    ocorr_series = serie[serie.index >= start_date].rename("Ocorrencias")
+    if ocorr_series.empty:
         return {}
-    ocorr_series = df_period.set_index('Data')["Ocorrencias"]
     ma = moving_average(ocorr_series, window=3)
     gr = growth_rate(ocorr_series)
     std = std_deviation(ocorr_series)
@@ -1721,8 +1552,7 @@ def historical_ocorrencias(months=12):
         "std_deviation": formatar_valor_utils(std, 'numero'),
         "last_quarter": last_q,
         "last_semester": last_s,
-        "raw_data": {d.strftime("%Y-%m-%d"): formatar_valor_utils(v, 'numero')
-                     for d, v in ocorr_series.to_dict().items()}
+        "raw_data": _serie_numerica(ocorr_series, "numero")
     }
 
 def historical_erros_operacionais(months: int = 12):
@@ -1731,7 +1561,7 @@ def historical_erros_operacionais(months: int = 12):
     Coluna-fonte: "Op. Shows" da Base2.
     Retorna dict compatível com kpi_charts.kpi_hist_data().
     """
-    df = carregar_base2()
+    df = _local(carregar_base2())
     if df is None or df.empty:
         return {"raw_data": OrderedDict()}
 
@@ -1767,10 +1597,7 @@ def historical_erros_operacionais(months: int = 12):
     last_q, last_s = get_recent_metrics(serie, fmt="monetario")
 
     # Raw data formatado
-    raw = OrderedDict(
-        (d.strftime("%Y-%m-%d"), formatar_valor_utils(v, "monetario"))
-        for d, v in serie.items()
-    )
+    raw = _serie_numerica(serie, "monetario")
 
     return {
         "start_date":   serie.index.min().strftime("%Y-%m-%d"),
@@ -1788,13 +1615,7 @@ def historical_cidades(months=12):
     Histórico para Número de Cidades.
     Conta cidades únicas por mês; valores médios e std formatados como 'numero'.
     """
-    df_eshows = carregar_base_eshows()
-    if df_eshows is None or df_eshows.empty:
-        return {}
-    df_eshows['Data do Show'] = pd.to_datetime(df_eshows['Data do Show'], errors='coerce')
-    df_eshows = df_eshows.dropna(subset=['Data do Show']).sort_values('Data do Show')
-    df_monthly = df_eshows.groupby(pd.Grouper(key='Data do Show', freq='M')).agg({'Cidade': 'nunique'}).reset_index()
-    df_monthly.rename(columns={'Cidade': 'Cidades'}, inplace=True)
+    df_monthly = _eshows_mensal()[['Data do Show', 'Cidades']]
     if df_monthly.empty:
         return {}
     end_date = df_monthly['Data do Show'].max()
@@ -1815,8 +1636,7 @@ def historical_cidades(months=12):
         "std_deviation": formatar_valor_utils(std, 'numero'),
         "last_quarter": last_q,
         "last_semester": last_s,
-        "raw_data": {d.strftime("%Y-%m-%d"): formatar_valor_utils(v, 'numero')
-                     for d, v in cidades_series.to_dict().items()}
+        "raw_data": _serie_numerica(cidades_series, "numero")
     }
 
 def historical_novos_palcos(months=12):
@@ -1825,7 +1645,7 @@ def historical_novos_palcos(months=12):
     Calcula o número de casas que tiveram o primeiro show em cada mês.
     Valores formatados como 'numero'.
     """
-    df = carregar_base_eshows()
+    df = _local(carregar_base_eshows())
     if df is None or df.empty:
         return {}
     df['Data do Show'] = pd.to_datetime(df['Data do Show'], errors='coerce')
@@ -1854,36 +1674,34 @@ def historical_novos_palcos(months=12):
         "std_deviation": formatar_valor_utils(std, 'numero'),
         "last_quarter": last_q,
         "last_semester": last_s,
-        "raw_data": {d.strftime("%Y-%m-%d"): formatar_valor_utils(v, 'numero')
-                     for d, v in novos_series.to_dict().items()}
+        "raw_data": _serie_numerica(novos_series, "numero")
     }
 
+def _grade_ka(df_eshows, months):
+    """
+    (ano de referência do Top 5, inícios de mês) dos históricos *_ka: os
+    últimos *months* meses até o maior entre o mês atual e o último mês com
+    show. O Top 5 é o do ano anterior ao do último mês.
+    """
+    today_month = pd.Timestamp.today().normalize().replace(day=1)
+    ultimo_show = pd.to_datetime(df_eshows['Data do Show'], errors='coerce').max()
+    last_month = (max(today_month, ultimo_show.normalize().replace(day=1))
+                  if pd.notna(ultimo_show) else today_month)
+    return last_month.year, pd.date_range(end=last_month, periods=months, freq='MS')
+
 def historical_fat_ka(months=12):
     """
     Histórico para Faturamento KA (Contas Chave).
     Calcula o faturamento mensal dos shows dos grupos-chave (top5 do ano anterior ao final do período).
-    Utiliza a função `faturamento_dos_grupos` de utils.py para consistência.
+    Os meses saem todos do índice KA (ka_index), com a regra de `faturamento_dos_grupos`.
     Valores: média e std 'monetario'; growth_rate em 'percentual'.
     """
     df_eshows = carregar_base_eshows()
-    if df_eshows is None or df_eshows.empty:
-        return {"raw_data": OrderedDict()}
-
-    # Garantir colunas e tipos
-    df_eshows['Data do Show'] = pd.to_datetime(df_eshows['Data do Show'], errors='coerce')
-    df_eshows = df_eshows.dropna(subset=['Data do Show'])
-    df_eshows = ensure_grupo_col(df_eshows) # Garante a coluna 'Grupo'
-    if 'Grupo' not in df_eshows.columns:
-        logger.debug("[hist.historical_fat_ka] Coluna 'Grupo' não encontrada após ensure_grupo_col.")
+    if df_eshows is None or df_eshows.empty or 'Grupo' not in df_eshows.columns:
         return {"raw_data": OrderedDict()}
 
     # Determinar período e ano de referência para Top 5
-    today_month = pd.Timestamp.today().normalize().replace(day=1)
-    last_data_month = df_eshows['Data do Show'].max().normalize().replace(day=1) if not df_eshows.empty else today_month
-    last_month = max(today_month, last_data_month)
-    period_starts = pd.date_range(end=last_month, periods=months, freq='MS') # Inícios de mês
-
-    ano_referencia_top5 = last_month.year # Usa o ano do último mês como referência
+    ano_referencia_top5, period_starts = _grade_ka(df_eshows, months)
     logger.debug(f"[hist.historical_fat_ka] Ano de referência para Top 5: {ano_referencia_top5}")
     top5_list = obter_top5_grupos_ano_anterior(df_eshows, ano_referencia_top5)
     if not top5_list:
@@ -1891,30 +1709,10 @@ def historical_fat_ka(months=12):
         return {"raw_data": OrderedDict()}
     logger.debug(f"[hist.historical_fat_ka] Top 5 Grupos: {[g[0] for g in top5_list]}")
 
-    # Calcular faturamento KA mensalmente
-    serie_vals = OrderedDict()
-    for month_start in period_starts:
-        ano_iter = month_start.year
-        mes_iter = month_start.month
-        periodo_iter = 'Mês Aberto'
-
-        # Filtrar dados do mês
-        df_principal_iter = filtrar_periodo_principal(
-            df_eshows,
-            ano_iter,
-            periodo_iter,
-            mes_iter,
-            custom_range=None
-        )
-
-        if df_principal_iter.empty:
-            fat_ka_mes = 0.0
-        else:
-            # Calcular faturamento KA para o mês
-            fat_ka_mes = faturamento_dos_grupos(df_principal_iter, top5_list)
-
-        serie_vals[month_start] = fat_ka_mes
-        logger.debug(f"[hist.historical_fat_ka] Fat KA para {ano_iter}-{mes_iter:02d}: {fat_ka_mes:.2f}")
+    # Faturamento KA de todos os meses ('Mês Aberto') numa chamada
+    mes_ini, mes_fim = _limites_mes_aberto(period_starts)
+    fat_ka = faturamento_ka(ano_referencia_top5, mes_ini, mes_fim)
+    serie_vals = OrderedDict(zip(period_starts, fat_ka.tolist()))
 
     # Finalizar e formatar retorno
     if not serie_vals:
@@ -1928,10 +1726,7 @@ def historical_fat_ka(months=12):
     std = std_deviation(serie) if len(serie) >= 1 else 0.0
     last_q, last_s = get_recent_metrics(serie, fmt="monetario")
 
-    raw_data = OrderedDict(
-        (d.strftime("%Y-%m-%d"), formatar_valor_utils(v, "monetario"))
-        for d, v in serie.items()
-    )
+    raw_data = _serie_numerica(serie, "monetario")
 
     ma_last_val = ma.iloc[-1] if not ma.empty else 0
     gr_pct = (gr * 100.0) if gr is not None else 0.0
@@ -1957,67 +1752,26 @@ def historical_take_rate_ka(months=12):
     GMV KA é a soma de `Valor Total do Show` dos grupos KA no mês.
     Valores formatados em 'percentual'.
     """
-    # ---------- 1) Carrega bases e garante colunas ----------
+    # ---------- 1) Carrega base ----------
     df_eshows = carregar_base_eshows()
-    if df_eshows is None or df_eshows.empty:
+    if df_eshows is None or df_eshows.empty or 'Grupo' not in df_eshows.columns:
         return {"raw_data": OrderedDict()}
 
-    df_eshows['Data do Show'] = pd.to_datetime(df_eshows['Data do Show'], errors='coerce')
-    df_eshows = df_eshows.dropna(subset=['Data do Show'])
-    df_eshows = ensure_grupo_col(df_eshows)
-
-    # Garante coluna Valor Total do Show
-    if "Valor Total do Show" not in df_eshows.columns:
-        for alt in ["ValorTotaldoShow", "Valor_Total", "Valor_Total_do_Show"]:
-            if alt in df_eshows.columns:
-                df_eshows.rename(columns={alt: "Valor Total do Show"}, inplace=True)
-                break
-        if "Valor Total do Show" not in df_eshows.columns:
-            df_eshows["Valor Total do Show"] = 0
-    df_eshows["Valor Total do Show"] = pd.to_numeric(df_eshows["Valor Total do Show"], errors='coerce').fillna(0)
-
     # ---------- 2) Determina Top 5 e Período ----------
-    today_month = pd.Timestamp.today().normalize().replace(day=1)
-    last_data_month = df_eshows['Data do Show'].max().normalize().replace(day=1) if not df_eshows.empty else today_month
-    last_month = max(today_month, last_data_month)
-    period_starts = pd.date_range(end=last_month, periods=months, freq='MS')
-
-    ano_referencia_top5 = last_month.year
+    ano_referencia_top5, period_starts = _grade_ka(df_eshows, months)
     logger.debug(f"[hist.historical_take_rate_ka] Ano de referência para Top 5: {ano_referencia_top5}")
     top5_list = obter_top5_grupos_ano_anterior(df_eshows, ano_referencia_top5)
     if not top5_list:
         logger.debug("[hist.historical_take_rate_ka] Lista Top 5 está vazia.")
         return {"raw_data": OrderedDict()}
     logger.debug(f"[hist.historical_take_rate_ka] Top 5 Grupos: {[g[0] for g in top5_list]}")
-    grp_names = [g[0] for g in top5_list]
 
-    # ---------- 3) Itera e calcula mensalmente ----------
-    serie_vals = OrderedDict()
-    for month_start in period_starts:
-        ano_iter = month_start.year
-        mes_iter = month_start.month
-        periodo_iter = 'Mês Aberto'
-
-        # Filtra dados do mês
-        df_principal_iter = filtrar_periodo_principal(
-            df_eshows, ano_iter, periodo_iter, mes_iter, custom_range=None
-        )
-
-        if df_principal_iter.empty:
-            take_rate_ka_mes = 0.0
-        else:
-            # Calcula faturamento KA do mês
-            fat_ka_mes = faturamento_dos_grupos(df_principal_iter, top5_list)
-
-            # Calcula GMV KA do mês
-            df_ka_iter = df_principal_iter[df_principal_iter['Grupo'].isin(grp_names)]
-            gmv_ka_mes = df_ka_iter['Valor Total do Show'].sum()
-
-            # Calcula Take Rate KA do mês
-            take_rate_ka_mes = (fat_ka_mes / gmv_ka_mes * 100) if gmv_ka_mes > 0 else 0.0
-
-        serie_vals[month_start] = take_rate_ka_mes
-        logger.debug(f"[hist.historical_take_rate_ka] Take Rate KA para {ano_iter}-{mes_iter:02d}: {take_rate_ka_mes:.2f}%")
+    # ---------- 3) Faturamento e GMV KA de todos os meses (índice KA) ----------
+    mes_ini, mes_fim = _limites_mes_aberto(period_starts)
+    fat_ka = faturamento_ka(ano_referencia_top5, mes_ini, mes_fim)
+    gmv_mes = gmv_ka(ano_referencia_top5, mes_ini, mes_fim)
+    take_rate = np.where(gmv_mes > 0, fat_ka / np.where(gmv_mes > 0, gmv_mes, 1.0) * 100, 0.0)
+    serie_vals = OrderedDict(zip(period_starts, take_rate.tolist()))
 
     # ---------- 4) Finaliza e formata retorno ----------
     if not serie_vals:
@@ -2030,10 +1784,7 @@ def historical_take_rate_ka(months=12):
     std = std_deviation(serie) if len(serie) >= 1 else 0.0
     last_q, last_s = get_recent_metrics(serie, fmt="percentual") # Formato percentual
 
-    raw_data = OrderedDict(
-        (d.strftime("%Y-%m-%d"), formatar_valor_utils(v, "percentual"))
-        for d, v in serie.items()
-    )
+    raw_data = _serie_numerica(serie, "percentual")
 
     ma_last_val = ma.iloc[-1] if not ma.empty else 0
     gr_pct = (gr * 100.0) if gr is not None else 0.0
@@ -2057,13 +1808,9 @@ def historical_num_shows(months=12):
     Conta o número de shows únicos por mês.
     Valores: médias e std como 'numero'; growth_rate como 'percentual'.
     """
-    df = carregar_base_eshows()
-    if df is None or df.empty:
-        return {}
-    df['Data do Show'] = pd.to_datetime(df['Data do Show'], errors='coerce')
-    df = df.dropna(subset=['Data do Show']).sort_values('Data do Show')
-    df_monthly = df.groupby(pd.Grouper(key='Data do Show', freq='M')).agg({'Id do Show': 'nunique'}).reset_index()
-    df_monthly.rename(columns={'Id do Show': 'Num Shows'}, inplace=True)
+    # Id do Show é único na base sanitizada: contagem mensal = nunique
+    df_monthly = _eshows_mensal()[['Data do Show', 'Shows']]
+    df_monthly = df_monthly.rename(columns={'Shows': 'Num Shows'})
     if df_monthly.empty:
         return {}
     end_date = df_monthly['Data do Show'].max()
@@ -2084,12 +1831,11 @@ def historical_num_shows(months=12):
         "std_deviation": formatar_valor_utils(std, 'numero'),
         "last_quarter": last_q,
         "last_semester": last_s,
-        "raw_data": {d.strftime("%Y-%m-%d"): formatar_valor_utils(v, 'numero')
-                     for d, v in series.to_dict().items()}
+        "raw_data": _serie_numerica(series, "numero")
     }
 
 def historical_custos_totais(months: int = 12):
-    df = carregar_base2()
+    df = _local(carregar_base2())
     if df is None or df.empty:
         return {"raw_data": OrderedDict()}
 
@@ -2114,9 +1860,8 @@ def historical_custos_totais(months: int = 12):
     # 3) últimos N meses com dados > 0 ----------------------------------------
     df_last = df_mensal.sort_values("Data").tail(months)
 
-    raw = OrderedDict(
-        (d.strftime("%Y-%m-%d"), formatar_valor_utils(v, "monetario"))
-        for d, v in zip(df_last["Data"], df_last["Custos"])
+    raw = _serie_numerica(
+        pd.Series(df_last["Custos"].to_numpy(), index=df_last["Data"]), "monetario"
     )
 
     # métricas básicas (opcionais)
@@ -2141,22 +1886,7 @@ def historical_gmv(months: int = 12) -> dict:
     Histórico para GMV (Gross Merchandise Volume) dos últimos *months* meses.
     Soma o valor total do show mensal (Valor Total do Show) e calcula métricas.
     """
-    df_eshows = carregar_base_eshows()
-    if df_eshows is None or df_eshows.empty:
-        return {}
-    # Garante coluna Valor Total do Show
-    if "Valor Total do Show" not in df_eshows.columns:
-        for alt in ["ValorTotaldoShow", "Valor_Total", "Valor_Total_do_Show"]:
-            if alt in df_eshows.columns:
-                df_eshows.rename(columns={alt: "Valor Total do Show"}, inplace=True)
-                break
-        if "Valor Total do Show" not in df_eshows.columns:
-            df_eshows["Valor Total do Show"] = 0
-    df_eshows["Valor Total do Show"] = pd.to_numeric(df_eshows["Valor Total do Show"], errors="coerce").fillna(0)
-    if "Data do Show" not in df_eshows.columns:
-        return {}
-    df_eshows["Data do Show"] = pd.to_datetime(df_eshows["Data do Show"], errors='coerce')
-    df_group = df_eshows.groupby(pd.Grouper(key="Data do Show", freq="M"))["Valor Total do Show"].sum()
+    df_group = cubo_mensal()["Valor Total do Show"]
     df_group = df_group[df_group > 0]
     if df_group.empty:
         return {}
@@ -2175,42 +1905,16 @@ def historical_gmv(months: int = 12) -> dict:
         "std_deviation": formatar_valor_utils(std, "monetario"),
         "last_quarter": last_q,
         "last_semester": last_s,
-        "raw_data": {d.strftime("%Y-%m-%d"): formatar_valor_utils(v, "monetario")
-                     for d, v in series.to_dict().items()}
+        "raw_data": _serie_numerica(series, "monetario")
     }
 
 def historical_ticket(months: int = 12) -> dict:
     """
     Ticket Médio histórico (GMV / nº de shows) para os últimos *months* meses.
     """
-    df = carregar_base_eshows()
-    if df.empty:
-        return {}
-
-    # ---------- garante coluna única ----------
-    if "Valor Total do Show" not in df.columns:
-        for alt in ["ValorTotaldoShow", "Valor_Total_do_Show"]:
-            if alt in df.columns:
-                df.rename(columns={alt: "Valor Total do Show"}, inplace=True)
-                break
-        if "Valor Total do Show" not in df.columns:
-            df["Valor Total do Show"] = 0
-
-    # elimina duplicadas mantendo a 1ª
-    df = df.loc[:, ~df.columns.duplicated(keep="first")]
-
-    df["Valor Total do Show"] = pd.to_numeric(
-        df["Valor Total do Show"], errors="coerce"
-    ).fillna(0)
-
-    if "Data do Show" not in df.columns:
-        return {}
-
-    df["Data do Show"] = pd.to_datetime(df["Data do Show"], errors="coerce")
     df_group = (
-        df.groupby(pd.Grouper(key="Data do Show", freq="M"))
-        .agg({"Valor Total do Show": "sum", "Id do Show": "count"})
-        .rename(columns={"Valor Total do Show": "GMV", "Id do Show": "Qtd"})
+        cubo_mensal()[["Valor Total do Show", "Shows"]]
+        .rename(columns={"Valor Total do Show": "GMV", "Shows": "Qtd"})
     )
 
     df_group = df_group[df_group["Qtd"] > 0]
@@ -2234,10 +1938,7 @@ def historical_ticket(months: int = 12) -> dict:
         "std_deviation":  formatar_valor_utils(std, "monetario"),
         "last_quarter":   qtr,
         "last_semester":  sem,
-        "raw_data": {
-            d.strftime("%Y-%m-%d"): formatar_valor_utils(v, "monetario")
-            for d, v in series.to_dict().items()
-        }
+        "raw_data": _serie_numerica(series, "monetario")
     }
 
 def historical_nps_artistas(months=12):
@@ -2246,7 +1947,7 @@ def historical_nps_artistas(months=12):
     Calcula a média mensal do NPS Artistas.
     Valores formatados em 'percentual'.
     """
-    df = carregar_base2()
+    df = _local(carregar_base2())
     if df is None or df.empty:
         return {}
     df = prepare_base2_with_date(df)
@@ -2275,8 +1976,7 @@ def historical_nps_artistas(months=12):
          "std_deviation": formatar_valor_utils(std, 'percentual'),
          "last_quarter": last_q,
          "last_semester": last_s,
-         "raw_data": {d.strftime("%Y-%m-%d"): formatar_valor_utils(v, 'percentual')
-                      for d, v in series.to_dict().items()}
+         "raw_data": _serie_numerica(series, "percentual")
     }
 
 def historical_nps_equipe(months=12):
@@ -2285,7 +1985,7 @@ def historical_nps_equipe(months=12):
     Calcula a média mensal do NPS Equipe.
     Valores formatados em 'percentual'.
     """
-    df = carregar_base2()
+    df = _local(carregar_base2())
     if df is None or df.empty:
         return {}
     df = prepare_base2_with_date(df)
@@ -2314,8 +2014,7 @@ def historical_nps_equipe(months=12):
          "std_deviation": formatar_valor_utils(std, 'percentual'),
          "last_quarter": last_q,
          "last_semester": last_s,
-         "raw_data": {d.strftime("%Y-%m-%d"): formatar_valor_utils(v, 'percentual')
-                      for d, v in series.to_dict().items()}
+         "raw_data": _serie_numerica(series, "percentual")
     }
 
 def historical_lucro_liquido(months=12):
@@ -2325,16 +2024,11 @@ def historical_lucro_liquido(months=12):
     Faturamento é calculado a partir de colunas padrão; custos a partir da Base2.
     Valores: média e std monetários; growth_rate em 'percentual'.
     """
-    df_eshows = carregar_base_eshows()
-    if df_eshows is None or df_eshows.empty:
+    df_fat_monthly = _eshows_mensal()[['Data do Show', 'Faturamento']]
+    if df_fat_monthly.empty:
         return {}
-    sanitize_faturamento_cols(df_eshows)
-    df_eshows['Faturamento'] = df_eshows[COLUNAS_FATURAMENTO].sum(axis=1)
-    df_eshows['Data do Show'] = pd.to_datetime(df_eshows['Data do Show'], errors='coerce')
-    df_eshows = df_eshows.sort_values('Data do Show')
-    df_fat_monthly = df_eshows.groupby(pd.Grouper(key='Data do Show', freq='M')).agg({'Faturamento': 'sum'}).reset_index()
 
-    df_base2 = carregar_base2()
+    df_base2 = _local(carregar_base2())
     if df_base2 is None or df_base2.empty:
         return {}
     df_base2 = prepare_base2_with_date(df_base2)
@@ -2367,8 +2061,7 @@ def historical_lucro_liquido(months=12):
          "std_deviation": formatar_valor_utils(std, 'monetario'),
          "last_quarter": last_q,
          "last_semester": last_s,
-         "raw_data": {d.strftime("%Y-%m-%d"): formatar_valor_utils(v, 'monetario')
-                      for d, v in series.to_dict().items()}
+         "raw_data": _serie_numerica(series, "monetario")
     }
 
 def historical_faturamento_eshows(months=12):
@@ -2377,18 +2070,7 @@ def historical_faturamento_eshows(months=12):
     Soma o faturamento total a partir da base eShows.
     Valores monetários são formatados como 'monetario'.
     """
-    df = carregar_base_eshows()
-    if df is None or df.empty:
-        return {}
-    COLUNAS_FATURAMENTO = [
-         "Comissão B2B", "Comissão B2C", "Antecipação de Cachês",
-         "Curadoria", "SaaS Percentual", "SaaS Mensalidade", "Notas Fiscais"
-    ]
-    sanitize_faturamento_cols(df)
-    df['Faturamento'] = df[COLUNAS_FATURAMENTO].sum(axis=1)
-    df['Data do Show'] = pd.to_datetime(df['Data do Show'], errors='coerce')
-    df = df.sort_values('Data do Show')
-    df_monthly = df.groupby(pd.Grouper(key='Data do Show', freq='M')).agg({'Faturamento': 'sum'}).reset_index()
+    df_monthly = _eshows_mensal()[['Data do Show', 'Faturamento']]
     if df_monthly.empty:
         return {}
     end_date = df_monthly['Data do Show'].max()
@@ -2407,8 +2089,7 @@ def historical_faturamento_eshows(months=12):
          "std_deviation": formatar_valor_utils(std, 'monetario'),
          "last_quarter": last_q,
          "last_semester": last_s,
-         "raw_data": {d.strftime("%Y-%m-%d"): formatar_valor_utils(v, 'monetario')
-                      for d, v in series.to_dict().items()}
+         "raw_data": _serie_numerica(series, "monetario")
     }
 
 def historical_lifetime_novos_palcos(months: int = 12):
@@ -2420,7 +2101,7 @@ def historical_lifetime_novos_palcos(months: int = 12):
       → convertimos para MESES dividindo por 30.
     • Retorna dicionário no formato esperado por kpi_charts.kpi_hist_data().
     """
-    df = carregar_base_eshows()
+    df = _local(carregar_base_eshows())
     if df is None or df.empty:
         return {"raw_data": OrderedDict()}
 
@@ -2488,10 +2169,7 @@ def historical_lifetime_novos_palcos(months: int = 12):
     std = std_deviation(serie) or 0
     last_q, last_s = get_recent_metrics(serie, fmt="numero")
 
-    raw = OrderedDict(
-        (d.strftime("%Y-%m-%d"), formatar_valor_utils(v, "numero"))
-        for d, v in serie.items()
-    )
+    raw = _serie_numerica(serie, "numero")
 
     return {
         "start_date":     serie.index.min().strftime("%Y-%m-%d"),
@@ -2517,7 +2195,7 @@ def historical_fat_novos_palcos(months: int = 12):
 
     Retorna dict no formato exigido por kpi_charts.kpi_hist_data().
     """
-    df = carregar_base_eshows()
+    df = _local(carregar_base_eshows())
     if df is None or df.empty:
         return {"raw_data": OrderedDict()}
 
@@ -2567,10 +2245,7 @@ def historical_fat_novos_palcos(months: int = 12):
     std = std_deviation(serie) or 0
     last_q, last_s = get_recent_metrics(serie, fmt="monetario")
 
-    raw = OrderedDict(
-        (d.strftime("%Y-%m-%d"), formatar_valor_utils(v, "monetario"))
-        for d, v in serie.items()
-    )
+    raw = _serie_numerica(serie, "monetario")
 
     return {
         "start_date":     serie.index.min().strftime("%Y-%m-%d"),
@@ -2589,28 +2264,19 @@ def historical_churn_novos_palcos(months: int = 12, dias_sem_show: int = 45):
     """
     Série mensal (últimos *months* meses) da quantidade de NOVOS palcos que deram churn.
 
-    Utiliza a mesma lógica de `calcular_churn_novos_palcos` (utils.py) aplicada
-    mensalmente para consistência com os cards do dashboard.
+    Utiliza a mesma lógica de `calcular_churn_novos_palcos` (utils.py), calculada
+    para todos os meses numa única grade (casa × mês).
 
     - "Novo palco" para um mês = Palco cujo 1º show ocorreu NAQUELE mês.
     - Churn = Último show ocorreu no mês + dias_sem_show ultrapassou e não retornou até o fim do mês.
     """
-    # ---------- 1) Carrega bases (se não forem globais) ----------
-    try:
-        # Tenta acessar DFs globais se existirem
-        global df_eshows, df_casas_earliest
-        if df_eshows is None or df_casas_earliest is None: raise NameError # Força o carregamento se não definidos
-    except NameError:
-        # Carrega se não forem globais ou se forem None
-        logger.debug("[hist.historical_churn_novos_palcos] Carregando bases df_eshows e df_casas_earliest...")
-        df_eshows = carregar_base_eshows()
-        if df_eshows is not None and not df_eshows.empty:
-            df_eshows['Data do Show'] = pd.to_datetime(df_eshows['Data do Show'], errors='coerce')
-            df_eshows.dropna(subset=['Data do Show', 'Id da Casa'], inplace=True)
-            df_casas_earliest = df_eshows.groupby("Id da Casa")["Data do Show"].min().reset_index(name="EarliestShow")
-        else:
-            df_casas_earliest = pd.DataFrame(columns=["Id da Casa", "EarliestShow"])
-        logger.debug("[hist.historical_churn_novos_palcos] Bases carregadas.")
+    # ---------- 1) Carrega bases (registry) ----------
+    df_eshows = _local(carregar_base_eshows())
+    if df_eshows is not None and not df_eshows.empty:
+        df_eshows = df_eshows.dropna(subset=['Data do Show', 'Id da Casa'])
+        df_casas_earliest = carregar_casas_earliest_latest()[0]
+    else:
+        df_casas_earliest = pd.DataFrame(columns=["Id da Casa", "EarliestShow"])
 
 
     if df_eshows is None or df_eshows.empty or df_casas_earliest is None: # df_casas_earliest pode estar vazio, mas não None
@@ -2624,42 +2290,25 @@ def historical_churn_novos_palcos(months: int = 12, dias_sem_show: int = 45):
     # Gera os inícios de mês para os últimos 'months' meses
     period_starts = pd.date_range(end=last_month, periods=months, freq='MS') # MS = Month Start
 
-    # ---------- 3) Itera sobre os meses ---------------------------------
-    serie_vals = OrderedDict()
-
-    for month_start in period_starts:
-        ano_iter = month_start.year
-        mes_iter = month_start.month
-        periodo_ytd_iter = 'YTD' # <<< MUDANÇA: Considera palcos novos desde o início do ano até o mês atual
-
-        logger.debug(f"[hist.historical_churn_novos_palcos] Calculando para: {ano_iter}-{mes_iter:02d}")
-
-        # Filtra os palcos que se tornaram "novos" DESDE O INÍCIO DO ANO até este mês
-        df_new_period_iter = filtrar_novos_palcos_por_periodo(
-            df_casas_earliest,
-            ano_iter,
-            periodo_ytd_iter, # <<< MUDANÇA: Usa YTD
-            mes_iter,         # <<< MUDANÇA: Passa o mês para limitar o YTD
-            custom_range=None
-        )
-
-        # Calcula o churn que ocorreu NESTE MÊS para esses novos palcos
-        churn_count_mes = calcular_churn_novos_palcos(
-            ano=ano_iter,
-            periodo='Mês Aberto', # <<< MUDANÇA: Calcula churn APENAS para este mês
-            mes=mes_iter,
-            start_date=None, # Usa ano/periodo/mes
-            end_date=None,   # Usa ano/periodo/mes
-            df_earliest=df_casas_earliest,
-            df_eshows=df_eshows,
-            df_new_period=df_new_period_iter, # Passa os novos palcos ACUMULADOS do ano
-            dias_sem_show=dias_sem_show,
-            uf=None # Churn geral, sem filtro de UF
-        )
-
-        serie_vals[month_start] = churn_count_mes
-        logger.debug(f"[hist.historical_churn_novos_palcos] Resultado para {ano_iter}-{mes_iter:02d}: {churn_count_mes}")
-
+    # ---------- 3) Grade (casa × mês) ----------------------------------
+    # Mesma regra de calcular_churn_novos_palcos mês a mês: o palco é novo
+    # se o 1º show (>= 2022-04-01) caiu no YTD do mês e deu churn se o
+    # LastShow global + dias_sem_show cai dentro do mês.
+    ytd_ini = [get_period_start(p.year, "YTD", p.month, None) for p in period_starts]
+    ytd_fim = [get_period_end(p.year, "YTD", p.month, None) for p in period_starts]
+    mes_ini, mes_fim = _limites_mes_aberto(period_starts)
+
+    earliest = df_casas_earliest.copy()
+    earliest["EarliestShow"] = pd.to_datetime(earliest["EarliestShow"], errors="coerce")
+    earliest = earliest[earliest["EarliestShow"] >= pd.to_datetime("2022-04-01")]
+    data_churn = datas_churn(dias_sem_show)
+    churn_casa = _datas_ns(data_churn.reindex(earliest["Id da Casa"]).to_numpy())[:, None]
+    novo_casa = _datas_ns(earliest["EarliestShow"].to_numpy())[:, None]
+
+    novo = (novo_casa >= _datas_ns(ytd_ini)) & (novo_casa <= _datas_ns(ytd_fim))
+    churn = (churn_casa >= _datas_ns(mes_ini)) & (churn_casa <= _datas_ns(mes_fim))
+    serie_vals = OrderedDict(zip(period_starts, (novo & churn).sum(axis=0).tolist()))
+    logger.debug(f"[hist.historical_churn_novos_palcos] {len(earliest)} palcos novos na grade de {len(period_starts)} meses")
 
     # ---------- 4) Finaliza e formata retorno --------------------------
     if not serie_vals:
@@ -2674,10 +2323,7 @@ def historical_churn_novos_palcos(months: int = 12, dias_sem_show: int = 45):
     std = std_deviation(serie) if len(serie) >= 1 else 0.0
     last_q, last_s = get_recent_metrics(serie, fmt="numero")
 
-    raw_data = OrderedDict(
-        (d.strftime("%Y-%m-%d"), formatar_valor_utils(v, "numero"))
-        for d, v in serie.items()
-    )
+    raw_data = _serie_numerica(serie, "numero")
 
     ma_last_val = ma.iloc[-1] if not ma.empty else 0
     gr_pct = (gr * 100.0) if gr is not None else 0.0
@@ -2703,26 +2349,14 @@ def historical_novos_palcos_ka(months=12):
     """
     # ---------- 1) Carrega bases ----------
     df_eshows = carregar_base_eshows()
-    if df_eshows is None or df_eshows.empty:
-        return {"raw_data": OrderedDict()}
-
-    df_eshows['Data do Show'] = pd.to_datetime(df_eshows['Data do Show'], errors='coerce')
-    df_eshows = df_eshows.dropna(subset=['Data do Show'])
-    df_eshows = ensure_grupo_col(df_eshows)
-    if 'Grupo' not in df_eshows.columns:
-        logger.debug("[hist.historical_novos_palcos_ka] Coluna 'Grupo' não encontrada.")
+    if df_eshows is None or df_eshows.empty or 'Grupo' not in df_eshows.columns:
         return {"raw_data": OrderedDict()}
 
     # Earliest show (necessário para filtrar novos palcos)
-    df_casas_earliest = df_eshows.groupby("Id da Casa")["Data do Show"].min().reset_index(name="EarliestShow")
+    df_casas_earliest = carregar_casas_earliest_latest()[0]
 
     # ---------- 2) Determina Top 5 e Período ----------
-    today_month = pd.Timestamp.today().normalize().replace(day=1)
-    last_data_month = df_eshows['Data do Show'].max().normalize().replace(day=1) if not df_eshows.empty else today_month
-    last_month = max(today_month, last_data_month)
-    period_starts = pd.date_range(end=last_month, periods=months, freq='MS')
-
-    ano_referencia_top5 = last_month.year
+    ano_referencia_top5, period_starts = _grade_ka(df_eshows, months)
     logger.debug(f"[hist.historical_novos_palcos_ka] Ano de referência para Top 5: {ano_referencia_top5}")
     top5_list = obter_top5_grupos_ano_anterior(df_eshows, ano_referencia_top5)
     if not top5_list:
@@ -2732,26 +2366,19 @@ def historical_novos_palcos_ka(months=12):
 
     # ---------- 3) Itera e calcula mensalmente ----------
     serie_vals = OrderedDict()
-    for month_start in period_starts:
-        ano_iter = month_start.year
-        mes_iter = month_start.month
-        periodo_iter = 'Mês Aberto'
-
-        # Filtra dados gerais do mês
-        df_principal_iter = filtrar_periodo_principal(
-            df_eshows, ano_iter, periodo_iter, mes_iter, custom_range=None
-        )
-
+    for month_start, ini, fim in zip(period_starts, *_limites_mes_aberto(period_starts)):
         # Filtra SOMENTE os palcos cujo PRIMEIRO show foi neste mês
         df_new_period_iter = filtrar_novos_palcos_por_periodo(
-            df_casas_earliest, ano_iter, periodo_iter, mes_iter, custom_range=None
+            df_casas_earliest, month_start.year, 'Mês Aberto', month_start.month, custom_range=None
         )
 
-        # Calcula quantos desses novos palcos pertencem aos grupos KA
-        np_ka_mes = novos_palcos_dos_grupos(df_new_period_iter, df_principal_iter, top5_list)
+        # Quantos desses novos palcos têm show KA no mês (índice KA)
+        np_ka_mes = 0
+        if not df_new_period_iter.empty:
+            np_ka_mes = novos_palcos_ka(ano_referencia_top5, ini, fim, df_new_period_iter["Id da Casa"])
 
         serie_vals[month_start] = np_ka_mes
-        logger.debug(f"[hist.historical_novos_palcos_ka] Novos Palcos KA para {ano_iter}-{mes_iter:02d}: {np_ka_mes}")
+        logger.debug(f"[hist.historical_novos_palcos_ka] Novos Palcos KA para {month_start:%Y-%m}: {np_ka_mes}")
 
     # ---------- 4) Finaliza e formata retorno ----------
     if not serie_vals:
@@ -2764,10 +2391,7 @@ def historical_novos_palcos_ka(months=12):
     std = std_deviation(serie) if len(serie) >= 1 else 0.0
     last_q, last_s = get_recent_metrics(serie, fmt="numero") # Formato numero
 
-    raw_data = OrderedDict(
-        (d.strftime("%Y-%m-%d"), formatar_valor_utils(v, "numero"))
-        for d, v in serie.items()
-    )
+    raw_data = _serie_numerica(serie, "numero")
 
     ma_last_val = ma.iloc[-1] if not ma.empty else 0
     gr_pct = (gr * 100.0) if gr is not None else 0.0
@@ -2788,28 +2412,17 @@ def historical_novos_palcos_ka(months=12):
 def historical_churn_ka(months=12, dias_sem_show=45):
     """
     Histórico para Churn de Contas-Chave (KA).
-    Calcula mensalmente o número de casas KA que entraram em churn.
-    Utiliza `get_churn_ka_for_period` de utils.py para consistência.
+    Calcula mensalmente o número de casas KA que entraram em churn: LastShow
+    de cada casa KA (só shows KA) + dias_sem_show caindo no mês, vetorizado
+    nos meses.
     """
-    # ---------- 1) Carrega bases e garante colunas ----------
+    # ---------- 1) Carrega base ----------
     df_eshows = carregar_base_eshows()
-    if df_eshows is None or df_eshows.empty:
-        return {"raw_data": OrderedDict()}
-
-    df_eshows['Data do Show'] = pd.to_datetime(df_eshows['Data do Show'], errors='coerce')
-    df_eshows = df_eshows.dropna(subset=['Data do Show'])
-    df_eshows = ensure_grupo_col(df_eshows)
-    if 'Grupo' not in df_eshows.columns:
-        logger.debug("[hist.historical_churn_ka] Coluna 'Grupo' não encontrada.")
+    if df_eshows is None or df_eshows.empty or 'Grupo' not in df_eshows.columns:
         return {"raw_data": OrderedDict()}
 
     # ---------- 2) Determina Top 5 e Período ----------
-    today_month = pd.Timestamp.today().normalize().replace(day=1)
-    last_data_month = df_eshows['Data do Show'].max().normalize().replace(day=1) if not df_eshows.empty else today_month
-    last_month = max(today_month, last_data_month)
-    period_starts = pd.date_range(end=last_month, periods=months, freq='MS')
-
-    ano_referencia_top5 = last_month.year
+    ano_referencia_top5, period_starts = _grade_ka(df_eshows, months)
     logger.debug(f"[hist.historical_churn_ka] Ano de referência para Top 5: {ano_referencia_top5}")
     top5_list = obter_top5_grupos_ano_anterior(df_eshows, ano_referencia_top5)
     if not top5_list:
@@ -2817,26 +2430,11 @@ def historical_churn_ka(months=12, dias_sem_show=45):
         return {"raw_data": OrderedDict()}
     logger.debug(f"[hist.historical_churn_ka] Top 5 Grupos: {[g[0] for g in top5_list]}")
 
-    # ---------- 3) Itera e calcula mensalmente ----------
-    serie_vals = OrderedDict()
-    for month_start in period_starts:
-        ano_iter = month_start.year
-        mes_iter = month_start.month
-        periodo_iter = 'Mês Aberto'
-
-        # Calcula churn KA para este mês específico
-        churn_ka_mes = get_churn_ka_for_period(
-            ano=ano_iter,
-            periodo=periodo_iter,
-            mes=mes_iter,
-            top5_list=top5_list,
-            start_date_main=None,
-            end_date_main=None,
-            dias_sem_show=dias_sem_show
-        )
-
-        serie_vals[month_start] = churn_ka_mes
-        logger.debug(f"[hist.historical_churn_ka] Churn KA para {ano_iter}-{mes_iter:02d}: {churn_ka_mes}")
+    # ---------- 3) Churn KA de todos os meses numa passada (índice KA) ----------
+    # data_churn_tech = último show da casa nos grupos KA + dias_sem_show
+    mes_ini, mes_fim = _limites_mes_aberto(period_starts)
+    contagem = churn_ka(ano_referencia_top5, mes_ini, mes_fim, dias_sem_show)
+    serie_vals = OrderedDict(zip(period_starts, contagem.tolist()))
 
     # ---------- 4) Finaliza e formata retorno ----------
     if not serie_vals:
@@ -2849,10 +2447,7 @@ def historical_churn_ka(months=12, dias_sem_show=45):
     std = std_deviation(serie) if len(serie) >= 1 else 0.0
     last_q, last_s = get_recent_metrics(serie, fmt="numero") # Formato numero
 
-    raw_data = OrderedDict(
-        (d.strftime("%Y-%m-%d"), formatar_valor_utils(v, "numero"))
-        for d, v in serie.items()
-    )
+    raw_data = _serie_numerica(serie, "numero")
 
     ma_last_val = ma.iloc[-1] if not ma.empty else 0
     gr_pct = (gr * 100.0) if gr is not None else 0.0
@@ -2879,24 +2474,14 @@ def historical_num_colaboradores(months=12):
     if df_p is None or df_p.empty:
         return {"raw_data": OrderedDict()}
 
-    df_p["DataInicio"] = pd.to_datetime(df_p.get("DataInicio"), errors="coerce")
-    df_p["DataFinal"]  = pd.to_datetime(df_p.get("DataFinal"),  errors="coerce")
-    df_p = df_p.dropna(subset=["DataInicio"]) # Precisa de data de início
-
     end_date   = pd.Timestamp.today().normalize()
     start_date = (end_date - relativedelta(months=months)).replace(day=1)
     # Usamos fim de mês para garantir que peguemos todos ativos naquele mês
     dates = pd.date_range(start=start_date, end=end_date, freq="M") # ME = Month End
 
-    series_vals = OrderedDict()
-    for month_end in dates:
-        ativos = (
-            (df_p["DataInicio"] <= month_end) &
-            (df_p["DataFinal"].isna() | (df_p["DataFinal"] > month_end))
-        )
-        series_vals[month_end.replace(day=1)] = int(ativos.sum()) # Armazena com início do mês
-
-    serie = pd.Series(series_vals).sort_index()
+    # headcount de todos os fins de mês numa chamada (rh_intervalos);
+    # a série fica indexada pelo início do mês
+    serie = pd.Series(headcount(dates, df_p), index=dates.to_period("M").to_timestamp())
     if serie.empty: return {"raw_data": OrderedDict()}
 
     ma = moving_average(serie, 3) if len(serie) >= 3 else pd.Series([0]*len(serie), index=serie.index)
@@ -2904,10 +2489,7 @@ def historical_num_colaboradores(months=12):
     std = std_deviation(serie) if len(serie) >= 1 else 0.0
     last_q, last_s = get_recent_metrics(serie, fmt="numero")
 
-    raw_data = OrderedDict(
-        (d.strftime("%Y-%m-%d"), formatar_valor_utils(v, "numero"))
-        for d, v in serie.items()
-    )
+    raw_data = _serie_numerica(serie, "numero")
     ma_last_val = ma.iloc[-1] if not ma.empty else 0
     gr_pct = (gr * 100.0) if gr is not None else 0.0
 
@@ -2938,58 +2520,15 @@ def historical_tempo_medio_casa(months=12):
     if df_p is None or df_p.empty:
         return {"raw_data": OrderedDict()}
 
-    df_p["DataInicio"] = pd.to_datetime(df_p.get("DataInicio"), errors="coerce")
-    df_p["DataFinal"]  = pd.to_datetime(df_p.get("DataFinal"),  errors="coerce")
-    df_p = df_p.dropna(subset=["DataInicio"])
-
     end_date   = pd.Timestamp.today().normalize()
     start_date = (end_date - relativedelta(months=months)).replace(day=1)
     dates = pd.date_range(start=start_date, end=end_date, freq="M") # Month End
-
-    series_vals = OrderedDict()
     logger.debug(f"[hist.historical_tempo_medio_casa] Calculando de {start_date.date()} a {end_date.date()}")
 
-    for month_end_dt in dates:
-        logger.debug(f"Processing month ending: {month_end_dt.date()}")
-        df_empregados_ate_mes = df_p[df_p["DataInicio"] <= month_end_dt].copy()
-
-        if df_empregados_ate_mes.empty:
-            logger.debug("  No employees started by this month.")
-            series_vals[month_end_dt.replace(day=1)] = 0.0
-            continue
-
-        # Determina o "fim" da contagem para cada um:
-        # 1. Default é o fim do mês que estamos analisando.
-        df_empregados_ate_mes["FimContagem"] = month_end_dt
-
-        # 2. Identifica quem saiu ANTES do fim do mês
-        mask_saiu_antes = pd.notna(df_empregados_ate_mes["DataFinal"]) & (df_empregados_ate_mes["DataFinal"] < month_end_dt)
-
-        # 3. Para esses que saíram antes, o FimContagem é a DataFinal
-        df_empregados_ate_mes.loc[mask_saiu_antes, "FimContagem"] = df_empregados_ate_mes.loc[mask_saiu_antes, "DataFinal"]
-
-        # Garante que FimContagem seja datetime antes de subtrair
-        df_empregados_ate_mes["FimContagem"] = pd.to_datetime(df_empregados_ate_mes["FimContagem"], errors='coerce')
-        # Garante que DataInicio seja datetime
-        df_empregados_ate_mes["DataInicio"] = pd.to_datetime(df_empregados_ate_mes["DataInicio"], errors='coerce')
-
-        # Calcula TempoDias
-        df_empregados_ate_mes["TempoDias"] = (df_empregados_ate_mes["FimContagem"] - df_empregados_ate_mes["DataInicio"]).dt.days
-
-        # Remove NaT e dias negativos
-        df_empregados_ate_mes = df_empregados_ate_mes.dropna(subset=["TempoDias"])
-        df_empregados_ate_mes = df_empregados_ate_mes[df_empregados_ate_mes["TempoDias"] >= 0]
-
-        if df_empregados_ate_mes.empty:
-             logger.debug("  No valid tenure calculated for this month.")
-             media_dias = 0.0
-        else:
-            media_dias = df_empregados_ate_mes["TempoDias"].mean()
-            logger.debug(f"  Avg tenure (days): {media_dias:.2f} for {len(df_empregados_ate_mes)} employees")
-
-        series_vals[month_end_dt.replace(day=1)] = media_dias if pd.notna(media_dias) else 0.0
-
-    serie = pd.Series(series_vals).sort_index()
+    # Tempo de casa até o fim de cada mês (ou até a saída, se anterior) de
+    # quem já tinha começado – todos os meses numa chamada (rh_intervalos)
+    medias = tempo_medio(dates, df_p)
+    serie = pd.Series(np.nan_to_num(medias, nan=0.0), index=dates.to_period("M").to_timestamp())
     if serie.empty: return {"raw_data": OrderedDict()}
 
     # Métricas calculadas sobre a média de dias
@@ -3004,10 +2543,7 @@ def historical_tempo_medio_casa(months=12):
 
 
     # Raw data DEVE conter o valor NUMÉRICO (média de dias)
-    raw_data = OrderedDict(
-        (d.strftime("%Y-%m-%d"), float(v) if pd.notna(v) else 0.0) # Garante float
-        for d, v in serie.items()
-    )
+    raw_data = _serie_numerica(serie.fillna(0.0), "dias")
     ma_last_val = ma.iloc[-1] if not ma.empty else 0.0
     gr_pct = (gr * 100.0) if gr is not None else 0.0
 
@@ -3027,42 +2563,16 @@ def historical_receita_por_colaborador(months=12):
     """
     Histórico mensal da Receita por Colaborador (Faturamento / Nº Colaboradores).
     """
-    df_eshows = carregar_base_eshows()
+    df_fat_monthly = cubo_mensal()['Faturamento']
     df_p = carregar_pessoas()
-    if df_eshows is None or df_eshows.empty or df_p is None or df_p.empty:
+    if df_fat_monthly.empty or df_p is None or df_p.empty:
         return {"raw_data": OrderedDict()}
 
-    # Prepara Faturamento
-    df_eshows['Data do Show'] = pd.to_datetime(df_eshows['Data do Show'], errors='coerce')
-    df_eshows = df_eshows.dropna(subset=['Data do Show'])
-    sanitize_faturamento_cols(df_eshows)
-    df_eshows['Faturamento'] = df_eshows[COLUNAS_FATURAMENTO].sum(axis=1)
-    df_fat_monthly = df_eshows.groupby(pd.Grouper(key='Data do Show', freq='M'))['Faturamento'].sum()
-
-    # Prepara Colaboradores
-    df_p["DataInicio"] = pd.to_datetime(df_p.get("DataInicio"), errors="coerce")
-    df_p["DataFinal"]  = pd.to_datetime(df_p.get("DataFinal"),  errors="coerce")
-    df_p = df_p.dropna(subset=["DataInicio"])
-
-    # Calcula RPC mensal
-    series_vals = OrderedDict()
+    # RPC mensal: faturamento do mês ÷ colaboradores ativos no fim do mês
     dates = pd.date_range(end=df_fat_monthly.index.max(), periods=months, freq='M')
-
-    for month_end in dates:
-        # Faturamento do mês
-        fat_mes = df_fat_monthly.get(month_end, 0.0)
-
-        # Colaboradores ativos no fim do mês
-        ativos = (
-            (df_p["DataInicio"] <= month_end) &
-            (df_p["DataFinal"].isna() | (df_p["DataFinal"] > month_end))
-        )
-        n_colab = int(ativos.sum())
-
-        rpc_mes = (fat_mes / n_colab) if n_colab > 0 else 0.0
-        series_vals[month_end.replace(day=1)] = rpc_mes
-
-    serie = pd.Series(series_vals).sort_index()
+    fat_mes = df_fat_monthly.reindex(dates, fill_value=0.0).to_numpy()
+    serie = pd.Series(receita_por_colaborador(fat_mes, dates, df_p),
+                      index=dates.to_period("M").to_timestamp())
     if serie.empty: return {"raw_data": OrderedDict()}
 
     ma = moving_average(serie, 3) if len(serie) >= 3 else pd.Series([0]*len(serie), index=serie.index)
@@ -3070,10 +2580,7 @@ def historical_receita_por_colaborador(months=12):
     std = std_deviation(serie) if len(serie) >= 1 else 0.0
     last_q, last_s = get_recent_metrics(serie, fmt="monetario")
 
-    raw_data = OrderedDict(
-        (d.strftime("%Y-%m-%d"), formatar_valor_utils(v, "monetario"))
-        for d, v in serie.items()
-    )
+    raw_data = _serie_numerica(serie, "monetario")
     ma_last_val = ma.iloc[-1] if not ma.empty else 0
     gr_pct = (gr * 100.0) if gr is not None else 0.0
 
@@ -3093,8 +2600,8 @@ def historical_custo_medio_colaborador(months=12):
     Histórico mensal do Custo Médio por Colaborador (Custo Equipe / Nº Colaboradores).
     Inclui apenas os últimos 'months' meses com dados válidos de CUSTO e COLABORADORES.
     """
-    df_base2 = carregar_base2()
-    df_p = carregar_pessoas()
+    df_base2 = _local(carregar_base2())
+    df_p = _local(carregar_pessoas())
     if df_base2 is None or df_p is None or df_base2.empty or df_p.empty:
         return {"raw_data": OrderedDict()}
 
@@ -3165,10 +2672,8 @@ def historical_custo_medio_colaborador(months=12):
     std = std_deviation(serie_numeric) if len(serie_numeric) >= 1 else 0.0
     last_q, last_s = get_recent_metrics(serie_numeric, fmt="monetario")
 
-    # 8. Raw data formatado (somente dos meses selecionados)
-    raw_data = OrderedDict()
-    for d, v in serie.items():
-        raw_data[d.replace(day=1).strftime("%Y-%m-%d")] = formatar_valor_utils(v, "monetario")
+    # 8. Raw data numérico (somente dos meses selecionados)
+    raw_data = _serie_numerica(serie, "monetario")
 
     ma_last_val = ma.iloc[-1] if not ma.empty else 0.0 # Usa 0.0 se não puder calcular MA
     gr_pct = (gr * 100.0) if gr is not None else 0.0
@@ -3191,15 +2696,10 @@ def historical_artistas_ativos(months=12):
     """
     Histórico mensal do número de artistas ativos (únicos 'Nome do Artista').
     """
-    df_eshows = carregar_base_eshows()
-    if df_eshows is None or df_eshows.empty or 'Nome do Artista' not in df_eshows.columns:
+    df_monthly = cubo_mensal()['Artistas']
+    if df_monthly.empty:
         return {"raw_data": OrderedDict()}
 
-    df_eshows['Data do Show'] = pd.to_datetime(df_eshows['Data do Show'], errors='coerce')
-    df_eshows = df_eshows.dropna(subset=['Data do Show'])
-
-    df_monthly = df_eshows.groupby(pd.Grouper(key='Data do Show', freq='M'))['Nome do Artista'].nunique()
-
     # Filtra para os últimos meses
     series = df_monthly.tail(months)
     if series.empty: return {"raw_data": OrderedDict()}
@@ -3214,10 +2714,7 @@ def historical_artistas_ativos(months=12):
     std = std_deviation(series) if len(series) >= 1 else 0.0
     last_q, last_s = get_recent_metrics(series, fmt="numero")
 
-    raw_data = OrderedDict(
-        (d.strftime("%Y-%m-%d"), formatar_valor_utils(v, "numero"))
-        for d, v in series.items()
-    )
+    raw_data = _serie_numerica(series, "numero")
     ma_last_val = ma.iloc[-1] if not ma.empty else 0
     gr_pct = (gr * 100.0) if gr is not None else 0.0
 
@@ -3238,37 +2735,12 @@ def historical_take_rate(months=12):
     Calcula mensalmente: (Soma Comissão B2B / Soma GMV) * 100.
     Valores formatados em 'percentual'.
     """
-    df = carregar_base_eshows()
-    if df is None or df.empty:
-        return {"raw_data": OrderedDict()}
-
-    # Garantir colunas necessárias e tipos
-    if "Data do Show" not in df.columns:
-        logger.debug("[hist.historical_take_rate] Coluna 'Data do Show' não encontrada.")
-        return {"raw_data": OrderedDict()}
-    df['Data do Show'] = pd.to_datetime(df['Data do Show'], errors='coerce')
-    df = df.dropna(subset=['Data do Show'])
-
-    if "Comissão B2B" not in df.columns:
-        df["Comissão B2B"] = 0.0
-    else:
-        df["Comissão B2B"] = pd.to_numeric(df["Comissão B2B"], errors='coerce').fillna(0.0)
-
-    # Garante coluna Valor Total do Show (GMV)
-    if "Valor Total do Show" not in df.columns:
-        for alt in ["ValorTotaldoShow", "Valor_Total", "Valor_Total_do_Show"]:
-            if alt in df.columns:
-                df.rename(columns={alt: "Valor Total do Show"}, inplace=True)
-                break
-        if "Valor Total do Show" not in df.columns:
-            df["Valor Total do Show"] = 0.0
-    df["Valor Total do Show"] = pd.to_numeric(df["Valor Total do Show"], errors='coerce').fillna(0.0)
-
-    # Agrupa por mês, somando Comissão e GMV
-    df_monthly = df.groupby(pd.Grouper(key='Data do Show', freq='M')).agg(
-        ComissaoB2B_Sum=("Comissão B2B", "sum"),
-        GMV_Sum=("Valor Total do Show", "sum")
+    # Comissão B2B e GMV mensais (cubo compartilhado)
+    df_monthly = cubo_mensal()[["Comissão B2B", "Valor Total do Show"]].rename(
+        columns={"Comissão B2B": "ComissaoB2B_Sum", "Valor Total do Show": "GMV_Sum"}
     )
+    if df_monthly.empty:
+        return {"raw_data": OrderedDict()}
 
     # Calcula Take Rate Mensal
     df_monthly["TakeRate"] = df_monthly.apply(
@@ -3290,11 +2762,6 @@ def historical_take_rate(months=12):
     last_q, last_s = get_recent_metrics(serie_numeric, fmt="percentual")
 
     # Formata retorno
-    raw_data_numeric = OrderedDict()  # Guarda números primeiro
-    logger.debug(f"\n[hist.historical_take_rate] Gerando raw_data_numeric para {months} meses:")
-    for d, v in serie.items():
-        raw_data_numeric[d.replace(day=1).strftime("%Y-%m-%d")] = v  # Guarda valor numérico percentual
-        logger.debug(f"  Data: {d.replace(day=1).strftime('%Y-%m-%d')}, Valor NUMÉRICO para raw_data: {v}")
 
     ma_last_val = ma.iloc[-1] if not ma.empty else np.nan
     gr_pct = (gr * 100.0) if gr is not None else 0.0
@@ -3310,6 +2777,5 @@ def historical_take_rate(months=12):
         "std_deviation":  formatar_valor_utils(std if pd.notna(std) else None, "percentual"),
         "last_quarter":   last_q,
         "last_semester":  last_s,
-        # CORREÇÃO: Aplica a formatação percentual aos valores numéricos guardados
-        "raw_data":       {k: formatar_valor_utils(v, "percentual") for k, v in raw_data_numeric.items()}
+        "raw_data":       _serie_numerica(serie, "percentual")
     }
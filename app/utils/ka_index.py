@@ -0,0 +1,159 @@
+"""
+ka_index.py — índice das contas-chave (KA) por ano de referência
+-----------------------------------------------------------------
+KA = top-5 grupos por faturamento no ano anterior ao de referência. Os
+cards de KA do painel (faturamento, novos palcos, take rate, churn) e os
+históricos *_ka refaziam a cada chamada esse ranking e varriam a BaseEshows
+atrás das linhas dos grupos. O índice, montado uma vez por (ano, versão da
+BaseEshows), guarda:
+
+    • "top": o ranking, no formato de obter_top5_grupos_ano_anterior
+    • "casas": Id da Casa de cada grupo do top
+    • as linhas KA ordenadas pela data de filtro ("datas"), a casa de cada
+      linha e as somas acumuladas de faturamento ("fat") e GMV ("gmv")
+    • "ultimo": último show KA de cada casa, ordenado (churn técnico)
+
+Faturamento, GMV e churn de qualquer lista de períodos [inicio, fim] viram
+dois searchsorted + diferença de somas acumuladas: um mês do histórico ou
+o período do card custam o mesmo, sem voltar à base.
+"""
+from __future__ import annotations
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+from app.data import registry
+from app.data.data_manager import CACHE_RAM
+from app.data.modulobase import carregar_base_eshows
+from app.utils.fact_cube import COLUNAS_FATURAMENTO, GMV
+
+logger = logging.getLogger(__name__)
+
+TOP_N = 5
+# mesma ordem do filtrar_periodo_principal
+_COLUNAS_DATA = ("Data", "Data do Show", "Data de Pagamento")
+_NAT = np.iinfo(np.int64).min
+
+
+def _ns(datas) -> np.ndarray:
+    """Datas (escalar, lista, índice ou série) → int64 ns; NaT = _NAT."""
+    return pd.to_datetime(np.atleast_1d(datas), errors="coerce").to_numpy("datetime64[ns]").view("i8")
+
+
+def _ranking(df: pd.DataFrame | None, ano: int) -> list:
+    # regra de obter_top5_grupos_ano_anterior, sem copiar a base
+    if df is None or df.empty or "Grupo" not in df.columns or "Ano" not in df.columns:
+        return []
+    prev = (pd.to_numeric(df["Ano"], errors="coerce") == ano - 1).to_numpy()
+    cols = [c for c in COLUNAS_FATURAMENTO if c in df.columns]
+    if not prev.any() or not cols:
+        return []
+    fat = df.loc[prev, cols].apply(pd.to_numeric, errors="coerce").fillna(0).sum(axis=1)
+    gp = (pd.DataFrame({"Grupo": df.loc[prev, "Grupo"], "FatGrupo": fat})
+          .groupby("Grupo")["FatGrupo"].sum().reset_index()
+          .sort_values("FatGrupo", ascending=False).head(TOP_N))
+    return [(g, f) for g, f in zip(gp["Grupo"], gp["FatGrupo"]) if pd.notna(g) and f > 0]
+
+
+def _build(df: pd.DataFrame | None, ano: int) -> dict:
+    top = _ranking(df, ano)
+    r = {"top": top, "casas": {}, "datas": np.array([], np.int64),
+         "casa": np.array([], object), "fat": np.zeros(1), "gmv": np.zeros(1),
+         "ultimo": np.array([], np.int64)}
+    col = next((c for c in _COLUNAS_DATA if c in df.columns), None) if top else None
+    if col is None:
+        return r
+
+    df = df.loc[df["Grupo"].isin([g for g, _ in top]).to_numpy()]
+    tem_casa = "Id da Casa" in df.columns
+    casas = df["Id da Casa"] if tem_casa else pd.Series(np.nan, index=df.index)
+    r["casas"] = {g: pd.Index(casas[(df["Grupo"] == g).to_numpy()].dropna().unique(), name="Id da Casa")
+                  for g, _ in top}
+
+    # linhas KA por data de filtro (NaT nunca entra num período)
+    datas = pd.to_datetime(df[col], errors="coerce").to_numpy("datetime64[ns]").view("i8")
+    validas = datas != _NAT
+    ordem = np.argsort(datas[validas], kind="stable")
+    cols = [c for c in COLUNAS_FATURAMENTO if c in df.columns]
+    fat = (df[cols].apply(pd.to_numeric, errors="coerce").fillna(0).sum(axis=1).to_numpy(np.float64)
+           if cols else np.zeros(len(df)))
+    gmv = (pd.to_numeric(df[GMV], errors="coerce").fillna(0).to_numpy(np.float64)
+           if GMV in df.columns else np.zeros(len(df)))
+    r["datas"] = datas[validas][ordem]
+    r["casa"] = casas.to_numpy()[validas][ordem]
+    r["fat"] = np.concatenate([[0.0], np.cumsum(fat[validas][ordem])])
+    r["gmv"] = np.concatenate([[0.0], np.cumsum(gmv[validas][ordem])])
+
+    # último show KA de cada casa – o LastShow de casas_churn sobre as linhas KA
+    if tem_casa and "Data do Show" in df.columns:
+        show = pd.to_datetime(df["Data do Show"], errors="coerce")
+        ultimo = show.groupby(casas).max().dropna()
+        r["ultimo"] = np.sort(ultimo.to_numpy("datetime64[ns]").view("i8"))
+
+    logger.debug("[ka_index] %s: grupos %s, %s linhas KA, %s casas",
+                 ano, [g for g, _ in top], len(r["datas"]), len(r["ultimo"]))
+    return r
+
+
+def indice_ka(ano: int, df_eshows: pd.DataFrame | None = None) -> dict:
+    """
+    Índice KA do ano de referência *ano* (ver docstring do módulo). Sem
+    *df_eshows* – ou com a própria BaseEshows do registry – usa o índice
+    compartilhado da versão atual; outro frame gera um índice só para ele.
+    """
+    if not CACHE_RAM:
+        return _build(carregar_base_eshows() if df_eshows is None else df_eshows, ano)
+    if df_eshows is not None and df_eshows is not carregar_base_eshows():
+        return _build(df_eshows, ano)
+    return registry.get(f"indice_ka_{ano}", lambda: _build(carregar_base_eshows(), ano),
+                        tables=("baseeshows",))
+
+
+def top_grupos(ano: int, df_eshows: pd.DataFrame | None = None) -> list:
+    """[(grupo, faturamento no ano anterior)] dos KA; para um frame avulso só o ranking."""
+    if df_eshows is not None and (not CACHE_RAM or df_eshows is not carregar_base_eshows()):
+        return _ranking(df_eshows, ano)
+    return list(indice_ka(ano)["top"])
+
+
+def _fatias(r: dict, inicios, fins) -> tuple[np.ndarray, np.ndarray]:
+    # posições [lo, hi) das linhas KA com data em [inicio, fim], como recortar_periodo
+    a, b = _ns(inicios), _ns(fins)
+    lo = np.searchsorted(r["datas"], a, side="left")
+    hi = np.maximum(lo, np.searchsorted(r["datas"], b, side="right"))
+    vazio = (a == _NAT) | (b == _NAT)
+    return np.where(vazio, 0, lo), np.where(vazio, 0, hi)
+
+
+def faturamento_ka(ano: int, inicios, fins, df_eshows=None) -> np.ndarray:
+    """Faturamento das linhas KA em cada período [inicio, fim]."""
+    r = indice_ka(ano, df_eshows)
+    lo, hi = _fatias(r, inicios, fins)
+    return r["fat"][hi] - r["fat"][lo]
+
+
+def gmv_ka(ano: int, inicios, fins, df_eshows=None) -> np.ndarray:
+    """GMV (Valor Total do Show) das linhas KA em cada período [inicio, fim]."""
+    r = indice_ka(ano, df_eshows)
+    lo, hi = _fatias(r, inicios, fins)
+    return r["gmv"][hi] - r["gmv"][lo]
+
+
+def novos_palcos_ka(ano: int, inicio, fim, casas_novas, df_eshows=None) -> int:
+    """Quantas de *casas_novas* têm show KA em [inicio, fim] (novos_palcos_dos_grupos)."""
+    r = indice_ka(ano, df_eshows)
+    lo, hi = _fatias(r, [inicio], [fim])
+    casas = pd.unique(r["casa"][lo[0]:hi[0]])
+    return int(pd.Index(casas).dropna().isin(pd.unique(np.asarray(casas_novas))).sum())
+
+
+def churn_ka(ano: int, inicios, fins, dias_sem_show: int = 45, df_eshows=None) -> np.ndarray:
+    """Casas KA cujo churn técnico (último show KA + dias_sem_show) cai em cada [inicio, fim]."""
+    r = indice_ka(ano, df_eshows)
+    gap = int(dias_sem_show) * 86_400 * 10 ** 9
+    a, b = _ns(inicios), _ns(fins)
+    n = (np.searchsorted(r["ultimo"], b - gap, side="right")
+         - np.searchsorted(r["ultimo"], a - gap, side="left"))
+    return np.where((a == _NAT) | (b == _NAT), 0, np.maximum(n, 0))
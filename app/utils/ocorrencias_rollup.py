@@ -0,0 +1,156 @@
+"""
+ocorrencias_rollup.py — rollup diário das ocorrências por TIPO
+---------------------------------------------------------------
+Índice único, por versão da base de ocorrências, com o que o card de
+Palcos Vazios, o Nível de Serviço e os históricos de Ocorrências / Palcos
+Vazios refaziam a cada chamada (rename + cópia, filtro do período, filtro
+de TIPO e nunique de ID_OCORRENCIA):
+
+    • "instantes": datas distintas da base (um por dia quando DATA é data)
+    • por TIPO: ids distintos de cada dia, ordenados por dia ("ids") com o
+      offset de cada dia ("ptr"), e o nº de linhas acumulado ("linhas")
+
+Um período vira dois searchsorted nos instantes. Quando cada ocorrência
+cai num único (TIPO, dia) – o normal – a contagem de distintos é a soma
+dos ptr no intervalo; senão os ids do intervalo passam por um np.unique.
+Sem a coluna ID_OCORRENCIA a contagem é de linhas, como nos cálculos
+antigos.
+"""
+from __future__ import annotations
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+from app.data import registry
+from app.data.data_manager import CACHE_RAM
+from app.data.modulobase import carregar_ocorrencias
+
+logger = logging.getLogger(__name__)
+
+# mesma ordem do filtrar_periodo_principal (DATA é renomeada para Data)
+_COLUNAS_DATA = ("DATA", "Data", "Data do Show", "Data de Pagamento")
+_NAT = np.iinfo(np.int64).min
+
+
+def _build(df: pd.DataFrame | None) -> dict:
+    r = {"instantes": np.array([], np.int64), "tipos": None, "tem_id": False,
+         "ids": [], "ptr": [], "linhas": [], "aditivo": True}
+    if df is None or df.empty:
+        return r
+    df = df.loc[:, ~df.columns.duplicated()]
+    col = next((c for c in _COLUNAS_DATA if c in df.columns), None)
+    if col is None:
+        return r
+
+    datas = pd.to_datetime(df[col], errors="coerce").to_numpy("datetime64[ns]").view("i8")
+    validas = datas != _NAT
+    datas = datas[validas]
+    if "TIPO" in df.columns:
+        tipo, nomes = pd.factorize(df["TIPO"].to_numpy()[validas], use_na_sentinel=False)
+        r["tipos"] = {v: i for i, v in enumerate(nomes)}
+    else:
+        tipo, nomes = np.zeros(len(datas), np.intp), [None]
+    r["tem_id"] = "ID_OCORRENCIA" in df.columns
+    ids = (pd.factorize(df["ID_OCORRENCIA"].to_numpy()[validas])[0] if r["tem_id"]
+           else np.full(len(datas), -1, np.intp))
+
+    instantes, dia = np.unique(datas, return_inverse=True)
+    r["instantes"] = instantes
+    limites = np.arange(len(instantes) + 1)
+    for t in range(len(nomes)):
+        m = tipo == t
+        dia_t, id_t = dia[m], ids[m]
+        r["linhas"].append(np.searchsorted(np.sort(dia_t), limites))
+        par = np.unique(np.stack([dia_t[id_t >= 0], id_t[id_t >= 0]], axis=1), axis=0)
+        r["ids"].append(par[:, 1])
+        r["ptr"].append(np.searchsorted(par[:, 0], limites))
+    if r["tem_id"]:
+        # cada id num único (TIPO, dia): contagem = soma dos intervalos
+        r["aditivo"] = sum(len(i) for i in r["ids"]) == len(np.unique(ids[ids >= 0]))
+
+    logger.debug("[ocorrencias_rollup] %s linhas, %s dias, %s tipos",
+                 len(datas), len(instantes), len(nomes))
+    return r
+
+
+def rollup_ocorrencias(df_ocorrencias: pd.DataFrame | None = None) -> dict:
+    """
+    Rollup diário (ver docstring do módulo). Sem *df_ocorrencias* – ou com a
+    própria base do registry – usa o rollup compartilhado da versão atual;
+    outro frame gera um rollup só para ele.
+    """
+    if not CACHE_RAM:
+        return _build(carregar_ocorrencias() if df_ocorrencias is None else df_ocorrencias)
+    if df_ocorrencias is not None and df_ocorrencias is not carregar_ocorrencias():
+        return _build(df_ocorrencias)
+    return registry.get("ocorrencias_rollup", lambda: _build(carregar_ocorrencias()),
+                        tables=("ocorrencias",))
+
+
+def _codigos(r: dict, tipo, exceto) -> list:
+    """Códigos de TIPO selecionados (sem coluna TIPO, filtro por tipo = nada)."""
+    if r["tipos"] is None:
+        return [] if tipo is not None else list(range(len(r["ptr"])))
+    if tipo is not None:
+        return [r["tipos"][tipo]] if tipo in r["tipos"] else []
+    return [c for v, c in r["tipos"].items() if exceto is None or v != exceto]
+
+
+def _contar_dias(r: dict, codigos: list, a: int, b: int) -> int:
+    # distintos nos dias [a, b) dos tipos em *codigos*
+    if not r["tem_id"]:
+        return int(sum(r["linhas"][c][b] - r["linhas"][c][a] for c in codigos))
+    if r["aditivo"]:
+        return int(sum(r["ptr"][c][b] - r["ptr"][c][a] for c in codigos))
+    fatias = [r["ids"][c][r["ptr"][c][a]:r["ptr"][c][b]] for c in codigos]
+    return int(np.unique(np.concatenate(fatias)).size) if fatias else 0
+
+
+def _dias(r: dict, inicio, fim) -> tuple[int, int]:
+    # [inicio, fim] inclusivo, como recortar_periodo
+    if pd.isna(inicio) or pd.isna(fim):
+        return 0, 0
+    a = np.searchsorted(r["instantes"], pd.Timestamp(inicio).value, side="left")
+    b = np.searchsorted(r["instantes"], pd.Timestamp(fim).value, side="right")
+    return int(a), int(max(a, b))
+
+
+def contar_ocorrencias(inicio, fim, tipo=None, exceto=None, df_ocorrencias=None) -> int:
+    """
+    Ocorrências distintas (ID_OCORRENCIA) com data em [inicio, fim]: só do
+    *tipo* dado, ou de todos os TIPO menos *exceto*.
+    """
+    r = rollup_ocorrencias(df_ocorrencias)
+    return _contar_dias(r, _codigos(r, tipo, exceto), *_dias(r, inicio, fim))
+
+
+def extremos_ocorrencias(inicio, fim, df_ocorrencias=None):
+    """(primeira, última) data com ocorrência em [inicio, fim]; None se não houver."""
+    r = rollup_ocorrencias(df_ocorrencias)
+    a, b = _dias(r, inicio, fim)
+    if a >= b:
+        return None
+    return pd.Timestamp(r["instantes"][a]), pd.Timestamp(r["instantes"][b - 1])
+
+
+def serie_mensal_ocorrencias(tipo=None, exceto=None, df_ocorrencias=None) -> pd.Series:
+    """
+    Distintos por mês, do primeiro ao último mês com ocorrência do filtro,
+    índice = fim do mês – o mesmo de groupby(pd.Grouper(freq="M")).
+    """
+    r = rollup_ocorrencias(df_ocorrencias)
+    codigos = _codigos(r, tipo, exceto)
+    por_dia = sum((np.diff(r["linhas"][c]) for c in codigos), np.zeros(len(r["instantes"]), np.int64))
+    com_linha = np.flatnonzero(por_dia)
+    if not len(com_linha):
+        return pd.Series([], index=pd.DatetimeIndex([], name="Data"), dtype="int64")
+
+    meses = pd.period_range(pd.Timestamp(r["instantes"][com_linha[0]]),
+                            pd.Timestamp(r["instantes"][com_linha[-1]]), freq="M")
+    bordas = np.append(meses.start_time.asi8, (meses[-1] + 1).start_time.value)
+    pos = np.searchsorted(r["instantes"], bordas, side="left")
+    valores = [_contar_dias(r, codigos, pos[i], pos[i + 1]) for i in range(len(meses))]
+    indice = pd.DatetimeIndex(meses.to_timestamp(how="end").normalize(), name="Data")
+    return pd.Series(valores, index=indice, dtype="int64")
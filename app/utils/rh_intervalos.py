@@ -0,0 +1,124 @@
+"""
+rh_intervalos.py — intervalos de permanência dos colaboradores
+---------------------------------------------------------------
+Índice, por versão da base Pessoas, com início e saída de cada colaborador
+em int64 (ns). Atende as métricas de RH do painel (metricas_rh_quick,
+get_rpc_variables) e os históricos de colaboradores, tempo de casa e
+receita por colaborador, que antes varriam a base data a data:
+
+    • headcount(datas)              – ativos em cada data (início <= d < saída)
+    • ativos_no_intervalo(ini, fim) – ativos em algum momento de [ini, fim]
+    • tempo_medio(datas)            – tempo médio de casa (dias) em cada data
+    • receita_por_colaborador(receitas, datas)
+
+Cada função recebe um vetor de datas e responde numa chamada: contagens
+por searchsorted nos vetores ordenados; tempo de casa por broadcasting
+(datas × colaboradores). Sem DataInicio o colaborador é ignorado; saída
+nula = ainda ativo. Registros com saída antes do início ficam à parte e
+são contados um a um, com as mesmas comparações das máscaras antigas.
+"""
+from __future__ import annotations
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+from app.data import registry
+from app.data.data_manager import CACHE_RAM
+from app.data.modulobase import carregar_pessoas
+
+logger = logging.getLogger(__name__)
+
+_NAT = np.iinfo(np.int64).min
+_DIA = 86_400 * 10 ** 9
+
+
+def _ns(datas) -> np.ndarray:
+    """Datas (escalar, lista, índice ou série) → int64 ns; NaT = _NAT."""
+    return pd.to_datetime(np.atleast_1d(datas), errors="coerce").to_numpy("datetime64[ns]").view("i8")
+
+
+def _coluna_ns(df: pd.DataFrame, col: str) -> np.ndarray:
+    if col not in df.columns:
+        return np.full(len(df), _NAT, np.int64)
+    return pd.to_datetime(df[col], errors="coerce").to_numpy("datetime64[ns]").view("i8")
+
+
+def _build(df: pd.DataFrame | None, saida: str) -> dict:
+    if df is None or df.empty:
+        ini = fim = np.array([], np.int64)
+    else:
+        df = df.loc[:, ~df.columns.duplicated()]
+        ini, fim = _coluna_ns(df, "DataInicio"), _coluna_ns(df, saida)
+        validos = ini != _NAT
+        ini, fim = ini[validos], fim[validos]
+    com_saida = fim != _NAT
+    coerente = com_saida & (fim >= ini)
+    invertido = com_saida & ~coerente
+    logger.debug("[rh_intervalos] %s colaboradores (%s com saída, %s invertidos)",
+                 len(ini), int(com_saida.sum()), int(invertido.sum()))
+    return {
+        "inicio": ini, "saida": fim,
+        "inicio_ord": np.sort(ini), "saida_ord": np.sort(fim[coerente]),
+        "inv_inicio": ini[invertido], "inv_saida": fim[invertido],
+    }
+
+
+def indice_rh(df_pessoas: pd.DataFrame | None = None, saida: str = "DataFinal") -> dict:
+    """
+    Índice de intervalos (ver docstring do módulo); *saida* é a coluna de
+    desligamento (DataFinal ou o alias DataSaida). Sem *df_pessoas* – ou com
+    a própria base do registry – usa o índice compartilhado da versão atual.
+    """
+    if not CACHE_RAM:
+        return _build(carregar_pessoas() if df_pessoas is None else df_pessoas, saida)
+    if df_pessoas is not None and df_pessoas is not carregar_pessoas():
+        return _build(df_pessoas, saida)
+    return registry.get(f"rh_intervalos_{saida}", lambda: _build(carregar_pessoas(), saida),
+                        tables=("pessoas",))
+
+
+def _ativos(idx: dict, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    # início <= b e (sem saída ou saída >= a), com a <= b + 1ns. Para saída
+    # coerente, "saída < a" já implica "início <= b": basta subtrair.
+    n = (np.searchsorted(idx["inicio_ord"], b, side="right")
+         - np.searchsorted(idx["saida_ord"], a, side="left"))
+    if len(idx["inv_inicio"]):
+        n = n - ((idx["inv_saida"][None, :] < a[:, None])
+                 & (idx["inv_inicio"][None, :] <= b[:, None])).sum(axis=1)
+    return np.where((a == _NAT) | (b == _NAT), 0, n).astype(np.int64)
+
+
+def headcount(datas, df_pessoas=None, saida: str = "DataFinal") -> np.ndarray:
+    """Ativos em cada data: DataInicio <= d e (saída nula ou saída > d)."""
+    d = _ns(datas)
+    return _ativos(indice_rh(df_pessoas, saida), np.where(d == _NAT, _NAT, d + 1), d)
+
+
+def ativos_no_intervalo(inicios, fins, df_pessoas=None, saida: str = "DataFinal") -> np.ndarray:
+    """Ativos em algum momento de [inicio, fim]: DataInicio <= fim e (saída nula ou >= inicio)."""
+    return _ativos(indice_rh(df_pessoas, saida), _ns(inicios), _ns(fins))
+
+
+def tempo_medio(datas, df_pessoas=None, saida: str = "DataFinal") -> np.ndarray:
+    """
+    Tempo médio de casa, em dias inteiros, em cada data: até a data (ou até a
+    saída, se anterior) de quem já tinha começado. NaN onde não há ninguém.
+    """
+    idx = indice_rh(df_pessoas, saida)
+    d = _ns(datas)[:, None]
+    ini, fim = idx["inicio"][None, :], idx["saida"][None, :]
+    delta = np.where(fim == _NAT, d, np.minimum(fim, d)) - ini
+    validos = (delta >= 0) & (d != _NAT)
+    soma = np.where(validos, delta // _DIA, 0).sum(axis=1)
+    n = validos.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(n > 0, soma / n, np.nan)
+
+
+def receita_por_colaborador(receitas, datas, df_pessoas=None, saida: str = "DataFinal") -> np.ndarray:
+    """Receita de cada data ÷ headcount nela (0 sem colaboradores)."""
+    hc = headcount(datas, df_pessoas, saida)
+    receitas = np.asarray(receitas, dtype=np.float64)
+    return np.where(hc > 0, receitas / np.maximum(hc, 1), 0.0)
@@ -9,8 +9,10 @@ import math
 import unicodedata
 import ast
 import textwrap
-from datetime import datetime, timedelta
-import gc
+import threading
+import weakref
+from collections import OrderedDict
+from datetime import datetime
 
 import pandas as pd
 import numpy as np
@@ -20,14 +22,10 @@ from dateutil.relativedelta import relativedelta
 # IMPORTAÇÃO DE FUNÇÕES DE CARREGAMENTO (modulobase) E FORMATAÇÃO (utils)
 # =================================================================================
 from app.data.modulobase import (
-    carregar_base_eshows,
     carregar_eshows_excluidos,  # p/ exportar as linhas excluídas
-    carregar_base2,
-    carregar_ocorrencias,
-    carregar_base_inad,
-    carregar_pessoas,
-    carregar_npsartistas
 )
+from app.utils.casa_lifecycle import casas_churn
+from app.utils.ka_index import top_grupos
 
 logger = logging.getLogger(__name__)
 
@@ -35,17 +33,8 @@ logger = logging.getLogger(__name__)
 # CARREGAMENTO DAS BASES GERAIS (removido uso de variáveis globais duplicadas)
 # =================================================================================
 # Utilize carregar_base_eshows(), carregar_base2(), carregar_ocorrencias() etc. sempre que precisar dos dados.
-
-# Load global DataFrames for util functions
-try:
-    df_eshows = carregar_base_eshows()
-    df_base2 = carregar_base2()
-    df_ocorrencias = carregar_ocorrencias()
-    df_inad = carregar_base_inad()
-    df_pessoas = carregar_pessoas()
-    df_npsartistas = carregar_npsartistas()
-except Exception:
-    df_eshows = df_base2 = df_ocorrencias = df_inad = df_pessoas = df_npsartistas = None
+# Os frames ficam no registry (app.data.registry); não guarde cópias em globais.
+# Nada é carregado no import – ver app.core.warmup.
 
 def ensure_grupo_col(df):
     """
@@ -333,6 +322,70 @@ def get_period_range(ano, periodo, mes, custom_range):
 # FILTRAR PERÍODO PRINCIPAL
 # =================================================================================
 
+# Índice de período por (frame, coluna de data): datas em int64 ordenadas e,
+# se o frame não estiver ordenado, a permutação que as ordena. As bases do
+# registry são imutáveis e a BaseEshows já vem ordenada por data, então o
+# recorte de um período vira dois searchsorted + um slice sem cópia.
+_INDICES_PERIODO: "OrderedDict[tuple, tuple]" = OrderedDict()
+_INDICES_MAX = 32
+_indices_lock = threading.Lock()
+
+
+def _ponteiro(arr) -> int:
+    return arr.__array_interface__["data"][0] if isinstance(arr, np.ndarray) else id(arr)
+
+
+def _indice_periodo(df, col):
+    """(datas ns ordenadas, ordem | None, coluna convertida?) de df[col], com cache."""
+    bruto = df[col].to_numpy()
+    chave = (id(df), col)
+    with _indices_lock:
+        entrada = _INDICES_PERIODO.get(chave)
+        if entrada is not None:
+            ref, ptr, n, indice = entrada
+            if ref() is df and ptr == _ponteiro(bruto) and n == len(df):
+                _INDICES_PERIODO.move_to_end(chave)
+                return indice
+
+    convertida = not pd.api.types.is_datetime64_dtype(df[col])
+    datas = pd.to_datetime(df[col], errors="coerce") if convertida else df[col]
+    # NaT vira o menor int64: fica no começo e nunca entra num intervalo válido
+    datas = datas.to_numpy("datetime64[ns]").view("i8")
+    if len(datas) < 2 or bool((datas[1:] >= datas[:-1]).all()):
+        indice = (datas, None, convertida)
+    else:
+        ordem = np.argsort(datas, kind="stable")
+        indice = (datas[ordem], ordem, convertida)
+
+    with _indices_lock:
+        _INDICES_PERIODO[chave] = (weakref.ref(df), _ponteiro(bruto), len(df), indice)
+        _INDICES_PERIODO.move_to_end(chave)
+        while len(_INDICES_PERIODO) > _INDICES_MAX:
+            _INDICES_PERIODO.popitem(last=False)
+    return indice
+
+
+def recortar_periodo(df, col, start_d, end_d):
+    """
+    Linhas de *df* com *col* em [start_d, end_d], na ordem original. Em frame
+    ordenado devolve um slice sem copiar dados; com o copy-on-write ligado
+    pelo registry, alterar o recorte (inclusive .loc parcial) copia só o que
+    for escrito e nunca toca o frame de origem.
+    """
+    if pd.isna(start_d) or pd.isna(end_d):
+        return df.iloc[0:0].copy()
+    datas, ordem, convertida = _indice_periodo(df, col)
+    lo = np.searchsorted(datas, pd.Timestamp(start_d).value, side="left")
+    hi = np.searchsorted(datas, pd.Timestamp(end_d).value, side="right")
+    if ordem is None:
+        df_filtrado = df.iloc[lo:hi].copy(deep=False)
+    else:
+        df_filtrado = df.take(np.sort(ordem[lo:hi]))
+    if convertida:
+        df_filtrado[col] = pd.to_datetime(df_filtrado[col], errors="coerce")
+    return df_filtrado
+
+
 def filtrar_periodo_principal(df, ano, periodo, mes, custom_range):
     """
     Filtra um DataFrame pelo intervalo determinado em (ano, periodo, mes, custom_range).
@@ -371,16 +424,13 @@ def filtrar_periodo_principal(df, ano, periodo, mes, custom_range):
         end_d,
     )
 
-    df_ = df.copy()
-    linhas_antes = len(df_)
+    linhas_antes = len(df)
 
     # ──────── AJUSTE: múltiplas colunas possíveis de data ────────
     DATE_COLS = ["Data", "Data do Show", "Data de Pagamento"]
     for col in DATE_COLS:
-        if col in df_.columns:
-            df_[col] = pd.to_datetime(df_[col], errors="coerce")
-            mask = (df_[col] >= start_d) & (df_[col] <= end_d)
-            df_filtrado = df_[mask].copy()
+        if col in df.columns:
+            df_filtrado = recortar_periodo(df, col, start_d, end_d)
             logger.debug(
                 "[filtrar_periodo_principal] (via '%s') Linhas antes: %s, depois: %s",
                 col,
@@ -391,7 +441,8 @@ def filtrar_periodo_principal(df, ano, periodo, mes, custom_range):
     # ──────────────────────────────────────────────────────────────
 
     # caminho com Ano / Mês
-    if "Ano" in df_.columns and "Mês" in df_.columns:
+    if "Ano" in df.columns and "Mês" in df.columns:
+        df_ = df.copy()
         df_["Ano"] = pd.to_numeric(df_["Ano"], errors="coerce")
         df_["Mês"] = pd.to_numeric(df_["Mês"], errors="coerce")
         start_ano, start_mes = start_d.year, start_d.month
@@ -459,54 +510,57 @@ def calcular_periodo_anterior(ano: int, periodo: str, mes):
         return ("YTD", ano, mes_atual - 1)
 
 
-def filtrar_periodo_comparacao(df, ano, periodo, mes, comparar_opcao, datas_comparacao=None):
+def argumentos_periodo_comparacao(ano, periodo, mes, comparar_opcao, datas_comparacao=None):
     """
-    Filtra o DataFrame para o período de comparação.
-    `datas_comparacao` é um tuple (start_date, end_date) para `comparar_opcao == 'custom-compare'`.
-    `periodo` e `mes` aqui referem-se ao período *principal* para calcular o comparativo corretamente.
+    (ano, periodo, mes, custom_range) do período de comparação, no formato de
+    filtrar_periodo_principal / get_period_range; None se não houver período
+    (opção desconhecida ou custom-compare sem datas).
+    `periodo` e `mes` aqui referem-se ao período *principal*.
     """
-    if df is None or df.empty:
-        return pd.DataFrame()
-
     start_date_principal_obj = get_period_start(ano, periodo, mes, datas_comparacao if periodo == 'custom-range' else None)
     end_date_principal_obj   = get_period_end(ano, periodo, mes, datas_comparacao if periodo == 'custom-range' else None)
 
-
     if comparar_opcao == "ano_anterior":
-        ano_comp = ano - 1
-        mes_comp = mes
-        periodo_comp = periodo
-        
         # Se o período principal é custom-range, calcula custom_range para o ano anterior
         if periodo == "custom-range" and start_date_principal_obj and end_date_principal_obj:
             start_date_compare = start_date_principal_obj - pd.DateOffset(years=1)
             end_date_compare = end_date_principal_obj - pd.DateOffset(years=1)
-            return filtrar_periodo_principal(df, ano_comp, periodo_comp, mes_comp, (start_date_compare, end_date_compare))
-        else:
-            return filtrar_periodo_principal(df, ano_comp, periodo_comp, mes_comp, None)
+            return ano - 1, periodo, mes, (start_date_compare, end_date_compare)
+        return ano - 1, periodo, mes, None
 
-    elif comparar_opcao == "periodo_anterior":
+    if comparar_opcao == "periodo_anterior":
         periodo_comp, ano_comp, mes_comp = calcular_periodo_anterior(ano, periodo, mes)
-        
+
         # Se o período principal é custom-range, calcula o período anterior com a mesma duração
         if periodo == "custom-range" and start_date_principal_obj and end_date_principal_obj:
             duration = end_date_principal_obj - start_date_principal_obj
             end_date_compare = start_date_principal_obj - pd.Timedelta(days=1)
             start_date_compare = end_date_compare - duration
-            # Usamos o ano e mês do start_date_compare para que get_period_start/end funcione corretamente dentro de filtrar_periodo_principal
-            # ou passamos diretamente o range.
-            return filtrar_periodo_principal(df, start_date_compare.year, 'custom-range', start_date_compare.month, (start_date_compare, end_date_compare))
-        else:
-            return filtrar_periodo_principal(df, ano_comp, periodo_comp, mes_comp, None)
-            
-    elif comparar_opcao == "custom-compare":
+            return start_date_compare.year, 'custom-range', start_date_compare.month, (start_date_compare, end_date_compare)
+        return ano_comp, periodo_comp, mes_comp, None
+
+    if comparar_opcao == "custom-compare":
+        # Para custom-compare, o ano e mes não importam tanto quanto o range explícito
         if datas_comparacao and datas_comparacao[0] and datas_comparacao[1]:
-            # Para custom-compare, o ano e mes não importam tanto quanto o range explícito
-            return filtrar_periodo_principal(df, ano, "custom-range", mes, datas_comparacao)
-        else:
-            return pd.DataFrame() # Retorna DataFrame vazio se não houver datas válidas
+            return ano, "custom-range", mes, datas_comparacao
+        return None
+
+    return None
+
+
+def filtrar_periodo_comparacao(df, ano, periodo, mes, comparar_opcao, datas_comparacao=None):
+    """
+    Filtra o DataFrame para o período de comparação.
+    `datas_comparacao` é um tuple (start_date, end_date) para `comparar_opcao == 'custom-compare'`.
+    `periodo` e `mes` aqui referem-se ao período *principal* para calcular o comparativo corretamente.
+    """
+    if df is None or df.empty:
+        return pd.DataFrame()
 
-    return pd.DataFrame() # Fallback
+    argumentos = argumentos_periodo_comparacao(ano, periodo, mes, comparar_opcao, datas_comparacao)
+    if argumentos is None:
+        return pd.DataFrame() # Sem datas válidas / opção desconhecida
+    return filtrar_periodo_principal(df, *argumentos)
 
 
 # =================================================================================
@@ -521,6 +575,29 @@ def mes_nome(m):
     }
     return mapa.get(m, str(m))
 
+def rotulo_intervalo(dmin, dmax, periodo):
+    """
+    Rótulo de mes_nome_intervalo a partir da primeira e da última data
+    (ex.: vindas de um rollup, sem o frame filtrado em mãos).
+    """
+    if pd.isna(dmin) or pd.isna(dmax):
+        return "Sem dados"
+
+    min_y = dmin.year
+    max_y = dmax.year
+    min_m = dmin.month
+    max_m = dmax.month
+
+    # Converte ano para 2 dígitos => str(...)[2:]
+    min_y_2d = str(min_y)[2:]
+    max_y_2d = str(max_y)[2:]
+
+    # Se "Mês Aberto" ou se range é só um mês
+    if periodo == 'Mês Aberto' or (min_m == max_m and min_y == max_y):
+        return f"{mes_nome(min_m)}/{min_y_2d}"
+    else:
+        return f"{mes_nome(min_m)}/{min_y_2d} até {mes_nome(max_m)}/{max_y_2d}"
+
 def mes_nome_intervalo(df_filtrado, periodo):
     """
     Retorna uma string como "Janeiro/24 até Fevereiro/24",
@@ -535,23 +612,7 @@ def mes_nome_intervalo(df_filtrado, periodo):
     if "Data" in df_filtrado.columns:
         dmin = pd.to_datetime(df_filtrado["Data"], errors='coerce').min()
         dmax = pd.to_datetime(df_filtrado["Data"], errors='coerce').max()
-        if pd.isna(dmin) or pd.isna(dmax):
-            return "Sem dados"
-
-        min_y = dmin.year
-        max_y = dmax.year
-        min_m = dmin.month
-        max_m = dmax.month
-
-        # Converte ano para 2 dígitos => str(...)[2:]
-        min_y_2d = str(min_y)[2:]
-        max_y_2d = str(max_y)[2:]
-
-        # Se "Mês Aberto" ou se range é só um mês
-        if periodo == 'Mês Aberto' or (min_m == max_m and min_y == max_y):
-            return f"{mes_nome(min_m)}/{min_y_2d}"
-        else:
-            return f"{mes_nome(min_m)}/{min_y_2d} até {mes_nome(max_m)}/{max_y_2d}"
+        return rotulo_intervalo(dmin, dmax, periodo)
 
     # Caso 2: se tiver 'Ano' e 'Mês'
     if ("Ano" in df_filtrado.columns) and ("Mês" in df_filtrado.columns):
@@ -596,75 +657,110 @@ def carregar_kpi_descriptions(caminho_relativo='../data/kpi_descriptions.json'):
     return kpi_descriptions
 
 # =================================================================================
-# TOP5 GRUPOS
+# AGREGADOS SIMPLES DO DASHBOARD (uma passada para todos os períodos)
 # =================================================================================
-def obter_top5_grupos_ano_anterior(df, ano):
-    logger.debug("[obter_top5_grupos_ano_anterior] Iniciando para ano base: %s", ano)
-    if df is None or df.empty:
-        logger.debug("[obter_top5_grupos_ano_anterior] Erro: DataFrame de entrada está vazio ou None.")
-        return []
-    if "Grupo" not in df.columns:
-        logger.debug("[obter_top5_grupos_ano_anterior] Erro: Coluna 'Grupo' não encontrada no DataFrame.")
-        return []
-
-    prev_year = ano - 1
-    logger.debug("[obter_top5_grupos_ano_anterior] Filtrando para o ano anterior: %s", prev_year)
-    if "Ano" not in df.columns:
-        logger.debug("[obter_top5_grupos_ano_anterior] Erro: Coluna 'Ano' não encontrada para filtrar.")
-        return []
-
-    # Garantir que 'Ano' seja numérico antes de filtrar
-    df["Ano"] = pd.to_numeric(df["Ano"], errors='coerce')
-    df_prev = df[df["Ano"] == prev_year].copy()
+COLUNAS_FAT = [
+    "Comissão B2B", "Comissão B2C", "Antecipação de Cachês",
+    "Curadoria", "SaaS Percentual", "SaaS Mensalidade", "Notas Fiscais"
+]
+_CHAVES_DISTINTAS = {
+    "casas": "Id da Casa", "artistas": "Nome do Artista",
+    "shows": "Id do Show", "cidades": "Cidade",
+}
+_VALORES_SOMADOS = ["Valor Total do Show"] + COLUNAS_FAT
 
-    if df_prev.empty:
-        logger.debug("[obter_top5_grupos_ano_anterior] Nenhum dado encontrado para o ano %s.", prev_year)
-        return []
-    logger.debug(
-        "[obter_top5_grupos_ano_anterior] Dados encontrados para %s: %s linhas.",
-        prev_year,
-        len(df_prev),
-    )
 
-    colunas_fat = [
-        "Comissão B2B","Comissão B2C","Antecipação de Cachês",
-        "Curadoria","SaaS Percentual","SaaS Mensalidade","Notas Fiscais"
-    ]
-    valid_cols = [c for c in colunas_fat if c in df_prev.columns]
-    if not valid_cols:
-        logger.debug("[obter_top5_grupos_ano_anterior] Erro: Nenhuma coluna de faturamento válida encontrada.")
-        return []
-    logger.debug(
-        "[obter_top5_grupos_ano_anterior] Colunas de faturamento válidas: %s",
-        valid_cols,
-    )
+def _codigos_empilhados(series):
+    """Códigos inteiros (-1 = nulo) da coluna empilhada e o nº de códigos possíveis."""
+    cats = [s.cat.categories for s in series if isinstance(s.dtype, pd.CategoricalDtype)]
+    if len(cats) == len(series) and all(c.equals(cats[0]) for c in cats):
+        # recortes da mesma base tipada: os códigos da categoria já servem
+        return np.concatenate([s.cat.codes.to_numpy() for s in series]), len(cats[0])
+    if all(pd.api.types.is_integer_dtype(s.dtype) for s in series):
+        valores = np.concatenate([s.to_numpy() for s in series]).astype(np.int64)
+        menor, maior = valores.min(), valores.max()
+        if maior - menor < 8 * len(valores) + 1024:     # ids densos: o próprio valor
+            return valores - menor, int(maior - menor) + 1
+    codigos, uniques = pd.factorize(pd.concat(series, ignore_index=True))
+    return codigos, len(uniques)
 
-    for c in valid_cols:
-        df_prev[c] = pd.to_numeric(df_prev[c], errors='coerce').fillna(0)
-    df_prev["FatGrupo"] = df_prev[valid_cols].sum(axis=1)
 
-    logger.debug("[obter_top5_grupos_ano_anterior] Agrupando faturamento por Grupo...")
-    df_gp = df_prev.groupby("Grupo")["FatGrupo"].sum().reset_index()
-    df_gp.sort_values("FatGrupo", ascending=False, inplace=True)
+def agregados_simples(frames):
+    """
+    Métricas simples dos cards para cada frame de {rótulo: df}: distintos de
+    casa/artista/show/cidade e somas de GMV, faturamento e Comissão B2B.
+    As colunas usadas são empilhadas uma vez para todos os frames (ex.:
+    principal e comparativo), com o período como rótulo de grupo: somas num
+    único reduceat sobre o bloco numérico (acumulado em float64) e distintos
+    num mapa período × código por coluna.
+    Devolve {rótulo: {"casas", "artistas", "shows", "cidades", "gmv", "fat",
+    "b2b"}}; frame vazio vem zerado e coluna ausente vem None (fat soma só
+    as colunas presentes).
+    """
+    zerado = {**{k: 0 for k in _CHAVES_DISTINTAS}, "gmv": 0, "fat": 0.0, "b2b": 0.0}
+    out = {rotulo: dict(zerado) for rotulo in frames}
+    cheios = {r: df for r, df in frames.items() if df is not None and not df.empty}
+    if not cheios:
+        return out
+    rotulos = list(cheios)
+    tamanhos = np.array([len(cheios[r]) for r in rotulos])
+
+    # ― somas: bloco (linhas de todos os períodos × colunas de valor) --------------
+    posicao = {c: k for k, c in enumerate(_VALORES_SOMADOS)}
+    valores = np.zeros((int(tamanhos.sum()), len(_VALORES_SOMADOS)))
+    inicio = np.concatenate(([0], np.cumsum(tamanhos)[:-1]))
+    for r, ini, n in zip(rotulos, inicio, tamanhos):
+        df = cheios[r]
+        cols = [c for c in _VALORES_SOMADOS if c in df.columns]
+        if not cols:
+            continue
+        bloco = df[cols]
+        if not all(pd.api.types.is_numeric_dtype(t) for t in bloco.dtypes):
+            bloco = bloco.apply(pd.to_numeric, errors="coerce")
+        valores[ini:ini + n, [posicao[c] for c in cols]] = bloco.to_numpy(dtype=np.float64)
+    np.nan_to_num(valores, copy=False)
+    somas = np.add.reduceat(valores, inicio, axis=0)        # uma linha por período
+
+    # ― distintos: só os períodos que têm a coluna ---------------------------------
+    distintos = {}
+    for nome, col in _CHAVES_DISTINTAS.items():
+        idx = [i for i, r in enumerate(rotulos) if col in cheios[r].columns]
+        if not idx:
+            continue
+        codigos, n = _codigos_empilhados([cheios[rotulos[i]][col] for i in idx])
+        periodo = np.repeat(np.array(idx, dtype=np.intp), tamanhos[idx])
+        validos = codigos >= 0
+        mapa = np.zeros((len(rotulos), max(n, 1)), dtype=bool)
+        mapa[periodo[validos], codigos[validos]] = True
+        distintos[nome] = mapa.sum(axis=1)
+
+    for i, rotulo in enumerate(rotulos):
+        cols = cheios[rotulo].columns
+        m = out[rotulo]
+        for nome, col in _CHAVES_DISTINTAS.items():
+            m[nome] = int(distintos[nome][i]) if col in cols else None
+        soma = {c: float(somas[i, posicao[c]]) for c in _VALORES_SOMADOS if c in cols}
+        m["gmv"] = soma.get("Valor Total do Show")
+        m["fat"] = float(sum(soma[c] for c in COLUNAS_FAT if c in soma))
+        m["b2b"] = soma.get("Comissão B2B")
+    return out
 
-    logger.debug(
-        "[obter_top5_grupos_ano_anterior] Faturamento por grupo (Top 10): %s",
-        df_gp.head(10),
-    )
 
-    top5 = df_gp.head(5)
-    if top5.empty:
-        logger.debug("[obter_top5_grupos_ano_anterior] Top 5 grupos está vazio após agregação.")
+# =================================================================================
+# TOP5 GRUPOS
+# =================================================================================
+def obter_top5_grupos_ano_anterior(df, ano):
+    """
+    [(grupo, faturamento)] dos 5 grupos que mais faturaram em ano-1 – as
+    contas-chave do ano *ano*. Com a BaseEshows do registry o ranking vem do
+    índice KA (ka_index), montado uma vez por ano e versão da base.
+    """
+    if df is None or df.empty:
+        logger.debug("[obter_top5_grupos_ano_anterior] Erro: DataFrame de entrada está vazio ou None.")
         return []
-
-    ret = []
-    for _, row in top5.iterrows():
-        # Ensure group name is not None/NaN and revenue is positive
-        if pd.notna(row["Grupo"]) and row["FatGrupo"] > 0:
-             ret.append((row["Grupo"], row["FatGrupo"]))
-
-    logger.debug("[obter_top5_grupos_ano_anterior] Retornando top 5: %s", ret)
-    return ret
+    top5 = top_grupos(ano, df)
+    logger.debug("[obter_top5_grupos_ano_anterior] Top 5 de %s: %s", ano - 1, top5)
+    return top5
 
 def faturamento_dos_grupos(df_, list_grp):
     if not list_grp or df_ is None or df_.empty:
@@ -699,107 +795,6 @@ def novos_palcos_dos_grupos(df_new_period, df_principal, list_grp):
     df_map = df_map[df_map["Grupo"].isin(grp_names)]
     return df_map["Id da Casa"].nunique()
 
-def get_churn_ka_for_period(ano, periodo, mes, top5_list, start_date_main=None, end_date_main=None, dias_sem_show=45):
-    """
-    Calcula o churn de Key Accounts (contas-chave) para um determinado período.
-    Refatorado para calcular churn que *ocorre* no período (data_churn_tech cai no período).
-    
-    Args:
-        ano: Ano de referência
-        periodo: Período ('YTD', 'Mês Aberto', etc) - Para histórico, usar 'Mês Aberto'.
-        mes: Mês (se aplicável, obrigatório para 'Mês Aberto').
-        top5_list: Lista com top 5 contas-chave.
-        start_date_main, end_date_main: Datas para período personalizado (ignorado se periodo != 'custom-range').
-        dias_sem_show: Dias sem show para considerar churn.
-        
-    Returns:
-        Número de casas KA cujo churn técnico ocorreu no período.
-    """
-    # Verificação de parâmetros
-    if not top5_list:
-        logger.debug("[get_churn_ka_for_period] Lista de Key Accounts está vazia")
-        return 0
-    grupos_ka = [g[0] for g in top5_list]
-    
-    # Carregar dados da base, aplicando filtros iniciais para economizar memória
-    logger.debug("[get_churn_ka_for_period] Carregando dados e aplicando filtros iniciais...")
-    df = carregar_base_eshows()
-    if df is None or df.empty:
-        logger.debug("[get_churn_ka_for_period] Base de dados vazia ou None")
-        return 0
-    required_cols = ["Data do Show", "Id da Casa", "Grupo"]
-    if not all(col in df.columns for col in required_cols):
-        missing = [col for col in required_cols if col not in df.columns]
-        logger.debug("[get_churn_ka_for_period] Colunas faltando: %s", missing)
-        return 0
-    df_reduced = df[required_cols].copy()
-    df = None; gc.collect()
-    df_reduced["Data do Show"] = pd.to_datetime(df_reduced["Data do Show"], errors='coerce')
-    df_ka = df_reduced[df_reduced["Grupo"].isin(grupos_ka)].copy()
-    del df_reduced; gc.collect()
-    if df_ka.empty:
-        logger.debug("[get_churn_ka_for_period] Nenhum show encontrado para os grupos KA.")
-        return 0
-
-    # Definir intervalo de datas EXATO para o período/mês solicitado
-    # Usamos as funções auxiliares get_period_start/end
-    periodo_start = get_period_start(ano, periodo, mes, (start_date_main, end_date_main))
-    periodo_end = get_period_end(ano, periodo, mes, (start_date_main, end_date_main))
-
-    if periodo_start is None or periodo_end is None:
-        logger.debug("[get_churn_ka_for_period] Não foi possível determinar o período de análise.")
-        return 0
-
-    # 1. Calcular LastShow GLOBALMENTE para todos os palcos KA
-    df_last_show = df_ka.groupby("Id da Casa")["Data do Show"].max().reset_index(name="LastShow")
-
-    # 2. Calcular data_churn_tech
-    df_last_show["data_churn_tech"] = df_last_show["LastShow"] + timedelta(days=dias_sem_show)
-
-    # 3. Filtrar palcos cuja data_churn_tech cai DENTRO do período/mês alvo
-    churn_candidates_month = df_last_show[
-        (df_last_show["data_churn_tech"] >= periodo_start) &
-        (df_last_show["data_churn_tech"] <= periodo_end)
-    ].copy()
-
-    if churn_candidates_month.empty:
-        return 0
-
-    # 4. Verificar se esses candidatos realmente não retornaram APÓS LastShow
-    #    (Esta verificação pode ser redundante se LastShow é global, mas garante)
-    casas_cand = churn_candidates_month["Id da Casa"].unique()
-    df_shows_cand = df_ka[df_ka["Id da Casa"].isin(casas_cand)] # Shows *globais* desses candidatos
-
-    # Merge para comparar Data do Show com LastShow calculado
-    df_check = pd.merge(
-        churn_candidates_month[["Id da Casa", "LastShow"]],
-        df_shows_cand[["Id da Casa", "Data do Show"]],
-        on="Id da Casa",
-        how="left"
-    )
-
-    # Verifica se existe algum show DEPOIS do LastShow calculado
-    df_check["Retornou"] = df_check["Data do Show"] > df_check["LastShow"]
-    df_status = df_check.groupby("Id da Casa")["Retornou"].any().reset_index()
-
-    # Casas que SÃO candidatas ao churn no mês E que NÃO retornaram
-    casas_nao_retornaram = df_status[~df_status["Retornou"]]["Id da Casa"].unique()
-
-    # Contagem final: candidatos do mês que não retornaram
-    churn_count_final = churn_candidates_month[churn_candidates_month["Id da Casa"].isin(casas_nao_retornaram)]["Id da Casa"].nunique()
-
-    logger.debug(
-        "[get_churn_ka_for_period] Período: %s a %s, Churns ocorridos: %s",
-        periodo_start.date(),
-        periodo_end.date(),
-        churn_count_final,
-    )
-
-    del df_ka, df_last_show, churn_candidates_month, df_shows_cand, df_check, df_status
-    gc.collect()
-
-    return churn_count_final
-
 
 def formatar_valor_utils(valor, tipo='numero'):
     """
@@ -1041,56 +1036,23 @@ def calcular_churn(ano, periodo, mes, start_date=None, end_date=None, uf=None, d
     start_periodo = get_period_start(ano, periodo, mes, date_range)
     end_periodo = get_period_end(ano, periodo, mes, date_range)
 
-    if df_eshows is None or df_eshows.empty:
-        return 0
-
-    df_relevante = df_eshows
-    if uf and uf != "BR":
-        df_relevante = df_relevante[df_relevante["Estado"] == uf]
-    if df_relevante.empty:
-        return 0
-
-    df_last = (
-        df_relevante
-        .groupby("Id da Casa")["Data do Show"]
-        .max()
-        .reset_index(name="LastShow")
-    )
-
-    df_last["data_churn"] = df_last["LastShow"] + timedelta(days=dias_sem_show)
-
-    df_churn_cand = df_last[df_last["data_churn"] <= end_periodo].copy()
-    if df_churn_cand.empty:
-        return 0
-
-    casas_cand = df_churn_cand["Id da Casa"].unique()
-    df_shows_cand = df_relevante[df_relevante["Id da Casa"].isin(casas_cand)]
-    df_churn_cand = pd.merge(
-        df_churn_cand,
-        df_shows_cand[["Id da Casa", "Data do Show"]],
-        on="Id da Casa", how="left"
-    )
-
-    df_churn_cand["Retornou"] = df_churn_cand["Data do Show"] > df_churn_cand["LastShow"]
-    df_status = df_churn_cand.groupby("Id da Casa")["Retornou"].any().reset_index()
-    casas_nao_retornaram = df_status[~df_status["Retornou"]]["Id da Casa"].unique()
-
-    df_churn_final = df_last[df_last["Id da Casa"].isin(casas_nao_retornaram)].copy()
-    df_churn_final = df_churn_final[
-        (df_churn_final["data_churn"] >= start_periodo) &
-        (df_churn_final["data_churn"] <= end_periodo)
-    ]
-
-    churn_count = df_churn_final["Id da Casa"].nunique()
-    return churn_count
+    # LastShow é global por casa (na UF, se houver filtro): quem tem churn
+    # técnico no período nunca "retornou" – basta o índice de ciclo de vida
+    return len(casas_churn(start_periodo, end_periodo, dias_sem_show, uf=uf))
 
 def floatify_hist_data(data):
     """
     Converte recursivamente dados para serem serializáveis em JSON:
     - Chaves Timestamp para string ISO format.
     - Valores numpy (float64, int64, etc.) para float/int nativo.
+    - raw_data numérico dos históricos ({"mes", "valor", "formato"}) para
+      {"AAAA-MM": valor}, legível no JSON que vai para o LLM.
+    - Arrays numpy para listas.
     - Trata dicionários e listas.
     """
+    if isinstance(data, dict) and isinstance(data.get("mes"), np.ndarray):
+        meses = ["%04d-%02d" % (m // 12, m % 12 + 1) for m in data["mes"].tolist()]
+        return dict(zip(meses, floatify_hist_data(np.asarray(data["valor"], dtype=float))))
     if isinstance(data, dict):
         new_dict = {}
         for k, v in data.items():
@@ -1104,6 +1066,11 @@ def floatify_hist_data(data):
         return new_dict
     elif isinstance(data, list):
         return [floatify_hist_data(item) for item in data]
+    elif isinstance(data, np.ndarray):
+        # NaN vira null no JSON e 6 algarismos significativos bastam
+        if data.dtype.kind == "f":
+            return [None if np.isnan(x) else float(f"{x:.6g}") for x in data.tolist()]
+        return data.tolist()
     elif isinstance(data, (np.floating, np.integer)):
         # Converte valores numpy para float ou int nativo
         return float(data) if isinstance(data, np.floating) else int(data)
@@ -1139,48 +1106,11 @@ def calcular_churn_novos_palcos(
     start_periodo = get_period_start(ano, periodo, mes, (start_date, end_date))
     end_periodo   = get_period_end(ano, periodo, mes, (start_date, end_date))
 
-    df_relevante = df_eshows.copy()
-    if uf and uf != "BR":
-        df_relevante = df_relevante[df_relevante["Estado"] == uf]
-    if df_relevante.empty:
-        return 0
-
-    df_relevante = df_relevante[df_relevante["Id da Casa"].isin(df_new_period["Id da Casa"])]
-    if df_relevante.empty:
-        return 0
-
-    df_last = (
-        df_relevante
-        .groupby("Id da Casa")["Data do Show"]
-        .max()
-        .reset_index(name="LastShow")
-    )
-    df_last["data_churn_tech"] = df_last["LastShow"] + timedelta(days=dias_sem_show)
-    churn_candidates = df_last[df_last["data_churn_tech"] <= end_periodo].copy()
-    if churn_candidates.empty:
-        return 0
-
-    casas_cand = churn_candidates["Id da Casa"].unique()
-    df_shows_cand = df_relevante[df_relevante["Id da Casa"].isin(casas_cand)]
-    df_merged = pd.merge(
-        churn_candidates[["Id da Casa", "LastShow"]],
-        df_shows_cand[["Id da Casa", "Data do Show"]],
-        on="Id da Casa", how="left"
-    )
-    df_merged["Retornou"] = df_merged["Data do Show"] > df_merged["LastShow"]
-    df_status = df_merged.groupby("Id da Casa")["Retornou"].any().reset_index()
-    casas_nao_retornaram = df_status[~df_status["Retornou"]]["Id da Casa"].unique()
-
-    # Filtra os candidatos iniciais que não retornaram
-    churn_final_candidates = churn_candidates[churn_candidates["Id da Casa"].isin(casas_nao_retornaram)].copy()
-
-    # CORREÇÃO: Filtra pelo período em que a DATA DE CHURN TÉCNICA ocorre, não a LastShow
-    churn_final = churn_final_candidates[
-        (churn_final_candidates["data_churn_tech"] >= start_periodo) &
-        (churn_final_candidates["data_churn_tech"] <= end_periodo)
-    ]
-
-    return churn_final["Id da Casa"].nunique()
+    # data de churn técnico = LastShow global da casa + dias_sem_show, restrita
+    # aos novos palcos (ver casa_lifecycle)
+    return len(casas_churn(start_periodo, end_periodo, dias_sem_show,
+                           df_eshows=df_eshows, uf=uf,
+                           casas=df_new_period["Id da Casa"]))
 
 # =================================================================================
 # FUNÇÕES PARA FILTRAR APENAS OS PALCOS QUE SÃO NOVOS
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Apoio aos test_*_equivalencia.py: roda o mesmo cálculo na árvore atual e
+numa revisão anterior do git, sobre as mesmas bases sintéticas, e compara.
+
+A revisão é extraída com git archive num diretório temporário e cada árvore
+roda num subprocesso próprio (imports limpos): o script é reexecutado com
+--calcular <árvore> <saída.pkl> e devolve o resultado em pickle. Nada toca
+o Supabase nem o cache em disco: as bases vão direto para o registry.
+
+Uso (a partir da raiz do repositório, com o histórico git disponível):
+    python scripts/test_churn_equivalencia.py [revisão]
+"""
+
+import io
+import math
+import os
+import pickle
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# sem memo/shared_cache/scheduler: cada chamada calcula de verdade
+AMBIENTE = {"KPI_CACHE_SIZE": "0", "SHARED_CACHE": "0", "REFRESH_SCHEDULER": "0"}
+
+
+# ─────────────────────────────  bases  ──────────────────────────────
+def carregar_bases_sinteticas(seed=7):
+    """
+    Publica no registry BaseEshows (com casas de vida curta e grupos),
+    inadimplência, base2, pessoas e ocorrências sintéticas – as mesmas em
+    qualquer árvore, para o mesmo *seed*.
+    """
+    import numpy as np
+    import pandas as pd
+
+    from app.data import registry
+    from app.data.modulobase import sanitize_eshows_df
+    from app.scripts.bench_sanitize_eshows import base_eshows_sintetica
+
+    rng = np.random.default_rng(seed)
+    bruto = base_eshows_sintetica(60000)
+    # parte das linhas vira uma casa por (casa, trimestre): churn e novos palcos
+    datas = pd.to_datetime(bruto["Data do Show"], errors="coerce")
+    curta = rng.random(len(bruto)) < 0.35
+    tri = (datas.dt.year.fillna(0) * 4 + datas.dt.quarter.fillna(0)).astype(int)
+    bruto.loc[curta, "Id da Casa"] = 100000 + bruto.loc[curta, "Id da Casa"] * 100 + tri[curta] % 100
+    bruto["Grupo"] = np.where(rng.random(len(bruto)) < 0.5,
+                              rng.choice([f"G{i}" for i in range(8)], len(bruto)), None)
+    eshows, _ = sanitize_eshows_df(bruto)
+    registry.put("eshows", eshows, tables=("baseeshows",))
+
+    n = 3000
+    casas = pd.DataFrame({
+        "ID_Boleto": np.r_[np.arange(n - 5), [1, 2, 3, np.nan, np.nan]],
+        "AnoVenc": rng.choice([2023, 2024, 2025], n).astype(str),
+        "MesVenc": rng.integers(1, 13, n),
+        "DiaVenc": rng.integers(0, 29, n),
+        "Status": rng.choice(["Vencido", "DUNNING_REQUESTED", "Pago"], n),
+        "Valor Real": np.where(rng.random(n) < 0.05, None, rng.uniform(100, 5000, n)),
+    })
+    m = 6000
+    artistas = pd.DataFrame({
+        "ID_Boleto": np.where(rng.random(m) < 0.02, np.nan, rng.integers(0, n, m)).astype(float),
+        "Adiantamento": rng.choice(["Sim", "não", None], m),
+        "Valor Bruto": np.where(rng.random(m) < 0.05, "x", rng.uniform(50, 4000, m).astype(str)),
+    })
+    registry.put("inadimplencia", (casas, artistas), tables=("boletocasas", "boletoartistas"))
+
+    anos = np.repeat(np.arange(2019, 2027), 12)
+    registry.put("base2", pd.DataFrame({
+        "Ano": anos, "Mês": np.tile(np.arange(1, 13), 8),
+        "Equipe": rng.uniform(1e4, 9e4, len(anos)),
+    }), tables=("base2",))
+    registry.put("pessoas", pessoas_sinteticas(300, rng), tables=("pessoas",))
+    registry.put("ocorrencias", ocorrencias_sinteticas(4000, rng), tables=("ocorrencias",))
+
+
+def pessoas_sinteticas(n, rng, invertidas=False, horas=False, alias=True):
+    """Base de pessoas: saídas nulas, no próprio início e (opcional) antes dele."""
+    import pandas as pd
+
+    ini = pd.Timestamp("2019-01-01") + pd.to_timedelta(rng.integers(0, 2400, n), "D")
+    if horas:
+        ini = ini + pd.to_timedelta(rng.integers(0, 86400, n), "s")
+    dur = pd.to_timedelta(rng.integers(-400 if invertidas else 0, 1500, n), "D")
+    fim = pd.Series(ini + dur)
+    fim[rng.random(n) < 0.4] = pd.NaT
+    fim[rng.random(n) < 0.05] = pd.Series(ini)
+    df = pd.DataFrame({"DataInicio": ini, "DataFinal": fim})
+    df.loc[rng.random(n) < 0.05, "DataInicio"] = pd.NaT
+    if alias:
+        df["DataSaida"] = df["DataFinal"]
+        df.loc[rng.random(n) < 0.1, "DataSaida"] = pd.NaT
+    return df
+
+
+def ocorrencias_sinteticas(n, rng, ids_unicos=False, tipo=True, id_col=True,
+                           horas=False, sujo=False):
+    """Base de ocorrências: IDs repetidos ou únicos, horários e nulos opcionais."""
+    import numpy as np
+    import pandas as pd
+
+    datas = pd.Timestamp("2021-01-01") + pd.to_timedelta(rng.integers(0, 1800, n), "D")
+    if horas:
+        datas = datas + pd.to_timedelta(rng.integers(0, 86400, n), "s")
+    df = pd.DataFrame({"DATA": datas})
+    if tipo:
+        df["TIPO"] = rng.choice(["Leve", "Palco vazio", "Grave", "Média"], n)
+    if id_col:
+        df["ID_OCORRENCIA"] = np.arange(n) if ids_unicos else rng.integers(0, n // 2, n)
+    if sujo:
+        df.loc[df.sample(frac=0.05, random_state=1).index, "DATA"] = pd.NaT
+        if tipo:
+            df.loc[df.sample(frac=0.05, random_state=2).index, "TIPO"] = None
+        if id_col:
+            df["ID_OCORRENCIA"] = df["ID_OCORRENCIA"].astype(float)
+            df.loc[df.sample(frac=0.05, random_state=3).index, "ID_OCORRENCIA"] = np.nan
+    return df
+
+
+# ───────────────────────────  comparação  ───────────────────────────
+def iguais(a, b, rel_tol=1e-6):
+    """Igualdade recursiva (dict, lista, array, Series); floats com *rel_tol*."""
+    import numpy as np
+    import pandas as pd
+
+    if isinstance(a, pd.DataFrame) and isinstance(b, pd.DataFrame):
+        try:
+            pd.testing.assert_frame_equal(a, b, check_dtype=False, check_index_type=False,
+                                          check_categorical=False, rtol=rel_tol)
+            return True
+        except AssertionError:
+            return False
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(iguais(a[k], b[k], rel_tol) for k in a)
+    if isinstance(a, (np.ndarray, pd.Series, pd.Index, list, tuple)) \
+            and isinstance(b, (np.ndarray, pd.Series, pd.Index, list, tuple)):
+        return len(a) == len(b) and all(iguais(x, y, rel_tol) for x, y in zip(list(a), list(b)))
+    if isinstance(a, (float, np.floating)) and isinstance(b, (float, np.floating)):
+        return (math.isnan(a) and math.isnan(b)) or math.isclose(a, b, rel_tol=rel_tol, abs_tol=1e-9)
+    return a == b
+
+
+def tentar(fn, *args, **kwargs):
+    """Resultado de *fn* ou o tipo da exceção (erro igual nas duas árvores conta como igual)."""
+    try:
+        return fn(*args, **kwargs)
+    except Exception as e:
+        return f"ERRO {type(e).__name__}"
+
+
+# ────────────────────────────  execução  ────────────────────────────
+def _extrair(ref, destino):
+    bruto = subprocess.run(["git", "archive", ref, "app"], cwd=RAIZ,
+                           stdout=subprocess.PIPE, check=True).stdout
+    with tarfile.open(fileobj=io.BytesIO(bruto)) as tar:
+        tar.extractall(destino)
+
+
+def _rodar(script, arvore):
+    with tempfile.TemporaryDirectory() as tmp:
+        saida = os.path.join(tmp, "resultado.pkl")
+        caminho = os.pathsep.join(p for p in (arvore, os.environ.get("PYTHONPATH")) if p)
+        env = {**os.environ, **AMBIENTE, "PYTHONPATH": caminho}
+        # cwd vazio: nenhum .env nem cache em disco entra na conta
+        subprocess.run([sys.executable, os.path.abspath(script), "--calcular", arvore, saida],
+                       cwd=tmp, env=env, check=True)
+        with open(saida, "rb") as f:
+            return pickle.load(f)
+
+
+def executar(script, ref, calcular):
+    """
+    Ponto de entrada dos test_*_equivalencia.py. Com --calcular roda
+    *calcular(arvore)* – {caso: resultado} – e grava o pickle; sem ele,
+    compara a revisão *ref* (ou a passada na linha de comando) com a
+    árvore atual e sai com 1 se algum caso diverge.
+    """
+    if len(sys.argv) == 4 and sys.argv[1] == "--calcular":
+        import logging
+        import warnings
+
+        warnings.simplefilter("ignore")
+        logging.disable(logging.CRITICAL)
+        resultado = calcular(sys.argv[2])
+        with open(sys.argv[3], "wb") as f:
+            pickle.dump(resultado, f)
+        return
+
+    ref = sys.argv[1] if len(sys.argv) > 1 else ref
+    print(f"[INFO] Referência: {ref}")
+    with tempfile.TemporaryDirectory() as tmp:
+        _extrair(ref, tmp)
+        antes = _rodar(script, tmp)
+    depois = _rodar(script, RAIZ)
+
+    difs = [k for k in antes if k not in depois or not iguais(antes[k], depois[k])]
+    difs += [k for k in depois if k not in antes]
+    for k in difs[:20]:
+        print(f"[ERRO] {k}:\n  antes : {antes.get(k)!r:.300}\n  depois: {depois.get(k)!r:.300}")
+    print(f"[{'ERRO' if difs else 'OK'}] {len(antes) - len(difs)}/{len(antes)} casos iguais")
+    sys.exit(1 if difs else 0)
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Confere o churn das casas (índice casa_lifecycle) contra a implementação
+anterior, com groupby + merge por chamada: calcular_churn,
+calcular_churn_novos_palcos e EarliestShow/LastShow por casa em 144
+combinações de ano × período × mês × UF × dias_sem_show.
+
+    python scripts/test_churn_equivalencia.py [revisão]   (padrão: 31485ba)
+"""
+
+import itertools
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from equivalencia import carregar_bases_sinteticas, executar, tentar
+
+REFERENCIA = "31485ba"      # antes do índice de ciclo de vida das casas
+
+
+def calcular(arvore):
+    carregar_bases_sinteticas()
+    from app.data.modulobase import carregar_base_eshows, carregar_casas_earliest_latest
+    from app.utils import utils as U
+
+    df = carregar_base_eshows()
+    earliest, latest = carregar_casas_earliest_latest()
+    out = {"earliest": earliest, "latest": latest}
+    for ano, periodo, mes, uf, dias in itertools.product(
+            [2023, 2024, 2025], ["Mês Aberto", "YTD", "2° Trimestre", "Ano Completo"],
+            [1, 5, 11], [None, "SP"], [30, 45]):
+        caso = (ano, periodo, mes, uf, dias)
+        out[("churn",) + caso] = tentar(U.calcular_churn, ano, periodo, mes,
+                                        uf=uf, dias_sem_show=dias)
+        novos = U.filtrar_novos_palcos_por_periodo(earliest, ano, periodo, mes, None)
+        out[("churn_novos_palcos",) + caso] = tentar(
+            U.calcular_churn_novos_palcos, ano, periodo, mes, None, None,
+            earliest, df, novos, dias, uf)
+    return out
+
+
+if __name__ == "__main__":
+    executar(__file__, REFERENCIA, calcular)
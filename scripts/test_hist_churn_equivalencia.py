@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Confere os históricos vetorizados na grade de meses – inadimplência real,
+churn, churn de novos palcos e churn KA – contra a implementação anterior,
+que refiltrava as bases mês a mês (janelas de 12 e 40 meses, dois
+dias_sem_show).
+
+    python scripts/test_hist_churn_equivalencia.py [revisão]   (padrão: 8c3458d)
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from equivalencia import carregar_bases_sinteticas, executar, tentar
+
+REFERENCIA = "8c3458d"      # antes da vetorização dos históricos de churn
+
+HISTORICOS = ("historical_inadimplencia_real", "historical_churn",
+              "historical_churn_novos_palcos", "historical_churn_ka")
+
+
+def calcular(arvore):
+    carregar_bases_sinteticas()
+    import app.utils.hist as H
+
+    out = {}
+    for nome in HISTORICOS:
+        for months in (12, 40):
+            for kwargs in ({}, {"dias_sem_show": 30}) if "churn" in nome else ({},):
+                caso = (nome, months) + tuple(kwargs.items())
+                out[caso] = tentar(getattr(H, nome), months=months, **kwargs)
+    return out
+
+
+if __name__ == "__main__":
+    executar(__file__, REFERENCIA, calcular)
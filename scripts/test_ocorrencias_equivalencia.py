@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Confere o rollup diário de ocorrências contra a implementação anterior,
+que refiltrava a base a cada chamada: historical_palcos_vazios,
+historical_ocorrencias, get_palcos_vazios_variables e
+get_nivel_servico_variables, em bases com IDs repetidos ou únicos, sem ID,
+sem TIPO, com horário e com nulos, para períodos, custom ranges e
+comparações variados.
+
+    python scripts/test_ocorrencias_equivalencia.py [revisão]   (padrão: f514fdc)
+"""
+
+import itertools
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from equivalencia import carregar_bases_sinteticas, executar, ocorrencias_sinteticas, tentar
+
+REFERENCIA = "f514fdc"      # antes do rollup de ocorrências
+
+CASOS = {
+    "ids_repetidos": {},
+    "ids_unicos": {"ids_unicos": True},
+    "sem_id": {"id_col": False},
+    "sem_tipo": {"tipo": False},
+    "com_horario": {"horas": True},
+    "sujo": {"sujo": True},
+    "horario_ids_unicos": {"ids_unicos": True, "horas": True},
+}
+
+
+def calcular(arvore):
+    import numpy as np
+
+    carregar_bases_sinteticas()
+    from app.data import registry
+    import app.utils.hist as H
+    import app.kpis.variacoes as V
+
+    rng = np.random.default_rng(7)
+    out = {}
+    for nome, opcoes in CASOS.items():
+        df = ocorrencias_sinteticas(4000, rng, **opcoes)
+        registry.invalidate_tables(["ocorrencias"])
+        registry.put("ocorrencias", df, tables=("ocorrencias",))
+        for fn in ("historical_palcos_vazios", "historical_ocorrencias"):
+            for months in (3, 12, 24):
+                out[(nome, fn, months)] = tentar(getattr(H, fn), months)
+        for ano, periodo, mes, cr, comp, cc, glob in itertools.product(
+                [2022, 2024, 2026], ["Mês Aberto", "YTD", "2° Trimestre", "Ano Completo", "custom-range"],
+                [3, 8], [None, ("2024-02-01", "2024-05-20"), ("2023-03-10", "2023-03-10")],
+                [None, "ano_anterior", "periodo_anterior", "custom-compare"],
+                [(None, None), ("2022-01-05", "2022-04-30")], [True, False]):
+            g = df if glob else None
+            ini, fim = cr or (None, None)
+            caso = (nome, ano, periodo, mes, cr, comp, cc, glob)
+            out[("palcos_vazios",) + caso] = tentar(
+                V.get_palcos_vazios_variables, ano, periodo, mes, cr,
+                df_ocorrencias_global=g, comparar_opcao=comp,
+                start_date_compare=cc[0], end_date_compare=cc[1],
+                start_date_main=ini, end_date_main=fim)
+            if comp is None and cc[0] is None:
+                out[("nivel_servico",) + caso] = tentar(
+                    V.get_nivel_servico_variables, ano, periodo, mes, cr,
+                    df_ocorrencias_global=g)
+    return out
+
+
+if __name__ == "__main__":
+    executar(__file__, REFERENCIA, calcular)
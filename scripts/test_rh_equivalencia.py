@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Confere os intervalos de RH (headcount e tempo médio por ordenação +
+searchsorted) contra a implementação anterior, que refiltrava pessoas mês
+a mês: históricos de colaboradores, tempo médio de casa e receita por
+colaborador, metricas_rh_quick (main.py) e get_rpc_variables, em bases com
+saídas nulas, invertidas, com horário e sem a coluna DataSaida.
+
+    python scripts/test_rh_equivalencia.py [revisão]   (padrão: 37cdf44)
+"""
+
+import ast
+import itertools
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from equivalencia import carregar_bases_sinteticas, executar, pessoas_sinteticas, tentar
+
+REFERENCIA = "37cdf44"      # antes do índice de intervalos de RH
+
+CASOS = {
+    "base": (300, {}),
+    "saidas_invertidas": (300, {"invertidas": True}),
+    "com_horario": (200, {"horas": True}),
+    "sem_datasaida": (200, {"alias": False}),
+    "pequeno": (3, {}),
+}
+
+
+def _metricas_rh_quick(arvore):
+    """
+    metricas_rh_quick da árvore, sem importar main.py (que sobe o app): o
+    bloco de imports da seção + os loaders de modulobase do topo do arquivo.
+    """
+    import app.data.modulobase as modulobase
+
+    with open(os.path.join(arvore, "app", "core", "main.py"), encoding="utf-8") as f:
+        fonte = f.read()
+    fn = next(n for n in ast.parse(fonte).body
+              if isinstance(n, ast.FunctionDef) and n.name == "metricas_rh_quick")
+    fim = fonte.index("def metricas_rh_quick")
+    cabecalho = fonte[fonte.rindex("from datetime import datetime\n", 0, fim):fim]
+    ns = {k: v for k, v in vars(modulobase).items() if k.startswith("carregar_")}
+    ns["__name__"] = "metricas_rh"
+    exec(cabecalho + "\n" + ast.get_source_segment(fonte, fn), ns)
+    return ns["metricas_rh_quick"]
+
+
+def calcular(arvore):
+    import numpy as np
+
+    carregar_bases_sinteticas()
+    from app.data import registry
+    import app.utils.hist as H
+    import app.kpis.variacoes as V
+
+    metricas_rh_quick = _metricas_rh_quick(arvore)
+    base2 = registry.peek("base2").copy()
+    rng = np.random.default_rng(3)
+    out = {}
+    for nome, (n, opcoes) in CASOS.items():
+        df = pessoas_sinteticas(n, rng, **opcoes)
+
+        def republicar():
+            # a versão antiga alterava no lugar os frames de pessoas e base2
+            # do registry; cada chamada parte das bases originais
+            registry.invalidate_tables(["pessoas", "base2"])
+            registry.put("pessoas", df.copy(), tables=("pessoas",))
+            registry.put("base2", base2.copy(), tables=("base2",))
+
+        republicar()
+        for fn in ("historical_num_colaboradores", "historical_tempo_medio_casa",
+                   "historical_receita_por_colaborador"):
+            for months in (1, 3, 12, 40):
+                out[(nome, fn, months)] = tentar(getattr(H, fn), months)
+        for ano, periodo, mes, comp, glob in itertools.product(
+                [2022, 2024, 2026], ["Mês Aberto", "YTD", "2° Trimestre", "Ano Completo"],
+                [3, 8], [None, "ano_anterior", "periodo_anterior"], [True, False]):
+            caso = (nome, ano, periodo, mes, comp, glob)
+            r = tentar(metricas_rh_quick, ano, periodo, mes, comparar_opcao=comp,
+                       df_pessoas_global=df if glob else None)
+            if nome == "sem_datasaida" and isinstance(r, tuple):
+                # a versão antiga repassava ao RPC uma cópia com DataSaida nula;
+                # a base real sempre tem a coluna
+                for d in r:
+                    if d:
+                        d.pop("receita_por_colaborador", None)
+                        d.pop("rpc_fmt", None)
+            out[("metricas_rh_quick",) + caso] = r
+            republicar()
+            for pg in ([df, None] if glob else [None]):
+                out[("rpc", pg is None) + caso] = tentar(
+                    V.get_rpc_variables, ano, periodo, mes, df_pessoas_global=pg)
+    return out
+
+
+if __name__ == "__main__":
+    executar(__file__, REFERENCIA, calcular)